@@ -0,0 +1 @@
+# analytics package initialization
\ No newline at end of file
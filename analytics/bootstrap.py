@@ -0,0 +1,148 @@
+# analytics/bootstrap.py
+# シフト差・チーム差のブートストラップ信頼区間（インデックス行列による一括リサンプリング）
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from utils.versioned_cache import versioned_cache
+
+# 1チャンクあたりのリサンプル要素数の上限（メモリ使用量の目安）
+MAX_CHUNK_ELEMENTS = 20_000_000
+
+
+def bootstrap_group_means(values, codes, n_groups, n_resamples=10000, seed=42):
+    """
+    全グループの平均値をまとめてブートストラップ
+
+    全グループ分のリサンプル位置を1つの (リサンプル数, 行数) インデックス行列として
+    生成し、グループ境界ごとの和を reduceat で集計する。
+
+    Args:
+        values: 値の配列（欠損は事前に除外しておく）
+        codes: 各値のグループ番号（0..n_groups-1）
+        n_groups: グループ数
+        n_resamples: リサンプル回数
+        seed: 乱数シード
+
+    Returns:
+        ndarray: (リサンプル数, グループ数) のブートストラップ平均
+    """
+    order = np.argsort(codes, kind='stable')
+    values = np.asarray(values, dtype=np.float64)[order]
+    codes = np.asarray(codes)[order]
+
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    present = sizes > 0
+
+    # 各列が属するグループの先頭位置と件数
+    row_start = starts[codes]
+    row_size = sizes[codes]
+
+    rng = np.random.default_rng(seed)
+    means = np.full((n_resamples, n_groups), np.nan)
+    chunk = max(1, MAX_CHUNK_ELEMENTS // max(len(values), 1))
+
+    for begin in range(0, n_resamples, chunk):
+        end = min(begin + chunk, n_resamples)
+        # グループ内の位置を一様乱数から一括生成
+        index = row_start + (rng.random((end - begin, len(values))) * row_size).astype(np.int64)
+        sums = np.add.reduceat(values[index], starts[present], axis=1)
+        means[begin:end, present] = sums / sizes[present]
+
+    return means
+
+
+def _percentile_ci(samples, ci):
+    """パーセンタイル法の信頼区間（リサンプル軸=0）"""
+    alpha = (1 - ci) / 2
+    lower, upper = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+    return lower, upper
+
+
+def bootstrap_group_differences(df, value_col, group_cols, n_resamples=10000, ci=0.95, seed=42, pairwise=True):
+    """
+    グループ平均とグループ間差のブートストラップ信頼区間（キャッシュなし）
+
+    Args:
+        df: 対象データ
+        value_col: 値の列（例: 品質不良率 (%)）
+        group_cols: グループの列（例: ['シフト'] や ['チーム']）
+        pairwise: グループ間の全ペア差を計算するか
+
+    Returns:
+        tuple: (グループ平均表, ペア差表)
+            グループ平均表: グループ列 + 平均, 下限, 上限, データ数
+            ペア差表: 比較, 差, 下限, 上限, 有意（信頼区間が0を含まない）
+    """
+    group_cols = list(group_cols)
+    df_valid = df.dropna(subset=[value_col])
+
+    grouped = df_valid.groupby(group_cols, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    group_keys = [key if isinstance(key, tuple) else (key,) for key in grouped.size().index]
+    n_groups = len(group_keys)
+
+    mean_columns = group_cols + ['平均', '下限', '上限', 'データ数']
+    diff_columns = ['比較', '差', '下限', '上限', '有意']
+    if n_groups == 0:
+        return pd.DataFrame(columns=mean_columns), pd.DataFrame(columns=diff_columns)
+
+    values = df_valid[value_col].to_numpy(dtype=np.float64)
+    boot = bootstrap_group_means(values, codes, n_groups, n_resamples=n_resamples, seed=seed)
+
+    point = np.bincount(codes, weights=values, minlength=n_groups) / np.bincount(codes, minlength=n_groups)
+    lower, upper = _percentile_ci(boot, ci)
+
+    df_means = pd.DataFrame({col: [key[i] for key in group_keys] for i, col in enumerate(group_cols)})
+    df_means['平均'] = point
+    df_means['下限'] = lower
+    df_means['上限'] = upper
+    df_means['データ数'] = np.bincount(codes, minlength=n_groups)
+
+    # 全ペアの差（前 - 後）を一括計算
+    pairs = list(combinations(range(n_groups), 2)) if pairwise else []
+    if pairs:
+        first, second = np.array(pairs).T
+        diff_boot = boot[:, first] - boot[:, second]
+        diff_lower, diff_upper = _percentile_ci(diff_boot, ci)
+        labels = [
+            f"{' '.join(map(str, group_keys[i]))} - {' '.join(map(str, group_keys[j]))}"
+            for i, j in pairs
+        ]
+        df_diffs = pd.DataFrame({
+            '比較': labels,
+            '差': point[first] - point[second],
+            '下限': diff_lower,
+            '上限': diff_upper,
+            '有意': (diff_lower > 0) | (diff_upper < 0)
+        })
+    else:
+        df_diffs = pd.DataFrame(columns=diff_columns)
+
+    return df_means, df_diffs
+
+
+def get_difference(df_diffs, first, second):
+    """ペア差表から「first - second」の向きで差と信頼区間を取り出す"""
+    row = df_diffs[df_diffs['比較'] == f'{first} - {second}']
+    if not row.empty:
+        row = row.iloc[0]
+        return {'差': row['差'], '下限': row['下限'], '上限': row['上限'], '有意': row['有意']}
+
+    row = df_diffs[df_diffs['比較'] == f'{second} - {first}']
+    if row.empty:
+        return None
+    row = row.iloc[0]
+    return {'差': -row['差'], '下限': -row['上限'], '上限': -row['下限'], '有意': row['有意']}
+
+
+@versioned_cache(namespace='integrated')
+def compute_bootstrap_ci(df_daily_prod, location, process, value_col, group_cols, n_resamples=10000, ci=0.95):
+    """拠点×工程スライスのブートストラップ信頼区間を計算してキャッシュ"""
+    df_slice = df_daily_prod[
+        (df_daily_prod['拠点'] == location) & (df_daily_prod['工程'] == process)
+    ]
+    return bootstrap_group_differences(df_slice, value_col, group_cols, n_resamples=n_resamples, ci=ci)
@@ -0,0 +1,180 @@
+# analytics/budget_optimizer.py
+# 教育予算の配分最適化（拠点×工程×スキルカテゴリ×施策の線形計画）
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from analytics.location_loss import BENCHMARK_LOCATION, compute_location_summary
+from analytics.skill_gap import compute_gap_tensor, gap_from_tensor
+from utils.versioned_cache import versioned_cache
+
+# 施策ごとの費用と効果曲線
+#   費用: 1人あたり（百万円）
+#   向上: 受講者1人あたりのスキル向上（pt）
+#   効果曲線: (対象人数の割合, 効果の倍率) の区間。スキルの低い人から順に受講する想定で、
+#             後の区間ほど効果が小さくなる（逓減）。割合の合計がその施策で対象にできる上限
+MEASURES = [
+    {'施策': '🎯 技術者派遣', '費用': 0.30, '向上': 1.5, '効果曲線': [(0.2, 1.0), (0.3, 0.5)]},
+    {'施策': '🏫 集合研修', '費用': 0.15, '向上': 1.0, '効果曲線': [(0.5, 1.0), (0.5, 0.6)]},
+    {'施策': '📚 オンライン教育', '費用': 0.05, '向上': 0.6, '効果曲線': [(0.6, 1.0), (0.4, 0.5)]},
+    {'施策': '👥 ペアリング制度', '費用': 0.02, '向上': 0.3, '効果曲線': [(1.0, 1.0)]}
+]
+
+# 予算と損失削減額の関係（効率的フロンティア）を計算する点数
+FRONTIER_POINTS = 25
+
+
+def build_budget_problem(tensor, df_summary, benchmark_location=BENCHMARK_LOCATION, measures=MEASURES):
+    """
+    予算配分の線形計画を組み立てる（予算以外の制約はここで1回だけ作る）
+
+    各セル（ベンチマーク以外の拠点×工程×スキルカテゴリ）の損失額は、拠点の年間損失額を
+    人数×ギャップの比で按分する（セルのギャップを全て埋めると拠点の損失がゼロになる）。
+    変数はセル×施策×効果曲線の区間ごとの受講割合で、制約は
+    予算、セルごとの受講割合の合計 ≤ 1（1人1施策）、スキル向上の合計 ≤ ギャップ。
+
+    Args:
+        tensor: compute_gap_tensor の結果
+        df_summary: compute_location_summary の結果（拠点, 年間損失額 (M¥)）
+
+    Returns:
+        dict: cells（セル表）, variables（変数表）, c, A_ub, b_ub, bounds と
+            saturation_budget（全ギャップを埋めるのに必要な予算）, frontier（予算別の削減額）
+    """
+    gap = gap_from_tensor(tensor, benchmark_location)
+    headcount = np.broadcast_to(tensor['count'][:, :, None], gap.shape).astype(np.float64)
+    annual_loss = (
+        df_summary.set_index('拠点')['年間損失額 (M¥)']
+        .reindex(tensor['locations']).fillna(0).clip(lower=0).to_numpy()
+    )
+
+    positive_gap = np.where(np.isnan(gap), 0.0, np.maximum(gap, 0.0))
+    weighted_gap = (headcount * positive_gap).sum(axis=(1, 2))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # ギャップ1pt（セル平均）を埋めたときの年間損失削減額
+        value_per_point = np.where(
+            weighted_gap[:, None, None] > 0,
+            annual_loss[:, None, None] * headcount / weighted_gap[:, None, None],
+            0.0
+        )
+
+    li, pi, ci = np.nonzero((positive_gap > 0) & (value_per_point > 0))
+    df_cells = pd.DataFrame({
+        '拠点': np.asarray(tensor['locations'], dtype=object)[li],
+        '工程': np.asarray(tensor['processes'], dtype=object)[pi],
+        'スキルカテゴリ': np.asarray(tensor['categories'], dtype=object)[ci],
+        '人数': headcount[li, pi, ci],
+        'ギャップ': positive_gap[li, pi, ci],
+        '損失単価': value_per_point[li, pi, ci]
+    })
+
+    # 変数（セル×施策×区間）
+    segments = [
+        (m, measure['費用'], measure['向上'] * effect, width)
+        for m, measure in enumerate(measures)
+        for width, effect in measure['効果曲線']
+    ]
+    n_cells, n_segments = len(df_cells), len(segments)
+    cell_index = np.repeat(np.arange(n_cells), n_segments)
+    segment_index = np.tile(np.arange(n_segments), n_cells)
+    measure_index = np.array([s[0] for s in segments])[segment_index]
+    unit_cost = np.array([s[1] for s in segments])[segment_index]
+    uplift = np.array([s[2] for s in segments])[segment_index]
+    width = np.array([s[3] for s in segments])[segment_index]
+
+    people = df_cells['人数'].to_numpy()[cell_index]
+    cost = people * unit_cost
+    reduction = df_cells['損失単価'].to_numpy()[cell_index] * uplift
+
+    n_variables = len(cell_index)
+    columns = np.arange(n_variables)
+    a_ub = sparse.vstack([
+        sparse.csr_matrix(cost[None, :]),
+        sparse.csr_matrix((np.ones(n_variables), (cell_index, columns)), shape=(n_cells, n_variables)),
+        sparse.csr_matrix((uplift, (cell_index, columns)), shape=(n_cells, n_variables))
+    ]).tocsr()
+
+    problem = {
+        'cells': df_cells,
+        'variables': pd.DataFrame({
+            'セル': cell_index,
+            '施策': np.asarray([m['施策'] for m in measures], dtype=object)[measure_index],
+            '人数': people,
+            '費用': cost,
+            '向上': uplift,
+            '削減額': reduction
+        }),
+        'c': -reduction,
+        'A_ub': a_ub,
+        'b_ub': np.concatenate([[0.0], np.ones(n_cells), df_cells['ギャップ'].to_numpy()]),
+        'bounds': np.column_stack([np.zeros(n_variables), width]),
+        'total_loss': float(annual_loss.sum())
+    }
+
+    # 予算の制約がない場合に使う予算 = それ以上増やしても削減額が増えない予算
+    unconstrained = solve_budget_allocation(problem, float(cost @ width))
+    problem['saturation_budget'] = unconstrained['投資額']
+    budgets = np.linspace(0, problem['saturation_budget'], FRONTIER_POINTS)
+    problem['frontier'] = pd.DataFrame({
+        '予算 (M¥)': budgets,
+        '年間損失削減 (M¥)': [solve_budget_allocation(problem, b)['年間損失削減'] for b in budgets]
+    })
+    return problem
+
+
+def solve_budget_allocation(problem, budget):
+    """
+    予算 budget（百万円）で年間損失削減額が最大になる配分を求める
+
+    制約行列は build_budget_problem で作成済みのため、予算の右辺だけを差し替えて HiGHS で解く。
+
+    Returns:
+        dict: 配分（DataFrame: 拠点, 工程, スキルカテゴリ, 施策, 対象人数, 投資額 (M¥),
+            ギャップ改善 (pt), 年間損失削減 (M¥)）, 投資額, 年間損失削減,
+            限界効果（予算1百万円あたりの追加削減額）
+    """
+    columns = ['拠点', '工程', 'スキルカテゴリ', '施策', '対象人数', '投資額 (M¥)', 'ギャップ改善 (pt)', '年間損失削減 (M¥)']
+    if len(problem['c']) == 0 or budget <= 0:
+        return {'配分': pd.DataFrame(columns=columns), '投資額': 0.0, '年間損失削減': 0.0, '限界効果': np.nan}
+
+    b_ub = problem['b_ub'].copy()
+    b_ub[0] = budget
+    result = linprog(problem['c'], A_ub=problem['A_ub'], b_ub=b_ub, bounds=problem['bounds'], method='highs')
+    if result.status != 0:
+        raise RuntimeError(f"予算配分の最適化に失敗しました: {result.message}")
+
+    x = result.x
+    df_variables = problem['variables']
+    used = x > 1e-9
+    df_used = pd.DataFrame({
+        'セル': df_variables['セル'].to_numpy()[used],
+        '施策': df_variables['施策'].to_numpy()[used],
+        '対象人数': (df_variables['人数'].to_numpy() * x)[used],
+        '投資額 (M¥)': (df_variables['費用'].to_numpy() * x)[used],
+        'ギャップ改善 (pt)': (df_variables['向上'].to_numpy() * x)[used],
+        '年間損失削減 (M¥)': (df_variables['削減額'].to_numpy() * x)[used]
+    })
+    df_allocation = df_used.groupby(['セル', '施策'], sort=False).sum().reset_index()
+    df_cells = problem['cells']
+    df_allocation = pd.concat([
+        df_cells.loc[df_allocation['セル'], ['拠点', '工程', 'スキルカテゴリ']].reset_index(drop=True),
+        df_allocation.drop(columns='セル')
+    ], axis=1).sort_values('年間損失削減 (M¥)', ascending=False, ignore_index=True)
+
+    return {
+        '配分': df_allocation[columns],
+        '投資額': float(df_allocation['投資額 (M¥)'].sum()),
+        '年間損失削減': float(-result.fun),
+        # 予算制約の双対値（最小化問題なので符号を反転）
+        '限界効果': float(-result.ineqlin.marginals[0])
+    }
+
+
+@versioned_cache(namespace='action_plan')
+def cached_budget_problem(df_skill, skill_matrix, processes, skill_categories, benchmark_location=BENCHMARK_LOCATION):
+    """データセットのバージョンごとに予算配分の線形計画（と効率的フロンティア）をキャッシュ"""
+    tensor = compute_gap_tensor(skill_matrix, processes, skill_categories)
+    df_summary = compute_location_summary(df_skill, benchmark_location)
+    return build_budget_problem(tensor, df_summary, benchmark_location)
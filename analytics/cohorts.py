@@ -0,0 +1,236 @@
+# analytics/cohorts.py
+# 研修コホートの設計（スキルプロファイルのミニバッチ k-means、NumPy 実装）
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analytics.location_loss import BENCHMARK_LOCATION
+from analytics.skill_matrix import UNRATED
+from utils.versioned_cache import versioned_cache
+
+# コホート数の既定値
+N_COHORTS = 6
+
+# ミニバッチの大きさと反復回数
+BATCH_SIZE = 2048
+MAX_ITERATIONS = 200
+
+# 重心の移動量（スコアの二乗和）がこれ未満の反復が続いたら打ち切る
+CONVERGENCE_TOL = 1e-4
+CONVERGENCE_PATIENCE = 10
+
+# 初期値を変えてミニバッチ k-means を行う回数（標本での二乗誤差が最小のものを採用）
+N_INIT = 4
+
+# ミニバッチの後に全件で行う Lloyd 法の反復回数（重心を全件平均に合わせて仕上げる）
+REFINE_ITERATIONS = 3
+
+# k-means++ の初期値を選ぶ標本数
+INIT_SAMPLE_SIZE = 10_000
+
+# 全件の割り当てで一度に処理する行数
+ASSIGN_CHUNK_ROWS = 65_536
+
+# スキル数がこれを超える場合（大規模な疎行列）はカテゴリ平均をプロファイルに使う
+MAX_PROFILE_SKILLS = 200
+
+
+def _squared_distances(x, centers, center_norms):
+    """(行数, 重心数) の二乗距離（|x|^2 - 2 x·c + |c|^2）"""
+    distances = (x * x).sum(axis=1)[:, None] - 2 * (x @ centers.T) + center_norms[None, :]
+    return np.maximum(distances, 0)
+
+
+def _kmeans_plus_plus(x, n_clusters, rng):
+    """k-means++ で初期重心を選ぶ"""
+    centers = [x[rng.integers(len(x))]]
+    closest = ((x - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, n_clusters):
+        total = closest.sum()
+        index = rng.choice(len(x), p=closest / total) if total > 0 else rng.integers(len(x))
+        centers.append(x[index])
+        closest = np.minimum(closest, ((x - x[index]) ** 2).sum(axis=1))
+    return np.array(centers)
+
+
+def assign_clusters(x, centers, chunk_rows=ASSIGN_CHUNK_ROWS):
+    """全行を最も近い重心に割り当てる（行を分割して距離行列のメモリを抑える）"""
+    center_norms = (centers * centers).sum(axis=1)
+    labels = np.empty(len(x), dtype=np.int32)
+    for start in range(0, len(x), chunk_rows):
+        chunk = x[start:start + chunk_rows]
+        labels[start:start + chunk_rows] = _squared_distances(chunk, centers, center_norms).argmin(axis=1)
+    return labels
+
+
+def _minibatch_centers(x, centers, rng, batch_size, max_iterations):
+    """初期重心からミニバッチ更新を繰り返した重心を返す"""
+    n_clusters = len(centers)
+    counts = np.zeros(n_clusters)
+    quiet = 0
+    for _ in range(max_iterations):
+        batch = x[rng.integers(len(x), size=min(batch_size, len(x)))].astype(np.float64)
+        labels = _squared_distances(batch, centers, (centers * centers).sum(axis=1)).argmin(axis=1)
+
+        # 重心ごとにまとめて更新（1件ずつの逐次更新と同じ結果）
+        batch_counts = np.bincount(labels, minlength=n_clusters)
+        batch_sums = np.zeros_like(centers)
+        np.add.at(batch_sums, labels, batch)
+        updated = batch_counts > 0
+        new_counts = counts + batch_counts
+        previous = centers.copy()
+        centers[updated] = (
+            centers[updated] * counts[updated, None] + batch_sums[updated]
+        ) / new_counts[updated, None]
+        counts = new_counts
+
+        shift = ((centers - previous) ** 2).sum()
+        quiet = quiet + 1 if shift < CONVERGENCE_TOL else 0
+        if quiet >= CONVERGENCE_PATIENCE:
+            break
+    return centers
+
+
+def minibatch_kmeans(x, n_clusters, batch_size=BATCH_SIZE, max_iterations=MAX_ITERATIONS, n_init=N_INIT, seed=0):
+    """
+    ミニバッチ k-means（Sculley 2010）
+
+    毎回 batch_size 行を無作為に取り出し、各重心をそれまでに割り当てられた件数に応じた
+    学習率（1 / 件数）で割り当てられた行の方へ動かす。初期値を変えて n_init 回行い、
+    標本での二乗誤差が最小の重心を採用した後、全件で Lloyd 法を REFINE_ITERATIONS 回行い、
+    全行を最も近い重心に割り当てる。
+
+    Returns:
+        tuple: (重心 (n_clusters, 特徴数), 割り当て (行数,))
+    """
+    x = np.asarray(x, dtype=np.float32)
+    n_clusters = min(n_clusters, len(x))
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), min(len(x), INIT_SAMPLE_SIZE), replace=False)].astype(np.float64)
+
+    best_inertia, centers = np.inf, None
+    for _ in range(n_init):
+        candidate = _minibatch_centers(
+            x, _kmeans_plus_plus(sample, n_clusters, rng), rng, batch_size, max_iterations
+        )
+        inertia = _squared_distances(sample, candidate, (candidate * candidate).sum(axis=1)).min(axis=1).sum()
+        if inertia < best_inertia:
+            best_inertia, centers = inertia, candidate
+
+    centers = centers.astype(np.float32)
+    labels = assign_clusters(x, centers)
+    for _ in range(REFINE_ITERATIONS):
+        counts = np.bincount(labels, minlength=n_clusters)
+        onehot = sparse.csr_matrix(
+            (np.ones(len(x), dtype=np.float32), (labels, np.arange(len(x)))), shape=(n_clusters, len(x))
+        )
+        sums = onehot @ x
+        # 割り当てのない重心はそのまま残す
+        centers = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers).astype(np.float32)
+        labels = assign_clusters(x, centers)
+    return centers, labels
+
+
+def skill_profiles(skill_matrix, rows=None):
+    """
+    クラスタリングに使う従業員のスキルプロファイル
+
+    スキル数が MAX_PROFILE_SKILLS 以下ならスキルごとのスコア、超える場合はカテゴリ平均。
+    未評価は全従業員の平均で補う（距離に影響しない）。
+
+    Returns:
+        tuple: (プロファイル (行数, 特徴数) float32, 特徴名のリスト)
+    """
+    rows = np.arange(skill_matrix.n_employees) if rows is None else np.asarray(rows)
+    if len(skill_matrix.skills) <= MAX_PROFILE_SKILLS:
+        values = skill_matrix.values[rows]
+        values = values.toarray() if sparse.issparse(values) else values
+        profiles = np.where(values == UNRATED, np.nan, values.astype(np.float32))
+        features = list(skill_matrix.skills)
+    else:
+        profiles, _ = skill_matrix.employee_category_scores(rows)
+        profiles = profiles.astype(np.float32)
+        features = list(skill_matrix.categories)
+
+    column_means = np.nanmean(profiles, axis=0)
+    column_means = np.where(np.isnan(column_means), 0, column_means)
+    profiles = np.where(np.isnan(profiles), column_means, profiles)
+    return profiles, features
+
+
+def cluster_employees(skill_matrix, n_clusters=N_COHORTS, benchmark_location=BENCHMARK_LOCATION, seed=0):
+    """
+    全従業員をスキルプロファイルでコホートに分ける
+
+    コホート番号は重心の平均スコアの低い順（0 が最も支援が必要）に並べ替える。
+    重心ギャップはベンチマーク拠点の平均プロファイル - 重心（正ならベンチマークより低い）。
+
+    Returns:
+        dict: labels（全従業員のコホート番号）, features（特徴名）, centroids（コホート×特徴 DataFrame）,
+            gaps（コホート×特徴の重心ギャップ DataFrame）
+    """
+    profiles, features = skill_profiles(skill_matrix)
+    centers, labels = minibatch_kmeans(profiles, n_clusters, seed=seed)
+
+    order = np.argsort(centers.mean(axis=1), kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    labels = rank[labels]
+    centers = centers[order]
+
+    if skill_matrix.has_column('拠点') and benchmark_location in skill_matrix.labels('拠点'):
+        benchmark = profiles[skill_matrix.rows({'拠点': benchmark_location})].mean(axis=0)
+    else:
+        benchmark = profiles.max(axis=0)
+
+    cohort_names = [f"コホート{k + 1}" for k in range(len(centers))]
+    return {
+        'labels': labels,
+        'features': features,
+        'centroids': pd.DataFrame(centers, index=cohort_names, columns=features),
+        'gaps': pd.DataFrame(benchmark[None, :] - centers, index=cohort_names, columns=features)
+    }
+
+
+@versioned_cache(namespace='cohorts')
+def cached_employee_cohorts(skill_matrix, n_clusters=N_COHORTS, benchmark_location=BENCHMARK_LOCATION, seed=0):
+    """データセットのバージョンごとにコホートの割り当てをキャッシュ"""
+    return cluster_employees(skill_matrix, n_clusters, benchmark_location, seed)
+
+
+def summarize_cohorts(cohorts, skill_matrix, rows):
+    """
+    対象の従業員（rows）について、コホートごとの人数と重心ギャップの要約
+
+    Returns:
+        DataFrame: コホート, 人数, 全体人数, 平均スコア, 平均ギャップ, 最大ギャップ, 最大ギャップ項目
+    """
+    gaps = cohorts['gaps']
+    n_cohorts = len(gaps)
+    counts = np.bincount(cohorts['labels'][rows], minlength=n_cohorts)
+    total = np.bincount(cohorts['labels'], minlength=n_cohorts)
+    worst = gaps.to_numpy().argmax(axis=1)
+
+    return pd.DataFrame({
+        'コホート': gaps.index,
+        '人数': counts,
+        '全体人数': total,
+        '平均スコア': cohorts['centroids'].mean(axis=1).to_numpy(),
+        '平均ギャップ': gaps.mean(axis=1).to_numpy(),
+        '最大ギャップ': gaps.to_numpy().max(axis=1),
+        '最大ギャップ項目': np.asarray(cohorts['features'], dtype=object)[worst]
+    })
+
+
+def category_gaps(cohorts, skill_matrix):
+    """重心ギャップをスキルカテゴリ単位に平均（コホート×カテゴリ DataFrame）"""
+    gaps = cohorts['gaps']
+    if list(gaps.columns) == list(skill_matrix.categories):
+        return gaps
+    membership = skill_matrix.membership[[skill_matrix.skill_position[f] for f in gaps.columns]]
+    sizes = membership.sum(axis=0)
+    present = sizes > 0
+    values = (gaps.to_numpy() @ membership[:, present]) / sizes[present]
+    categories = [c for c, ok in zip(skill_matrix.categories, present) if ok]
+    return pd.DataFrame(values, index=gaps.index, columns=categories)
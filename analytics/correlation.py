@@ -0,0 +1,179 @@
+# analytics/correlation.py
+# スキル指標×品質KPIの一括相関エンジン
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.versioned_cache import versioned_cache
+
+# 相関対象の品質KPI
+KPI_COLUMNS = ['歩留まり (%)', '品質不良率 (%)', '生産効率 (%)']
+
+# スライスの軸（拠点×工程×チーム×シフト）
+SLICE_KEYS = ('拠点', '工程', 'チーム', 'シフト')
+
+
+def get_skill_metric_columns(df):
+    """相関対象のスキル指標列（*_平均 と 平均スキル予測値）を取得"""
+    columns = [c for c in df.columns if str(c).endswith('_平均')]
+    if '平均スキル予測値' in df.columns:
+        columns.append('平均スキル予測値')
+    return columns
+
+
+def pearson_from_sums(cnt, sx, sy, sxx, syy, sxy):
+    """件数・和・二乗和・積和からピアソン相関を計算（3件未満はNaN）"""
+    cov = cnt * sxy - sx * sy
+    var_x = cnt * sxx - sx * sx
+    var_y = cnt * syy - sy * sy
+    denom = np.sqrt(np.clip(var_x * var_y, 0, None))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where((cnt > 2) & (denom > 0), cov / denom, np.nan)
+
+    return np.clip(r, -1.0, 1.0)
+
+
+def _grouped_pearson(X, Y, codes, n_groups):
+    """
+    グループごとのピアソン相関を一括計算（欠損はペアごとに除外）
+
+    Args:
+        X: (行数, スキル指標数) の配列
+        Y: (行数, KPI数) の配列
+        codes: 各行のグループ番号（0..n_groups-1）
+        n_groups: グループ数
+
+    Returns:
+        tuple: (相関係数, サンプル数) いずれも (グループ数, スキル指標数, KPI数)
+    """
+    order = np.argsort(codes, kind='stable')
+    codes_sorted = codes[order]
+    X = X[order]
+    Y = Y[order]
+    starts = np.searchsorted(codes_sorted, np.arange(n_groups))
+
+    x_valid = ~np.isnan(X)
+    y_valid = ~np.isnan(Y)
+
+    shape = (n_groups, X.shape[1], Y.shape[1])
+    r = np.full(shape, np.nan)
+    n = np.zeros(shape, dtype=np.int64)
+
+    # KPIごとに全グループ・全スキル指標をまとめて集計
+    for k in range(Y.shape[1]):
+        valid = x_valid & y_valid[:, [k]]
+        x = np.where(valid, X, 0.0)
+        y = np.where(valid, Y[:, [k]], 0.0)
+
+        cnt = np.add.reduceat(valid.astype(np.float64), starts, axis=0)
+        sx = np.add.reduceat(x, starts, axis=0)
+        sy = np.add.reduceat(y, starts, axis=0)
+        sxx = np.add.reduceat(x * x, starts, axis=0)
+        syy = np.add.reduceat(y * y, starts, axis=0)
+        sxy = np.add.reduceat(x * y, starts, axis=0)
+
+        r[:, :, k] = pearson_from_sums(cnt, sx, sy, sxx, syy, sxy)
+        n[:, :, k] = cnt.astype(np.int64)
+
+    return r, n
+
+
+def pearson_pvalues(r, n):
+    """相関係数とサンプル数から両側p値を計算"""
+    dof = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = r * np.sqrt(dof / np.clip(1.0 - r * r, 1e-12, None))
+        p = 2 * stats.t.sf(np.abs(t), np.where(dof > 0, dof, np.nan))
+    return np.where(np.isnan(r), np.nan, p)
+
+
+def correlate_by_slice(df_daily_prod, by=SLICE_KEYS, skill_columns=None, kpi_columns=None):
+    """
+    スライスごとのスキル指標×KPI相関を一括計算（キャッシュなし）
+
+    Args:
+        df_daily_prod: 日次生産データ
+        by: スライスの軸（SLICE_KEYS の部分集合）
+        skill_columns: 相関対象のスキル指標列（省略時は自動検出）
+        kpi_columns: 相関対象のKPI列（省略時は KPI_COLUMNS のうち存在する列）
+
+    Returns:
+        DataFrame: スライス軸 + スキル指標, KPI, 相関係数, p値, サンプル数
+    """
+    by = list(by)
+    if skill_columns is None:
+        skill_columns = get_skill_metric_columns(df_daily_prod)
+    if kpi_columns is None:
+        kpi_columns = [c for c in KPI_COLUMNS if c in df_daily_prod.columns]
+
+    result_columns = by + ['スキル指標', 'KPI', '相関係数', 'p値', 'サンプル数']
+    if df_daily_prod.empty or not skill_columns or not kpi_columns:
+        return pd.DataFrame(columns=result_columns)
+
+    X = df_daily_prod[skill_columns].to_numpy(dtype=np.float64)
+    Y = df_daily_prod[kpi_columns].to_numpy(dtype=np.float64)
+
+    if by:
+        grouped = df_daily_prod.groupby(by, sort=True, dropna=False)
+        codes = grouped.ngroup().to_numpy()
+        # 軸が1つでもタプルにそろえる（groups のキーの形は pandas のバージョンで変わるため size の索引を使う）
+        group_keys = [key if isinstance(key, tuple) else (key,) for key in grouped.size().index]
+    else:
+        codes = np.zeros(len(df_daily_prod), dtype=np.int64)
+        group_keys = [()]
+
+    r, n = _grouped_pearson(X, Y, codes, len(group_keys))
+    p = pearson_pvalues(r, n)
+
+    # (グループ, スキル指標, KPI) を縦持ちに展開
+    n_groups, n_skills, n_kpis = r.shape
+    g_idx, s_idx, k_idx = np.meshgrid(
+        np.arange(n_groups), np.arange(n_skills), np.arange(n_kpis), indexing='ij'
+    )
+    g_idx, s_idx, k_idx = g_idx.ravel(), s_idx.ravel(), k_idx.ravel()
+
+    result = {key: [group_keys[g][i] for g in g_idx] for i, key in enumerate(by)}
+    result['スキル指標'] = np.asarray(skill_columns, dtype=object)[s_idx]
+    result['KPI'] = np.asarray(kpi_columns, dtype=object)[k_idx]
+    result['相関係数'] = r.ravel()
+    result['p値'] = p.ravel()
+    result['サンプル数'] = n.ravel()
+
+    return pd.DataFrame(result, columns=result_columns)
+
+
+@versioned_cache(namespace='quality')
+def compute_correlation_batch(df_daily_prod, by=SLICE_KEYS):
+    """全スライスの相関をまとめて計算してキャッシュ"""
+    return correlate_by_slice(df_daily_prod, by=by)
+
+
+def get_slice_correlation(df_daily_prod, location=None, process=None, team=None, shift=None):
+    """
+    指定スライスの相関表を取得
+
+    指定された軸（None以外）の組み合わせで一括計算した結果をキャッシュし、
+    該当スライスの行だけを返す。
+
+    Returns:
+        DataFrame: スキル指標, KPI, 相関係数, p値, サンプル数
+    """
+    selection = dict(zip(SLICE_KEYS, (location, process, team, shift)))
+    by = tuple(key for key, value in selection.items() if value is not None)
+
+    df_batch = compute_correlation_batch(df_daily_prod, by=by)
+
+    mask = np.ones(len(df_batch), dtype=bool)
+    for key in by:
+        mask &= (df_batch[key] == selection[key]).to_numpy()
+
+    return df_batch.loc[mask, ['スキル指標', 'KPI', '相関係数', 'p値', 'サンプル数']].reset_index(drop=True)
+
+
+def correlation_strength(corr):
+    """相関係数の強度ラベル"""
+    if pd.isna(corr):
+        return '-'
+    return '強' if abs(corr) > 0.7 else ('中' if abs(corr) > 0.4 else '弱')
@@ -0,0 +1,161 @@
+# analytics/exp_smoothing.py
+# 減衰トレンド付き指数平滑法（Holt）の当てはめと予測区間（statsmodels / NumPy）
+#
+# プロセスプールのワーカーから読み込まれるため、Streamlit やキャッシュのモジュールには依存しない。
+
+import warnings
+
+import numpy as np
+
+# statsmodels の当てはめに必要な最小の観測数（これ未満の系列は NumPy 版で当てはめる）
+MIN_STATSMODELS_OBSERVATIONS = 10
+
+# NumPy 版で探索するパラメータの格子（α: 水準, β: トレンド, φ: 減衰）
+ALPHA_GRID = np.linspace(0.05, 0.95, 10)
+BETA_GRID = np.array([0.0, 0.05, 0.1, 0.2, 0.3])
+PHI_GRID = np.array([0.8, 0.9, 0.98])
+
+# 予測区間の幅（正規分布の両側 95%）
+INTERVAL_Z = 1.96
+
+
+def has_statsmodels():
+    try:
+        import statsmodels  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cumulative_damping(phi, horizon):
+    """φ_h = φ + φ^2 + ... + φ^h（h = 1..horizon）。phi は任意の形の配列"""
+    powers = np.asarray(phi)[..., None] ** np.arange(1, horizon + 1)
+    return np.cumsum(powers, axis=-1)
+
+
+def forecast_band(level, trend, alpha, beta, phi, sigma, horizon, z=INTERVAL_Z):
+    """
+    最終時点の水準・トレンドとパラメータから、予測値と予測区間を計算（系列ごとの配列で一括）
+
+    分散は加法誤差の ETS(A,Ad,N) の式 σ²(1 + Σ_{j<h} c_j²), c_j = α(1 + β φ_j)。
+
+    Returns:
+        tuple: (予測, 下限, 上限) いずれも (系列数, horizon)
+    """
+    damping = _cumulative_damping(phi, horizon)
+    forecast = level[:, None] + damping * trend[:, None]
+
+    c = alpha[:, None] * (1 + beta[:, None] * damping[:, :-1])
+    variance = sigma[:, None] ** 2 * (1 + np.concatenate([np.zeros((len(level), 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    width = z * np.sqrt(variance)
+    return forecast, forecast - width, forecast + width
+
+
+def fit_holt_numpy(values):
+    """
+    全系列をまとめて格子探索で当てはめる（1期先予測誤差の二乗和が最小のパラメータ）
+
+    初期値は水準 = 最初の値、トレンド = 最初の差分。全系列×全格子点を同時に漸化式で更新する。
+
+    Args:
+        values: (系列数, 時点数)、欠損なし
+
+    Returns:
+        dict: level, trend, alpha, beta, phi, sigma（いずれも (系列数,)）
+    """
+    alpha, beta, phi = (g.ravel() for g in np.meshgrid(ALPHA_GRID, BETA_GRID, PHI_GRID, indexing='ij'))
+    y = np.asarray(values, dtype=np.float64)
+    n_series, n_times = y.shape
+
+    level = np.repeat(y[:, :1], len(alpha), axis=1)
+    trend = np.repeat(y[:, 1:2] - y[:, :1], len(alpha), axis=1) if n_times > 1 else np.zeros_like(level)
+    sse = np.zeros_like(level)
+    for t in range(1, n_times):
+        predicted = level + phi * trend
+        error = y[:, t:t + 1] - predicted
+        sse += error ** 2
+        level = predicted + alpha * error
+        trend = phi * trend + alpha * beta * error
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(n_series)
+    return {
+        'level': level[rows, best],
+        'trend': trend[rows, best],
+        'alpha': alpha[best],
+        'beta': beta[best],
+        'phi': phi[best],
+        'sigma': np.sqrt(sse[rows, best] / max(n_times - 1, 1))
+    }
+
+
+def fit_holt_statsmodels(y):
+    """
+    1系列を statsmodels の ExponentialSmoothing（加法・減衰トレンド）で当てはめる
+
+    Returns:
+        dict: level, trend, alpha, beta, phi, sigma（スカラー）。当てはめに失敗した場合は None
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            result = ExponentialSmoothing(
+                y, trend='add', damped_trend=True, initialization_method='estimated'
+            ).fit()
+    except (ValueError, np.linalg.LinAlgError):
+        return None
+
+    params = result.params
+    fitted = {
+        'level': float(result.level[-1]),
+        'trend': float(result.trend[-1]),
+        'alpha': float(params['smoothing_level']),
+        'beta': float(params['smoothing_trend']),
+        'phi': float(params['damping_trend']),
+        'sigma': float(np.sqrt(result.sse / len(y)))
+    }
+    return fitted if all(np.isfinite(v) for v in fitted.values()) else None
+
+
+def fit_block(values, horizon, method='statsmodels'):
+    """
+    系列のまとまりを当てはめて予測する（プロセスプールの1タスク）
+
+    method='statsmodels' では系列ごとに statsmodels で当てはめ、観測が少ない・失敗した系列は
+    NumPy 版で補う。method='numpy' では全系列を NumPy 版でまとめて当てはめる。
+
+    Args:
+        values: (系列数, 時点数)、欠損なし
+
+    Returns:
+        dict: forecast / lower / upper（(系列数, horizon)）, alpha / beta / phi / sigma, method（系列ごと）
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_series, n_times = values.shape
+    fitted = fit_holt_numpy(values)
+    methods = np.full(n_series, 'numpy', dtype=object)
+
+    if method == 'statsmodels' and n_times >= MIN_STATSMODELS_OBSERVATIONS:
+        for i in range(n_series):
+            result = fit_holt_statsmodels(values[i])
+            if result is None:
+                continue
+            for name, value in result.items():
+                fitted[name][i] = value
+            methods[i] = 'statsmodels'
+
+    forecast, lower, upper = forecast_band(
+        fitted['level'], fitted['trend'], fitted['alpha'], fitted['beta'], fitted['phi'], fitted['sigma'], horizon
+    )
+    return {
+        'forecast': forecast,
+        'lower': lower,
+        'upper': upper,
+        'alpha': fitted['alpha'],
+        'beta': fitted['beta'],
+        'phi': fitted['phi'],
+        'sigma': fitted['sigma'],
+        'method': methods
+    }
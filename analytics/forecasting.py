@@ -0,0 +1,177 @@
+# analytics/forecasting.py
+# 拠点×工程×シフトごとの KPI 予測（指数平滑法をプロセスプールで一括当てはめ・バックグラウンド実行）
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from analytics.exp_smoothing import fit_block, has_statsmodels
+from utils.background_jobs import get_background_jobs
+from utils.versioned_cache import dataset_version, versioned_cache
+
+# 予測する指標
+FORECAST_METRICS = ['生産効率 (%)', '品質不良率 (%)', '平均スキル予測値']
+
+# 系列の単位
+SERIES_COLUMNS = ['拠点', '工程', 'シフト']
+
+# 予測する日数
+FORECAST_HORIZON = 14
+
+# 並列数（環境変数 SDP_FORECAST_WORKERS で変更可、未指定なら CPU 数）
+FORECAST_WORKERS = int(os.environ.get('SDP_FORECAST_WORKERS', 0)) or os.cpu_count() or 1
+
+# 1プロセスあたりの最小の系列（×指標）数。spawn のワーカーは起動と statsmodels の読み込みに数秒かかるため、
+# 系列が少ないうちはワーカー数を減らし、1プロセス分に満たなければ並列化しない（1系列の当てはめは数十 ms）
+MIN_SERIES_PER_WORKER = 256
+
+# 1タスクあたりの最小系列数（タスクが細かすぎるとプロセス間の受け渡しが支配的になる）
+MIN_SERIES_PER_TASK = 16
+
+
+def kpi_series(df_daily_prod, metrics=FORECAST_METRICS):
+    """
+    日次データを系列（拠点×工程×シフト）× 指標 × 日付の配列にまとめる
+
+    同じ日・系列の行（チーム別）は平均し、データのない日は前後の値で補う（指数平滑法は等間隔が前提）。
+
+    Returns:
+        tuple: (系列表 DataFrame, 日付 DatetimeIndex, 配列 (系列数, 指標数, 日数))
+    """
+    df = df_daily_prod.groupby(SERIES_COLUMNS + ['日付'], observed=True)[metrics].mean().reset_index()
+    df_series = df[SERIES_COLUMNS].drop_duplicates().sort_values(SERIES_COLUMNS, ignore_index=True)
+    dates = pd.date_range(df['日付'].min(), df['日付'].max(), freq='D')
+
+    series_codes = pd.Series(np.arange(len(df_series)), index=pd.MultiIndex.from_frame(df_series))
+    series_index = series_codes.reindex(pd.MultiIndex.from_frame(df[SERIES_COLUMNS])).to_numpy()
+    date_index = dates.get_indexer(pd.to_datetime(df['日付']))
+
+    values = np.full((len(df_series), len(metrics), len(dates)), np.nan)
+    values[series_index, :, date_index] = df[metrics].to_numpy()
+
+    # 欠損日を前の値（先頭は後の値）で補う
+    flat = pd.DataFrame(values.reshape(-1, len(dates)).T).ffill().bfill()
+    return df_series, dates, flat.to_numpy().T.reshape(values.shape)
+
+
+def _split_tasks(n_rows, workers):
+    """行を並列数の数倍のタスクに分ける（処理時間の偏りをならす）"""
+    n_tasks = max(1, min(workers * 4, math.ceil(n_rows / MIN_SERIES_PER_TASK)))
+    return np.array_split(np.arange(n_rows), n_tasks)
+
+
+def forecast_kpis(df_daily_prod, horizon=FORECAST_HORIZON, workers=FORECAST_WORKERS, metrics=FORECAST_METRICS):
+    """
+    全系列・全指標を指数平滑法（減衰トレンド）で当てはめ、horizon 日先までの予測と予測区間を返す
+
+    statsmodels があれば系列ごとに statsmodels で、なければ NumPy 版でまとめて当てはめる。
+    系列を分けたタスクをプロセスプール（spawn。Streamlit のスレッドから fork しないため）で並列に処理する。
+    ワーカー数は系列数に応じて MIN_SERIES_PER_WORKER 系列に1つまでに抑える。
+
+    Returns:
+        dict: series（系列表）, metrics, dates（履歴の日付）, history（系列×指標×日）,
+            forecast_dates, forecast / lower / upper（系列×指標×予測日）,
+            models（系列×指標ごとの 手法, α, β, φ, 残差σ）
+    """
+    df_series, dates, history = kpi_series(df_daily_prod, metrics)
+    n_series, n_metrics, n_dates = history.shape
+    flat = history.reshape(-1, n_dates)
+    method = 'statsmodels' if has_statsmodels() else 'numpy'
+
+    workers = min(workers, len(flat) // MIN_SERIES_PER_WORKER)
+    if workers > 1:
+        tasks = _split_tasks(len(flat), workers)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as executor:
+            results = list(executor.map(fit_block, (flat[rows] for rows in tasks), repeat(horizon), repeat(method)))
+    else:
+        results = [fit_block(flat, horizon, method)]
+
+    merged = {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+    shape = (n_series, n_metrics, horizon)
+
+    df_models = df_series.iloc[np.repeat(np.arange(n_series), n_metrics)].reset_index(drop=True)
+    df_models['指標'] = np.tile(metrics, n_series)
+    df_models['手法'] = merged['method']
+    df_models['α'] = merged['alpha']
+    df_models['β'] = merged['beta']
+    df_models['φ'] = merged['phi']
+    df_models['残差σ'] = merged['sigma']
+
+    return {
+        'series': df_series,
+        'metrics': list(metrics),
+        'dates': dates,
+        'history': history,
+        'forecast_dates': pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=horizon, freq='D'),
+        'forecast': merged['forecast'].reshape(shape),
+        'lower': merged['lower'].reshape(shape),
+        'upper': merged['upper'].reshape(shape),
+        'models': df_models
+    }
+
+
+@versioned_cache(namespace='forecast')
+def cached_kpi_forecasts(df_daily_prod, horizon=FORECAST_HORIZON):
+    """データセットのバージョンごとに予測結果をキャッシュ"""
+    return forecast_kpis(df_daily_prod, horizon)
+
+
+def _job_key(df_daily_prod, horizon):
+    return ('kpi_forecast', dataset_version(df_daily_prod), horizon)
+
+
+def _run_forecast_job(df_daily_prod, horizon):
+    """
+    バックグラウンドジョブの本体。キャッシュに保存できた場合は None を返す
+
+    結果がキャッシュの上限を超えて保存されなかった場合だけ結果を返し、ジョブの戻り値として保持させる
+    （保存されなかった結果を毎回計算し直さないように）。
+    """
+    result = cached_kpi_forecasts(df_daily_prod, horizon)
+    return None if cached_kpi_forecasts.peek(df_daily_prod, horizon) is not None else result
+
+
+def start_kpi_forecasts(df_daily_prod, horizon=FORECAST_HORIZON, retry=False):
+    """
+    キャッシュに予測がなければ、バックグラウンドで当てはめを開始（データセットのバージョンごとに読み込み時に1回呼ぶ）
+
+    実行中のジョブは二重に開始しない。失敗済みのジョブは retry=True（画面の再試行ボタン）のときだけ再実行する。
+    キャッシュに保存できなかった結果をジョブが保持している場合も再実行しない。
+    """
+    jobs = get_background_jobs()
+    key = _job_key(df_daily_prod, horizon)
+    if cached_kpi_forecasts.peek(df_daily_prod, horizon) is None and jobs.result(key) is None:
+        jobs.submit(key, _run_forecast_job, df_daily_prod, horizon, retry=retry)
+
+
+def get_kpi_forecasts(df_daily_prod, horizon=FORECAST_HORIZON):
+    """
+    予測結果を返す（画面の描画中には当てはめない）
+
+    Returns:
+        tuple: (結果 dict または None, 状態 'done' / 'running' / 'failed', 失敗時の説明)
+    """
+    result = cached_kpi_forecasts.peek(df_daily_prod, horizon)
+    if result is not None:
+        return result, 'done', None
+
+    jobs = get_background_jobs()
+    key = _job_key(df_daily_prod, horizon)
+    status = jobs.status(key)
+    if status == 'failed':
+        return None, 'failed', jobs.error(key)
+    if status == 'done':
+        # キャッシュに保存できなかった結果はジョブが保持している
+        result = jobs.result(key)
+        if result is not None:
+            return result, 'done', None
+    if status != 'running':
+        # 未開始、またはキャッシュから追い出された場合は計算し直す
+        start_kpi_forecasts(df_daily_prod, horizon)
+    return None, 'running', None
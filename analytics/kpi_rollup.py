@@ -0,0 +1,16 @@
+# analytics/kpi_rollup.py
+# モニタリング用の日次KPI集計
+
+from utils.versioned_cache import versioned_cache
+
+
+def compute_daily_rollup(df_daily_prod, location):
+    """拠点の日次データを日付単位に平均集計（日付昇順）"""
+    df_target_daily = df_daily_prod[df_daily_prod['拠点'] == location]
+    return df_target_daily.groupby('日付').mean(numeric_only=True).reset_index()
+
+
+@versioned_cache(namespace='monitoring')
+def cached_daily_rollup(df_daily_prod, location):
+    """データセットのバージョン・拠点ごとに日次KPI集計をキャッシュ"""
+    return compute_daily_rollup(df_daily_prod, location)
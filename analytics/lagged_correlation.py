@@ -0,0 +1,188 @@
+# analytics/lagged_correlation.py
+# ラグ相互相関・ローリング相関エンジン（累積和による O(n) 計算）
+
+import numpy as np
+import pandas as pd
+
+from analytics.correlation import pearson_from_sums
+from utils.versioned_cache import versioned_cache
+
+# 系列の軸（拠点×工程×チーム）
+SERIES_KEYS = ('拠点', '工程', 'チーム')
+
+
+def build_series_matrix(df_daily_prod, x_col, y_col, by=SERIES_KEYS):
+    """
+    系列ごとの日次値を (系列数, 日数) の行列に展開
+
+    稼働していない日（休み・欠測）は NaN として日付軸を連続させる。
+    同じ系列・日付の行（by に含まない軸、例えば シフト だけが異なる行）は平均して1日の値にする。
+
+    Returns:
+        tuple: (系列キーのリスト, 日付インデックス, X行列, Y行列)
+    """
+    by = list(by)
+    dates = pd.to_datetime(df_daily_prod['日付']).dt.normalize()
+    calendar = pd.date_range(dates.min(), dates.max(), freq='D')
+
+    df_values = df_daily_prod[by + [x_col, y_col]].assign(日付=dates)
+    daily = df_values.groupby(by + ['日付'], sort=True)[[x_col, y_col]].mean()
+
+    X = daily[x_col].unstack('日付').reindex(columns=calendar)
+    Y = daily[y_col].unstack('日付').reindex(index=X.index, columns=calendar)
+
+    keys = [key if isinstance(key, tuple) else (key,) for key in X.index]
+    return keys, calendar, X.to_numpy(dtype=np.float64), Y.to_numpy(dtype=np.float64)
+
+
+def _prefix_sums(values):
+    """最終軸方向の累積和（先頭に 0 を付けた長さ n+1。区間の和は2点の差で求まる）"""
+    return np.concatenate(
+        [np.zeros(values.shape[:-1] + (1,)), np.cumsum(values, axis=-1)], axis=-1
+    )
+
+
+def _window_sums(values, window):
+    """累積和の差分で全ウィンドウの和を O(n) で計算"""
+    cumsum = _prefix_sums(values)
+    return cumsum[..., window:] - cumsum[..., :-window]
+
+
+def _partner_missing_sums(values, missing, offset, n_series):
+    """
+    相手の系列が欠損している位置と組になる values の値を系列ごとに合計
+
+    values は (指標数, 系列数, 日数)、missing は相手の欠損位置 (系列, 日) の組、offset は相手の日から
+    values の日へのずれ。欠損は少ない前提で、欠損の件数に比例するコストで計算する。
+
+    Returns:
+        ndarray: (指標数, 系列数)
+    """
+    series, days = missing
+    days = days + offset
+    inside = (days >= 0) & (days < values.shape[-1])
+    series, days = series[inside], days[inside]
+    gathered = values[:, series, days]
+    return np.stack([np.bincount(series, weights=row, minlength=n_series) for row in gathered])
+
+
+def lagged_cross_correlation(X, Y, max_lag=14):
+    """
+    全系列のラグ相互相関を一括計算
+
+    ラグ L の相関は X[t] と Y[t+L] の相関（スキルが L 日先行）。どちらかが欠損の日の組は除外する。
+    件数・和・二乗和は累積和を1回だけ作り、各ラグの重なり区間の値を差分で求めたうえで、
+    相手が欠損している組の分だけを差し引く（欠損の件数に比例）。積和だけはラグごとに計算する。
+
+    Returns:
+        tuple: (相関係数, サンプル数) いずれも (系列数, max_lag+1)
+    """
+    n_series, n_days = X.shape
+    r = np.full((n_series, max_lag + 1), np.nan)
+    n = np.zeros((n_series, max_lag + 1), dtype=np.int64)
+
+    valid_x = ~np.isnan(X)
+    valid_y = ~np.isnan(Y)
+    x = np.where(valid_x, X, 0.0)
+    y = np.where(valid_y, Y, 0.0)
+    # X 側（件数・和・二乗和）と Y 側（和・二乗和）の値と累積和
+    x_side = np.stack([valid_x.astype(np.float64), x, x * x])
+    y_side = np.stack([y, y * y])
+    prefix_x = _prefix_sums(x_side)
+    prefix_y = _prefix_sums(y_side)
+    missing_x = np.nonzero(~valid_x)
+    missing_y = np.nonzero(~valid_y)
+
+    for lag in range(min(max_lag, n_days - 1) + 1):
+        overlap = n_days - lag
+        # X[0:overlap] の値から、組になる Y[t+lag] が欠損の分を除く
+        cnt, sum_x, sum_xx = prefix_x[..., overlap] - _partner_missing_sums(x_side, missing_y, -lag, n_series)
+        # Y[lag:n_days] の値から、組になる X[t-lag] が欠損の分を除く
+        sum_y, sum_yy = (
+            prefix_y[..., n_days] - prefix_y[..., lag] - _partner_missing_sums(y_side, missing_x, lag, n_series)
+        )
+        sum_xy = (x[:, :overlap] * y[:, lag:]).sum(axis=-1)
+
+        r[:, lag] = pearson_from_sums(cnt, sum_x, sum_y, sum_xx, sum_yy, sum_xy)
+        n[:, lag] = np.rint(cnt).astype(np.int64)
+
+    return r, n
+
+
+def rolling_correlation(X, Y, window=7, min_periods=None):
+    """
+    全系列のローリング相関を累積和で一括計算
+
+    Returns:
+        tuple: (相関係数, サンプル数) いずれも (系列数, 日数)。
+               各列はその日を終端とするウィンドウの値（先頭 window-1 日は NaN）
+    """
+    if min_periods is None:
+        min_periods = max(3, window // 2)
+
+    n_series, n_days = X.shape
+    r = np.full((n_series, n_days), np.nan)
+    n = np.zeros((n_series, n_days), dtype=np.int64)
+    if window > n_days:
+        return r, n
+
+    valid = ~(np.isnan(X) | np.isnan(Y))
+    x = np.where(valid, X, 0.0)
+    y = np.where(valid, Y, 0.0)
+
+    cnt = _window_sums(valid.astype(np.float64), window)
+    r_win = pearson_from_sums(
+        cnt,
+        _window_sums(x, window), _window_sums(y, window),
+        _window_sums(x * x, window), _window_sums(y * y, window),
+        _window_sums(x * y, window)
+    )
+
+    r[:, window - 1:] = np.where(cnt >= min_periods, r_win, np.nan)
+    n[:, window - 1:] = cnt.astype(np.int64)
+    return r, n
+
+
+@versioned_cache(namespace='quality')
+def compute_lag_profiles(df_daily_prod, x_col, y_col, max_lag=14, by=SERIES_KEYS):
+    """
+    全系列のラグ相関プロファイルを一括計算してキャッシュ
+
+    Returns:
+        DataFrame: 系列軸 + ラグ (日), 相関係数, サンプル数
+    """
+    by = list(by)
+    keys, _, X, Y = build_series_matrix(df_daily_prod, x_col, y_col, by=by)
+    r, n = lagged_cross_correlation(X, Y, max_lag=max_lag)
+
+    n_series, n_lags = r.shape
+    s_idx = np.repeat(np.arange(n_series), n_lags)
+
+    result = {key: [keys[s][i] for s in s_idx] for i, key in enumerate(by)}
+    result['ラグ (日)'] = np.tile(np.arange(n_lags), n_series)
+    result['相関係数'] = r.ravel()
+    result['サンプル数'] = n.ravel()
+
+    return pd.DataFrame(result)
+
+
+@versioned_cache(namespace='quality')
+def compute_rolling_correlations(df_daily_prod, x_col, y_col, window=7, by=SERIES_KEYS):
+    """
+    全系列のローリング相関を一括計算してキャッシュ
+
+    Returns:
+        DataFrame: 系列軸 + 日付, 相関係数, サンプル数（値のない日は除外）
+    """
+    by = list(by)
+    keys, calendar, X, Y = build_series_matrix(df_daily_prod, x_col, y_col, by=by)
+    r, n = rolling_correlation(X, Y, window=window)
+
+    s_idx, d_idx = np.nonzero(~np.isnan(r))
+
+    result = {key: [keys[s][i] for s in s_idx] for i, key in enumerate(by)}
+    result['日付'] = calendar[d_idx]
+    result['相関係数'] = r[s_idx, d_idx]
+    result['サンプル数'] = n[s_idx, d_idx]
+
+    return pd.DataFrame(result, columns=by + ['日付', '相関係数', 'サンプル数'])
@@ -0,0 +1,157 @@
+# analytics/mentor_pairing.py
+# メンター・メンティーのペアリング（拠点×工程ごとに補完度の割当問題を解く）
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+
+from analytics.skill_matrix import UNRATED
+from utils.versioned_cache import versioned_cache
+
+# 総合スキルがこの分位以上の従業員をメンター、MENTEE_QUANTILE 以下をメンティー候補とする（拠点×工程内）
+MENTOR_QUANTILE = 0.75
+MENTEE_QUANTILE = 0.25
+
+# シフトが異なるペアの補完度の割引率（シフト列がある場合のみ）
+SHIFT_MISMATCH_PENALTY = 0.5
+
+# 1回の割当問題で扱うメンティー数の上限（超える拠点×工程は総合スキル順に交互に分割）
+MAX_BLOCK_SIZE = 2000
+
+# 補完度の計算で一度に作る (メンティー, メンター, スキル) 配列の要素数の上限
+CHUNK_ELEMENTS = 4_000_000
+
+
+def complementarity(mentee_scores, mentor_scores, chunk_elements=CHUNK_ELEMENTS):
+    """
+    メンティー×メンターの補完度行列
+
+    補完度 = メンターがメンティーを上回るスキルの差の合計 / スキル数（未評価 NaN のスキルは除外）。
+    (メンティー, メンター, スキル) の差分はメンティーを分割して作るため、メモリは chunk_elements 程度。
+
+    Returns:
+        ndarray: (メンティー数, メンター数)
+    """
+    n_mentees, n_skills = mentee_scores.shape
+    n_mentors = len(mentor_scores)
+    benefit = np.empty((n_mentees, n_mentors), dtype=np.float32)
+    step = max(1, chunk_elements // max(n_mentors * n_skills, 1))
+    for start in range(0, n_mentees, step):
+        diff = mentor_scores[None, :, :] - mentee_scores[start:start + step, None, :]
+        # fmax は NaN（どちらかが未評価）を 0 として扱う
+        benefit[start:start + step] = np.fmax(diff, 0).sum(axis=2) / n_skills
+    return benefit
+
+
+def _block_scores(skill_matrix, rows):
+    """行の従業員×スキルのスコア（float32、未評価は NaN）"""
+    values = skill_matrix.values[rows]
+    values = values.toarray() if sparse.issparse(values) else values
+    return np.where(values == UNRATED, np.nan, values.astype(np.float32))
+
+
+def _split_block(mentees, mentors, overall, max_block):
+    """メンティーが多い場合は総合スキル順に交互に分け、各部分が同じ分布になるようにする"""
+    n_parts = int(np.ceil(len(mentees) / max_block))
+    if n_parts <= 1:
+        return [(mentees, mentors)]
+    mentees = mentees[np.argsort(overall[mentees], kind='stable')]
+    mentors = mentors[np.argsort(overall[mentors], kind='stable')]
+    return [(mentees[k::n_parts], mentors[k::n_parts]) for k in range(n_parts)]
+
+
+def pair_mentors(skill_matrix, location=None, mentor_quantile=MENTOR_QUANTILE, mentee_quantile=MENTEE_QUANTILE,
+                 mentees_per_mentor=1, shift_penalty=SHIFT_MISMATCH_PENALTY, max_block=MAX_BLOCK_SIZE):
+    """
+    拠点×工程ごとにメンター（高スキル）とメンティー（低スキル）の組を作る
+
+    補完度（complementarity）にシフト不一致の割引を掛けた値の合計が最大になるよう、
+    scipy.optimize.linear_sum_assignment で割り当てる。メンター1人あたり mentees_per_mentor 人まで
+    担当できるよう、メンターの列を複製して解く。補完度が 0 の組は含めない。
+
+    Args:
+        skill_matrix: SkillMatrix
+        location: 対象拠点（None なら全拠点）
+
+    Returns:
+        DataFrame: 拠点, 工程, メンター行, メンティー行（SkillMatrix の行番号）, メンター総合, メンティー総合,
+            補完度, 主な指導スキル, シフト一致（シフト列がない場合は NaN）
+    """
+    rows = skill_matrix.rows({'拠点': location} if location is not None else None)
+    columns = ['拠点', '工程', 'メンター行', 'メンティー行', 'メンター総合', 'メンティー総合', '補完度', '主な指導スキル', 'シフト一致']
+    if len(rows) == 0:
+        return pd.DataFrame(columns=columns)
+
+    _, overall_rows = skill_matrix.employee_category_scores(rows)
+    overall = np.full(skill_matrix.n_employees, np.nan)
+    overall[rows] = overall_rows
+    location_codes = skill_matrix.codes('拠点')
+    process_codes = skill_matrix.codes('工程')
+    has_shift = skill_matrix.has_column('シフト')
+    shift_codes = skill_matrix.codes('シフト') if has_shift else None
+
+    # 拠点×工程のブロックに分ける
+    rows = rows[(location_codes[rows] >= 0) & (process_codes[rows] >= 0) & ~np.isnan(overall[rows])]
+    block_id = location_codes[rows].astype(np.int64) * (process_codes.max() + 1) + process_codes[rows]
+    rows = rows[np.argsort(block_id, kind='stable')]
+    _, starts = np.unique(np.sort(block_id), return_index=True)
+
+    results = []
+    for block in np.split(rows, starts[1:]):
+        block_overall = overall[block]
+        upper = np.quantile(block_overall, mentor_quantile)
+        lower = np.quantile(block_overall, mentee_quantile)
+        mentors = block[block_overall >= upper]
+        mentees = block[(block_overall <= lower) & (block_overall < upper)]
+        if len(mentors) == 0 or len(mentees) == 0:
+            continue
+
+        for part_mentees, part_mentors in _split_block(mentees, mentors, overall, max_block):
+            if len(part_mentees) == 0 or len(part_mentors) == 0:
+                continue
+            mentee_scores = _block_scores(skill_matrix, part_mentees)
+            mentor_scores = _block_scores(skill_matrix, part_mentors)
+            benefit = complementarity(mentee_scores, mentor_scores)
+            if has_shift:
+                same_shift = shift_codes[part_mentees][:, None] == shift_codes[part_mentors][None, :]
+                benefit = np.where(same_shift, benefit, benefit * (1 - shift_penalty))
+
+            # メンターの列を担当人数分だけ複製して割り当て
+            slots = np.repeat(np.arange(len(part_mentors)), mentees_per_mentor)
+            mentee_index, slot_index = linear_sum_assignment(benefit[:, slots], maximize=True)
+            mentor_index = slots[slot_index]
+            value = benefit[mentee_index, mentor_index]
+            keep = value > 0
+            mentee_index, mentor_index, value = mentee_index[keep], mentor_index[keep], value[keep]
+
+            # 差が最も大きいスキルを主な指導内容とする
+            diff = np.fmax(mentor_scores[mentor_index] - mentee_scores[mentee_index], 0)
+            top_skill = np.asarray(skill_matrix.skills, dtype=object)[diff.argmax(axis=1)] if len(diff) else []
+
+            results.append(pd.DataFrame({
+                'メンター行': part_mentors[mentor_index],
+                'メンティー行': part_mentees[mentee_index],
+                '補完度': value.astype(np.float64),
+                '主な指導スキル': top_skill
+            }))
+
+    if not results:
+        return pd.DataFrame(columns=columns)
+
+    df_pairs = pd.concat(results, ignore_index=True)
+    mentor_rows = df_pairs['メンター行'].to_numpy()
+    mentee_rows = df_pairs['メンティー行'].to_numpy()
+    df_pairs['拠点'] = np.asarray(skill_matrix.labels('拠点'), dtype=object)[location_codes[mentee_rows]]
+    df_pairs['工程'] = np.asarray(skill_matrix.labels('工程'), dtype=object)[process_codes[mentee_rows]]
+    df_pairs['メンター総合'] = overall[mentor_rows]
+    df_pairs['メンティー総合'] = overall[mentee_rows]
+    df_pairs['シフト一致'] = shift_codes[mentor_rows] == shift_codes[mentee_rows] if has_shift else np.nan
+    return df_pairs[columns].sort_values(['拠点', '工程', '補完度'], ascending=[True, True, False], ignore_index=True)
+
+
+@versioned_cache(namespace='action_plan')
+def cached_mentor_pairs(skill_matrix, location=None, mentor_quantile=MENTOR_QUANTILE,
+                        mentee_quantile=MENTEE_QUANTILE, mentees_per_mentor=1):
+    """データセットのバージョン・条件ごとにペアリング結果をキャッシュ"""
+    return pair_mentors(skill_matrix, location, mentor_quantile, mentee_quantile, mentees_per_mentor)
@@ -0,0 +1,159 @@
+# analytics/regression.py
+# 品質KPIのスキルカテゴリ多変量回帰（拠点×工程グループを一括推定）
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.versioned_cache import versioned_cache
+
+# 目的変数
+TARGET_COLUMNS = ['品質不良率 (%)', '歩留まり (%)']
+
+# グループの軸（拠点×工程）
+GROUP_KEYS = ('拠点', '工程')
+
+# シフトダミー（夜勤=1）
+SHIFT_DUMMY = '夜勤ダミー'
+
+
+def get_category_columns(df):
+    """説明変数とするスキルカテゴリ平均列（*_平均）を取得"""
+    return [c for c in df.columns if str(c).endswith('_平均')]
+
+
+def build_design(df, feature_columns):
+    """説明変数行列（切片 + カテゴリ平均 + シフトダミー）を作成"""
+    X = np.column_stack([
+        np.ones(len(df)),
+        df[feature_columns].to_numpy(dtype=np.float64),
+        (df['シフト'] == '夜勤').to_numpy(dtype=np.float64)
+    ])
+    return X, ['切片'] + list(feature_columns) + [SHIFT_DUMMY]
+
+
+def batched_ols(X, y, codes, n_groups):
+    """
+    グループごとの最小二乗法を一括で解く
+
+    行をグループ単位の (グループ数, 最大行数, 説明変数数) 配列に詰め、
+    正規方程式をバッチで解く。欠損を含む行は重み0として除外する。
+
+    Returns:
+        dict: coef, se, r2, adj_r2, n（いずれも先頭軸がグループ）
+    """
+    n_features = X.shape[1]
+    valid = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+
+    order = np.argsort(codes, kind='stable')
+    codes_sorted = codes[order]
+    starts = np.searchsorted(codes_sorted, np.arange(n_groups))
+    position = np.arange(len(codes_sorted)) - starts[codes_sorted]
+    n_max = int(position.max()) + 1 if len(position) else 0
+
+    Xb = np.zeros((n_groups, n_max, n_features))
+    yb = np.zeros((n_groups, n_max))
+    wb = np.zeros((n_groups, n_max))
+
+    w = valid[order].astype(np.float64)
+    Xb[codes_sorted, position] = np.where(w[:, None] > 0, X[order], 0.0)
+    yb[codes_sorted, position] = np.where(w > 0, y[order], 0.0)
+    wb[codes_sorted, position] = w
+
+    # 正規方程式（ランク落ちに備えて擬似逆行列を使用）
+    XtX = np.einsum('gni,gnj->gij', Xb, Xb)
+    Xty = np.einsum('gni,gn->gi', Xb, yb)
+    XtX_inv = np.linalg.pinv(XtX)
+    coef = np.einsum('gij,gj->gi', XtX_inv, Xty)
+
+    n = wb.sum(axis=1)
+    resid = (yb - np.einsum('gni,gi->gn', Xb, coef)) * wb
+    rss = (resid ** 2).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_mean = yb.sum(axis=1) / n
+        tss = (((yb - y_mean[:, None]) * wb) ** 2).sum(axis=1)
+        dof = n - n_features
+        sigma2 = np.where(dof > 0, rss / dof, np.nan)
+        se = np.sqrt(np.clip(np.diagonal(XtX_inv, axis1=1, axis2=2), 0, None) * sigma2[:, None])
+        r2 = np.where(tss > 0, 1 - rss / tss, np.nan)
+        adj_r2 = np.where(dof > 0, 1 - (1 - r2) * (n - 1) / dof, np.nan)
+
+    return {'coef': coef, 'se': se, 'r2': r2, 'adj_r2': adj_r2, 'n': n.astype(np.int64)}
+
+
+def fit_regressions(df_daily_prod, targets=None, by=GROUP_KEYS):
+    """
+    全グループ×目的変数の多変量回帰を一括推定（キャッシュなし）
+
+    Returns:
+        tuple: (係数表, 適合度表)
+            係数表: グループ軸 + 目的変数, 説明変数, 係数, 標準誤差, t値, p値
+            適合度表: グループ軸 + 目的変数, R², 調整済みR², サンプル数
+    """
+    by = list(by)
+    if targets is None:
+        targets = [c for c in TARGET_COLUMNS if c in df_daily_prod.columns]
+
+    feature_columns = get_category_columns(df_daily_prod)
+    X, names = build_design(df_daily_prod, feature_columns)
+
+    grouped = df_daily_prod.groupby(by, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    group_keys = [key if isinstance(key, tuple) else (key,) for key in grouped.size().index]
+    n_groups = len(group_keys)
+
+    coef_frames = []
+    fit_frames = []
+
+    for target in targets:
+        result = batched_ols(X, df_daily_prod[target].to_numpy(dtype=np.float64), codes, n_groups)
+
+        dof = (result['n'] - len(names))[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_values = result['coef'] / result['se']
+            p_values = 2 * stats.t.sf(np.abs(t_values), np.where(dof > 0, dof, np.nan))
+
+        g_idx = np.repeat(np.arange(n_groups), len(names))
+        coef_frame = {key: [group_keys[g][i] for g in g_idx] for i, key in enumerate(by)}
+        coef_frame['目的変数'] = target
+        coef_frame['説明変数'] = np.tile(names, n_groups)
+        coef_frame['係数'] = result['coef'].ravel()
+        coef_frame['標準誤差'] = result['se'].ravel()
+        coef_frame['t値'] = t_values.ravel()
+        coef_frame['p値'] = p_values.ravel()
+        coef_frames.append(pd.DataFrame(coef_frame))
+
+        fit_frame = {key: [k[i] for k in group_keys] for i, key in enumerate(by)}
+        fit_frame['目的変数'] = target
+        fit_frame['R²'] = result['r2']
+        fit_frame['調整済みR²'] = result['adj_r2']
+        fit_frame['サンプル数'] = result['n']
+        fit_frames.append(pd.DataFrame(fit_frame))
+
+    return pd.concat(coef_frames, ignore_index=True), pd.concat(fit_frames, ignore_index=True)
+
+
+@versioned_cache(namespace='quality')
+def compute_regression_batch(df_daily_prod, by=GROUP_KEYS):
+    """全拠点×工程の回帰結果をまとめて計算してキャッシュ"""
+    return fit_regressions(df_daily_prod, by=by)
+
+
+@versioned_cache(namespace='quality')
+def fit_group_detail(df_daily_prod, location, process, target='品質不良率 (%)'):
+    """
+    選択グループの詳細回帰（statsmodels OLS）。データセットのバージョン・拠点・工程・目的変数ごとにキャッシュ
+
+    Returns:
+        RegressionResults: statsmodels の推定結果（summary() で詳細表示）
+    """
+    import statsmodels.api as sm
+
+    df_group = df_daily_prod[
+        (df_daily_prod['拠点'] == location) & (df_daily_prod['工程'] == process)
+    ]
+    X, names = build_design(df_group, get_category_columns(df_group))
+    exog = pd.DataFrame(X, columns=names, index=df_group.index)
+
+    return sm.OLS(df_group[target], exog, missing='drop').fit()
@@ -0,0 +1,161 @@
+# analytics/roster.py
+# 出勤表（日×チーム枠 × 従業員の疎行列）からの日次スキル平均の算出
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# 出勤表の1枠（=日次生産データの1行）を特定する列
+ROSTER_SLOT_KEYS = ('日付', '拠点', '工程', 'チーム', 'シフト')
+
+
+def category_membership(skill_hierarchy):
+    """
+    スキル→カテゴリの所属行列を作成
+
+    Returns:
+        tuple: (スキルリスト, カテゴリリスト, (スキル数, カテゴリ数) の0/1行列)
+    """
+    categories = list(skill_hierarchy.keys())
+    skills = [skill for category in categories for skill in skill_hierarchy[category]['skills']]
+    membership = np.zeros((len(skills), len(categories)), dtype=np.float32)
+    row = 0
+    for col, category in enumerate(categories):
+        n_skills = len(skill_hierarchy[category]['skills'])
+        membership[row:row + n_skills, col] = 1
+        row += n_skills
+    return skills, categories, membership
+
+
+def attendance_matrix(slot_codes, employee_codes, n_slots, n_employees):
+    """
+    出勤記録（枠番号, 従業員番号）の組から CSR 形式の出勤行列を作成
+
+    同じ枠・従業員の重複記録は1件として扱う。
+
+    Returns:
+        scipy.sparse.csr_matrix: (枠数, 従業員数) の0/1行列
+    """
+    slot_codes = np.asarray(slot_codes)
+    # 枠番号順に並べて indptr を直接作る（COO を経由しない）
+    order = np.argsort(slot_codes, kind='stable')
+    index_dtype = np.int64 if len(order) >= np.iinfo(np.int32).max else np.int32
+
+    indices = np.asarray(employee_codes)[order].astype(index_dtype)
+    indptr = np.zeros(n_slots + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(slot_codes, minlength=n_slots), out=indptr[1:])
+    data = np.ones(len(indices), dtype=np.float32)
+
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_slots, n_employees))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def assign_slot_codes(df_roster, slot_keys=ROSTER_SLOT_KEYS):
+    """出勤記録に枠番号を振る（枠キー昇順）。戻り値は (枠番号配列, 枠の一覧 DataFrame)"""
+    grouped = df_roster.groupby(list(slot_keys), sort=True)
+    codes = grouped.ngroup().to_numpy()
+    df_slots = grouped.size().reset_index(name='出勤記録数').drop(columns='出勤記録数')
+    return codes, df_slots
+
+
+def build_roster_matrix(df_roster, employee_ids, slot_keys=ROSTER_SLOT_KEYS):
+    """
+    出勤表 DataFrame から出勤行列と枠の一覧を作成
+
+    Args:
+        df_roster: 1行=1名の出勤記録（slot_keys の列 + 従業員ID）
+        employee_ids: 出勤行列の列順となる従業員IDの並び（df_skill['従業員ID']）
+
+    Returns:
+        tuple: (出勤行列, 枠の一覧 DataFrame, スキルデータにない従業員の記録数)
+    """
+    employee_codes = pd.Index(employee_ids).get_indexer(df_roster['従業員ID'])
+    known = employee_codes >= 0
+
+    codes, df_slots = assign_slot_codes(df_roster[known], slot_keys)
+    matrix = attendance_matrix(codes, employee_codes[known], len(df_slots), len(employee_ids))
+    return matrix, df_slots, int((~known).sum())
+
+
+def roster_skill_averages(attendance, skill_values, membership):
+    """
+    出勤者のスキルから枠ごとのスキル・カテゴリ平均を計算
+
+    欠損スキル（未評価）は値と有効フラグを横に並べた行列として1回の疎行列積で集計し、
+    評価済みの出勤者だけで平均する。カテゴリ平均はスキルごとの平均をカテゴリ内で平均した値
+    （従来の df[category_skills].mean().mean() と同じ定義）。
+
+    Args:
+        attendance: (枠数, 従業員数) の出勤行列
+        skill_values: (従業員数, スキル数) のスコア行列（未評価は NaN）
+        membership: (スキル数, カテゴリ数) の所属行列
+
+    Returns:
+        tuple: (出勤人数, カテゴリ平均 (枠数, カテゴリ数), 全スキル平均 (枠数,))
+    """
+    skill_values = np.asarray(skill_values, dtype=np.float32)
+    n_skills = skill_values.shape[1]
+    valid = ~np.isnan(skill_values)
+    stacked = np.hstack([np.where(valid, skill_values, 0), valid]).astype(np.float32)
+
+    # 出勤者のスキル合計と評価済み人数を1回の積で求める
+    totals = np.asarray(attendance @ stacked, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        skill_means = totals[:, :n_skills] / totals[:, n_skills:]
+
+    skill_valid = ~np.isnan(skill_means)
+    skill_sums = np.where(skill_valid, skill_means, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        category_means = (skill_sums @ membership) / (skill_valid @ membership)
+        overall_means = skill_sums.sum(axis=1) / skill_valid.sum(axis=1)
+
+    headcount = np.diff(attendance.indptr)
+    return headcount, category_means, overall_means
+
+
+def compute_roster_averages(df_roster, df_skill, skill_hierarchy, slot_keys=ROSTER_SLOT_KEYS):
+    """
+    出勤表とスキルデータから枠ごとの日次スキル平均を計算
+
+    Returns:
+        DataFrame: slot_keys + 従業員数, 平均スキル予測値, {カテゴリ}_平均
+    """
+    skills, categories, membership = category_membership(skill_hierarchy)
+    matrix, df_slots, _ = build_roster_matrix(df_roster, df_skill['従業員ID'], slot_keys)
+
+    skill_values = df_skill[skills].to_numpy(dtype=np.float32, na_value=np.nan)
+    return averages_frame(df_slots, matrix, skill_values, membership, categories)
+
+
+def averages_frame(df_slots, attendance, skill_values, membership, categories):
+    """出勤行列とスコア行列から枠ごとの平均表を作成"""
+    headcount, category_means, overall_means = roster_skill_averages(attendance, skill_values, membership)
+
+    df_result = df_slots.copy()
+    df_result['従業員数'] = headcount
+    df_result['平均スキル予測値'] = overall_means.round(2)
+    for i, category in enumerate(categories):
+        df_result[f'{category}_平均'] = category_means[:, i].round(2)
+    return df_result
+
+
+def apply_roster_averages(df_daily_prod, df_averages, slot_keys=ROSTER_SLOT_KEYS):
+    """
+    日次生産データのスキル平均列を出勤表ベースの値で置き換える
+
+    出勤表のない行は元の値を残す。
+    """
+    slot_keys = list(slot_keys)
+    value_columns = [col for col in df_averages.columns if col not in slot_keys]
+
+    df_merged = df_daily_prod.merge(
+        df_averages, on=slot_keys, how='left', suffixes=('', '_出勤表'), indicator=True
+    )
+    has_roster = (df_merged.pop('_merge') == 'both').to_numpy()
+    for col in value_columns:
+        roster_col = f'{col}_出勤表' if col in df_daily_prod.columns else col
+        if roster_col != col:
+            df_merged[col] = df_merged[col].where(~has_roster, df_merged.pop(roster_col))
+    return df_merged
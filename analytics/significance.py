@@ -0,0 +1,143 @@
+# analytics/significance.py
+# ギャップの有意性検定（全セルの Welch t 検定を1回で実行し、Benjamini-Hochberg 法で補正）
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from analytics.location_loss import BENCHMARK_LOCATION
+from utils.versioned_cache import versioned_cache
+
+# 有意とみなす FDR（q値）の水準
+FDR_ALPHA = 0.05
+
+
+def benjamini_hochberg(p_values):
+    """
+    Benjamini-Hochberg 法の q値（調整済み p値）を計算
+
+    NaN（検定できなかったセル）は検定数に含めず、NaN のまま返す。
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    q_values = np.full(p_values.shape, np.nan)
+    tested = np.flatnonzero(~np.isnan(p_values))
+    if len(tested) == 0:
+        return q_values
+
+    order = tested[np.argsort(p_values[tested], kind='stable')]
+    ranked = p_values[order] * len(order) / np.arange(1, len(order) + 1)
+    # 大きい順位からの累積最小値で単調性を保つ
+    q_values[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return q_values
+
+
+def _cell_stats(skill_matrix, group_columns, level):
+    """属性グループ×項目（カテゴリまたはスキル）の平均・標準偏差・件数を縦持ちで返す"""
+    if level == 'category':
+        df_groups, mean, std, count = skill_matrix.grouped_employee_category_stats(group_columns)
+        items, item_col = skill_matrix.categories, 'スキルカテゴリ'
+    elif level == 'skill':
+        df_groups, mean, std, count = skill_matrix.grouped_skill_stats(group_columns)
+        items, item_col = skill_matrix.skills, 'スキル'
+    else:
+        raise ValueError(f"未対応の検定単位: {level}")
+
+    df_cells = df_groups.drop(columns='人数').loc[np.repeat(np.arange(len(df_groups)), len(items))]
+    df_cells = df_cells.reset_index(drop=True)
+    df_cells[item_col] = np.tile(items, len(df_groups))
+    df_cells['平均'] = mean.ravel()
+    df_cells['標準偏差'] = std.ravel()
+    df_cells['件数'] = count.ravel()
+    return df_cells, item_col
+
+
+def compute_gap_significance(skill_matrix, benchmark_location=BENCHMARK_LOCATION, group_columns=('拠点', '工程'),
+                             level='category', alpha=FDR_ALPHA):
+    """
+    全拠点×属性×項目のセルについて、ベンチマーク拠点の同じセルとの差を Welch t 検定
+
+    セルごとの平均・標準偏差・件数をまとめて求め、scipy.stats.ttest_ind_from_stats を
+    全セルの配列に対して1回だけ呼ぶ。p値は Benjamini-Hochberg 法で全セルまとめて補正する。
+    カテゴリ単位の標本は従業員ごとのカテゴリ平均（評価済みスキルのみ）。
+
+    Args:
+        skill_matrix: SkillMatrix
+        benchmark_location: 比較の基準とする拠点
+        group_columns: 拠点と、ベンチマークと突き合わせる属性（例: 工程、工程+シフト）
+        level: 'category'（スキルカテゴリ単位）または 'skill'（スキル単位）
+
+    Returns:
+        DataFrame: group_columns, スキルカテゴリ（またはスキル）, 対象平均, ベンチマーク平均, ギャップ,
+            対象人数, ベンチマーク人数, t値, p値, q値, 有意（q < alpha）。ベンチマーク拠点自身の行は含まない
+    """
+    group_columns = list(group_columns)
+    if not skill_matrix.has_column('拠点') or any(not skill_matrix.has_column(c) for c in group_columns):
+        return pd.DataFrame()
+
+    df_cells, item_col = _cell_stats(skill_matrix, group_columns, level)
+    match_keys = [c for c in group_columns if c != '拠点'] + [item_col]
+
+    is_benchmark = df_cells['拠点'] == benchmark_location
+    df_benchmark = df_cells.loc[is_benchmark, match_keys + ['平均', '標準偏差', '件数']]
+    df_result = df_cells[~is_benchmark].merge(
+        df_benchmark, on=match_keys, how='left', suffixes=('', '_ベンチマーク')
+    )
+
+    n_target = df_result['件数'].to_numpy(dtype=np.float64)
+    n_benchmark = df_result['件数_ベンチマーク'].fillna(0).to_numpy(dtype=np.float64)
+    testable = (n_target >= 2) & (n_benchmark >= 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_values, p_values = stats.ttest_ind_from_stats(
+            df_result['平均_ベンチマーク'].to_numpy(dtype=np.float64),
+            df_result['標準偏差_ベンチマーク'].to_numpy(dtype=np.float64),
+            np.maximum(n_benchmark, 1),
+            df_result['平均'].to_numpy(dtype=np.float64),
+            df_result['標準偏差'].to_numpy(dtype=np.float64),
+            np.maximum(n_target, 1),
+            equal_var=False
+        )
+    t_values = np.where(testable, t_values, np.nan)
+    p_values = np.where(testable, p_values, np.nan)
+    q_values = benjamini_hochberg(p_values)
+
+    return pd.DataFrame({
+        **{col: df_result[col] for col in group_columns},
+        item_col: df_result[item_col],
+        '対象平均': df_result['平均'],
+        'ベンチマーク平均': df_result['平均_ベンチマーク'],
+        'ギャップ': df_result['平均_ベンチマーク'] - df_result['平均'],
+        '対象人数': n_target.astype(np.int64),
+        'ベンチマーク人数': n_benchmark.astype(np.int64),
+        't値': t_values,
+        'p値': p_values,
+        'q値': q_values,
+        '有意': q_values < alpha
+    })
+
+
+@versioned_cache(namespace='root_cause')
+def cached_gap_significance(skill_matrix, benchmark_location=BENCHMARK_LOCATION,
+                            group_columns=('拠点', '工程'), level='category', alpha=FDR_ALPHA):
+    """データセットのバージョンごとに有意性検定の結果をキャッシュ"""
+    return compute_gap_significance(skill_matrix, benchmark_location, group_columns, level, alpha)
+
+
+def attach_significance(df, df_significance, keys):
+    """
+    集計表に q値・有意 列を付与（検定結果のないセルは q値 NaN・有意 False）
+
+    Args:
+        df: ギャップ表（compute_gap_heatmap / compute_bottleneck_table の結果など）
+        df_significance: compute_gap_significance の結果
+        keys: 突き合わせる列（例: ['工程', 'スキルカテゴリ']）
+    """
+    if df.empty or df_significance.empty:
+        df_result = df.copy()
+        df_result['q値'] = np.nan
+        df_result['有意'] = False
+        return df_result
+
+    df_result = df.merge(df_significance[list(keys) + ['q値', '有意']], on=list(keys), how='left')
+    df_result['有意'] = df_result['有意'].fillna(False).astype(bool)
+    return df_result
@@ -0,0 +1,247 @@
+# analytics/skill_gap.py
+# 工程×スキルカテゴリのギャップ集計とボトルネック特定（根本原因分析ビューの計算部分）
+
+import numpy as np
+import pandas as pd
+
+from analytics.location_loss import BENCHMARK_LOCATION
+from analytics.significance import attach_significance
+from utils.versioned_cache import versioned_cache
+
+BOTTLENECK_SHIFTS = ['日勤', '夜勤']
+
+# 全拠点比較で「要改善」とみなすギャップ
+GAP_ALERT_THRESHOLD = 0.5
+
+
+def _stats_by_process(skill_matrix, location):
+    """拠点内の工程ごとのカテゴリ平均・バラツキ・人数を {工程: (平均, バラツキ, 人数)} で返す"""
+    rows = skill_matrix.rows({'拠点': location})
+    if len(rows) == 0:
+        return {}
+    df_groups, mean, std = skill_matrix.grouped_category_stats(['工程'], rows)
+    return {
+        process: (mean[i], std[i], count)
+        for i, (process, count) in enumerate(zip(df_groups['工程'], df_groups['人数']))
+    }
+
+
+def compute_gap_heatmap(skill_matrix, target_location, processes, skill_categories,
+                        benchmark_location=BENCHMARK_LOCATION):
+    """
+    工程×スキルカテゴリごとの平均・バラツキとベンチマークとのギャップを集計
+
+    Args:
+        skill_matrix: SkillMatrix
+        target_location: 対象拠点
+        processes: 工程リスト（この順に並べる）
+        skill_categories: スキルカテゴリリスト
+
+    Returns:
+        DataFrame: 工程, スキルカテゴリ, 対象拠点_平均, 対象拠点_バラツキ,
+            ベンチマーク_平均, ベンチマーク_バラツキ, ギャップ, 人数
+    """
+    target_stats = _stats_by_process(skill_matrix, target_location)
+    benchmark_stats = _stats_by_process(skill_matrix, benchmark_location)
+
+    heatmap_data = []
+    for process in processes:
+        # 対象拠点にデータがない工程は除外
+        if process not in target_stats:
+            continue
+        target_mean, target_std, count = target_stats[process]
+        benchmark_mean, benchmark_std, _ = benchmark_stats.get(process, (None, None, 0))
+
+        for category in skill_categories:
+            # データに存在するスキルがないカテゴリは除外
+            if len(skill_matrix.skill_columns(category)) == 0:
+                continue
+            col = skill_matrix.category_position[category]
+            tm = target_mean[col]
+            bm = benchmark_mean[col] if benchmark_mean is not None else np.nan
+
+            heatmap_data.append({
+                '工程': process,
+                'スキルカテゴリ': category,
+                '対象拠点_平均': tm,
+                '対象拠点_バラツキ': target_std[col],
+                'ベンチマーク_平均': bm,
+                'ベンチマーク_バラツキ': benchmark_std[col] if benchmark_std is not None else np.nan,
+                'ギャップ': bm - tm if not pd.isna(tm) and not pd.isna(bm) else 0,
+                '人数': count
+            })
+
+    return pd.DataFrame(heatmap_data)
+
+
+def compute_bottleneck_table(skill_matrix, target_location, processes, skill_categories, top_n=10,
+                             df_significance=None, significant_only=False):
+    """
+    工程×シフト×スキルカテゴリのリスクスコアを計算し、上位を返す
+
+    シフト列のないスキルデータでは空の表を返す。
+    df_significance（拠点×工程×シフト単位の compute_gap_significance の結果）を渡すと
+    q値・有意 列を付与し、significant_only なら有意なセルだけから上位を選ぶ。
+
+    Returns:
+        DataFrame: 工程, シフト, スキルカテゴリ, 平均スコア, バラツキ, 人数,
+            リスクスコア, 対策優先度（リスクスコア降順で上位 top_n 件）
+    """
+    columns = ['工程', 'シフト', 'スキルカテゴリ', '平均スコア', 'バラツキ', '人数', 'リスクスコア']
+    rows = skill_matrix.rows({'拠点': target_location}) if skill_matrix.has_column('シフト') else []
+    if len(rows) == 0:
+        significance_columns = ['q値', '有意'] if df_significance is not None else []
+        return pd.DataFrame(columns=columns + significance_columns + ['対策優先度'])
+
+    df_groups, mean, std = skill_matrix.grouped_category_stats(['工程', 'シフト'], rows)
+    group_position = {
+        (process, shift): i for i, (process, shift) in enumerate(zip(df_groups['工程'], df_groups['シフト']))
+    }
+
+    bottleneck_analysis = []
+    for process in processes:
+        for shift in BOTTLENECK_SHIFTS:
+            i = group_position.get((process, shift))
+            if i is None:
+                continue
+
+            for category in skill_categories:
+                col = skill_matrix.category_position[category]
+                avg_score = mean[i, col]
+                std_score = std[i, col]
+
+                bottleneck_analysis.append({
+                    '工程': process,
+                    'シフト': shift,
+                    'スキルカテゴリ': category,
+                    '平均スコア': avg_score,
+                    'バラツキ': std_score,
+                    '人数': df_groups['人数'].iat[i],
+                    # リスクスコア計算
+                    'リスクスコア': (5 - avg_score) * 0.5 + std_score * 0.5
+                })
+
+    df_bottleneck = pd.DataFrame(bottleneck_analysis, columns=columns)
+    if df_significance is not None:
+        if not df_significance.empty:
+            df_significance = df_significance[df_significance['拠点'] == target_location]
+        df_bottleneck = attach_significance(df_bottleneck, df_significance, ['工程', 'シフト', 'スキルカテゴリ'])
+        if significant_only:
+            df_bottleneck = df_bottleneck[df_bottleneck['有意']]
+    df_bottleneck = df_bottleneck.sort_values('リスクスコア', ascending=False).head(top_n)
+
+    threshold = df_bottleneck['リスクスコア'].quantile(0.7)
+    df_bottleneck['対策優先度'] = np.where(df_bottleneck['リスクスコア'] > threshold, '🔴 即時対応', '🟡 計画対応')
+
+    return df_bottleneck
+
+
+def compute_gap_tensor(skill_matrix, processes, skill_categories):
+    """
+    拠点×工程×スキルカテゴリの平均・バラツキ・人数をスキルデータ全体から一括計算
+
+    拠点×工程の全グループを1回の行列積で集計するため、どの拠点をベンチマークにしても
+    ギャップはこのテンソルの引き算だけで求まる。
+
+    Returns:
+        dict: locations, processes, categories（データにスキルがあるカテゴリのみ）,
+            mean / std（拠点数, 工程数, カテゴリ数）, count（拠点数, 工程数）
+    """
+    locations = skill_matrix.labels('拠点')
+    categories = [c for c in skill_categories if len(skill_matrix.skill_columns(c)) > 0]
+    category_columns = [skill_matrix.category_position[c] for c in categories]
+
+    shape = (len(locations), len(processes), len(categories))
+    tensor_mean = np.full(shape, np.nan)
+    tensor_std = np.full(shape, np.nan)
+    count = np.zeros(shape[:2], dtype=np.int64)
+
+    df_groups, mean, std = skill_matrix.grouped_category_stats(['拠点', '工程'])
+    location_index = pd.Index(locations).get_indexer(df_groups['拠点'])
+    process_index = pd.Index(processes).get_indexer(df_groups['工程'])
+    known = process_index >= 0
+    li, pi = location_index[known], process_index[known]
+    tensor_mean[li, pi] = mean[known][:, category_columns]
+    tensor_std[li, pi] = std[known][:, category_columns]
+    count[li, pi] = df_groups['人数'].to_numpy()[known]
+
+    return {
+        'locations': locations,
+        'processes': list(processes),
+        'categories': categories,
+        'mean': tensor_mean,
+        'std': tensor_std,
+        'count': count
+    }
+
+
+@versioned_cache(namespace='root_cause')
+def cached_gap_tensor(skill_matrix, processes, skill_categories):
+    """データセットのバージョンごとに拠点×工程×カテゴリのテンソルをキャッシュ"""
+    return compute_gap_tensor(skill_matrix, processes, skill_categories)
+
+
+def gap_from_tensor(tensor, benchmark_location):
+    """
+    ベンチマーク拠点との差（ベンチマーク - 各拠点）を (拠点数, 工程数, カテゴリ数) で返す
+
+    compute_gap_heatmap と同じく、どちらかの平均がないセルは 0、
+    対象拠点にその工程の従業員がいないセルは NaN。
+    """
+    benchmark = tensor['mean'][tensor['locations'].index(benchmark_location)]
+    gap = benchmark[None, :, :] - tensor['mean']
+    gap = np.where(np.isnan(gap), 0.0, gap)
+    return np.where(tensor['count'][:, :, None] > 0, gap, np.nan)
+
+
+def rank_location_gaps(tensor, benchmark_location, threshold=GAP_ALERT_THRESHOLD, significant=None):
+    """
+    ベンチマーク以外の全拠点をギャップの大きい順に並べた表
+
+    Args:
+        significant: significance_tensor_mask の有意フラグ。渡すと要改善セル数を有意なセルだけで数える
+
+    Returns:
+        DataFrame: 順位, 拠点, 人数, 平均ギャップ（人数加重）, 最大ギャップ, 最大ギャップ工程,
+            最大ギャップカテゴリ, 要改善セル数（ギャップ > threshold の工程×カテゴリ数）
+    """
+    gap = gap_from_tensor(tensor, benchmark_location)
+    alert = np.nan_to_num(gap, nan=-np.inf) > threshold
+    if significant is not None:
+        alert &= significant
+    weights = np.broadcast_to(tensor['count'][:, :, None], gap.shape).astype(np.float64)
+    has_data = ~np.isnan(gap)
+
+    flat = np.where(has_data, gap, -np.inf).reshape(len(gap), -1)
+    worst = flat.argmax(axis=1)
+    worst_process, worst_category = np.unravel_index(worst, gap.shape[1:])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weighted = (np.where(has_data, gap, 0) * weights).sum(axis=(1, 2)) / (weights * has_data).sum(axis=(1, 2))
+
+    df_rank = pd.DataFrame({
+        '拠点': tensor['locations'],
+        '人数': tensor['count'].sum(axis=1),
+        '平均ギャップ': weighted,
+        '最大ギャップ': flat[np.arange(len(flat)), worst],
+        '最大ギャップ工程': np.array(tensor['processes'])[worst_process],
+        '最大ギャップカテゴリ': np.array(tensor['categories'])[worst_category],
+        '要改善セル数': alert.sum(axis=(1, 2))
+    })
+    df_rank = df_rank[(df_rank['拠点'] != benchmark_location) & (df_rank['人数'] > 0)]
+    df_rank = df_rank.sort_values('平均ギャップ', ascending=False).reset_index(drop=True)
+    df_rank.insert(0, '順位', np.arange(1, len(df_rank) + 1))
+    return df_rank
+
+
+def significance_tensor_mask(tensor, df_significance):
+    """compute_gap_significance（拠点×工程単位）の結果をテンソルと同じ (拠点数, 工程数, カテゴリ数) の有意フラグに変換"""
+    mask = np.zeros(tensor['mean'].shape, dtype=bool)
+    if df_significance.empty:
+        return mask
+    df_significant = df_significance[df_significance['有意']]
+    li = pd.Index(tensor['locations']).get_indexer(df_significant['拠点'])
+    pi = pd.Index(tensor['processes']).get_indexer(df_significant['工程'])
+    ci = pd.Index(tensor['categories']).get_indexer(df_significant['スキルカテゴリ'])
+    known = (li >= 0) & (pi >= 0) & (ci >= 0)
+    mask[li[known], pi[known], ci[known]] = True
+    return mask
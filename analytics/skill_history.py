@@ -0,0 +1,173 @@
+# analytics/skill_history.py
+# 評価日ごとのスキル評価履歴と、生産日時点で有効な評価の as-of 結合
+
+import numpy as np
+import pandas as pd
+
+from analytics.roster import (
+    ROSTER_SLOT_KEYS, assign_slot_codes, attendance_matrix, averages_frame, category_membership
+)
+
+# 合成キー（従業員番号 << 32 | 日数）で日数を非負にするためのオフセット
+_DAY_OFFSET = 2 ** 31
+
+
+def _to_days(dates):
+    """日付列を 1970-01-01 からの日数（int64）に変換"""
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+class SkillEvaluationStore:
+    """
+    従業員ごとのスキル評価履歴（1行 = 1従業員の1回の評価）
+
+    評価は (従業員, 評価日) 順に並べ、合成キーの二分探索で
+    任意の日付時点で有効な評価（その日以前で最新の評価）を引く。
+    df_skill（1従業員1評価）からもそのまま作成できる。
+    """
+
+    def __init__(self, df_evaluations, skill_columns):
+        self.skill_columns = list(skill_columns)
+        self._set_evaluations(df_evaluations)
+
+    def _normalize(self, df):
+        df = df[['従業員ID', '評価日'] + self.skill_columns].copy()
+        df['評価日'] = pd.to_datetime(df['評価日']).astype('datetime64[ns]')
+        return df
+
+    def _set_evaluations(self, df):
+        df = self._normalize(df)
+        self._employee_index = pd.Index(df['従業員ID'].unique())
+        df['_emp'] = self._employee_index.get_indexer(df['従業員ID'])
+        df['_day'] = _to_days(df['評価日'])
+        # 同じ従業員・同じ評価日は後から登録された評価を採用
+        df = df.drop_duplicates(['従業員ID', '_day'], keep='last')
+        df = df.sort_values(['_emp', '_day'], kind='stable').reset_index(drop=True)
+
+        self._emp_codes = df.pop('_emp').to_numpy(np.int64)
+        self._keys = (self._emp_codes << 32) | (df.pop('_day').to_numpy(np.int64) + _DAY_OFFSET)
+        self._df = df
+        self._values = None
+
+    @property
+    def evaluations(self):
+        """評価履歴（従業員ID・評価日順）"""
+        return self._df
+
+    @property
+    def n_versions(self):
+        return len(self._df)
+
+    def skill_values(self, skills=None):
+        """(評価数, スキル数) の float32 スコア行列（未評価は NaN）"""
+        if skills is not None and list(skills) != self.skill_columns:
+            return self._df[list(skills)].to_numpy(dtype=np.float32, na_value=np.nan)
+        if self._values is None:
+            self._values = self._df[self.skill_columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        return self._values
+
+    def asof_indices(self, employee_ids, dates):
+        """
+        各（従業員, 日付）で有効な評価の行番号を返す（merge_asof の backward と同じ規則）
+
+        その日以前に評価がない場合や未登録の従業員は -1。
+        """
+        emp = self._employee_index.get_indexer(pd.Index(employee_ids)).astype(np.int64)
+        keys = (np.maximum(emp, 0) << 32) | (_to_days(dates) + _DAY_OFFSET)
+        pos = np.searchsorted(self._keys, keys, side='right') - 1
+
+        matched = (emp >= 0) & (pos >= 0)
+        matched &= self._emp_codes[np.maximum(pos, 0)] == emp
+        return np.where(matched, pos, -1)
+
+    def as_of(self, df, date_col='日付'):
+        """df の各行（従業員ID, date_col）に、その時点で有効な評価日とスキルを付与"""
+        pos = self.asof_indices(df['従業員ID'], df[date_col])
+        matched = pos >= 0
+
+        df_result = df.copy()
+        df_result['適用評価日'] = pd.NaT
+        df_result.loc[matched, '適用評価日'] = self._df['評価日'].to_numpy()[pos[matched]]
+        values = np.full((len(df), len(self.skill_columns)), np.nan)
+        values[matched] = self._df[self.skill_columns].to_numpy(dtype=np.float64, na_value=np.nan)[pos[matched]]
+        for i, skill in enumerate(self.skill_columns):
+            df_result[skill] = values[:, i]
+        return df_result
+
+    def snapshot(self, as_of_date):
+        """指定日時点で有効な評価（従業員ごとに1行）"""
+        employee_ids = self._employee_index
+        pos = self.asof_indices(employee_ids, [as_of_date] * len(employee_ids))
+        return self._df.iloc[pos[pos >= 0]].reset_index(drop=True)
+
+    def add(self, df_new):
+        """
+        新しい評価を追加し、評価の切り替わりで結果が変わる期間を返す
+
+        Returns:
+            DataFrame: 従業員ID, 開始日（新しい評価日）, 終了日（同じ従業員の次の評価日、なければ NaT）
+        """
+        df_new = self._normalize(df_new)
+        self._set_evaluations(pd.concat([self._df, df_new], ignore_index=True))
+
+        # 追加した評価の位置から、同じ従業員の次の評価日を求める
+        pos = self.asof_indices(df_new['従業員ID'], df_new['評価日'])
+        next_pos = pos + 1
+        has_next = next_pos < len(self._df)
+        has_next[has_next] &= self._emp_codes[next_pos[has_next]] == self._emp_codes[pos[has_next]]
+
+        end_dates = pd.Series(pd.NaT, index=df_new.index, dtype='datetime64[ns]')
+        end_dates[has_next] = self._df['評価日'].to_numpy()[next_pos[has_next]]
+        return pd.DataFrame({
+            '従業員ID': df_new['従業員ID'].to_numpy(),
+            '開始日': df_new['評価日'].to_numpy(),
+            '終了日': end_dates.to_numpy()
+        })
+
+
+def compute_versioned_roster_averages(df_roster, store, skill_hierarchy, slot_keys=ROSTER_SLOT_KEYS):
+    """
+    出勤表の各記録に出勤日時点の評価を as-of 結合し、枠ごとのスキル平均を計算
+
+    出勤行列の列を「従業員」ではなく「評価（版）」にすることで、
+    日によって異なる評価が混在しても1回の疎行列積で集計できる。
+    最初の評価より前の出勤記録は平均から除外する。
+    """
+    skills, categories, membership = category_membership(skill_hierarchy)
+    version = store.asof_indices(df_roster['従業員ID'], df_roster['日付'])
+    known = version >= 0
+
+    codes, df_slots = assign_slot_codes(df_roster[known], slot_keys)
+    matrix = attendance_matrix(codes, version[known], len(df_slots), store.n_versions)
+    return averages_frame(df_slots, matrix, store.skill_values(skills), membership, categories)
+
+
+def update_roster_averages(df_averages, df_roster, store, df_new_evaluations, skill_hierarchy,
+                           slot_keys=ROSTER_SLOT_KEYS):
+    """
+    新しい評価を store に追加し、影響を受ける枠だけ平均を再計算
+
+    影響を受けるのは、新しい評価の適用期間（評価日〜同じ従業員の次の評価日の前日）に
+    その従業員が出勤した枠のみ。
+
+    Returns:
+        tuple: (更新後の平均表, 再計算した枠数)
+    """
+    slot_keys = list(slot_keys)
+    windows = store.add(df_new_evaluations)
+
+    df_hits = df_roster[['従業員ID', '日付']].reset_index().merge(windows, on='従業員ID')
+    dates = pd.to_datetime(df_hits['日付'])
+    in_window = (dates >= df_hits['開始日']) & (df_hits['終了日'].isna() | (dates < df_hits['終了日']))
+    affected_rows = df_hits.loc[in_window, 'index'].unique()
+    if len(affected_rows) == 0:
+        return df_averages, 0
+
+    affected_slots = pd.MultiIndex.from_frame(df_roster.loc[affected_rows, slot_keys].drop_duplicates())
+    in_affected = pd.MultiIndex.from_frame(df_roster[slot_keys]).isin(affected_slots)
+    df_recalc = compute_versioned_roster_averages(df_roster[in_affected], store, skill_hierarchy, slot_keys)
+
+    keep = ~pd.MultiIndex.from_frame(df_averages[slot_keys]).isin(affected_slots)
+    df_updated = pd.concat([df_averages[keep], df_recalc], ignore_index=True)
+    df_updated = df_updated.sort_values(slot_keys, kind='stable').reset_index(drop=True)
+    return df_updated, len(affected_slots)
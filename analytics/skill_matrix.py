@@ -0,0 +1,369 @@
+# analytics/skill_matrix.py
+# 従業員×スキルの int8 行列（密/CSR、属性別の行インデックスとカテゴリ所属行列つき）
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analytics.roster import category_membership
+from utils.versioned_cache import dataset_version
+
+# 行インデックスを作成する属性列
+GROUP_COLUMNS = ('拠点', '工程', 'チーム', 'シフト')
+
+# 未評価スキルを表す値（スコアは1〜5の整数）
+UNRATED = 0
+
+# 評価済みスコアの範囲
+MIN_SCORE = 1
+MAX_SCORE = 5
+
+# 評価済みの割合がこれ未満なら CSR 形式で保持する
+SPARSE_DENSITY_THRESHOLD = 0.3
+
+
+def _rated(values):
+    """評価済みを 1、未評価を 0 とした行列（疎行列は疎のまま）"""
+    if sparse.issparse(values):
+        flags = values.copy()
+        flags.data = np.ones_like(flags.data)
+        return flags
+    return (values != UNRATED).astype(values.dtype)
+
+
+def _validate_scores(scores):
+    """
+    評価済みスコア（NaN・未評価 0 以外）が MIN_SCORE〜MAX_SCORE の整数であることを確認
+
+    int8 への変換で小数が切り捨てられたり、範囲外の値が桁あふれしたりしないよう、変換前に検査する。
+    """
+    rated = scores[~np.isnan(scores) & (scores != UNRATED)]
+    invalid = (rated != np.round(rated)) | (rated < MIN_SCORE) | (rated > MAX_SCORE)
+    if invalid.any():
+        examples = ', '.join(str(v) for v in np.unique(rated[invalid])[:5])
+        raise ValueError(
+            f"スキルスコアは {MIN_SCORE}〜{MAX_SCORE} の整数である必要があります"
+            f"（不正な値 {int(invalid.sum())}件: {examples}）"
+        )
+
+
+def _dense_rows(matrix):
+    """疎行列演算の結果（np.matrix / 疎行列）を 1次元の ndarray に変換"""
+    if sparse.issparse(matrix):
+        matrix = matrix.toarray()
+    return np.asarray(matrix).ravel()
+
+
+class SkillMatrix:
+    """
+    スキルデータの行列表現（全ビューで共有）
+
+    スコアは (従業員数, スキル数) の int8 行列で保持し、未評価は 0。
+    評価済みが少ない（スキル数が多く、各従業員が一部のスキルのみ評価される）場合は
+    CSR 形式の疎行列で保持し、未評価は格納しない。どちらの形式でも結果は同じ。
+    拠点・工程・チーム・シフトごとの行番号を事前に作成しておき、
+    カテゴリ平均・ギャップ・低スキル件数を DataFrame を介さず行列演算で求める。
+    平均・バラツキの定義は従来の df[category_skills].mean().mean() / .std().mean() と同じ
+    （スキルごとの平均・標準偏差をカテゴリ内で平均、未評価・値のないスキルは除外）。
+    """
+
+    def __init__(self, df_skill, skill_hierarchy, group_columns=GROUP_COLUMNS,
+                 sparse_threshold=SPARSE_DENSITY_THRESHOLD):
+        skills, categories, membership = category_membership(skill_hierarchy)
+        present = np.array([skill in df_skill.columns for skill in skills], dtype=bool)
+        skills = [skill for skill, ok in zip(skills, present) if ok]
+
+        scores = df_skill[skills].to_numpy(dtype=np.float32, na_value=np.nan)
+        _validate_scores(scores)
+        values = np.where(np.isnan(scores), UNRATED, scores).astype(np.int8)
+        if values.size > 0 and np.count_nonzero(values) / values.size < sparse_threshold:
+            values = sparse.csr_matrix(values)
+
+        self._set_values(values, skills, categories, membership[present])
+        self._set_groups(df_skill, group_columns)
+        # キャッシュキーに使う作成元データのバージョン
+        self.dataset_version = dataset_version(df_skill)
+
+    @classmethod
+    def from_ratings(cls, df_employees, df_ratings, skill_hierarchy, group_columns=GROUP_COLUMNS):
+        """
+        縦持ちの評価データから CSR 形式の行列を作成（スキル列を持つ横持ちの df_skill を作らない）
+
+        Args:
+            df_employees: 1行=1従業員（従業員ID と拠点・工程などの属性列）
+            df_ratings: 1行=1評価（従業員ID, スキル, スコア）。同じ従業員・スキルは後の行を採用
+            skill_hierarchy: スキル階層。階層にないスキルと df_employees にない従業員の評価は無視する
+
+        Returns:
+            SkillMatrix: 行は df_employees の順、列は評価が1件以上あるスキル
+        """
+        skills, categories, membership = category_membership(skill_hierarchy)
+        skill_codes = pd.Index(skills).get_indexer(df_ratings['スキル'])
+        employee_codes = pd.Index(df_employees['従業員ID']).get_indexer(df_ratings['従業員ID'])
+        scores = pd.to_numeric(df_ratings['スコア']).to_numpy(dtype=np.float64, na_value=np.nan)
+
+        valid = (skill_codes >= 0) & (employee_codes >= 0) & ~np.isnan(scores) & (scores != UNRATED)
+        keys = pd.Series(employee_codes[valid].astype(np.int64) * len(skills) + skill_codes[valid])
+        latest = ~keys.duplicated(keep='last').to_numpy()
+        skill_codes = skill_codes[valid][latest]
+        employee_codes = employee_codes[valid][latest]
+        scores = scores[valid][latest]
+        _validate_scores(scores)
+
+        # 評価のあるスキルだけを列にする
+        present = np.bincount(skill_codes, minlength=len(skills)) > 0
+        column_codes = (np.cumsum(present) - 1)[skill_codes]
+        values = sparse.csr_matrix(
+            (scores.astype(np.int8), (employee_codes, column_codes)),
+            shape=(len(df_employees), int(present.sum()))
+        )
+
+        matrix = cls.__new__(cls)
+        matrix._set_values(values, [skill for skill, ok in zip(skills, present) if ok],
+                           categories, membership[present])
+        matrix._set_groups(df_employees, group_columns)
+        matrix.dataset_version = f"{dataset_version(df_employees)}+{dataset_version(df_ratings)}"
+        return matrix
+
+    def _set_values(self, values, skills, categories, membership):
+        if sparse.issparse(values):
+            values = values.tocsr()
+            values.eliminate_zeros()
+            values.sort_indices()
+        self.values = values
+        self.skills = skills
+        self.categories = categories
+        self.membership = membership
+        self.skill_position = {skill: i for i, skill in enumerate(skills)}
+        self.category_position = {category: i for i, category in enumerate(categories)}
+        self.n_employees = values.shape[0]
+
+    def _set_groups(self, df, group_columns):
+        self._codes = {}
+        self._labels = {}
+        self._row_index = {}
+        for column in group_columns:
+            if column not in df.columns:
+                continue
+            codes, labels = pd.factorize(df[column], sort=True)
+            order = np.argsort(codes, kind='stable')
+            order = order[codes[order] >= 0]
+            bounds = np.cumsum(np.bincount(codes[order], minlength=len(labels)))[:-1]
+            self._codes[column] = codes
+            self._labels[column] = labels
+            self._row_index[column] = dict(zip(labels, np.split(order, bounds)))
+
+    @property
+    def is_sparse(self):
+        return sparse.issparse(self.values)
+
+    @property
+    def density(self):
+        """評価済みの割合"""
+        size = self.n_employees * len(self.skills)
+        n_rated = self.values.nnz if self.is_sparse else np.count_nonzero(self.values)
+        return n_rated / size if size > 0 else 0.0
+
+    def has_column(self, column):
+        return column in self._codes
+
+    def labels(self, column):
+        """属性列の値の一覧（昇順）"""
+        return list(self._labels[column])
+
+    def codes(self, column, rows=None):
+        """属性列の値のコード（labels(column) の位置、欠損は -1）"""
+        codes = self._codes[column]
+        return codes if rows is None else codes[rows]
+
+    def rows(self, filters=None):
+        """
+        属性の条件（{列名: 値}、AND）に合う行番号を返す
+
+        最も件数の少ない条件の行インデックスから始め、残りの条件を属性コードで絞り込む。
+        """
+        if not filters:
+            return np.arange(self.n_employees)
+
+        candidates = []
+        for column, value in filters.items():
+            index = self._row_index[column].get(value)
+            if index is None:
+                return np.empty(0, dtype=np.int64)
+            candidates.append((len(index), column, value, index))
+        candidates.sort(key=lambda item: item[0])
+
+        rows = candidates[0][3]
+        for _, column, value, _ in candidates[1:]:
+            code = self._labels[column].get_loc(value)
+            rows = rows[self._codes[column][rows] == code]
+        return rows
+
+    def skill_columns(self, category):
+        """カテゴリに属し、データに存在するスキルの列番号"""
+        return np.flatnonzero(self.membership[:, self.category_position[category]])
+
+    def _moments(self, values):
+        """(行数, スキル数) の部分行列からスキルごとの件数・和・二乗和"""
+        v = values.astype(np.float64)
+        if sparse.issparse(v):
+            return v.getnnz(axis=0), _dense_rows(v.sum(axis=0)), _dense_rows(v.multiply(v).sum(axis=0))
+        return (values != UNRATED).sum(axis=0), v.sum(axis=0), (v * v).sum(axis=0)
+
+    @staticmethod
+    def _mean_std(count, total, total_sq):
+        """件数・和・二乗和から平均と標本標準偏差（ddof=1、件数不足は NaN）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, np.nan)
+            var = (total_sq - total * total / np.maximum(count, 1)) / (count - 1)
+            std = np.where(count > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+        return mean, std
+
+    def _category_average(self, per_skill):
+        """スキルごとの値（NaN は除外）をカテゴリ内で平均。(..., スキル数) → (..., カテゴリ数)"""
+        valid = ~np.isnan(per_skill)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (np.where(valid, per_skill, 0) @ self.membership) / (valid @ self.membership)
+
+    def skill_stats(self, rows):
+        """行集合のスキルごとの平均・標準偏差・評価件数"""
+        count, total, total_sq = self._moments(self.values[rows])
+        mean, std = self._mean_std(count, total, total_sq)
+        return mean, std, count
+
+    def category_stats(self, rows):
+        """行集合のカテゴリごとの平均・バラツキ（スキル別の値のカテゴリ内平均）"""
+        mean, std, _ = self.skill_stats(rows)
+        return self._category_average(mean), self._category_average(std)
+
+    def _group_onehot(self, group_columns, rows):
+        """
+        行集合を属性の組み合わせでグループ化
+
+        いずれかの属性が欠損（コード -1）の行はどのグループにも含めない（one-hot の列は空になる）。
+
+        Returns:
+            tuple: ((グループ数, 行数) の one-hot 疎行列, グループキーと人数の DataFrame)
+        """
+        group_codes = [self._codes[column][rows] for column in group_columns]
+        valid = np.all([c >= 0 for c in group_codes], axis=0) if group_codes else np.ones(len(rows), dtype=bool)
+        positions = np.flatnonzero(valid)
+
+        codes = np.zeros(len(positions), dtype=np.int64)
+        sizes = [len(self._labels[column]) for column in group_columns]
+        for column_codes, size in zip(group_codes, sizes):
+            codes = codes * size + column_codes[positions]
+        group_codes, group_index = np.unique(codes, return_inverse=True)
+
+        onehot = sparse.csr_matrix(
+            (np.ones(len(positions)), (group_index, positions)),
+            shape=(len(group_codes), len(rows))
+        )
+
+        # 合成コードから各属性の値を復元
+        keys = {}
+        remainder = group_codes
+        for column, size in zip(reversed(group_columns), reversed(sizes)):
+            keys[column] = self._labels[column][remainder % size]
+            remainder = remainder // size
+        df_groups = pd.DataFrame({column: keys[column] for column in group_columns})
+        df_groups['人数'] = np.bincount(group_index, minlength=len(group_codes))
+        return onehot, df_groups
+
+    def grouped_skill_stats(self, group_columns, rows=None):
+        """
+        属性の組み合わせごとのスキル別平均・標準偏差・評価件数を一括計算
+
+        グループの one-hot 疎行列と [有効フラグ | スコア | スコア²] の積1回で
+        全グループのスキル別モーメントを求める。
+
+        Returns:
+            tuple: (グループキーと人数の DataFrame, 平均, 標準偏差, 評価件数（いずれも (グループ数, スキル数)）)
+        """
+        group_columns = list(group_columns)
+        rows = np.arange(self.n_employees) if rows is None else np.asarray(rows)
+        onehot, df_groups = self._group_onehot(group_columns, rows)
+
+        v = self.values[rows].astype(np.float64)
+        if sparse.issparse(v):
+            stacked = sparse.hstack([_rated(v), v, v.multiply(v)], format='csr')
+        else:
+            stacked = np.hstack([_rated(v), v, v * v])
+        totals = onehot @ stacked
+        if sparse.issparse(totals):
+            totals = totals.toarray()
+        k = len(self.skills)
+        count = totals[:, :k]
+        mean, std = self._mean_std(count, totals[:, k:2 * k], totals[:, 2 * k:])
+        return df_groups, mean, std, count.astype(np.int64)
+
+    def grouped_category_stats(self, group_columns, rows=None):
+        """
+        属性の組み合わせごとのカテゴリ平均・バラツキを一括計算
+
+        平均は従業員ごとのカテゴリ平均のグループ平均（有意性検定の grouped_employee_category_stats と
+        同じ集計で、ギャップと検定の対象が一致する）。バラツキはスキル別標準偏差のカテゴリ内平均。
+
+        Returns:
+            tuple: (グループキーと人数の DataFrame, 平均 (グループ数, カテゴリ数), バラツキ (同))
+        """
+        df_groups, _, std, _ = self.grouped_skill_stats(group_columns, rows)
+        _, mean, _, _ = self.grouped_employee_category_stats(group_columns, rows)
+        return df_groups, mean, self._category_average(std)
+
+    def grouped_employee_category_stats(self, group_columns, rows=None):
+        """
+        従業員ごとのカテゴリ平均（employee_category_scores）をグループ単位で集計
+
+        Returns:
+            tuple: (グループキーと人数の DataFrame, 平均, 標準偏差, 件数（いずれも (グループ数, カテゴリ数)）)
+        """
+        group_columns = list(group_columns)
+        rows = np.arange(self.n_employees) if rows is None else np.asarray(rows)
+        onehot, df_groups = self._group_onehot(group_columns, rows)
+
+        scores, _ = self.employee_category_scores(rows)
+        valid = ~np.isnan(scores)
+        v = np.where(valid, scores, 0)
+        count = onehot @ valid.astype(np.float64)
+        mean, std = self._mean_std(count, onehot @ v, onehot @ (v * v))
+        return df_groups, mean, std, count.astype(np.int64)
+
+    def employee_category_scores(self, rows=None):
+        """
+        従業員ごとのカテゴリ平均（評価済みスキルのみで平均、評価のないカテゴリは NaN）
+
+        Returns:
+            tuple: (カテゴリ平均 (行数, カテゴリ数), 全スキル平均 (行数,))
+        """
+        rows = np.arange(self.n_employees) if rows is None else np.asarray(rows)
+        v = self.values[rows].astype(np.float64)
+        rated = _rated(v)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            category_scores = np.asarray(v @ self.membership) / np.asarray(rated @ self.membership)
+            overall = _dense_rows(v.sum(axis=1)) / _dense_rows(rated.sum(axis=1))
+        return category_scores, overall
+
+    def scores(self, rows, skill):
+        """行集合のあるスキルの評価済みスコア"""
+        j = self.skill_position[skill]
+        if self.is_sparse:
+            return self.values[rows][:, [j]].tocsc().data
+        column = self.values[rows, j]
+        return column[column != UNRATED]
+
+    def low_skill_counts(self, rows, threshold=2):
+        """行集合のスキルごとのレベル threshold 以下の件数"""
+        values = self.values[rows]
+        if self.is_sparse:
+            return np.bincount(values.indices[values.data <= threshold], minlength=len(self.skills))
+        return ((values != UNRATED) & (values <= threshold)).sum(axis=0)
+
+    def employees_with_low_skill(self, rows, skill_columns, threshold=2):
+        """指定スキルのいずれかがレベル threshold 以下の従業員数"""
+        if self.is_sparse:
+            values = self.values[rows][:, skill_columns]
+            low = np.repeat(np.arange(values.shape[0]), np.diff(values.indptr))[values.data <= threshold]
+            return len(np.unique(low))
+        values = self.values[np.ix_(rows, skill_columns)]
+        return int(((values != UNRATED) & (values <= threshold)).any(axis=1).sum())
@@ -0,0 +1,365 @@
+# analytics/spc.py
+# 統計的工程管理（拠点×工程×シフトごとの EWMA・CUSUM を日次で逐次更新）
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.versioned_cache import dataset_signature, versioned_cache
+
+# ライン（管理単位）を表す列
+LINE_COLUMNS = ['拠点', '工程', 'シフト']
+
+# 管理する指標と、悪化とみなす方向（+1: 上昇が悪化、-1: 低下が悪化）
+SPC_METRICS = {
+    '品質不良率 (%)': 1,
+    '歩留まり (%)': -1
+}
+
+# 管理限界を決める基準期間（日数）。データが短い場合は前半を使う
+BASELINE_DAYS = 14
+
+# EWMA の平滑化係数と管理限界の幅（σ の倍数）
+EWMA_LAMBDA = 0.2
+EWMA_L = 3.0
+
+# CUSUM の参照値 k と判定値 h（いずれも σ 単位）
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+
+# 基準期間の標準偏差の下限（値が一定のラインで限界幅が 0 にならないように）
+MIN_SIGMA = 0.01
+
+# 日ごとに保持する結果
+HISTORY_FIELDS = ['値', 'EWMA', '下限', '上限', 'CUSUM+', 'CUSUM-']
+
+# 逐次更新するライン×指標の状態
+STATE_FIELDS = ['mean', 'sigma', 'ewma', 'cusum_pos', 'cusum_neg', 'n_observations']
+
+
+class SPCMonitor:
+    """
+    全ラインの EWMA・CUSUM の状態を保持し、1日分のデータごとに逐次更新する
+
+    状態は (ライン数, 指標数) の配列（基準平均・σ・EWMA・CUSUM+・CUSUM-・観測数）で、
+    update() は新しい日のデータだけを使って全ラインを一括で更新する（過去のデータは再計算しない）。
+    その日にデータのないラインは状態を変えない。
+    state() / from_state() で配列と DataFrame だけの辞書との間で変換する（キャッシュにはこの辞書を保存する）。
+    """
+
+    def __init__(self, df_baseline, metrics=SPC_METRICS, line_columns=LINE_COLUMNS,
+                 ewma_lambda=EWMA_LAMBDA, ewma_l=EWMA_L, cusum_k=CUSUM_K, cusum_h=CUSUM_H):
+        """
+        Args:
+            df_baseline: 管理限界を決める基準期間の日次データ（日付, line_columns, 指標）
+        """
+        self.metrics = list(metrics)
+        self.direction = np.array([metrics[m] for m in self.metrics], dtype=np.float64)
+        self.line_columns = list(line_columns)
+        self.ewma_lambda = ewma_lambda
+        self.ewma_l = ewma_l
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+
+        df_daily = self._daily_line_means(df_baseline)
+        self.baseline_days = df_daily['日付'].nunique()
+        self.lines = df_daily[self.line_columns].drop_duplicates().sort_values(self.line_columns, ignore_index=True)
+        self._line_codes = pd.Series(
+            np.arange(len(self.lines)), index=pd.MultiIndex.from_frame(self.lines)
+        )
+
+        _, baseline = self.line_values(df_baseline)
+        with np.errstate(invalid='ignore'):
+            self.mean = np.nanmean(baseline, axis=0)
+            sigma = np.nanstd(baseline, axis=0, ddof=1)
+        self.sigma = np.where(np.isnan(sigma), MIN_SIGMA, np.maximum(sigma, MIN_SIGMA))
+
+        shape = self.mean.shape
+        self.ewma = self.mean.copy()
+        self.cusum_pos = np.zeros(shape)
+        self.cusum_neg = np.zeros(shape)
+        self.n_observations = np.zeros(shape, dtype=np.int64)
+        self.last_date = None
+        # 日ごとの結果（日数を先頭の軸にした配列のブロックのリスト。history() で1つにまとめる）
+        self._history = {name: [] for name in ['日付'] + HISTORY_FIELDS}
+
+    def state(self, df_source=None):
+        """
+        現在の状態を配列と DataFrame だけの辞書にする（ResultCache がサイズを見積もれる形）
+
+        Args:
+            df_source: 状態を作った日次データ。渡すと行数とチェックサムを記録し、extend_spc_state() で
+                行を追加したデータに差分更新できるようにする
+        """
+        dates, history = self._stacked_history()
+        return {
+            'metrics': dict(zip(self.metrics, self.direction.tolist())),
+            'line_columns': list(self.line_columns),
+            'params': {'ewma_lambda': self.ewma_lambda, 'ewma_l': self.ewma_l,
+                       'cusum_k': self.cusum_k, 'cusum_h': self.cusum_h},
+            'baseline_days': self.baseline_days,
+            'lines': self.lines,
+            **{name: getattr(self, name).copy() for name in STATE_FIELDS},
+            'last_date': self.last_date,
+            'dates': dates,
+            'history': history,
+            'source_rows': None if df_source is None else len(df_source),
+            'source_signature': None if df_source is None else dataset_signature(df_source)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """state() の辞書から復元（状態の配列はコピーするため、キャッシュ済みの辞書は変更されない）"""
+        monitor = cls.__new__(cls)
+        monitor.metrics = list(state['metrics'])
+        monitor.direction = np.array(list(state['metrics'].values()), dtype=np.float64)
+        monitor.line_columns = list(state['line_columns'])
+        for name, value in state['params'].items():
+            setattr(monitor, name, value)
+        monitor.baseline_days = state['baseline_days']
+        monitor.lines = state['lines']
+        monitor._line_codes = pd.Series(np.arange(len(monitor.lines)), index=pd.MultiIndex.from_frame(monitor.lines))
+        for name in STATE_FIELDS:
+            setattr(monitor, name, state[name].copy())
+        monitor.last_date = state['last_date']
+        monitor._history = {'日付': [state['dates']], **{name: [state['history'][name]] for name in HISTORY_FIELDS}}
+        return monitor
+
+    def _daily_line_means(self, df):
+        """同じ日・ラインの行（チーム別など）を平均して1行にまとめる"""
+        return df.groupby(['日付'] + self.line_columns, observed=True)[self.metrics].mean().reset_index()
+
+    def line_values(self, df):
+        """
+        日次データを (日数, ライン数, 指標数) の配列にまとめる（データのない日・ラインは NaN）
+
+        基準期間にないラインの行は使わない。
+
+        Returns:
+            tuple: (日付の配列（昇順）, 配列)
+        """
+        df_daily = self._daily_line_means(df)
+        dates, date_codes = np.unique(df_daily['日付'].to_numpy(), return_inverse=True)
+        line_codes = self._line_codes.reindex(pd.MultiIndex.from_frame(df_daily[self.line_columns])).to_numpy()
+        known = ~np.isnan(line_codes)
+
+        values = np.full((len(dates), len(self.lines), len(self.metrics)), np.nan)
+        values[date_codes[known], line_codes[known].astype(np.int64)] = df_daily[self.metrics].to_numpy()[known]
+        return dates, values
+
+    def _ewma_width(self):
+        """観測数 t に応じた EWMA の管理限界の幅（時間とともに漸近値に近づく）"""
+        lam = self.ewma_lambda
+        return self.ewma_l * self.sigma * np.sqrt(
+            lam / (2 - lam) * (1 - (1 - lam) ** (2 * np.maximum(self.n_observations, 1)))
+        )
+
+    def step(self, date, x):
+        """
+        1日分の (ライン数, 指標数) の値で状態を更新（NaN のラインは前日の状態のまま）
+
+        update() と build_spc_monitor() の共通処理。DataFrame を作らないため、長い期間でも速い。
+        """
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(
+                f"{pd.Timestamp(date):%Y-%m-%d} は更新済みの日付（{pd.Timestamp(self.last_date):%Y-%m-%d}）以前です"
+            )
+        observed = ~np.isnan(x)
+
+        # EWMA と CUSUM（σ単位）の漸化式
+        lam = self.ewma_lambda
+        z = (x - self.mean) / self.sigma
+        self.ewma = np.where(observed, lam * x + (1 - lam) * self.ewma, self.ewma)
+        self.cusum_pos = np.where(observed, np.maximum(0, self.cusum_pos + z - self.cusum_k), self.cusum_pos)
+        self.cusum_neg = np.where(observed, np.maximum(0, self.cusum_neg - z - self.cusum_k), self.cusum_neg)
+        self.n_observations += observed
+        self.last_date = date
+
+        width = self._ewma_width()
+        self._history['日付'].append(np.array([date]))
+        for name, value in [('値', x), ('EWMA', self.ewma), ('下限', self.mean - width), ('上限', self.mean + width),
+                            ('CUSUM+', self.cusum_pos), ('CUSUM-', self.cusum_neg)]:
+            self._history[name].append(value[None])
+
+    def _stacked_history(self):
+        """日ごとの結果を (日数, ライン数, 指標数) の配列にまとめる（まとめた配列は次回以降も使う）"""
+        shape = (0, len(self.lines), len(self.metrics))
+        for name, blocks in self._history.items():
+            if len(blocks) > 1:
+                self._history[name] = [np.concatenate(blocks)]
+        dates = self._history['日付'][0] if self._history['日付'] else np.empty(0, dtype='datetime64[ns]')
+        return dates, {
+            name: self._history[name][0] if self._history[name] else np.empty(shape) for name in HISTORY_FIELDS
+        }
+
+    def update(self, df_day):
+        """
+        1日分のデータで全ラインの統計量を更新し、その日の結果を返す（過去の日は再計算しない）
+
+        Returns:
+            DataFrame: history() と同じ列の、その日の分
+        """
+        if df_day.empty:
+            return pd.DataFrame()
+        dates, values = self.line_values(df_day)
+        if len(dates) != 1:
+            raise ValueError("update() には1日分のデータを渡してください")
+        self.step(dates[0], values[0])
+        return self._frame(self._history['日付'][-1], {name: self._history[name][-1] for name in HISTORY_FIELDS})
+
+    def _frame(self, dates, arrays):
+        """(日数, ライン数, 指標数) の結果を縦持ちの DataFrame にする（観測のある日・ライン・指標のみ）"""
+        n_days = len(dates)
+        n_lines, n_metrics = len(self.lines), len(self.metrics)
+        observed = ~np.isnan(arrays['値'].ravel())
+
+        day_index = np.repeat(np.arange(n_days), n_lines * n_metrics)[observed]
+        line_index = np.tile(np.repeat(np.arange(n_lines), n_metrics), n_days)[observed]
+        metric_index = np.tile(np.arange(n_metrics), n_days * n_lines)[observed]
+
+        df_result = self.lines.iloc[line_index].reset_index(drop=True)
+        df_result.insert(0, '日付', dates[day_index])
+        df_result['指標'] = np.asarray(self.metrics, dtype=object)[metric_index]
+        df_result['基準平均'] = self.mean[line_index, metric_index]
+        for name, values in arrays.items():
+            df_result[name] = values.ravel()[observed]
+        df_result['EWMA逸脱'] = np.where(
+            df_result['EWMA'] > df_result['上限'], 1, np.where(df_result['EWMA'] < df_result['下限'], -1, 0)
+        )
+        df_result['CUSUM逸脱'] = np.where(
+            df_result['CUSUM+'] > self.cusum_h, 1, np.where(df_result['CUSUM-'] > self.cusum_h, -1, 0)
+        )
+        return df_result
+
+    def history(self):
+        """
+        更新済みの全日の結果（日付昇順）
+
+        Returns:
+            DataFrame: 日付, line_columns, 指標, 基準平均, 値, EWMA, 下限, 上限, CUSUM+, CUSUM-,
+                EWMA逸脱（+1/-1/0）, CUSUM逸脱（+1/-1/0）
+        """
+        if self.last_date is None:
+            return pd.DataFrame()
+        return self._frame(*self._stacked_history())
+
+    def alerts(self):
+        """
+        全ラインの最新の状態のうち、悪化方向に逸脱しているものの一覧
+
+        Returns:
+            DataFrame: line_columns, 指標, 基準平均, EWMA, 下限, 上限, CUSUM（悪化方向）, 判定,
+                逸脱度（σ単位、逸脱の大きい順）
+        """
+        if self.last_date is None:
+            return pd.DataFrame()
+
+        width = self._ewma_width()
+        # 悪化方向に揃えた逸脱量（σ単位）
+        ewma_excess = self.direction * (self.ewma - self.mean) / self.sigma - width / self.sigma
+        cusum_worse = np.where(self.direction > 0, self.cusum_pos, self.cusum_neg)
+        ewma_alert = (ewma_excess > 0) & (self.n_observations > 0)
+        cusum_alert = (cusum_worse > self.cusum_h) & (self.n_observations > 0)
+
+        line_index, metric_index = np.nonzero(ewma_alert | cusum_alert)
+        if len(line_index) == 0:
+            return pd.DataFrame()
+
+        judgement = np.where(
+            ewma_alert[line_index, metric_index] & cusum_alert[line_index, metric_index], 'EWMA・CUSUM',
+            np.where(ewma_alert[line_index, metric_index], 'EWMA', 'CUSUM')
+        )
+        df_alerts = self.lines.iloc[line_index].reset_index(drop=True)
+        df_alerts['指標'] = np.asarray(self.metrics, dtype=object)[metric_index]
+        df_alerts['基準平均'] = self.mean[line_index, metric_index]
+        df_alerts['EWMA'] = self.ewma[line_index, metric_index]
+        df_alerts['下限'] = (self.mean - width)[line_index, metric_index]
+        df_alerts['上限'] = (self.mean + width)[line_index, metric_index]
+        df_alerts['CUSUM'] = cusum_worse[line_index, metric_index]
+        df_alerts['判定'] = judgement
+        df_alerts['逸脱度'] = np.maximum(
+            ewma_excess[line_index, metric_index], cusum_worse[line_index, metric_index] / self.cusum_h - 1
+        )
+        return df_alerts.sort_values('逸脱度', ascending=False, ignore_index=True)
+
+
+def build_spc_monitor(df_daily_prod, baseline_days=BASELINE_DAYS):
+    """
+    日次データの先頭 baseline_days 日で管理限界を決め、以降の日を1日ずつ update() に流す
+
+    基準期間の日も update() に流すため、管理図は全期間分になる。新しい日のデータが届いたら
+    返された SPCMonitor の update() にその日の分だけを渡せばよい。
+    """
+    dates = np.sort(df_daily_prod['日付'].unique())
+    baseline_days = min(baseline_days, max(len(dates) // 2, 2))
+    df_baseline = df_daily_prod[df_daily_prod['日付'].isin(dates[:baseline_days])]
+    monitor = SPCMonitor(df_baseline)
+
+    # 全期間を一度に配列へまとめ、1日ずつ step() で更新（update() と同じ結果）
+    dates, values = monitor.line_values(df_daily_prod)
+    for date, x in zip(dates, values):
+        monitor.step(date, x)
+    return monitor
+
+
+def extend_spc_state(state, df_daily_prod, baseline_days=BASELINE_DAYS):
+    """
+    前のバージョンの状態に、追加された日だけを step() で反映した状態を返す（過去の日は再計算しない）
+
+    df_daily_prod の先頭 state['source_rows'] 行が状態を作ったデータと同じ（チェックサムが一致）で、
+    追加された行がすべて状態の最終日より後の日付であり、基準期間の日数が変わらない場合だけ差分更新できる。
+    できない場合は None を返す（呼び出し側で全期間を再計算する）。
+    """
+    n_rows = state['source_rows']
+    if n_rows is None or len(df_daily_prod) < n_rows or state['last_date'] is None:
+        return None
+    if dataset_signature(df_daily_prod.iloc[:n_rows]) != state['source_signature']:
+        return None
+
+    df_new = df_daily_prod.iloc[n_rows:]
+    if (df_new['日付'] <= state['last_date']).any():
+        return None
+    # build_spc_monitor と同じ基準期間になるか（データが短いと全体の日数で基準期間が変わる）
+    n_dates = len(state['dates']) + df_new['日付'].nunique()
+    if min(baseline_days, max(n_dates // 2, 2)) != state['baseline_days']:
+        return None
+
+    monitor = SPCMonitor.from_state(state)
+    if not df_new.empty:
+        dates, values = monitor.line_values(df_new)
+        for date, x in zip(dates, values):
+            monitor.step(date, x)
+    return monitor.state(df_daily_prod)
+
+
+# baseline_days ごとの最新の状態（次のバージョンのデータで追加された日だけを更新する起点）
+_latest_states = {}
+_latest_states_lock = threading.Lock()
+
+
+@versioned_cache(namespace='monitoring')
+def cached_spc_state(df_daily_prod, baseline_days=BASELINE_DAYS):
+    """
+    データセットのバージョンごとに SPC の状態（state() の辞書）をキャッシュ
+
+    直前に使った状態のデータに行を追加したデータなら、追加された日だけを更新する。
+    """
+    with _latest_states_lock:
+        previous = _latest_states.get(baseline_days)
+    state = extend_spc_state(previous, df_daily_prod, baseline_days) if previous is not None else None
+    if state is None:
+        state = build_spc_monitor(df_daily_prod, baseline_days).state(df_daily_prod)
+    return state
+
+
+def cached_spc_monitor(df_daily_prod, baseline_days=BASELINE_DAYS):
+    """キャッシュ済みの状態から SPCMonitor を復元（呼び出し側で update() してもキャッシュは変わらない）"""
+    state = cached_spc_state(df_daily_prod, baseline_days)
+    with _latest_states_lock:
+        latest = _latest_states.get(baseline_days)
+        if latest is None or latest['last_date'] is None or (
+            state['last_date'] is not None and state['last_date'] >= latest['last_date']
+        ):
+            _latest_states[baseline_days] = state
+    return SPCMonitor.from_state(state)
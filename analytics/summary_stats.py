@@ -0,0 +1,118 @@
+# analytics/summary_stats.py
+# グループ別の要約統計（四分位・ひげ・平均/標準偏差・外れ値）を1回のソートで計算
+
+import numpy as np
+import pandas as pd
+
+# ひげの長さ（IQR の倍率、Plotly の箱ひげ図と同じ）
+WHISKER_IQR = 1.5
+
+# グループごとに返す外れ値の上限（フェンスから遠い順）
+MAX_OUTLIERS = 200
+
+# 統計量の列（グループ列の後）
+STATS_COLUMNS = ['件数', '平均', '標準偏差', '最小', '第1四分位', '中央値', '第3四分位', '最大', '下ひげ', '上ひげ', '外れ値数']
+
+
+def _quantile(sorted_values, starts, sizes, q):
+    """グループごとに昇順に並んだ値から分位点を線形補間で求める（pandas の quantile と同じ）"""
+    position = starts + (sizes - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_groups(df, value_col, by, whisker=WHISKER_IQR, max_outliers=MAX_OUTLIERS):
+    """
+    グループごとの箱ひげ図用の統計量を計算
+
+    (グループ, 値) で1回ソートし、四分位点はグループ内の位置から直接読み出す。
+    ひげはフェンス（Q1 - whisker×IQR, Q3 + whisker×IQR）内の最小値・最大値、
+    外れ値はフェンス外の値で、グループごとにフェンスから遠い順に max_outliers 件まで返す。
+
+    Args:
+        df: 対象データ
+        value_col: 値の列（欠損は除外）
+        by: グループ化する列のリスト
+
+    Returns:
+        tuple: (統計量 DataFrame, 外れ値 DataFrame)
+            統計量: by + 件数, 平均, 標準偏差, 最小, 第1四分位, 中央値, 第3四分位, 最大, 下ひげ, 上ひげ, 外れ値数
+            外れ値: by + 値
+    """
+    by = list(by)
+    df_valid = df.loc[df[value_col].notna(), by + [value_col]]
+    if df_valid.empty:
+        # 値のあるグループがない（フィルタ結果が空・指標が全て欠損）場合は列だけの空の表
+        df_stats = pd.DataFrame(columns=by + STATS_COLUMNS)
+        df_outliers = pd.DataFrame(columns=by + ['値'])
+        return df_stats, df_outliers
+
+    grouped = df_valid.groupby(by, sort=True, observed=True)
+    codes = grouped.ngroup().to_numpy()
+    df_stats = grouped.size().reset_index(name='件数')
+    values = df_valid[value_col].to_numpy(dtype=np.float64)
+
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    sorted_codes = codes[order]
+    sizes = df_stats['件数'].to_numpy()
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    mean = np.bincount(codes, weights=values, minlength=len(sizes)) / sizes
+    squared = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=len(sizes))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.where(sizes > 1, np.sqrt(squared / (sizes - 1)), np.nan)
+
+    q1 = _quantile(sorted_values, starts, sizes, 0.25)
+    median = _quantile(sorted_values, starts, sizes, 0.5)
+    q3 = _quantile(sorted_values, starts, sizes, 0.75)
+    iqr = q3 - q1
+    lower_limit = q1 - whisker * iqr
+    upper_limit = q3 + whisker * iqr
+
+    # フェンス内の最小値・最大値（Q1〜Q3 の値は必ずフェンス内なので各グループに1件以上ある）
+    inside = (sorted_values >= lower_limit[sorted_codes]) & (sorted_values <= upper_limit[sorted_codes])
+    lower_fence = np.full(len(sizes), np.inf)
+    upper_fence = np.full(len(sizes), -np.inf)
+    np.minimum.at(lower_fence, sorted_codes[inside], sorted_values[inside])
+    np.maximum.at(upper_fence, sorted_codes[inside], sorted_values[inside])
+
+    df_stats['平均'] = mean
+    df_stats['標準偏差'] = std
+    df_stats['最小'] = sorted_values[starts]
+    df_stats['第1四分位'] = q1
+    df_stats['中央値'] = median
+    df_stats['第3四分位'] = q3
+    df_stats['最大'] = sorted_values[starts + sizes - 1]
+    df_stats['下ひげ'] = lower_fence
+    df_stats['上ひげ'] = upper_fence
+    df_stats['外れ値数'] = np.bincount(sorted_codes[~inside], minlength=len(sizes))
+
+    # 外れ値はフェンスから遠い順に上限件数まで
+    outlier_codes = sorted_codes[~inside]
+    outlier_values = sorted_values[~inside]
+    distance = np.maximum(lower_limit[outlier_codes] - outlier_values, outlier_values - upper_limit[outlier_codes])
+    outlier_order = np.lexsort((-distance, outlier_codes))
+    outlier_codes = outlier_codes[outlier_order]
+    outlier_values = outlier_values[outlier_order]
+    rank = np.arange(len(outlier_codes)) - np.searchsorted(outlier_codes, outlier_codes)
+    keep = rank < max_outliers
+
+    df_outliers = df_stats[by].iloc[outlier_codes[keep]].reset_index(drop=True)
+    df_outliers['値'] = outlier_values[keep]
+
+    return df_stats, df_outliers
+
+
+def box_parameters(stats):
+    """統計量の1行から Plotly の go.Box に渡す事前計算済みパラメータを作成"""
+    return {
+        'q1': [stats['第1四分位']],
+        'median': [stats['中央値']],
+        'q3': [stats['第3四分位']],
+        'lowerfence': [stats['下ひげ']],
+        'upperfence': [stats['上ひげ']],
+        'mean': [stats['平均']],
+        'sd': [stats['標準偏差']]
+    }
@@ -0,0 +1,231 @@
+# analytics/team_optimizer.py
+# チーム編成の最適化（拠点×工程内の従業員の入れ替えで、チーム間のスキル差を縮める）
+
+import numpy as np
+import pandas as pd
+
+from utils.versioned_cache import versioned_cache
+
+# 目的関数
+#   worst:    最も低いチーム×カテゴリ平均を最大化（同点はバラツキの小さい方）
+#   variance: チーム平均のチーム間分散（カテゴリ合計）を最小化
+OBJECTIVES = ('worst', 'variance')
+
+# worst の同点を分けるバラツキの重み
+TIE_BREAK_WEIGHT = 1e-3
+
+# 1回の反復で評価する各チームの候補人数の上限（チームが大きい場合は無作為に抽出）
+CANDIDATES_PER_TEAM = 256
+
+# 1回の反復で評価する入れ替え候補数の目安（チームの組が多いときは組ごとの候補人数を減らす）
+CANDIDATES_PER_ITERATION = 200_000
+
+
+def _objective(min_value, sum_means, sum_squares, n_teams, objective):
+    """
+    チーム平均の最小値・和・二乗和（カテゴリごと）から目的関数値（小さいほど良い）を計算
+
+    入れ替え候補ごとの値を配列のまま評価できるよう、先頭の次元は任意。
+    """
+    variance = (sum_squares / n_teams - (sum_means / n_teams) ** 2).sum(axis=-1)
+    if objective == 'variance':
+        return variance
+    return -min_value + TIE_BREAK_WEIGHT * variance
+
+
+def _sample(rng, members, size):
+    return members if len(members) <= size else rng.choice(members, size, replace=False)
+
+
+def optimize_teams(scores, teams, objective='worst', max_moves=20, headcount_tolerance=0,
+                   candidates_per_team=CANDIDATES_PER_TEAM, max_iterations=None, seed=0):
+    """
+    従業員のチームを入れ替えて目的関数を改善（局所探索）
+
+    毎回、チームの組について「2人の入れ替え」と（人数の許容幅があれば）「1人の移動」を評価し、
+    最も改善する1手を採用する。チームごとの合計・人数を保持しておき、候補の評価は
+    影響する2チームの平均だけを差分更新するため、1候補あたり O(カテゴリ数) で済む。
+    worst では最も低いチームを含む組だけを評価する（それ以外の組では最小値が上がらない）。
+
+    Args:
+        scores: 従業員×カテゴリのスコア (n, カテゴリ数)
+        teams: 現在のチーム番号 (n,)、0〜チーム数-1
+        max_moves: 元のチームから移る従業員数の上限
+        headcount_tolerance: 各チームの人数を元の人数から増減してよい人数（0 なら入れ替えのみ）
+
+    Returns:
+        tuple: (最適化後のチーム番号, 反復回数)
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"未対応の目的関数: {objective}")
+
+    rng = np.random.default_rng(seed)
+    x = np.asarray(scores, dtype=np.float64)
+    original = np.asarray(teams)
+    team = original.copy()
+    n_teams = int(team.max()) + 1 if len(team) else 0
+    max_iterations = 4 * max_moves + 10 if max_iterations is None else max_iterations
+
+    count = np.bincount(team, minlength=n_teams).astype(np.float64)
+    lower = np.maximum(count - headcount_tolerance, 1)
+    upper = count + headcount_tolerance
+    sums = np.zeros((n_teams, x.shape[1]))
+    np.add.at(sums, team, x)
+
+    n_pairs = n_teams - 1 if objective == 'worst' else n_teams * (n_teams - 1) // 2
+    candidates_per_team = int(np.clip(
+        np.sqrt(CANDIDATES_PER_ITERATION / max(n_pairs, 1)), 16, candidates_per_team
+    ))
+
+    moved = 0
+    iterations = 0
+    while iterations < max_iterations and n_teams > 1:
+        iterations += 1
+        means = sums / count[:, None]
+        sum_means = means.sum(axis=0)
+        sum_squares = (means ** 2).sum(axis=0)
+        current = _objective(means.min(), sum_means, sum_squares, n_teams, objective)
+        members = [np.flatnonzero(team == t) for t in range(n_teams)]
+        worst_team = int(np.argmin(means.min(axis=1)))
+
+        best = (current - 1e-12, None)
+        for a in range(n_teams):
+            for b in range(n_teams):
+                if a == b or (objective == 'worst' and worst_team not in (a, b)):
+                    continue
+                others = [t for t in range(n_teams) if t not in (a, b)]
+                min_others = means[others].min() if others else np.inf
+                base_sum = sum_means - means[a] - means[b]
+                base_squares = sum_squares - means[a] ** 2 - means[b] ** 2
+                ia = _sample(rng, members[a], candidates_per_team)
+
+                # 入れ替え（i: a→b, j: b→a）。組ごとに1回だけ評価
+                if a < b:
+                    jb = _sample(rng, members[b], candidates_per_team)
+                    delta = x[jb][None, :, :] - x[ia][:, None, :]
+                    mean_a = means[a] + delta / count[a]
+                    mean_b = means[b] - delta / count[b]
+                    move_delta = (
+                        (original[ia] != b).astype(int) - (original[ia] != a)
+                    )[:, None] + (
+                        (original[jb] != a).astype(int) - (original[jb] != b)
+                    )[None, :]
+                    value = _objective(
+                        np.minimum(min_others, np.minimum(mean_a.min(axis=-1), mean_b.min(axis=-1))),
+                        base_sum + mean_a + mean_b,
+                        base_squares + mean_a ** 2 + mean_b ** 2,
+                        n_teams, objective
+                    )
+                    value = np.where(moved + move_delta <= max_moves, value, np.inf)
+                    k = np.argmin(value)
+                    if value.flat[k] < best[0]:
+                        i, j = np.unravel_index(k, value.shape)
+                        best = (value.flat[k], ('swap', ia[i], a, jb[j], b))
+
+                # 移動（i: a→b）。人数の許容幅の中でのみ
+                if count[a] - 1 >= lower[a] and count[b] + 1 <= upper[b]:
+                    mean_a = (sums[a] - x[ia]) / (count[a] - 1)
+                    mean_b = (sums[b] + x[ia]) / (count[b] + 1)
+                    move_delta = (original[ia] != b).astype(int) - (original[ia] != a)
+                    value = _objective(
+                        np.minimum(min_others, np.minimum(mean_a.min(axis=-1), mean_b.min(axis=-1))),
+                        base_sum + mean_a + mean_b,
+                        base_squares + mean_a ** 2 + mean_b ** 2,
+                        n_teams, objective
+                    )
+                    value = np.where(moved + move_delta <= max_moves, value, np.inf)
+                    k = np.argmin(value)
+                    if value[k] < best[0]:
+                        best = (value[k], ('move', ia[k], a, None, b))
+
+        if best[1] is None:
+            break
+
+        kind, i, a, j, b = best[1]
+        team[i] = b
+        sums[a] -= x[i]
+        sums[b] += x[i]
+        if kind == 'swap':
+            team[j] = a
+            sums[b] -= x[j]
+            sums[a] += x[j]
+        else:
+            count[a] -= 1
+            count[b] += 1
+        moved = int((team != original).sum())
+
+    return team, iterations
+
+
+def _team_table(scores, teams, team_labels, categories):
+    """チームごとの人数とカテゴリ平均"""
+    df = pd.DataFrame(scores, columns=categories)
+    df['チーム'] = np.asarray(team_labels, dtype=object)[teams]
+    df_table = df.groupby('チーム').mean()
+    df_table.insert(0, '人数', df.groupby('チーム').size())
+    return df_table.reset_index()
+
+
+def optimize_team_composition(skill_matrix, location, process, objective='worst', max_moves=20,
+                              headcount_tolerance=0, seed=0):
+    """
+    拠点×工程の従業員をチーム間で入れ替え、チーム間のスキル差を縮める編成案を作成
+
+    従業員のスコアはカテゴリ平均（評価済みスキルのみ）で、評価のないカテゴリは
+    その拠点×工程の平均で補う（チーム平均に影響しない）。
+
+    Returns:
+        dict: moves（行番号, 移動元チーム, 移動先チーム）, before / after（チーム, 人数, カテゴリ平均）,
+            worst_before / worst_after（最も低いチーム×カテゴリ平均）,
+            spread_before / spread_after（チーム平均のチーム間分散のカテゴリ平均）, iterations
+    """
+    if not skill_matrix.has_column('チーム'):
+        raise ValueError("スキルデータにチーム列がありません")
+
+    rows = skill_matrix.rows({'拠点': location, '工程': process})
+    team_codes = skill_matrix.codes('チーム', rows)
+    rows, team_codes = rows[team_codes >= 0], team_codes[team_codes >= 0]
+    if len(rows) == 0:
+        return None
+
+    category_scores, _ = skill_matrix.employee_category_scores(rows)
+    rated = ~np.all(np.isnan(category_scores), axis=0)
+    categories = [c for c, ok in zip(skill_matrix.categories, rated) if ok]
+    category_scores = category_scores[:, rated]
+    category_scores = np.where(np.isnan(category_scores), np.nanmean(category_scores, axis=0), category_scores)
+
+    # データにあるチームだけを 0〜チーム数-1 に詰める
+    present, teams = np.unique(team_codes, return_inverse=True)
+    team_labels = [skill_matrix.labels('チーム')[code] for code in present]
+
+    optimized, iterations = optimize_teams(
+        category_scores, teams, objective, max_moves, headcount_tolerance, seed=seed
+    )
+
+    df_before = _team_table(category_scores, teams, team_labels, categories)
+    df_after = _team_table(category_scores, optimized, team_labels, categories)
+    changed = np.flatnonzero(optimized != teams)
+    labels = np.asarray(team_labels, dtype=object)
+
+    return {
+        'moves': pd.DataFrame({
+            '行番号': rows[changed],
+            '移動元チーム': labels[teams[changed]],
+            '移動先チーム': labels[optimized[changed]]
+        }),
+        'before': df_before,
+        'after': df_after,
+        'worst_before': float(df_before[categories].to_numpy().min()),
+        'worst_after': float(df_after[categories].to_numpy().min()),
+        'spread_before': float(df_before[categories].var(ddof=0).mean()),
+        'spread_after': float(df_after[categories].var(ddof=0).mean()),
+        'iterations': iterations
+    }
+
+
+@versioned_cache(namespace='action_plan')
+def cached_team_composition(skill_matrix, location, process, objective='worst', max_moves=20,
+                            headcount_tolerance=0, seed=0):
+    """データセットのバージョン・条件ごとにチーム編成案をキャッシュ"""
+    return optimize_team_composition(skill_matrix, location, process, objective, max_moves,
+                                     headcount_tolerance, seed)
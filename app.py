@@ -1,5 +1,9 @@
 import streamlit as st
 from data_loader import generate_dummy_data
+from analytics.forecasting import start_kpi_forecasts
+from analytics.skill_matrix import SkillMatrix
+from utils.versioned_cache import VERSION_HASH_FUNCS, register_dataset
+from utils.session_results import touch_session
 from views.welcome import show_welcome_screen
 from views.executive_summary import show_executive_summary
 from views.root_cause_analysis import show_root_cause_analysis
@@ -8,7 +12,9 @@ from views.integrated_quality_analysis import show_integrated_quality_analysis
 from views.action_plan import show_action_plan
 from views.monitoring import show_monitoring_dashboard
 from views.raw_data import show_raw_data
+from views.cache_admin import show_cache_admin
 from utils.styles import apply_custom_styles
+from utils.profiling import start_profiling_run, profile_section, finish_profiling_run, show_profiling_panel
 
 # ページ設定（最初に実行）
 st.set_page_config(
@@ -34,6 +40,12 @@ if 'target_location' not in st.session_state:
 if 'priority_skill' not in st.session_state:
     st.session_state.priority_skill = None
 
+# 共有結果ストアの操作時刻を更新し、操作のないセッションの参照を解放
+touch_session()
+
+# パフォーマンス計測（サイドバーの開発者ツールで有効化した場合のみ）
+start_profiling_run(st.session_state.selected_menu, st.session_state.target_location)
+
 # --------------------------------------------------------------------------------
 # データ読み込み
 # --------------------------------------------------------------------------------
@@ -42,11 +54,24 @@ if 'priority_skill' not in st.session_state:
 def load_data():
     """データをキャッシュして読み込み"""
     df_skill, df_daily_prod, skill_hierarchy, all_skills, skill_to_category, skill_categories, processes = generate_dummy_data()
+    # 読み込み時に1回だけバージョンを計算（以降のキャッシュはこの値をキーにする）
+    register_dataset(df_skill)
+    register_dataset(df_daily_prod)
+    # KPI予測の当てはめは重いため、読み込み直後にバックグラウンドで開始（データセットのバージョンごとに1回）
+    start_kpi_forecasts(df_daily_prod)
     return df_skill, df_daily_prod, skill_hierarchy, all_skills, skill_to_category, skill_categories, processes
 
+@st.cache_resource(hash_funcs=VERSION_HASH_FUNCS)
+def load_skill_matrix(df_skill, skill_hierarchy):
+    """スキルデータの行列表現を作成（全ビュー・全セッションで共有）"""
+    return SkillMatrix(df_skill, skill_hierarchy)
+
 # データをロード
 try:
-    df_skill, df_daily_prod, skill_hierarchy, all_skills, skill_to_category, skill_categories, processes = load_data()
+    with profile_section('load_data'):
+        df_skill, df_daily_prod, skill_hierarchy, all_skills, skill_to_category, skill_categories, processes = load_data()
+    with profile_section('load_skill_matrix'):
+        skill_matrix = load_skill_matrix(df_skill, skill_hierarchy)
 except Exception as e:
     st.error(f"データロードエラー: {str(e)}")
     st.stop()
@@ -155,6 +180,17 @@ with st.sidebar:
         3. アクションプランで施策を決定
         4. モニタリングで効果を追跡
         """)
+    
+    with st.expander("🛠️ 開発者ツール"):
+        st.checkbox(
+            "パフォーマンス計測を有効化",
+            key="profiling_enabled",
+            help="セクションごとの処理時間を計測し、logs/profiling.jsonl に追記します（メモリは環境変数 SDP_PROFILE_MEMORY=1 で起動したときのみ）"
+        )
+        if st.button("🛠️ キャッシュ管理", key="menu_cache_admin", use_container_width=True):
+            st.session_state.selected_menu = "🛠️ キャッシュ管理"
+            st.rerun()
+        profiling_container = st.container()
 
 # --------------------------------------------------------------------------------
 # メインコンテンツエリア
@@ -165,10 +201,8 @@ if st.session_state.selected_menu == "🏠 ホーム":
     show_welcome_screen()
 
 elif st.session_state.selected_menu == "📊 エグゼクティブサマリー":
-    df_summary = show_executive_summary(df_skill, df_daily_prod)
-    # サマリー情報をセッション状態に保存
-    if df_summary is not None and not df_summary.empty:
-        st.session_state.df_summary = df_summary
+    # サマリーは共有結果ストアに保持される（セッションにはハンドルのみ）
+    show_executive_summary(df_skill, df_daily_prod)
 
 elif st.session_state.selected_menu == "🔬 根本原因分析":
     if st.session_state.target_location:
@@ -179,7 +213,8 @@ elif st.session_state.selected_menu == "🔬 根本原因分析":
             skill_to_category,
             skill_categories,
             skill_hierarchy,
-            processes
+            processes,
+            skill_matrix
         )
         st.session_state.priority_skill = priority_skill
     else:
@@ -217,7 +252,10 @@ elif st.session_state.selected_menu == "📋 アクションプラン":
         show_action_plan(
             df_skill, 
             st.session_state.target_location,
-            priority_skill
+            priority_skill,
+            skill_matrix,
+            processes,
+            skill_categories
         )
     else:
         st.warning("分析対象拠点を選択してください。", icon="⚠️")
@@ -234,6 +272,12 @@ elif st.session_state.selected_menu == "📉 継続モニタリング":
 elif st.session_state.selected_menu == "📁 生データ閲覧":
     show_raw_data(df_skill, df_daily_prod)
 
+elif st.session_state.selected_menu == "🛠️ キャッシュ管理":
+    show_cache_admin()
+
 # フッター
 st.markdown("---")
-st.caption("© Skillnote SDP Analysis Dashboard | Designed for Strategic Decision Making")
\ No newline at end of file
+st.caption("© Skillnote SDP Analysis Dashboard | Designed for Strategic Decision Making")
+
+# 計測結果の記録とデバッグパネル表示
+show_profiling_panel(profiling_container, finish_profiling_run())
\ No newline at end of file
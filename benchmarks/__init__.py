@@ -0,0 +1 @@
+# benchmarks package initialization
\ No newline at end of file
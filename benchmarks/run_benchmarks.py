@@ -0,0 +1,394 @@
+# benchmarks/run_benchmarks.py
+# 各ビューの中核計算のベンチマーク（複数規模・JSONレポート・ベースライン比較）
+#
+# 使い方:
+#   python -m benchmarks.run_benchmarks                        # 1×, 10×, 100× を計測
+#   python -m benchmarks.run_benchmarks --scales 1 10 --repeat 3
+#   python -m benchmarks.run_benchmarks --output benchmarks/baseline.json   # ベースラインを保存
+#   python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json # 回帰を検出（回帰時は終了コード1）
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics.budget_optimizer import build_budget_problem, solve_budget_allocation
+from analytics.cohorts import cluster_employees
+from analytics.forecasting import forecast_kpis
+from analytics.correlation import SLICE_KEYS, correlate_by_slice
+from analytics.kpi_rollup import compute_daily_rollup
+from analytics.location_loss import compute_location_summary
+from analytics.mentor_pairing import pair_mentors
+from analytics.roster import attendance_matrix, category_membership, roster_skill_averages
+from analytics.significance import compute_gap_significance
+from analytics.skill_gap import compute_bottleneck_table, compute_gap_heatmap, compute_gap_tensor, rank_location_gaps
+from analytics.skill_matrix import SkillMatrix
+from analytics.spc import build_spc_monitor, extend_spc_state
+from analytics.team_optimizer import optimize_team_composition
+from benchmarks.synthetic import BASE_DAYS, generate_datasets, generate_roster_codes, generate_sparse_skill_data
+from data_loader import generate_dummy_data
+from utils.data_filters import filter_by_values
+
+REPORT_SCHEMA_VERSION = 1
+
+DEFAULT_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), 'results', 'latest.json')
+
+# ベンチマーク対象の拠点
+TARGET_LOCATION = '拠点A (IN)'
+BENCHMARK_LOCATION = '日本 (JP)'
+
+
+def _case_location_loss(ctx):
+    compute_location_summary(ctx['df_skill'])
+
+
+def _skill_matrix(ctx):
+    # アプリと同様に行列は1回だけ作成して使い回す
+    if 'skill_matrix' not in ctx:
+        ctx['skill_matrix'] = SkillMatrix(ctx['df_skill'], ctx['skill_hierarchy'])
+    return ctx['skill_matrix']
+
+
+def _case_skill_matrix_build(ctx):
+    SkillMatrix(ctx['df_skill'], ctx['skill_hierarchy'])
+
+
+def _case_gap_heatmap(ctx):
+    compute_gap_heatmap(
+        _skill_matrix(ctx), TARGET_LOCATION, ctx['processes'], ctx['skill_categories'],
+        benchmark_location=BENCHMARK_LOCATION
+    )
+
+
+def _case_bottleneck_table(ctx):
+    compute_bottleneck_table(_skill_matrix(ctx), TARGET_LOCATION, ctx['processes'], ctx['skill_categories'])
+
+
+def _case_location_comparison(ctx):
+    tensor = compute_gap_tensor(_skill_matrix(ctx), ctx['processes'], ctx['skill_categories'])
+    rank_location_gaps(tensor, BENCHMARK_LOCATION)
+
+
+def _case_gap_significance(ctx):
+    compute_gap_significance(_skill_matrix(ctx), BENCHMARK_LOCATION, ('拠点', '工程', 'シフト'), level='skill')
+
+
+def _case_budget_optimizer(ctx):
+    tensor = compute_gap_tensor(_skill_matrix(ctx), ctx['processes'], ctx['skill_categories'])
+    problem = build_budget_problem(tensor, compute_location_summary(ctx['df_skill']), BENCHMARK_LOCATION)
+    solve_budget_allocation(problem, problem['saturation_budget'] / 2)
+
+
+def _case_team_optimizer(ctx):
+    optimize_team_composition(_skill_matrix(ctx), TARGET_LOCATION, ctx['processes'][0], 'variance', max_moves=20)
+
+
+def _case_mentor_pairing(ctx):
+    pair_mentors(_skill_matrix(ctx))
+
+
+def _case_cohorts(ctx):
+    cluster_employees(_skill_matrix(ctx))
+
+
+def _sparse_ratings(ctx):
+    # 2,000スキル・1人40評価の縦持ちデータ（生成は初回のみ）
+    if 'sparse_ratings' not in ctx:
+        ctx['sparse_ratings'] = generate_sparse_skill_data(ctx['scale'], ctx['processes'])
+    return ctx['sparse_ratings']
+
+
+def _case_sparse_matrix_build(ctx):
+    df_employees, df_ratings, skill_hierarchy = _sparse_ratings(ctx)
+    ctx['sparse_matrix'] = SkillMatrix.from_ratings(df_employees, df_ratings, skill_hierarchy)
+
+
+def _case_sparse_gap_heatmap(ctx):
+    _, _, skill_hierarchy = _sparse_ratings(ctx)
+    if 'sparse_matrix' not in ctx:
+        _case_sparse_matrix_build(ctx)
+    compute_gap_heatmap(
+        ctx['sparse_matrix'], TARGET_LOCATION, ctx['processes'], list(skill_hierarchy),
+        benchmark_location=BENCHMARK_LOCATION
+    )
+
+
+def _case_correlation_table(ctx):
+    correlate_by_slice(ctx['df_daily_prod'], by=SLICE_KEYS)
+
+
+def _case_monitoring_rollup(ctx):
+    compute_daily_rollup(ctx['df_daily_prod'], TARGET_LOCATION)
+
+
+def _case_monitoring_spc(ctx):
+    build_spc_monitor(ctx['df_daily_prod']).alerts()
+
+
+def _case_monitoring_spc_incremental(ctx):
+    # 最終日を除いたデータの状態の作成は初回（ウォームアップ）のみ
+    if 'spc_previous_state' not in ctx:
+        df_daily_prod = ctx['df_daily_prod']
+        df_previous = df_daily_prod[df_daily_prod['日付'] < df_daily_prod['日付'].max()].reset_index(drop=True)
+        ctx['spc_previous_state'] = build_spc_monitor(df_previous).state(df_previous)
+    extend_spc_state(ctx['spc_previous_state'], ctx['df_daily_prod'])
+
+
+def _case_monitoring_forecast(ctx):
+    forecast_kpis(ctx['df_daily_prod'])
+
+
+def _case_raw_filter_skill(ctx):
+    df_skill = ctx['df_skill']
+    filter_by_values(df_skill, {
+        '拠点': [TARGET_LOCATION, BENCHMARK_LOCATION],
+        'チーム': ['Aチーム', 'Bチーム'],
+        'シフト': ['日勤']
+    })
+
+
+def _case_raw_filter_daily(ctx):
+    filter_by_values(ctx['df_daily_prod'], {
+        '拠点': [TARGET_LOCATION],
+        'シフト': ['日勤', '夜勤']
+    })
+
+
+def _case_roster_averages(ctx):
+    # 出勤記録の生成は初回（ウォームアップ）のみ
+    if 'roster' not in ctx:
+        n_days = int(BASE_DAYS * ctx['scale'])
+        skills, _, membership = category_membership(ctx['skill_hierarchy'])
+        ctx['roster'] = (
+            generate_roster_codes(ctx['df_skill'], n_days),
+            ctx['df_skill'][skills].to_numpy(dtype=np.float32),
+            membership
+        )
+    (slot_codes, employee_codes, n_slots), skill_values, membership = ctx['roster']
+    matrix = attendance_matrix(slot_codes, employee_codes, n_slots, len(ctx['df_skill']))
+    roster_skill_averages(matrix, skill_values, membership)
+
+
+# ケース名 → 計測関数（ctx を受け取る）
+BENCHMARK_CASES = {
+    'summary.location_loss': _case_location_loss,
+    'skill_matrix.build': _case_skill_matrix_build,
+    'root_cause.gap_heatmap': _case_gap_heatmap,
+    'root_cause.bottleneck_table': _case_bottleneck_table,
+    'root_cause.location_comparison': _case_location_comparison,
+    'root_cause.gap_significance': _case_gap_significance,
+    'action_plan.budget_optimizer': _case_budget_optimizer,
+    'action_plan.team_optimizer': _case_team_optimizer,
+    'action_plan.mentor_pairing': _case_mentor_pairing,
+    'action_plan.cohorts': _case_cohorts,
+    'skill_matrix.sparse_build': _case_sparse_matrix_build,
+    'root_cause.sparse_gap_heatmap': _case_sparse_gap_heatmap,
+    'quality.correlation_table': _case_correlation_table,
+    'monitoring.daily_rollup': _case_monitoring_rollup,
+    'monitoring.spc': _case_monitoring_spc,
+    'monitoring.spc_incremental': _case_monitoring_spc_incremental,
+    'monitoring.forecast': _case_monitoring_forecast,
+    'roster.skill_averages': _case_roster_averages,
+    'raw_data.filter_skill': _case_raw_filter_skill,
+    'raw_data.filter_daily': _case_raw_filter_daily
+}
+
+
+def time_case(func, ctx, repeat=5, warmup=1):
+    """関数を warmup 回空実行した後 repeat 回計測し、ミリ秒の統計値を返す"""
+    for _ in range(warmup):
+        func(ctx)
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(ctx)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(max(timings), 3)
+    }
+
+
+def run_benchmarks(scales, cases=None, repeat=5, warmup=1, seed=42, log=print):
+    """
+    全規模×全ケースを計測してレポート辞書を返す
+
+    Args:
+        scales: データ規模の倍率リスト（従業員数・日数の両方に掛かる）
+        cases: 計測するケース名のリスト（None で全ケース）
+
+    Returns:
+        dict: environment, config, results を含むレポート
+    """
+    case_names = list(cases) if cases else list(BENCHMARK_CASES)
+    unknown = [name for name in case_names if name not in BENCHMARK_CASES]
+    if unknown:
+        raise ValueError(f"未定義のベンチマークケース: {', '.join(unknown)}")
+
+    # スキル階層などのメタデータはアプリと同じ定義を使う
+    _, _, skill_hierarchy, _, _, skill_categories, processes = generate_dummy_data()
+
+    results = []
+    for scale in scales:
+        df_skill, df_daily_prod = generate_datasets(scale, skill_hierarchy, processes, seed=seed)
+        ctx = {
+            'scale': scale,
+            'df_skill': df_skill,
+            'df_daily_prod': df_daily_prod,
+            'skill_hierarchy': skill_hierarchy,
+            'skill_categories': skill_categories,
+            'processes': processes
+        }
+        log(f"--- scale {scale}x: スキル {len(df_skill):,}行 / 日次 {len(df_daily_prod):,}行")
+
+        for name in case_names:
+            stats = time_case(BENCHMARK_CASES[name], ctx, repeat=repeat, warmup=warmup)
+            results.append({
+                'case': name,
+                'scale': scale,
+                'skill_rows': len(df_skill),
+                'daily_rows': len(df_daily_prod),
+                **stats
+            })
+            log(f"  {name:<32} median {stats['median_ms']:>10.2f} ms  (min {stats['min_ms']:.2f})")
+
+    return {
+        'schema_version': REPORT_SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__
+        },
+        'config': {
+            'scales': list(scales),
+            'cases': case_names,
+            'repeat': repeat,
+            'warmup': warmup,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def compare_with_baseline(report, baseline, threshold=0.2, min_delta_ms=1.0):
+    """
+    中央値をベースラインと比較し、ケース×規模ごとの判定を返す
+
+    中央値が (1 + threshold) 倍を超え、かつ差が min_delta_ms 以上なら回帰とする。
+
+    Returns:
+        list: case, scale, baseline_ms, current_ms, ratio, status の辞書
+            status は 'regression' / 'improvement' / 'ok' / 'new'
+    """
+    baseline_index = {(row['case'], row['scale']): row for row in baseline.get('results', [])}
+
+    comparison = []
+    for row in report['results']:
+        base = baseline_index.get((row['case'], row['scale']))
+        if base is None:
+            comparison.append({
+                'case': row['case'], 'scale': row['scale'],
+                'baseline_ms': None, 'current_ms': row['median_ms'], 'ratio': None, 'status': 'new'
+            })
+            continue
+
+        base_ms = base['median_ms']
+        ratio = row['median_ms'] / base_ms if base_ms > 0 else float('inf')
+        delta_ms = row['median_ms'] - base_ms
+
+        if ratio > 1 + threshold and delta_ms >= min_delta_ms:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold) and -delta_ms >= min_delta_ms:
+            status = 'improvement'
+        else:
+            status = 'ok'
+
+        comparison.append({
+            'case': row['case'], 'scale': row['scale'],
+            'baseline_ms': base_ms, 'current_ms': row['median_ms'],
+            'ratio': round(ratio, 3), 'status': status
+        })
+
+    return comparison
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='分析処理のベンチマーク')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help='データ規模の倍率（従業員数・日数）')
+    parser.add_argument('--cases', nargs='+', choices=list(BENCHMARK_CASES),
+                        help='計測するケース（省略時は全ケース）')
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数')
+    parser.add_argument('--warmup', type=int, default=1, help='計測前の空実行回数')
+    parser.add_argument('--seed', type=int, default=42, help='合成データの乱数シード')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help='JSONレポートの出力先')
+    parser.add_argument('--baseline', help='比較するベースラインレポート（JSON）')
+    parser.add_argument('--threshold', type=float, default=0.2, help='回帰とみなす中央値の増加率')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='回帰とみなす最小の差（ミリ秒）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    # 整数倍率は int のまま扱う（レポートのキーを安定させる）
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+
+    report = run_benchmarks(scales, cases=args.cases, repeat=args.repeat, warmup=args.warmup, seed=args.seed)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparison = compare_with_baseline(report, baseline, threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+        report['baseline'] = {
+            'path': args.baseline,
+            'created_at': baseline.get('created_at'),
+            'threshold': args.threshold,
+            'min_delta_ms': args.min_delta_ms
+        }
+        report['comparison'] = comparison
+
+        print("\n=== ベースライン比較 ===")
+        print(pd.DataFrame(comparison).to_string(index=False))
+
+        regressions = [row for row in comparison if row['status'] == 'regression']
+        if regressions:
+            print(f"\n⚠️ 性能回帰: {len(regressions)}件")
+            exit_code = 1
+        else:
+            print("\n✅ 性能回帰なし")
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 レポート: {args.output}")
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
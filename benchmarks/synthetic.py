@@ -0,0 +1,218 @@
+# benchmarks/synthetic.py
+# ベンチマーク用の合成データ生成（従業員数・日数を倍率で拡大）
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 現行データの規模（倍率1のとき）
+BASE_EMPLOYEES = 400
+BASE_DAYS = 30
+
+# 拠点ごとのスキル水準（generate_dummy_data.py と同じ範囲）
+LOCATION_SKILL_RANGES = {
+    '日本 (JP)': (3.5, 4.8),
+    '拠点A (IN)': (2.5, 4.0),
+    '拠点B (BR)': (2.3, 3.8),
+    '拠点C (VN)': (2.2, 3.6)
+}
+
+TEAMS = ['Aチーム', 'Bチーム', 'Cチーム']
+SHIFTS = ['日勤', '夜勤']
+
+# 日次生産データの工程とスキルカテゴリ（daily_production_dummy.csv と同じ構成）
+DAILY_PROCESSES = ['加工', '組立', '検査']
+DAILY_CATEGORIES = {
+    '技術力': 0.2,
+    '安全意識': 0.3,
+    '品質意識': 0.2,
+    'チームワーク': 0.3,
+    '改善提案力': 0.4
+}
+
+
+def generate_skill_data(scale, skill_hierarchy, processes, seed=42):
+    """
+    従業員スキルデータを生成（従業員数 = BASE_EMPLOYEES × scale）
+
+    ボトルネック分析で使うため、アプリのスキルデータにはないシフト列も付与する。
+    """
+    rng = np.random.default_rng(seed)
+    n = int(BASE_EMPLOYEES * scale)
+    locations = list(LOCATION_SKILL_RANGES)
+
+    location_idx = rng.integers(0, len(locations), n)
+    low = np.array([LOCATION_SKILL_RANGES[loc][0] for loc in locations])[location_idx]
+    high = np.array([LOCATION_SKILL_RANGES[loc][1] for loc in locations])[location_idx]
+    base_score = rng.uniform(low, high)
+
+    df_skill = pd.DataFrame({
+        '拠点': np.array(locations)[location_idx],
+        '工程': np.array(processes)[rng.integers(0, len(processes), n)],
+        'チーム': np.array(TEAMS)[rng.integers(0, len(TEAMS), n)],
+        'シフト': np.array(SHIFTS)[rng.integers(0, len(SHIFTS), n)],
+        '従業員ID': [f'EMP_{i + 1:07d}' for i in range(n)],
+        '評価日': pd.Timestamp(datetime(2025, 1, 1)) - pd.to_timedelta(rng.integers(1, 180, n), unit='D')
+    })
+
+    all_skills = [skill for info in skill_hierarchy.values() for skill in info['skills']]
+    scores = np.clip(base_score[:, None] + rng.uniform(-0.3, 0.3, (n, len(all_skills))), 1, 5).astype(int)
+    df_scores = pd.DataFrame(scores, columns=all_skills)
+    df_skill = pd.concat([df_skill, df_scores], axis=1)
+
+    for category, info in skill_hierarchy.items():
+        df_skill[f'{category}_平均'] = df_skill[info['skills']].mean(axis=1).round(2)
+
+    df_skill['総合スキルスコア'] = df_skill[all_skills].mean(axis=1).round(2)
+    df_skill['生産効率 (%)'] = (60 + df_skill['総合スキルスコア'] * 8 + rng.standard_normal(n) * 4).clip(75, 98).round(1)
+    df_skill['品質不良率 (%)'] = (8 - df_skill['総合スキルスコア'] * 1.2 + rng.standard_normal(n)).clip(0.5, 8).round(1)
+
+    return df_skill
+
+
+def generate_daily_data(scale, seed=42):
+    """
+    日次生産データを生成（日数 = BASE_DAYS × scale、1日あたり拠点×工程×シフトの行）
+
+    チームは日勤・夜勤・休みの3日ローテーション。
+    """
+    rng = np.random.default_rng(seed + 1)
+    n_days = int(BASE_DAYS * scale)
+    locations = list(LOCATION_SKILL_RANGES)
+
+    # 日付×拠点×工程×シフトの全組み合わせ
+    day, loc_idx, proc_idx, shift_idx = [
+        axis.ravel() for axis in np.meshgrid(
+            np.arange(n_days), np.arange(len(locations)), np.arange(len(DAILY_PROCESSES)), np.arange(len(SHIFTS)),
+            indexing='ij'
+        )
+    ]
+    n = len(day)
+    is_night = shift_idx == 1
+
+    # 日勤チーム = day % 3、夜勤チーム = (day + 1) % 3
+    team_idx = (day + is_night) % len(TEAMS)
+
+    low = np.array([LOCATION_SKILL_RANGES[loc][0] for loc in locations])[loc_idx]
+    high = np.array([LOCATION_SKILL_RANGES[loc][1] for loc in locations])[loc_idx]
+    low = np.where(is_night, np.maximum(1.0, low - 0.2), low)
+    high = np.where(is_night, high - 0.2, high)
+    skill_mean = rng.uniform(low, high)
+
+    defect = np.maximum(0.1, np.where(is_night, 5.5, 5.0) - skill_mean * 1.2 + rng.normal(0, 0.3, n))
+    efficiency = np.clip(75 + skill_mean * 4 + rng.standard_normal(n) * 3, 75, 98)
+
+    df_daily_prod = pd.DataFrame({
+        '日付': pd.Timestamp(datetime(2025, 1, 1)) + pd.to_timedelta(day, unit='D'),
+        '拠点': np.array(locations)[loc_idx],
+        '工程': np.array(DAILY_PROCESSES)[proc_idx],
+        'シフト': np.array(SHIFTS)[shift_idx],
+        'チーム': np.array(TEAMS)[team_idx],
+        '生産数量': np.where(is_night, rng.integers(700, 1100, n), rng.integers(800, 1200, n)),
+        '日次生産量 (t)': (rng.integers(500, 3000, n) * (1 + (skill_mean - 3.5) / 5)).round(1),
+        '生産効率 (%)': efficiency.round(1),
+        '歩留まり (%)': (100 - defect).round(2),
+        '品質不良率 (%)': defect.round(2),
+        '平均スキル予測値': skill_mean.round(2),
+        '従業員数': rng.integers(5, 15, n)
+    })
+
+    for category, spread in DAILY_CATEGORIES.items():
+        df_daily_prod[f'{category}_平均'] = (skill_mean + rng.uniform(-spread, spread, n)).round(2)
+
+    return df_daily_prod
+
+
+def generate_datasets(scale, skill_hierarchy, processes, seed=42):
+    """倍率 scale の (スキルデータ, 日次生産データ) を生成"""
+    return (
+        generate_skill_data(scale, skill_hierarchy, processes, seed=seed),
+        generate_daily_data(scale, seed=seed)
+    )
+
+
+def generate_roster_codes(df_skill, n_days, attendance_rate=0.85, seed=42):
+    """
+    出勤記録を（枠番号, 従業員番号）の配列として生成
+
+    枠は 日×拠点×工程×シフト。チームは日次データと同じ3日ローテーション
+    （日勤 = day % 3、夜勤 = (day + 1) % 3）で、該当チームの各従業員が attendance_rate の確率で出勤する。
+    DataFrame を経由しないため、数千万件規模でも生成できる。
+
+    Returns:
+        tuple: (枠番号配列, 従業員番号配列, 枠数)
+    """
+    rng = np.random.default_rng(seed + 2)
+    group_codes = df_skill.groupby(['拠点', '工程'], sort=True).ngroup().to_numpy()
+    n_groups = group_codes.max() + 1
+    team_codes = pd.Index(TEAMS).get_indexer(df_skill['チーム'])
+    employee_idx = np.arange(len(df_skill), dtype=np.int32)
+    slots_per_day = n_groups * len(SHIFTS)
+
+    slot_parts = []
+    employee_parts = []
+    for day in range(n_days):
+        day_team = day % len(TEAMS)
+        night_team = (day + 1) % len(TEAMS)
+        working = (team_codes == day_team) | (team_codes == night_team)
+        present = working & (rng.random(len(df_skill)) < attendance_rate)
+
+        shift = (team_codes[present] == night_team) & (day_team != night_team)
+        slot_parts.append((day * slots_per_day + group_codes[present] * len(SHIFTS) + shift).astype(np.int32))
+        employee_parts.append(employee_idx[present])
+
+    return np.concatenate(slot_parts), np.concatenate(employee_parts), n_days * slots_per_day
+
+
+def generate_sparse_skill_data(scale, processes, n_skills=2000, n_categories=20, ratings_per_employee=40, seed=42):
+    """
+    大規模なスキル体系の評価データを縦持ちで生成（各従業員は一部のスキルのみ評価）
+
+    従業員は工程ごとに偏ったスキルを評価される（工程に対応するカテゴリから半数、残りは全体から）。
+    同じスキルの重複評価は SkillMatrix.from_ratings が後の行を採用する。
+
+    Returns:
+        tuple: (従業員属性 DataFrame, 評価 DataFrame（従業員ID, スキル, スコア）, スキル階層)
+    """
+    rng = np.random.default_rng(seed + 3)
+    n = int(BASE_EMPLOYEES * scale)
+    locations = list(LOCATION_SKILL_RANGES)
+
+    skills_per_category = n_skills // n_categories
+    skill_hierarchy = {
+        f'カテゴリ{c + 1:02d}': {
+            'skills': [f'スキル{c * skills_per_category + i + 1:05d}' for i in range(skills_per_category)]
+        }
+        for c in range(n_categories)
+    }
+    skill_names = np.array([skill for info in skill_hierarchy.values() for skill in info['skills']])
+
+    location_idx = rng.integers(0, len(locations), n)
+    process_idx = rng.integers(0, len(processes), n)
+    df_employees = pd.DataFrame({
+        '拠点': np.array(locations)[location_idx],
+        '工程': np.array(processes)[process_idx],
+        'チーム': np.array(TEAMS)[rng.integers(0, len(TEAMS), n)],
+        'シフト': np.array(SHIFTS)[rng.integers(0, len(SHIFTS), n)],
+        '従業員ID': [f'EMP_{i + 1:07d}' for i in range(n)]
+    })
+
+    # 工程に対応するカテゴリ内のスキルと、全体からのスキルを半数ずつ
+    n_focus = ratings_per_employee // 2
+    focus_category = process_idx % n_categories
+    focus = focus_category[:, None] * skills_per_category + rng.integers(0, skills_per_category, (n, n_focus))
+    other = rng.integers(0, len(skill_names), (n, ratings_per_employee - n_focus))
+    skill_idx = np.hstack([focus, other]).ravel()
+
+    low = np.array([LOCATION_SKILL_RANGES[loc][0] for loc in locations])[location_idx]
+    high = np.array([LOCATION_SKILL_RANGES[loc][1] for loc in locations])[location_idx]
+    base_score = np.repeat(rng.uniform(low, high), ratings_per_employee)
+    scores = np.clip(base_score + rng.uniform(-0.8, 0.8, len(skill_idx)), 1, 5).astype(np.int8)
+
+    df_ratings = pd.DataFrame({
+        '従業員ID': np.repeat(df_employees['従業員ID'].to_numpy(), ratings_per_employee),
+        'スキル': skill_names[skill_idx],
+        'スコア': scores
+    })
+    return df_employees, df_ratings, skill_hierarchy
@@ -1,23 +1,38 @@
 """
 ダミーデータ生成スクリプト
-- 30日間のデータ
-- 複数拠点（日本 + 海外3拠点）
+- 日数・拠点・工程・チームをコマンドライン引数で指定（既定: 30日、日本 + 海外3拠点、3工程、3チーム）
 - 各チーム・各日で休む人が変わる → スキル平均値が変動
 - スキル平均値が低い日 → 品質不良率が高い（負の相関 R≒-0.7）
+- 拠点×期間ブロックごとにプロセスプールで並列生成し、CSV / Parquet へ直接書き出す
+  （SeedSequence から派生した乱数ストリームを使うため、並列数によらず同じ結果になる）
+
+使い方:
+    python generate_dummy_data.py                                  # data/daily_production_dummy.csv を再生成
+    python generate_dummy_data.py --days 365 --output /tmp/daily.csv
+    python generate_dummy_data.py --rows 10000000 --extra-locations 996 --format parquet --output /tmp/soak.parquet
+    python generate_dummy_data.py --locations "日本 (JP)" "拠点D (MX)=2.4,3.9" --processes 加工 組立
 """
 
-import pandas as pd
+import argparse
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
 
-# ランダムシード固定（再現性のため）
-np.random.seed(42)
+# 既定の設定
+DEFAULT_START_DATE = '2025-01-01'
+DEFAULT_DAYS = 30
+DEFAULT_TEAMS = ['Aチーム', 'Bチーム', 'Cチーム']
+DEFAULT_PROCESSES = ['加工', '組立', '検査']
+DEFAULT_OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'daily_production_dummy.csv')
 
-# 設定
-START_DATE = datetime(2025, 1, 1)
-NUM_DAYS = 30
-TEAMS = ['Aチーム', 'Bチーム', 'Cチーム']
-PROCESSES = ['加工', '組立', '検査']
+# 1ファイルチャンク（=1タスク）あたりの目安行数
+DEFAULT_CHUNK_ROWS = 500_000
 
 # 拠点設定（日本 + 海外3拠点）
 LOCATIONS = {
@@ -27,154 +42,294 @@ LOCATIONS = {
     '拠点C (VN)': {'skill_base': 2.8, 'skill_range': (2.2, 3.6)}
 }
 
-# データリスト
-data = []
-
-# 日付ループ
-for day_offset in range(NUM_DAYS):
-    current_date = START_DATE + timedelta(days=day_offset)
-    
-    # その日のシフト割り当て（3チームを日勤・夜勤・休みにローテーション）
-    team_rotation_index = day_offset % 3
-    
-    if team_rotation_index == 0:
-        day_team = 'Aチーム'
-        night_team = 'Bチーム'
-        rest_team = 'Cチーム'
-    elif team_rotation_index == 1:
-        day_team = 'Bチーム'
-        night_team = 'Cチーム'
-        rest_team = 'Aチーム'
+# 範囲指定のない未知の拠点に使うスキル範囲
+DEFAULT_SKILL_RANGE = (2.5, 4.0)
+
+# 追加の合成拠点のスキル範囲（下限・上限の取りうる範囲）
+EXTRA_LOCATION_SKILL_MIN = (2.0, 3.0)
+EXTRA_LOCATION_SKILL_WIDTH = (1.0, 1.5)
+
+# スキルカテゴリ平均の揺らぎ幅（平均スキル予測値 ± 幅）
+CATEGORY_SPREADS = {
+    '技術力': 0.2,
+    '安全意識': 0.3,
+    '品質意識': 0.2,
+    'チームワーク': 0.3,
+    '改善提案力': 0.4
+}
+
+SHIFTS = ['日勤', '夜勤']
+
+COLUMNS = [
+    '日付', '拠点', '工程', 'シフト', 'チーム', '生産数量', '日次生産量 (t)', '生産効率 (%)',
+    '歩留まり (%)', '品質不良率 (%)', '平均スキル予測値', '従業員数'
+] + [f'{category}_平均' for category in CATEGORY_SPREADS]
+
+
+def parse_location(spec):
+    """「拠点名」または「拠点名=下限,上限」を (拠点名, スキル範囲) に変換"""
+    if '=' in spec:
+        name, bounds = spec.split('=', 1)
+        low, high = (float(v) for v in bounds.split(','))
+        return name.strip(), (low, high)
+    if spec in LOCATIONS:
+        return spec, LOCATIONS[spec]['skill_range']
+    return spec, DEFAULT_SKILL_RANGE
+
+
+def make_extra_locations(count, seed):
+    """大規模データ用の合成拠点（名前とスキル範囲）を作成"""
+    rng = np.random.default_rng(seed)
+    low = rng.uniform(*EXTRA_LOCATION_SKILL_MIN, count).round(1)
+    high = (low + rng.uniform(*EXTRA_LOCATION_SKILL_WIDTH, count)).round(1)
+    return [(f'合成拠点{i + 1:04d} (SYN)', (lo, hi)) for i, (lo, hi) in enumerate(zip(low, high))]
+
+
+def generate_block(location, skill_range, processes, teams, start_date, day_start, day_end, seed_seq):
+    """
+    1拠点・1期間ブロックの日次データを生成
+
+    行の並びは 日付 → 工程 → シフト（日勤・夜勤）。
+    3チームを日勤・夜勤・休みにローテーションする（日勤 = day % N、夜勤 = (day + 1) % N）。
+    """
+    rng = np.random.default_rng(seed_seq)
+
+    day, proc_idx, shift_idx = [
+        axis.ravel() for axis in np.meshgrid(
+            np.arange(day_start, day_end), np.arange(len(processes)), np.arange(len(SHIFTS)),
+            indexing='ij'
+        )
+    ]
+    n = len(day)
+    is_night = shift_idx == 1
+
+    # スキル平均値：拠点ごとの範囲でランダムに変動（夜勤はやや低め）
+    skill_min, skill_max = skill_range
+    low = np.where(is_night, max(1.0, skill_min - 0.2), skill_min)
+    high = np.where(is_night, skill_max - 0.2, skill_max)
+    skill_mean = rng.uniform(low, high)
+
+    # 品質不良率：スキルと負の相関 + 夜勤は基準値が少し高い（最低0.1%）
+    defect_rate = np.maximum(0.1, np.where(is_night, 5.5, 5.0) - skill_mean * 1.2 + rng.normal(0, 0.3, n))
+
+    efficiency = np.clip(75 + skill_mean * 4 + rng.standard_normal(n) * 3, 75, 98)
+
+    dates = np.datetime64(start_date, 'D') + day
+
+    df = pd.DataFrame({
+        '日付': np.datetime_as_string(dates, unit='D'),
+        '拠点': location,
+        '工程': np.asarray(processes)[proc_idx],
+        'シフト': np.asarray(SHIFTS)[shift_idx],
+        'チーム': np.asarray(teams)[(day + is_night) % len(teams)],
+        '生産数量': np.where(is_night, rng.integers(700, 1100, n), rng.integers(800, 1200, n)),
+        '日次生産量 (t)': (rng.integers(500, 3000, n) * (1 + (skill_mean - 3.5) / 5)).round(1),
+        '生産効率 (%)': efficiency.round(1),
+        '歩留まり (%)': (100 - defect_rate).round(2),
+        '品質不良率 (%)': defect_rate.round(2),
+        '平均スキル予測値': skill_mean.round(2),
+        '従業員数': rng.integers(5, 15, n)
+    })
+
+    for category, spread in CATEGORY_SPREADS.items():
+        df[f'{category}_平均'] = (skill_mean + rng.uniform(-spread, spread, n)).round(2)
+
+    return df
+
+
+def _correlation_sums(df, processes):
+    """工程×シフトごとの相関計算用の和（件数, Σx, Σy, Σx², Σy², Σxy）"""
+    codes = df['工程'].map({p: i for i, p in enumerate(processes)}).to_numpy() * len(SHIFTS) + \
+        (df['シフト'] == SHIFTS[1]).to_numpy()
+    x = df['平均スキル予測値'].to_numpy()
+    y = df['品質不良率 (%)'].to_numpy()
+    size = len(processes) * len(SHIFTS)
+    return np.stack([
+        np.bincount(codes, weights=w, minlength=size)
+        for w in (np.ones_like(x), x, y, x * x, y * y, x * y)
+    ])
+
+
+def _write_block(task):
+    """タスク1件を生成して一時ファイルへ書き出す（プロセスプールのワーカー）"""
+    df = generate_block(
+        task['location'], task['skill_range'], task['processes'], task['teams'],
+        task['start_date'], task['day_start'], task['day_end'], task['seed_seq']
+    )
+    if task['format'] == 'parquet':
+        df.to_parquet(task['path'], index=False)
     else:
-        day_team = 'Cチーム'
-        night_team = 'Aチーム'
-        rest_team = 'Bチーム'
-    
-    # 拠点ごとにデータ生成
-    for location, location_config in LOCATIONS.items():
-        skill_min, skill_max = location_config['skill_range']
-        
-        # 工程ごとにデータ生成
-        for process in PROCESSES:
-            # 日勤のデータ
-            # スキル平均値：拠点ごとの範囲でランダムに変動（休む人が変わる想定）
-            day_skill_mean = np.random.uniform(skill_min, skill_max)
-            
-            # 品質不良率：スキルと負の相関（R≒-0.7）
-            # スキルが高い → 不良率低い、スキルが低い → 不良率高い
-            # 基準不良率 = 5.0 - (スキル平均 * 1.2) + ノイズ
-            day_defect_base = 5.0 - (day_skill_mean * 1.2)
-            day_defect_noise = np.random.normal(0, 0.3)  # ノイズ追加
-            day_defect_rate = max(0.1, day_defect_base + day_defect_noise)  # 最低0.1%
-            
-            # 生産数量
-            day_production = np.random.randint(800, 1200)
-            
-            # 日次生産量（トン単位） - 既存のquality_skill_analysis.pyとの互換性のため
-            day_daily_production = np.random.randint(500, 3000) * (1 + (day_skill_mean - 3.5) / 5)
-            
-            # 生産効率
-            day_efficiency = (75 + day_skill_mean * 4 + np.random.randn() * 3)
-            day_efficiency = max(75, min(98, day_efficiency))
-            
-            # 歩留まり = 100 - 不良率
-            day_yield = 100 - day_defect_rate
-            
-            # 従業員数（仮）
-            day_employees = np.random.randint(5, 15)
-            
-            data.append({
-                '日付': current_date,
-                '拠点': location,
-                '工程': process,
-                'シフト': '日勤',
-                'チーム': day_team,
-                '生産数量': day_production,
-                '日次生産量 (t)': round(day_daily_production, 1),
-                '生産効率 (%)': round(day_efficiency, 1),
-                '歩留まり (%)': round(day_yield, 2),
-                '品質不良率 (%)': round(day_defect_rate, 2),
-                '平均スキル予測値': round(day_skill_mean, 2),
-                '従業員数': day_employees,
-                f'技術力_平均': round(day_skill_mean + np.random.uniform(-0.2, 0.2), 2),
-                f'安全意識_平均': round(day_skill_mean + np.random.uniform(-0.3, 0.3), 2),
-                f'品質意識_平均': round(day_skill_mean + np.random.uniform(-0.2, 0.2), 2),
-                f'チームワーク_平均': round(day_skill_mean + np.random.uniform(-0.3, 0.3), 2),
-                f'改善提案力_平均': round(day_skill_mean + np.random.uniform(-0.4, 0.4), 2),
-            })
-            
-            # 夜勤のデータ
-            # 夜勤は日勤よりもやや低めのスキル平均値（夜勤効果）
-            night_skill_mean = np.random.uniform(max(1.0, skill_min - 0.2), skill_max - 0.2)
-            
-            # 品質不良率：スキルと負の相関 + 夜勤効果でやや高め
-            night_defect_base = 5.5 - (night_skill_mean * 1.2)  # 夜勤は基準値が少し高い
-            night_defect_noise = np.random.normal(0, 0.3)
-            night_defect_rate = max(0.1, night_defect_base + night_defect_noise)
-            
-            night_production = np.random.randint(700, 1100)
-            
-            # 日次生産量（トン単位）
-            night_daily_production = np.random.randint(500, 3000) * (1 + (night_skill_mean - 3.5) / 5)
-            
-            # 生産効率
-            night_efficiency = (75 + night_skill_mean * 4 + np.random.randn() * 3)
-            night_efficiency = max(75, min(98, night_efficiency))
-            
-            night_yield = 100 - night_defect_rate
-            
-            # 従業員数（仮）
-            night_employees = np.random.randint(5, 15)
-            
-            data.append({
-                '日付': current_date,
-                '拠点': location,
-                '工程': process,
-                'シフト': '夜勤',
-                'チーム': night_team,
-                '生産数量': night_production,
-                '日次生産量 (t)': round(night_daily_production, 1),
-                '生産効率 (%)': round(night_efficiency, 1),
-                '歩留まり (%)': round(night_yield, 2),
-                '品質不良率 (%)': round(night_defect_rate, 2),
-                '平均スキル予測値': round(night_skill_mean, 2),
-                '従業員数': night_employees,
-                f'技術力_平均': round(night_skill_mean + np.random.uniform(-0.2, 0.2), 2),
-                f'安全意識_平均': round(night_skill_mean + np.random.uniform(-0.3, 0.3), 2),
-                f'品質意識_平均': round(night_skill_mean + np.random.uniform(-0.2, 0.2), 2),
-                f'チームワーク_平均': round(night_skill_mean + np.random.uniform(-0.3, 0.3), 2),
-                f'改善提案力_平均': round(night_skill_mean + np.random.uniform(-0.4, 0.4), 2),
+        df.to_csv(task['path'], index=False, header=False, encoding='utf-8')
+    return task['path'], len(df), _correlation_sums(df, task['processes'])
+
+
+def _merge_parts(part_paths, output_path, output_format):
+    """一時ファイルを順番に連結して1つの出力ファイルにする"""
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for path in part_paths:
+                table = pq.read_table(path)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(output_path, 'wb') as out:
+        out.write((','.join(COLUMNS) + '\n').encode('utf-8-sig'))
+        for path in part_paths:
+            with open(path, 'rb') as part:
+                shutil.copyfileobj(part, out, length=16 * 1024 * 1024)
+
+
+def build_tasks(locations, processes, teams, start_date, days, chunk_rows, seed, output_format, tmp_dir):
+    """
+    拠点×期間ブロックのタスクを作成
+
+    乱数は SeedSequence(seed) から拠点ごと、さらにブロックごとに派生させる。
+    結果は seed・chunk_rows が同じなら並列数に依存しない。
+    """
+    rows_per_day = len(processes) * len(SHIFTS)
+    days_per_block = max(1, chunk_rows // rows_per_day)
+    n_blocks = math.ceil(days / days_per_block)
+
+    location_seeds = np.random.SeedSequence(seed).spawn(len(locations))
+    tasks = []
+    for loc_idx, ((location, skill_range), loc_seed) in enumerate(zip(locations, location_seeds)):
+        for block_idx, block_seed in enumerate(loc_seed.spawn(n_blocks)):
+            day_start = block_idx * days_per_block
+            tasks.append({
+                'location': location,
+                'skill_range': skill_range,
+                'processes': processes,
+                'teams': teams,
+                'start_date': start_date,
+                'day_start': day_start,
+                'day_end': min(days, day_start + days_per_block),
+                'seed_seq': block_seed,
+                'format': output_format,
+                'path': os.path.join(tmp_dir, f'part-{loc_idx:04d}-{block_idx:06d}.{output_format}')
             })
+    return tasks
+
+
+def generate(locations, processes, teams, start_date, days, output_path, output_format='csv',
+             chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, seed=42):
+    """
+    ダミーデータを生成してファイルへ書き出す
+
+    Returns:
+        tuple: (総行数, 拠点×工程×シフト別の相関計算用の和 {拠点: ndarray})
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 一時ファイルは出力先と同じディレクトリに作り、連結時のコピーを同一デバイス内に収める
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix='.dummy_parts_') as tmp_dir:
+        tasks = build_tasks(locations, processes, teams, start_date, days, chunk_rows, seed, output_format, tmp_dir)
+
+        if workers == 1 or len(tasks) == 1:
+            results = [_write_block(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_write_block, tasks))
+
+        _merge_parts([path for path, _, _ in results], output_path, output_format)
+
+    total_rows = sum(n for _, n, _ in results)
+    sums = {}
+    for task, (_, _, block_sums) in zip(tasks, results):
+        sums[task['location']] = sums.get(task['location'], 0) + block_sums
+    return total_rows, sums
+
+
+def print_correlation_report(sums, processes):
+    """拠点×工程×シフト別の相関係数（平均スキル予測値 × 品質不良率）を表示"""
+    print("\n【相関係数確認（拠点別・工程別）】")
+    for location, location_sums in sums.items():
+        print(f"\n■ {location}")
+        for p_idx, process in enumerate(processes):
+            for s_idx, shift in enumerate(SHIFTS):
+                n, sx, sy, sxx, syy, sxy = location_sums[:, p_idx * len(SHIFTS) + s_idx]
+                if n <= 2:
+                    continue
+                cov = sxy - sx * sy / n
+                var_x = sxx - sx * sx / n
+                var_y = syy - sy * sy / n
+                corr = cov / np.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else np.nan
+                print(f"  {process} - {shift}: R = {corr:.3f}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='日次生産ダミーデータの生成')
+    period = parser.add_mutually_exclusive_group()
+    period.add_argument('--days', type=int, help=f'生成する日数（既定: {DEFAULT_DAYS}）')
+    period.add_argument('--rows', type=int, help='目標行数（日数を自動計算し、端数は1日単位で切り上げ）')
+    parser.add_argument('--start-date', default=DEFAULT_START_DATE, help='開始日（YYYY-MM-DD）')
+    parser.add_argument('--locations', nargs='+', default=list(LOCATIONS),
+                        help='拠点名（「拠点名=下限,上限」でスキル範囲を指定可）')
+    parser.add_argument('--extra-locations', type=int, default=0,
+                        help='追加する合成拠点の数（大規模データで期間を伸ばしすぎないため）')
+    parser.add_argument('--processes', nargs='+', default=DEFAULT_PROCESSES, help='工程名')
+    parser.add_argument('--teams', nargs='+', default=DEFAULT_TEAMS, help='ローテーションするチーム名')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='出力形式')
+    parser.add_argument('--output', help='出力ファイル（既定: data/daily_production_dummy.csv）')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='1チャンクあたりの目安行数')
+    parser.add_argument('--workers', type=int, help='並列プロセス数（既定: CPU数、1で逐次実行）')
+    parser.add_argument('--seed', type=int, default=42, help='乱数シード')
+    parser.add_argument('--no-report', action='store_true', help='相関係数とサンプルの表示を省略')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    locations = [parse_location(spec) for spec in args.locations]
+    locations += make_extra_locations(args.extra_locations, args.seed)
+    rows_per_day = len(locations) * len(args.processes) * len(SHIFTS)
+    if args.rows:
+        days = math.ceil(args.rows / rows_per_day)
+    else:
+        days = args.days or DEFAULT_DAYS
+
+    output_path = args.output
+    if output_path is None:
+        output_path = DEFAULT_OUTPUT_PATH
+        if args.format == 'parquet':
+            output_path = os.path.splitext(output_path)[0] + '.parquet'
+
+    start_date = date.fromisoformat(args.start_date)
+    end_date = np.datetime64(start_date, 'D') + (days - 1)
+    # pandas の日時型で読み込める範囲に収める
+    if end_date > np.datetime64(pd.Timestamp.max.date(), 'D'):
+        raise SystemExit(
+            f"期間が長すぎます（{days:,}日）。--extra-locations で拠点を増やすか --days を減らしてください。"
+        )
+
+    total_rows, sums = generate(
+        locations, args.processes, args.teams, start_date, days, output_path,
+        output_format=args.format, chunk_rows=args.chunk_rows, workers=args.workers, seed=args.seed
+    )
+
+    print(f"✅ ダミーデータ生成完了: {output_path}")
+    print(f"📊 データ件数: {total_rows:,}行")
+    print(f"📅 期間: {start_date} ～ {end_date}")
+
+    if not args.no_report:
+        print_correlation_report(sums, args.processes)
+
+        print("\n【サンプルデータ】")
+        if args.format == 'parquet':
+            import pyarrow.parquet as pq
+            print(pq.ParquetFile(output_path).read_row_group(0).slice(0, 10).to_pandas().to_string())
+        else:
+            print(pd.read_csv(output_path, nrows=10).to_string())
+
 
-# DataFrameに変換
-df = pd.DataFrame(data)
-
-# CSVとして保存
-output_path = '/home/claude/SDP-Analysis-Dashboard/data/daily_production_dummy.csv'
-df.to_csv(output_path, index=False, encoding='utf-8-sig')
-
-print(f"✅ ダミーデータ生成完了: {output_path}")
-print(f"📊 データ件数: {len(df)}行")
-print(f"📅 期間: {df['日付'].min()} ～ {df['日付'].max()}")
-
-# 相関係数を確認
-print("\n【相関係数確認（拠点別・工程別）】")
-for location in LOCATIONS.keys():
-    print(f"\n■ {location}")
-    for process in PROCESSES:
-        df_process = df[(df['拠点'] == location) & (df['工程'] == process)]
-        
-        # 日勤
-        df_day = df_process[df_process['シフト'] == '日勤']
-        if len(df_day) > 2:
-            corr_day = df_day['平均スキル予測値'].corr(df_day['品質不良率 (%)'])
-            print(f"  {process} - 日勤: R = {corr_day:.3f}")
-        
-        # 夜勤
-        df_night = df_process[df_process['シフト'] == '夜勤']
-        if len(df_night) > 2:
-            corr_night = df_night['平均スキル予測値'].corr(df_night['品質不良率 (%)'])
-            print(f"  {process} - 夜勤: R = {corr_night:.3f}")
-
-print("\n【サンプルデータ】")
-print(df.head(10))
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# tests/conftest.py
+# テスト共通の設定とデータ（ベンチマークと同じ合成データ生成を使う）
+
+import os
+import sys
+import tempfile
+
+# 結果キャッシュはリポジトリの cache/ ではなく一時ディレクトリに保存
+os.environ.setdefault('SDP_DISK_CACHE_DIR', tempfile.mkdtemp(prefix='sdp-test-cache-'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from benchmarks.synthetic import generate_daily_data, generate_skill_data
+from data_loader import generate_dummy_data
+
+
+@pytest.fixture(scope='session')
+def dummy_data():
+    """(df_skill, df_daily_prod, skill_hierarchy, all_skills, skill_to_category, skill_categories, processes)"""
+    return generate_dummy_data()
+
+
+@pytest.fixture(scope='session')
+def skill_hierarchy(dummy_data):
+    return dummy_data[2]
+
+
+@pytest.fixture(scope='session')
+def processes(dummy_data):
+    return dummy_data[6]
+
+
+@pytest.fixture(scope='session')
+def df_skill(skill_hierarchy, processes):
+    """倍率1の従業員スキルデータ（シフト列つき）"""
+    return generate_skill_data(1, skill_hierarchy, processes)
+
+
+@pytest.fixture(scope='session')
+def df_daily():
+    """倍率1の日次生産データ（30日 × 拠点 × 工程 × シフト）"""
+    return generate_daily_data(1)
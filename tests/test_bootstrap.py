@@ -0,0 +1,74 @@
+# tests/test_bootstrap.py
+# 一括ブートストラップを、グループ内リサンプリングの性質と scipy.stats.bootstrap のパーセンタイル区間で確認
+
+import numpy as np
+import pytest
+from scipy import stats
+
+import analytics.bootstrap as bootstrap
+from analytics.bootstrap import bootstrap_group_differences, bootstrap_group_means, get_difference
+
+
+def _grouped_values(seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = [40, 7, 120, 1]
+    codes = np.repeat(np.arange(len(sizes)), sizes)
+    values = rng.normal(3.0, 1.0, len(codes)) + codes * 100.0
+    shuffle = rng.permutation(len(codes))
+    return values[shuffle], codes[shuffle], len(sizes)
+
+
+def test_resamples_stay_within_each_group():
+    values, codes, n_groups = _grouped_values()
+    means = bootstrap_group_means(values, codes, n_groups, n_resamples=500)
+    for g in range(n_groups):
+        group = values[codes == g]
+        assert means[:, g].min() >= group.min() - 1e-9
+        assert means[:, g].max() <= group.max() + 1e-9
+    # 1件のグループはリサンプルしても同じ値
+    assert np.all(means[:, 3] == values[codes == 3][0])
+
+
+def test_chunking_does_not_change_results(monkeypatch):
+    values, codes, n_groups = _grouped_values()
+    expected = bootstrap_group_means(values, codes, n_groups, n_resamples=300, seed=7)
+    monkeypatch.setattr(bootstrap, 'MAX_CHUNK_ELEMENTS', len(values) * 16)
+    np.testing.assert_array_equal(bootstrap_group_means(values, codes, n_groups, n_resamples=300, seed=7), expected)
+
+
+def test_bootstrap_spread_matches_standard_error():
+    values, codes, n_groups = _grouped_values()
+    means = bootstrap_group_means(values, codes, n_groups, n_resamples=20000)
+    group = values[codes == 2]
+    # 平均のブートストラップ分布の標準偏差 ≈ 標本標準偏差（ddof=0） / sqrt(n)
+    assert means[:, 2].std() == pytest.approx(group.std() / np.sqrt(len(group)), rel=0.03)
+    assert means[:, 2].mean() == pytest.approx(group.mean(), abs=0.01)
+
+
+def test_percentile_ci_matches_scipy(df_daily):
+    df = df_daily[(df_daily['拠点'] == '日本 (JP)') & (df_daily['工程'] == '加工')]
+    df_means, _ = bootstrap_group_differences(df, '品質不良率 (%)', ['シフト'], n_resamples=20000)
+
+    for row in df_means.itertuples(index=False):
+        sample = df.loc[df['シフト'] == row.シフト, '品質不良率 (%)'].to_numpy()
+        reference = stats.bootstrap(
+            (sample,), np.mean, n_resamples=20000, confidence_level=0.95, method='percentile',
+            random_state=np.random.default_rng(0)
+        ).confidence_interval
+        width = reference.high - reference.low
+        assert row.平均 == pytest.approx(sample.mean())
+        assert row.データ数 == len(sample)
+        assert row.下限 == pytest.approx(reference.low, abs=0.05 * width)
+        assert row.上限 == pytest.approx(reference.high, abs=0.05 * width)
+
+
+def test_pairwise_differences_and_orientation(df_daily):
+    df = df_daily[df_daily['拠点'] == '拠点A (IN)']
+    df_means, df_diffs = bootstrap_group_differences(df, '品質不良率 (%)', ['チーム'], n_resamples=2000)
+    assert len(df_diffs) == 3
+
+    point = df.groupby('チーム')['品質不良率 (%)'].mean()
+    diff = get_difference(df_diffs, 'Cチーム', 'Aチーム')
+    assert diff['差'] == pytest.approx(point['Cチーム'] - point['Aチーム'])
+    assert diff['下限'] <= diff['差'] <= diff['上限']
+    assert diff['有意'] == (diff['下限'] > 0 or diff['上限'] < 0)
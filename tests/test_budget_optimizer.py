@@ -0,0 +1,110 @@
+# tests/test_budget_optimizer.py
+# 予算配分の線形計画（疎行列で一括に組み立てたもの）を、ループで組んだ密行列の線形計画と比較し、解の実行可能性を確認
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import linprog
+
+from analytics.budget_optimizer import MEASURES, build_budget_problem, solve_budget_allocation
+
+
+@pytest.fixture(scope='module')
+def small_problem():
+    rng = np.random.default_rng(2)
+    locations = ['日本 (JP)', '拠点A (IN)', '拠点B (BR)']
+    processes = ['製鋼', '圧延', '出荷']
+    categories = ['設備操作', '品質管理', '安全環境']
+    mean = rng.uniform(2.5, 4.5, (len(locations), len(processes), len(categories)))
+    mean[0] += 0.5
+    mean[1, 2, 1] = np.nan
+    count = rng.integers(5, 40, (len(locations), len(processes)))
+    count[2, 0] = 0
+    tensor = {
+        'locations': locations, 'processes': processes, 'categories': categories,
+        'mean': mean, 'std': np.full(mean.shape, 0.5), 'count': count
+    }
+    df_summary = pd.DataFrame({'拠点': locations, '年間損失額 (M¥)': [0.0, 120.0, 80.0]})
+    return tensor, df_summary, build_budget_problem(tensor, df_summary)
+
+
+def _reference_optimum(tensor, df_summary, budget):
+    """セル・施策・区間をループで並べた密行列の線形計画で最大削減額を求める"""
+    losses = df_summary.set_index('拠点')['年間損失額 (M¥)']
+    benchmark = tensor['mean'][0]
+    cells = []
+    for l, location in enumerate(tensor['locations'][1:], start=1):
+        gaps = {}
+        for p in range(len(tensor['processes'])):
+            for c in range(len(tensor['categories'])):
+                if tensor['count'][l, p] == 0:
+                    continue
+                gap = benchmark[p, c] - tensor['mean'][l, p, c]
+                gaps[(p, c)] = max(0.0 if np.isnan(gap) else gap, 0.0)
+        weighted = sum(tensor['count'][l, p] * g for (p, c), g in gaps.items())
+        for (p, c), g in gaps.items():
+            if g > 0 and losses[location] > 0:
+                cells.append((tensor['count'][l, p], g, losses[location] * tensor['count'][l, p] / weighted))
+
+    c, rows_budget, bounds, share_rows, uplift_rows = [], [], [], [], []
+    for k, (people, gap, value) in enumerate(cells):
+        for measure in MEASURES:
+            for width, effect in measure['効果曲線']:
+                uplift = measure['向上'] * effect
+                c.append(-value * uplift)
+                rows_budget.append(people * measure['費用'])
+                bounds.append((0, width))
+                share_rows.append(k)
+                uplift_rows.append(uplift)
+    n = len(c)
+    a_ub = np.zeros((1 + 2 * len(cells), n))
+    a_ub[0] = rows_budget
+    for j in range(n):
+        a_ub[1 + share_rows[j], j] = 1.0
+        a_ub[1 + len(cells) + share_rows[j], j] = uplift_rows[j]
+    b_ub = [budget] + [1.0] * len(cells) + [gap for _, gap, _ in cells]
+    return -linprog(c, A_ub=a_ub, b_ub=b_ub, bounds=bounds, method='highs').fun
+
+
+@pytest.mark.parametrize('fraction', [0.05, 0.3, 0.7, 1.5])
+def test_optimum_matches_dense_reference(small_problem, fraction):
+    tensor, df_summary, problem = small_problem
+    budget = problem['saturation_budget'] * fraction
+    result = solve_budget_allocation(problem, budget)
+    assert result['年間損失削減'] == pytest.approx(_reference_optimum(tensor, df_summary, budget), rel=1e-7)
+
+
+@pytest.mark.parametrize('fraction', [0.1, 0.5, 1.0])
+def test_allocation_is_feasible(small_problem, fraction):
+    _, _, problem = small_problem
+    budget = problem['saturation_budget'] * fraction
+    result = solve_budget_allocation(problem, budget)
+    df_allocation = result['配分']
+    assert result['投資額'] <= budget * (1 + 1e-9) + 1e-9
+    assert df_allocation['年間損失削減 (M¥)'].sum() == pytest.approx(result['年間損失削減'], rel=1e-9)
+
+    df_cells = problem['cells'].set_index(['拠点', '工程', 'スキルカテゴリ'])
+    df_per_cell = df_allocation.groupby(['拠点', '工程', 'スキルカテゴリ'])[['対象人数', 'ギャップ改善 (pt)']].sum()
+    df_per_cell = df_per_cell.join(df_cells)
+    # 1人1施策（受講人数 ≤ 人数）と、改善はギャップまで
+    assert (df_per_cell['対象人数'] <= df_per_cell['人数'] * (1 + 1e-9)).all()
+    assert (df_per_cell['ギャップ改善 (pt)'] <= df_per_cell['ギャップ'] + 1e-9).all()
+
+
+def test_frontier_is_monotone_and_concave(small_problem):
+    _, _, problem = small_problem
+    reduction = problem['frontier']['年間損失削減 (M¥)'].to_numpy()
+    steps = np.diff(reduction)
+    assert (steps >= -1e-9).all()
+    assert (np.diff(steps) <= 1e-6).all()
+    assert reduction[-1] <= problem['total_loss'] + 1e-9
+
+
+def test_marginal_effect_matches_finite_difference(small_problem):
+    _, _, problem = small_problem
+    budget = problem['saturation_budget'] * 0.4
+    result = solve_budget_allocation(problem, budget)
+    step = 1e-4 * problem['saturation_budget']
+    slope = (solve_budget_allocation(problem, budget + step)['年間損失削減'] - result['年間損失削減']) / step
+    assert result['限界効果'] == pytest.approx(slope, rel=1e-4)
+    assert solve_budget_allocation(problem, 0)['年間損失削減'] == 0.0
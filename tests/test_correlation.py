@@ -0,0 +1,62 @@
+# tests/test_correlation.py
+# 一括相関エンジン（reduceat による集計）を scipy.stats.pearsonr のスライスごとの計算と比較
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from analytics.correlation import correlate_by_slice, get_skill_metric_columns, pearson_pvalues
+
+
+def _reference(df, by, skill_columns, kpi_columns):
+    """スライスごと・列ペアごとに欠損を除いて pearsonr を計算"""
+    result = {}
+    for keys, df_group in df.groupby(by, sort=True):
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        for skill in skill_columns:
+            for kpi in kpi_columns:
+                pair = df_group[[skill, kpi]].dropna()
+                if len(pair) > 2 and pair[skill].std() > 0 and pair[kpi].std() > 0:
+                    r, p = stats.pearsonr(pair[skill], pair[kpi])
+                else:
+                    r, p = np.nan, np.nan
+                result[keys + (skill, kpi)] = (r, p, len(pair))
+    return result
+
+
+@pytest.mark.parametrize('by', [('拠点',), ('拠点', '工程'), ('拠点', '工程', 'チーム', 'シフト')])
+def test_correlate_by_slice_matches_pearsonr(df_daily, by):
+    df = df_daily.copy()
+    skill_columns = get_skill_metric_columns(df)
+    kpi_columns = ['歩留まり (%)', '生産効率 (%)']
+    # 欠損のペアごとの除外も確認
+    rng = np.random.default_rng(0)
+    df.loc[rng.random(len(df)) < 0.1, skill_columns[0]] = np.nan
+    df.loc[rng.random(len(df)) < 0.1, kpi_columns[1]] = np.nan
+
+    df_result = correlate_by_slice(df, by=by, skill_columns=skill_columns, kpi_columns=kpi_columns)
+    reference = _reference(df, list(by), skill_columns, kpi_columns)
+
+    assert len(df_result) == len(reference)
+    for row in df_result.itertuples(index=False):
+        key = tuple(row[:len(by)]) + (row.スキル指標, row.KPI)
+        r, p, n = reference[key]
+        assert row.サンプル数 == n
+        np.testing.assert_allclose(row.相関係数, r, rtol=1e-9, atol=1e-12, equal_nan=True)
+        np.testing.assert_allclose(row.p値, p, rtol=1e-7, atol=1e-12, equal_nan=True)
+
+
+def test_small_and_constant_slices_are_nan(df_daily):
+    df = df_daily.head(40).copy()
+    df['一定_平均'] = 3.0
+    df_result = correlate_by_slice(df.head(2), by=(), skill_columns=['技術力_平均'], kpi_columns=['歩留まり (%)'])
+    assert df_result['相関係数'].isna().all()
+    df_result = correlate_by_slice(df, by=(), skill_columns=['一定_平均'], kpi_columns=['歩留まり (%)'])
+    assert df_result['相関係数'].isna().all()
+
+
+def test_pearson_pvalues_handles_perfect_correlation():
+    p = pearson_pvalues(np.array([1.0, -1.0, np.nan]), np.array([10, 10, 10]))
+    assert p[0] == pytest.approx(0.0, abs=1e-12)
+    assert p[1] == pytest.approx(0.0, abs=1e-12)
+    assert np.isnan(p[2])
@@ -0,0 +1,114 @@
+# tests/test_disk_cache.py
+# ディスクキャッシュの原子的な書き込み・読み込めない結果の扱い・古い順の削除
+
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.disk_cache import DiskCache, cache_key_digest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(directory=str(tmp_path), max_bytes=10_000)
+
+
+def _files(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name != 'index.sqlite')
+
+
+def test_round_trip(cache):
+    df = pd.DataFrame({'拠点': ['日本 (JP)', '拠点A (IN)'], '値': [1.5, np.nan]})
+    assert cache.put('quality', ('f', 1), df)
+    pd.testing.assert_frame_equal(cache.get('quality', ('f', 1)), df)
+    assert cache.get('quality', ('f', 2), 'なし') == 'なし'
+    assert cache.stats()['quality'] == {'entries': 1, 'disk_bytes': len(pickle.dumps(df, pickle.HIGHEST_PROTOCOL)),
+                                        'hits': 1, 'misses': 1}
+
+
+def test_failed_write_leaves_previous_result_and_no_temp_files(cache, monkeypatch):
+    assert cache.put('quality', ('f',), 'v1')
+
+    def fail(*args):
+        raise OSError('disk full')
+
+    # 置き換えの直前で失敗しても、前の結果が残り一時ファイルも残らない
+    monkeypatch.setattr(os, 'replace', fail)
+    assert not cache.put('quality', ('f',), 'v2')
+    monkeypatch.undo()
+
+    assert cache.get('quality', ('f',)) == 'v1'
+    assert _files(cache) == [f"{cache_key_digest(('f',))}.pkl"]
+
+
+def test_unpicklable_and_oversized_values_are_not_stored(cache):
+    assert not cache.put('quality', ('lambda',), lambda: None)
+    assert not cache.put('quality', ('large',), b'x' * 20_000)
+    assert _files(cache) == []
+
+
+def test_corrupt_file_is_a_miss_and_is_removed(cache):
+    cache.put('quality', ('f',), [1, 2, 3])
+    path = os.path.join(cache.directory, f"{cache_key_digest(('f',))}.pkl")
+    with open(path, 'wb') as f:
+        f.write(b'broken')
+    assert cache.get('quality', ('f',)) is None
+    assert not os.path.exists(path)
+    assert cache.totals()['entries'] == 0
+
+
+def test_eviction_removes_least_recently_used(cache):
+    payload = b'x' * 3000
+    for i in range(3):
+        cache.put('quality', ('f', i), payload)
+    # 最初の結果を参照して、2番目を最も古くする
+    assert cache.get('quality', ('f', 0)) == payload
+    cache.put('quality', ('f', 3), payload)
+
+    assert cache.get('quality', ('f', 1)) is None
+    assert all(cache.get('quality', ('f', i)) == payload for i in (0, 2, 3))
+    assert cache.totals()['disk_bytes'] <= cache.max_bytes
+    assert len(_files(cache)) == 3
+
+
+def test_concurrent_writers_and_readers(cache):
+    errors = []
+
+    def work(worker):
+        try:
+            for i in range(30):
+                key = ('f', i % 4)
+                cache.put('quality', key, [worker] * 50)
+                value = cache.get('quality', key)
+                assert value is None or (len(value) == 50 and len(set(value)) == 1)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert not [name for name in _files(cache) if name.startswith('.tmp-')]
+    assert cache.totals()['entries'] == 4
+
+
+def test_clear_namespace(cache):
+    cache.put('quality', ('a',), 1)
+    cache.put('monitoring', ('b',), 2)
+    cache.clear('quality')
+    assert cache.get('quality', ('a',)) is None
+    assert cache.get('monitoring', ('b',)) == 2
+
+
+def test_disabled_cache(tmp_path):
+    cache = DiskCache(directory=str(tmp_path / 'off'), max_bytes=0)
+    assert not cache.put('quality', ('a',), 1)
+    assert cache.get('quality', ('a',), 'なし') == 'なし'
+    assert not os.path.exists(tmp_path / 'off')
@@ -0,0 +1,64 @@
+# tests/test_lagged_correlation.py
+# ラグ相関・ローリング相関（累積和による一括計算）を、系列・ラグ・ウィンドウごとの素朴な相関と比較
+
+import numpy as np
+import pytest
+
+from analytics.lagged_correlation import build_series_matrix, lagged_cross_correlation, rolling_correlation
+
+
+def _pearson(x, y):
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if len(x) < 3 or x.std() == 0 or y.std() == 0:
+        return np.nan, len(x)
+    return np.corrcoef(x, y)[0, 1], len(x)
+
+
+@pytest.fixture(scope='module')
+def series(df_daily):
+    _, _, X, Y = build_series_matrix(df_daily, '技術力_平均', '品質不良率 (%)')
+    rng = np.random.default_rng(4)
+    X = np.where(rng.random(X.shape) < 0.1, np.nan, X)
+    Y = np.where(rng.random(Y.shape) < 0.1, np.nan, Y)
+    return X, Y
+
+
+def test_lagged_cross_correlation_matches_per_lag_corrcoef(series):
+    X, Y = series
+    max_lag = 10
+    r, n = lagged_cross_correlation(X, Y, max_lag=max_lag)
+    n_days = X.shape[1]
+    for s in range(X.shape[0]):
+        for lag in range(max_lag + 1):
+            expected_r, expected_n = _pearson(X[s, :n_days - lag], Y[s, lag:])
+            assert n[s, lag] == expected_n
+            np.testing.assert_allclose(r[s, lag], expected_r, rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+def test_lags_longer_than_the_series_are_nan(series):
+    X, Y = series
+    r, n = lagged_cross_correlation(X[:, :5], Y[:, :5], max_lag=8)
+    assert np.isnan(r[:, 5:]).all()
+    assert (n[:, 5:] == 0).all()
+
+
+def test_rolling_correlation_matches_per_window_corrcoef(series):
+    X, Y = series
+    window, min_periods = 7, 4
+    r, n = rolling_correlation(X, Y, window=window, min_periods=min_periods)
+    assert np.isnan(r[:, :window - 1]).all()
+    for s in range(X.shape[0]):
+        for end in range(window - 1, X.shape[1]):
+            expected_r, expected_n = _pearson(X[s, end - window + 1:end + 1], Y[s, end - window + 1:end + 1])
+            if expected_n < min_periods:
+                expected_r = np.nan
+            assert n[s, end] == expected_n
+            np.testing.assert_allclose(r[s, end], expected_r, rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+def test_series_matrix_averages_shifts(df_daily):
+    keys, calendar, X, _ = build_series_matrix(df_daily, '技術力_平均', '品質不良率 (%)', by=('拠点', '工程'))
+    location, process = keys[0]
+    expected = df_daily[(df_daily['拠点'] == location) & (df_daily['工程'] == process)].groupby('日付')['技術力_平均'].mean()
+    np.testing.assert_allclose(X[0], expected.reindex(calendar).to_numpy())
@@ -0,0 +1,49 @@
+# tests/test_regression.py
+# 一括回帰（正規方程式のバッチ解法）を statsmodels のグループごとの OLS と比較
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sm = pytest.importorskip('statsmodels.api')
+
+from analytics.regression import build_design, fit_regressions, get_category_columns
+
+
+@pytest.mark.parametrize('by', [('拠点', '工程'), ('拠点',)])
+def test_fit_regressions_matches_statsmodels(df_daily, by):
+    df = df_daily.copy()
+    target = '品質不良率 (%)'
+    # 欠損行の除外も確認
+    rng = np.random.default_rng(1)
+    df.loc[rng.random(len(df)) < 0.05, '技術力_平均'] = np.nan
+    df.loc[rng.random(len(df)) < 0.05, target] = np.nan
+
+    df_coef, df_fit = fit_regressions(df, targets=[target], by=by)
+    feature_columns = get_category_columns(df)
+
+    for keys, df_group in df.groupby(list(by), sort=True):
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        X, names = build_design(df_group, feature_columns)
+        y = df_group[target].to_numpy(dtype=np.float64)
+        model = sm.OLS(y, X, missing='drop').fit()
+
+        selected = np.logical_and.reduce([df_coef[key] == value for key, value in zip(by, keys)])
+        row_coef = df_coef[selected].set_index('説明変数').loc[names]
+        np.testing.assert_allclose(row_coef['係数'], model.params, rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(row_coef['標準誤差'], model.bse, rtol=1e-6)
+        np.testing.assert_allclose(row_coef['p値'], model.pvalues, rtol=1e-5, atol=1e-10)
+
+        selected = np.logical_and.reduce([df_fit[key] == value for key, value in zip(by, keys)])
+        row_fit = df_fit[selected].iloc[0]
+        assert row_fit['サンプル数'] == model.nobs
+        assert row_fit['R²'] == pytest.approx(model.rsquared, rel=1e-8)
+        assert row_fit['調整済みR²'] == pytest.approx(model.rsquared_adj, rel=1e-8)
+
+
+def test_too_few_rows_give_nan_errors(df_daily):
+    df = df_daily.groupby(['拠点', '工程']).head(3)
+    df_coef, df_fit = fit_regressions(df, targets=['歩留まり (%)'])
+    assert df_coef['標準誤差'].isna().all()
+    assert df_fit['調整済みR²'].isna().all()
+    assert (df_fit['サンプル数'] == 3).all()
@@ -0,0 +1,49 @@
+# tests/test_result_cache.py
+# 結果キャッシュのサイズ見積もり（中身まで辿る）と LRU の破棄
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from analytics.skill_matrix import SkillMatrix
+from analytics.spc import build_spc_monitor
+from utils.result_cache import ResultCache, estimate_size
+
+
+class _Holder:
+    def __init__(self, payload):
+        self.payload = payload
+
+
+def test_containers_and_objects_include_their_arrays():
+    array = np.zeros(100_000)
+    assert estimate_size(array) >= array.nbytes
+    assert estimate_size({'a': array}) >= array.nbytes
+    assert estimate_size([array, array]) < 2 * array.nbytes  # 同じオブジェクトは1回だけ数える
+    # 独自クラスも __dict__ の中身まで数える（浅い getsizeof では数十バイト）
+    assert estimate_size(_Holder(array)) >= array.nbytes
+
+
+def test_dataframe_uses_deep_memory_usage():
+    df = pd.DataFrame({'拠点': ['日本 (JP)'] * 1000, '値': np.arange(1000.0)})
+    assert estimate_size(df) == df.memory_usage(deep=True, index=True).sum()
+
+
+def test_analysis_objects_are_close_to_their_pickled_size(df_skill, skill_hierarchy, df_daily):
+    for value in (SkillMatrix(df_skill, skill_hierarchy), build_spc_monitor(df_daily)):
+        pickled = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        assert 0.5 * pickled <= estimate_size(value) <= 3 * pickled
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(max_bytes=3_000_000)
+    for i in range(3):
+        assert cache.put('quality', i, np.zeros(100_000))  # 800 KB
+    cache.get('quality', 0)
+    cache.put('quality', 3, np.zeros(100_000))
+
+    assert cache.get('quality', 1) is None
+    assert all(cache.get('quality', i) is not None for i in (0, 2, 3))
+    assert cache.stats()['quality']['evictions'] == 1
+    assert not cache.put('quality', 'large', np.zeros(1_000_000))
@@ -0,0 +1,67 @@
+# tests/test_significance.py
+# 有意性検定（全セル一括の Welch t 検定・BH 補正）を scipy のセルごとの検定と比較
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from analytics.significance import benjamini_hochberg, compute_gap_significance
+from analytics.skill_gap import compute_gap_heatmap
+from analytics.skill_matrix import SkillMatrix
+
+
+def test_benjamini_hochberg_matches_scipy():
+    rng = np.random.default_rng(0)
+    p = np.concatenate([rng.uniform(0, 1, 200), rng.uniform(0, 0.01, 20), [0.0, 1.0, 0.5, 0.5]])
+    np.testing.assert_allclose(benjamini_hochberg(p), stats.false_discovery_control(p), rtol=1e-12)
+
+
+def test_benjamini_hochberg_skips_nan():
+    p = np.array([0.01, np.nan, 0.04, 0.03, np.nan])
+    q = benjamini_hochberg(p)
+    assert np.isnan(q[[1, 4]]).all()
+    np.testing.assert_allclose(q[[0, 2, 3]], stats.false_discovery_control([0.01, 0.04, 0.03]))
+    assert np.isnan(benjamini_hochberg([np.nan, np.nan])).all()
+
+
+@pytest.fixture(scope='module')
+def skill_matrix_with_gaps(df_skill, skill_hierarchy):
+    df = df_skill.copy()
+    all_skills = [s for info in skill_hierarchy.values() for s in info['skills']]
+    df[all_skills] = df[all_skills].astype(float)
+    # 未評価のスキルを混ぜ、従業員ごとのカテゴリ平均とスキル別平均が一致しないようにする
+    rng = np.random.default_rng(3)
+    df[all_skills] = df[all_skills].mask(rng.random(df[all_skills].shape) < 0.15)
+    return df, SkillMatrix(df, skill_hierarchy)
+
+
+def test_category_cells_match_scipy_welch(skill_matrix_with_gaps, skill_hierarchy):
+    df, matrix = skill_matrix_with_gaps
+    df_result = compute_gap_significance(matrix)
+
+    for category, info in skill_hierarchy.items():
+        df[category] = df[info['skills']].mean(axis=1)
+
+    benchmark = df[df['拠点'] == '日本 (JP)']
+    p_values = []
+    for row in df_result.itertuples(index=False):
+        target = df.loc[(df['拠点'] == row.拠点) & (df['工程'] == row.工程), row.スキルカテゴリ].dropna()
+        base = benchmark.loc[benchmark['工程'] == row.工程, row.スキルカテゴリ].dropna()
+        expected = stats.ttest_ind(base, target, equal_var=False)
+        assert row.対象人数 == len(target)
+        assert row.ギャップ == pytest.approx(base.mean() - target.mean())
+        assert row.t値 == pytest.approx(expected.statistic, rel=1e-9)
+        assert row.p値 == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-300)
+        p_values.append(expected.pvalue)
+
+    np.testing.assert_allclose(df_result['q値'], stats.false_discovery_control(p_values), rtol=1e-9)
+
+
+def test_heatmap_gap_is_the_tested_difference(skill_matrix_with_gaps, processes):
+    _, matrix = skill_matrix_with_gaps
+    df_result = compute_gap_significance(matrix)
+    location = '拠点B (BR)'
+    df_heatmap = compute_gap_heatmap(matrix, location, processes, matrix.categories)
+    df_joined = df_heatmap.merge(df_result[df_result['拠点'] == location], on=['工程', 'スキルカテゴリ'])
+    assert len(df_joined) == len(df_heatmap)
+    np.testing.assert_allclose(df_joined['ギャップ_x'], df_joined['ギャップ_y'], rtol=1e-12)
@@ -0,0 +1,115 @@
+# tests/test_spc.py
+# 管理図（全ライン一括の EWMA・CUSUM 漸化式）をラインごとの素朴なループと比較し、差分更新を全期間の再計算と比較
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.spc import (
+    CUSUM_K, EWMA_L, EWMA_LAMBDA, HISTORY_FIELDS, LINE_COLUMNS, MIN_SIGMA, SPC_METRICS, STATE_FIELDS,
+    SPCMonitor, build_spc_monitor, extend_spc_state
+)
+
+
+def _reference_line(series, baseline_days):
+    """1ライン・1指標の日次平均の系列から EWMA・管理限界・CUSUM を1日ずつ計算"""
+    baseline = series.iloc[:baseline_days].dropna()
+    mean = baseline.mean()
+    sigma = max(baseline.std(ddof=1), MIN_SIGMA) if len(baseline) > 1 else MIN_SIGMA
+    ewma, cusum_pos, cusum_neg, t = mean, 0.0, 0.0, 0
+    rows = []
+    for date, x in series.items():
+        if np.isnan(x):
+            continue
+        t += 1
+        z = (x - mean) / sigma
+        ewma = EWMA_LAMBDA * x + (1 - EWMA_LAMBDA) * ewma
+        cusum_pos = max(0.0, cusum_pos + z - CUSUM_K)
+        cusum_neg = max(0.0, cusum_neg - z - CUSUM_K)
+        width = EWMA_L * sigma * np.sqrt(EWMA_LAMBDA / (2 - EWMA_LAMBDA) * (1 - (1 - EWMA_LAMBDA) ** (2 * t)))
+        rows.append((date, x, ewma, mean - width, mean + width, cusum_pos, cusum_neg))
+    return pd.DataFrame(rows, columns=['日付'] + HISTORY_FIELDS)
+
+
+@pytest.fixture(scope='module')
+def df_spc(df_daily):
+    df = df_daily.copy()
+    # 欠測の日（ラインごとに NaN の日）も含める
+    rng = np.random.default_rng(5)
+    df.loc[rng.random(len(df)) < 0.05, '品質不良率 (%)'] = np.nan
+    return df
+
+
+def test_history_matches_per_line_loop(df_spc):
+    monitor = build_spc_monitor(df_spc)
+    df_history = monitor.history()
+    dates = np.sort(df_spc['日付'].unique())
+
+    for keys, df_line in df_spc.groupby(LINE_COLUMNS):
+        for metric in SPC_METRICS:
+            series = df_line.groupby('日付')[metric].mean().reindex(dates)
+            expected = _reference_line(series, monitor.baseline_days)
+            selected = (df_history[LINE_COLUMNS] == pd.Series(keys, index=LINE_COLUMNS)).all(axis=1)
+            actual = df_history[selected & (df_history['指標'] == metric)].reset_index(drop=True)
+            assert (actual['日付'].to_numpy() == expected['日付'].to_numpy()).all()
+            for name in HISTORY_FIELDS:
+                np.testing.assert_allclose(actual[name], expected[name], rtol=1e-10, atol=1e-12, err_msg=name)
+
+
+def test_update_matches_build(df_spc):
+    dates = np.sort(df_spc['日付'].unique())
+    full = build_spc_monitor(df_spc)
+
+    monitor = build_spc_monitor(df_spc[df_spc['日付'] < dates[-2]])
+    assert monitor.baseline_days == full.baseline_days
+    for date in dates[-2:]:
+        monitor.update(df_spc[df_spc['日付'] == date])
+
+    pd.testing.assert_frame_equal(monitor.history(), full.history())
+    pd.testing.assert_frame_equal(monitor.alerts(), full.alerts())
+    with pytest.raises(ValueError):
+        monitor.update(df_spc[df_spc['日付'] == dates[-1]])
+
+
+def test_extend_state_matches_full_rebuild(df_spc):
+    df_sorted = df_spc.sort_values('日付', kind='stable', ignore_index=True)
+    dates = np.sort(df_sorted['日付'].unique())
+    df_prefix = df_sorted[df_sorted['日付'] < dates[-2]]
+
+    previous = build_spc_monitor(df_prefix).state(df_prefix)
+    snapshot = {name: previous[name].copy() for name in STATE_FIELDS}
+    extended = extend_spc_state(previous, df_sorted)
+    rebuilt = build_spc_monitor(df_sorted).state(df_sorted)
+
+    assert extended is not None
+    for name in STATE_FIELDS:
+        np.testing.assert_allclose(extended[name], rebuilt[name], rtol=1e-12)
+        # 前の状態の配列は変更されない
+        np.testing.assert_array_equal(previous[name], snapshot[name])
+    for name in HISTORY_FIELDS:
+        np.testing.assert_allclose(extended['history'][name], rebuilt['history'][name], rtol=1e-12)
+    assert extended['source_signature'] == rebuilt['source_signature']
+    pd.testing.assert_frame_equal(SPCMonitor.from_state(extended).history(), SPCMonitor.from_state(rebuilt).history())
+
+
+def test_extend_state_refuses_changed_prefix(df_spc):
+    df_sorted = df_spc.sort_values('日付', kind='stable', ignore_index=True)
+    dates = np.sort(df_sorted['日付'].unique())
+    df_prefix = df_sorted[df_sorted['日付'] < dates[-2]]
+    state = build_spc_monitor(df_prefix).state(df_prefix)
+
+    df_changed = df_sorted.copy()
+    df_changed.loc[0, '歩留まり (%)'] += 1.0
+    assert extend_spc_state(state, df_changed) is None
+    # 追加行が最終日以前の日付を含む場合も再計算に回す
+    assert extend_spc_state(state, pd.concat([df_sorted, df_sorted.head(1)], ignore_index=True)) is None
+
+
+def test_extend_state_refuses_changed_baseline(df_spc):
+    df_sorted = df_spc.sort_values('日付', kind='stable', ignore_index=True)
+    dates = np.sort(df_sorted['日付'].unique())
+    # 27日分では基準期間が13日になり、30日分（14日）と管理限界が変わる
+    df_prefix = df_sorted[df_sorted['日付'] < dates[-3]]
+    state = build_spc_monitor(df_prefix).state(df_prefix)
+    assert state['baseline_days'] == 13
+    assert extend_spc_state(state, df_sorted) is None
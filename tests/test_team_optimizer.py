@@ -0,0 +1,93 @@
+# tests/test_team_optimizer.py
+# チーム編成の局所探索（入れ替え候補の差分評価）を、全候補のチーム平均を作り直す総当たりと比較
+
+from itertools import product
+
+import numpy as np
+import pytest
+
+from analytics.team_optimizer import TIE_BREAK_WEIGHT, optimize_team_composition, optimize_teams
+from analytics.skill_matrix import SkillMatrix
+
+
+def _objective(scores, teams, n_teams, objective):
+    """チーム平均を作り直して目的関数値を計算"""
+    means = np.array([scores[teams == t].mean(axis=0) for t in range(n_teams)])
+    variance = means.var(axis=0).sum()
+    return variance if objective == 'variance' else -means.min() + TIE_BREAK_WEIGHT * variance
+
+
+def _neighbours(teams, n_teams, tolerance, original_counts, pairs):
+    """1回の入れ替え・（人数の許容幅内の）移動で作れる全編成"""
+    for a, b in pairs:
+        for i, j in product(np.flatnonzero(teams == a), np.flatnonzero(teams == b)):
+            candidate = teams.copy()
+            candidate[i], candidate[j] = b, a
+            yield candidate
+        for i in np.flatnonzero(teams == a):
+            candidate = teams.copy()
+            candidate[i] = b
+            counts = np.bincount(candidate, minlength=n_teams)
+            if np.all(np.abs(counts - original_counts) <= tolerance) and counts.min() >= 1:
+                yield candidate
+
+
+def _instance(seed, n=15, n_teams=3, n_categories=3):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(1, 5, (n, n_categories))
+    teams = rng.permutation(np.arange(n) % n_teams)
+    return scores, teams, n_teams
+
+
+@pytest.mark.parametrize('objective', ['variance', 'worst'])
+@pytest.mark.parametrize('tolerance', [0, 1])
+@pytest.mark.parametrize('seed', range(5))
+def test_first_step_matches_brute_force(objective, tolerance, seed):
+    scores, teams, n_teams = _instance(seed)
+    step, _ = optimize_teams(scores, teams, objective, max_moves=100, headcount_tolerance=tolerance,
+                             candidates_per_team=1000, max_iterations=1)
+
+    # worst は最も低いチームを含む組だけを探索する
+    means = np.array([scores[teams == t].mean(axis=0) for t in range(n_teams)])
+    worst_team = int(np.argmin(means.min(axis=1)))
+    pairs = [(a, b) for a in range(n_teams) for b in range(n_teams)
+             if a != b and (objective == 'variance' or worst_team in (a, b))]
+    counts = np.bincount(teams, minlength=n_teams)
+    best = min(_objective(scores, c, n_teams, objective)
+               for c in _neighbours(teams, n_teams, tolerance, counts, pairs))
+
+    current = _objective(scores, teams, n_teams, objective)
+    if best < current - 1e-12:
+        assert _objective(scores, step, n_teams, objective) == pytest.approx(best, abs=1e-12)
+    else:
+        np.testing.assert_array_equal(step, teams)
+    assert np.abs(np.bincount(step, minlength=n_teams) - counts).max() <= tolerance
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_variance_result_is_a_local_optimum(seed):
+    scores, teams, n_teams = _instance(seed, n=12)
+    result, _ = optimize_teams(scores, teams, 'variance', max_moves=100, candidates_per_team=1000,
+                               max_iterations=200)
+    value = _objective(scores, result, n_teams, 'variance')
+    assert value <= _objective(scores, teams, n_teams, 'variance')
+
+    pairs = [(a, b) for a in range(n_teams) for b in range(n_teams) if a != b]
+    counts = np.bincount(teams, minlength=n_teams)
+    for candidate in _neighbours(result, n_teams, 0, counts, pairs):
+        assert _objective(scores, candidate, n_teams, 'variance') >= value - 1e-12
+    np.testing.assert_array_equal(np.bincount(result, minlength=n_teams), counts)
+
+
+def test_max_moves_is_respected():
+    scores, teams, _ = _instance(0, n=60)
+    result, _ = optimize_teams(scores, teams, 'variance', max_moves=3)
+    assert (result != teams).sum() <= 3
+
+
+def test_optimize_team_composition_improves_worst_team(df_skill, skill_hierarchy):
+    matrix = SkillMatrix(df_skill, skill_hierarchy)
+    result = optimize_team_composition(matrix, '拠点A (IN)', df_skill['工程'].iloc[0], max_moves=10)
+    assert result['worst_after'] >= result['worst_before']
+    assert len(result['moves']) <= 10
+    assert result['after']['人数'].tolist() == result['before']['人数'].tolist()
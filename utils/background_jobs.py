@@ -0,0 +1,78 @@
+# utils/background_jobs.py
+# 画面の描画を待たせない重い計算のバックグラウンド実行（キーごとに1回だけ実行）
+
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+# 同時に実行するジョブ数（環境変数 SDP_BACKGROUND_JOBS で変更可）
+BACKGROUND_JOB_WORKERS = int(os.environ.get('SDP_BACKGROUND_JOBS', 2))
+
+
+class BackgroundJobs:
+    """
+    キー（ジョブ名・データセットバージョンなど）ごとに関数をスレッドで実行する（同じキーは同時に1つだけ）
+
+    結果は各ジョブの関数自身がキャッシュへ保存する前提で、ここでは実行状況だけを管理する。
+    キャッシュに保存できなかった結果だけは関数の戻り値として返し、result() で取り出せるようにする。
+    呼び出し側はキャッシュに結果がない場合だけ submit() する（完了済みのキーは再実行する）。
+    失敗したジョブは、submit(..., retry=True) で明示的に再試行するまで失敗のまま保持する
+    （描画のたびに重いジョブを再実行しないように）。
+    """
+
+    def __init__(self, max_workers=BACKGROUND_JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sdp-job')
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, retry=False, **kwargs):
+        """同じキーのジョブが実行中・失敗済み（retry=False）でなければ開始し、Future を返す"""
+        with self._lock:
+            future = self._futures.get(key)
+            failed = future is not None and future.done() and future.exception() is not None
+            if future is None or (future.done() and (retry or not failed)):
+                future = self._executor.submit(func, *args, **kwargs)
+                self._futures[key] = future
+            return future
+
+    def status(self, key):
+        """'running' / 'done' / 'failed'（未登録なら None）"""
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None:
+            return None
+        if not future.done():
+            return 'running'
+        return 'failed' if future.exception() is not None else 'done'
+
+    def result(self, key):
+        """完了したジョブの戻り値（実行中・失敗・未登録なら None）"""
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def error(self, key):
+        """失敗したジョブの例外の説明（失敗していなければ None）"""
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None or not future.done() or future.exception() is None:
+            return None
+        return ''.join(traceback.format_exception_only(future.exception())).strip()
+
+    def stats(self):
+        with self._lock:
+            futures = list(self._futures.values())
+        running = sum(1 for future in futures if not future.done())
+        failed = sum(1 for future in futures if future.done() and future.exception() is not None)
+        return {'jobs': len(futures), 'running': running, 'failed': failed, 'done': len(futures) - running - failed}
+
+
+@st.cache_resource
+def get_background_jobs():
+    """プロセス全体（全セッション）で共有するジョブ実行器"""
+    return BackgroundJobs()
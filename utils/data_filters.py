@@ -0,0 +1,23 @@
+# utils/data_filters.py
+# 生データ閲覧用のフィルタリング
+
+
+def filter_by_values(df, filters):
+    """
+    列ごとの選択値でデータを絞り込む
+
+    Args:
+        df: 対象データ
+        filters: {列名: 選択値リスト} の辞書（全条件のAND）
+
+    Returns:
+        DataFrame: フィルタ後のコピー
+    """
+    mask = None
+    for column, values in filters.items():
+        condition = df[column].isin(values)
+        mask = condition if mask is None else mask & condition
+
+    if mask is None:
+        return df.copy()
+    return df[mask].copy()
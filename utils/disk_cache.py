@@ -0,0 +1,238 @@
+# utils/disk_cache.py
+# 分析結果のディスクキャッシュ（再起動後も残る2段目のキャッシュ。SQLite の索引 + 結果ファイル）
+
+import contextlib
+import hashlib
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 保存先（環境変数 SDP_DISK_CACHE_DIR で変更可）
+DISK_CACHE_DIR = os.environ.get(
+    'SDP_DISK_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'results')
+)
+
+# ディスク使用量の上限（環境変数 SDP_DISK_CACHE_MB で変更可。0 で無効）
+DISK_CACHE_MAX_BYTES = int(float(os.environ.get('SDP_DISK_CACHE_MB', 1024)) * 1024 * 1024)
+
+# pickle の互換性が変わるライブラリのバージョンをキーに含め、更新後は古い結果を読まない
+CACHE_FORMAT = f"1-pandas{pd.__version__}-numpy{np.__version__}"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def cache_key_digest(key):
+    """キャッシュキー（タプル）をファイル名に使えるハッシュ文字列に変換"""
+    return hashlib.sha256(f"{CACHE_FORMAT}:{key!r}".encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """
+    分析結果をディスクに保存するキャッシュ
+
+    結果は1件1ファイル（pickle）で保存し、キー・名前空間・サイズ・最終参照時刻を SQLite で管理する。
+    ファイルは一時ファイルに書き込んでから os.replace で置き換えるため、書き込み途中で
+    プロセスが落ちても壊れた結果を読むことはない。合計サイズが max_bytes を超えたら
+    最終参照時刻の古い順に削除する。読み込めない結果はキャッシュなしとして扱う。
+    pickle の読み書きと fsync はロックの外で行い、ロックは索引の参照・更新とファイルの置き換えだけに使う。
+    """
+
+    def __init__(self, directory=DISK_CACHE_DIR, max_bytes=DISK_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # このプロセスでの参照回数（名前空間ごと）
+        self._lookups = {}
+        self.enabled = max_bytes > 0
+        if self.enabled:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with self._connect() as conn:
+                    conn.execute(_SCHEMA)
+            except (OSError, sqlite3.Error):
+                # 書き込めない環境ではメモリキャッシュのみで動作
+                self.enabled = False
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """索引DBへの接続（ブロックを抜けるとコミットして閉じる）"""
+        conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def _delete_file(self, filename):
+        try:
+            os.remove(self._path(filename))
+        except FileNotFoundError:
+            pass
+
+    def _count(self, namespace, hit):
+        lookups = self._lookups.setdefault(namespace, {'hits': 0, 'misses': 0})
+        lookups['hits' if hit else 'misses'] += 1
+
+    def get(self, namespace, key, default=None):
+        """結果を返す（なければ default）"""
+        if not self.enabled:
+            return default
+        digest = cache_key_digest(key)
+
+        # ファイルの読み込み（unpickle）はロックの外で行い、索引の参照・更新だけをロック内で行う
+        value = default
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute('SELECT filename, created_at FROM entries WHERE key = ?', (digest,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is not None:
+            try:
+                with open(self._path(row[0]), 'rb') as f:
+                    value = pickle.load(f)
+                loaded = True
+            except Exception:
+                loaded = False
+            try:
+                with self._lock, self._connect() as conn:
+                    if loaded:
+                        conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), digest))
+                    else:
+                        # 削除済み・破損・非互換のファイルは索引からも削除（読み込み中に保存し直された結果は残す）
+                        deleted = conn.execute(
+                            'DELETE FROM entries WHERE key = ? AND created_at = ?', (digest, row[1])
+                        ).rowcount
+                        if deleted:
+                            self._delete_file(row[0])
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            self._count(namespace, value is not default)
+        return value
+
+    def put(self, namespace, key, value):
+        """結果を保存し、上限を超えた分を古い順に削除（上限より大きい結果・pickle できない結果は保存しない）"""
+        if not self.enabled:
+            return False
+        digest = cache_key_digest(key)
+        filename = f"{digest}.pkl"
+
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        if len(payload) > self.max_bytes:
+            return False
+
+        # 一時ファイルへの書き込み・fsync はロックの外で行い（他スレッドの get/put を待たせない）、
+        # 置き換え（os.replace）と索引の更新だけをロック内で行う
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix='.pkl')
+        except OSError:
+            return False
+        try:
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self._lock:
+                    os.replace(tmp_path, self._path(filename))
+                    now = time.time()
+                    with self._connect() as conn:
+                        conn.execute(
+                            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                            (digest, namespace, filename, len(payload), now, now)
+                        )
+                        self._evict(conn)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except (OSError, sqlite3.Error):
+            return False
+        return True
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, filename, size in conn.execute(
+            'SELECT key, filename, size FROM entries ORDER BY accessed_at'
+        ).fetchall():
+            conn.execute('DELETE FROM entries WHERE key = ?', (digest,))
+            self._delete_file(filename)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, namespace=None):
+        """全件（namespace 指定時はその名前空間のみ）を削除"""
+        if not self.enabled:
+            return
+        with self._lock:
+            with self._connect() as conn:
+                if namespace is None:
+                    rows = conn.execute('SELECT key, filename FROM entries').fetchall()
+                else:
+                    rows = conn.execute(
+                        'SELECT key, filename FROM entries WHERE namespace = ?', (namespace,)
+                    ).fetchall()
+                for digest, filename in rows:
+                    conn.execute('DELETE FROM entries WHERE key = ?', (digest,))
+                    self._delete_file(filename)
+
+    def stats(self):
+        """名前空間ごとの entries, disk_bytes（ディスク上の全プロセス分）と hits, misses（このプロセス分）"""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    'SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace'
+                ).fetchall()
+            result = {
+                namespace: {'entries': 0, 'disk_bytes': 0, 'hits': 0, 'misses': 0}
+                for namespace in self._lookups
+            }
+            for namespace, count, size in rows:
+                result.setdefault(namespace, {'hits': 0, 'misses': 0}).update(entries=count, disk_bytes=size)
+            for namespace, lookups in self._lookups.items():
+                result[namespace].update(lookups)
+        return dict(sorted(result.items()))
+
+    def totals(self):
+        stats = self.stats()
+        return {
+            'enabled': self.enabled,
+            'directory': self.directory,
+            'entries': sum(s['entries'] for s in stats.values()),
+            'disk_bytes': sum(s['disk_bytes'] for s in stats.values()),
+            'max_bytes': self.max_bytes
+        }
+
+
+@st.cache_resource
+def get_disk_cache():
+    """プロセス全体で共有するディスクキャッシュ（複数プロセスからも同じディレクトリを共有できる）"""
+    return DiskCache()
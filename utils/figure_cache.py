@@ -0,0 +1,147 @@
+# utils/figure_cache.py
+# Plotlyフィギュアのメモ化キャッシュ（ビューパラメータをキーにLRU＋メモリ上限で管理）
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+# キャッシュ全体のメモリ上限（トレースの配列・文字列のバイト数で概算）
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# キャッシュするフィギュア数の上限
+FIGURE_CACHE_MAX_ENTRIES = 256
+
+# サイズ見積もりで走査するリストの要素数（これより長いリストは標本から推定）
+SIZE_SAMPLE_ELEMENTS = 1024
+
+
+def _freeze(value):
+    """キャッシュキー用にパラメータをハッシュ可能な形へ変換"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+def _estimate_sequence_bytes(values):
+    """要素が多い場合は等間隔の標本から全体を推定（長い文字列リストの走査を避ける）"""
+    n = len(values)
+    if n <= SIZE_SAMPLE_ELEMENTS:
+        return sum(_estimate_bytes(v) for v in values)
+    step = n // SIZE_SAMPLE_ELEMENTS
+    sample = values[::step]
+    return int(sum(_estimate_bytes(v) for v in sample) * n / len(sample))
+
+
+def _estimate_bytes(value):
+    """フィギュアが保持する値のおおよそのバイト数（配列は nbytes、文字列は長さ、その他の値は 8 バイト）"""
+    if isinstance(value, np.ndarray):
+        return _estimate_sequence_bytes(value.ravel()) if value.dtype == object else value.nbytes
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return _estimate_sequence_bytes(value)
+    return 8
+
+
+def figure_size(figure):
+    """
+    フィギュアのサイズをトレースのデータ配列とレイアウトから見積もる
+
+    to_json() は大きなフィギュアで数百 ms かかるため使わず、フィギュアが内部に保持している
+    辞書（コピーせずに参照）を走査する。
+    """
+    return _estimate_bytes(figure._data) + _estimate_bytes(figure._layout)
+
+
+class FigureCache:
+    """構築済みフィギュアを保持するスレッドセーフなLRUキャッシュ"""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES, max_entries=FIGURE_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, figure):
+        size = figure_size(figure)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.resident_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (figure, size)
+            self.resident_bytes += size
+
+            while self._entries and (
+                self.resident_bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.resident_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+@st.cache_resource
+def get_figure_cache():
+    """プロセス全体（全セッション）で共有するフィギュアキャッシュ"""
+    return FigureCache()
+
+
+def cached_figure(view, version, params, build_fn):
+    """
+    キャッシュ済みのフィギュアを返し、なければ構築して登録
+
+    Args:
+        view: フィギュアの識別名（例: 'integrated.fig1'）
+        version: データセットバージョン（utils.versioned_cache.dataset_version() の戻り値）
+        params: 拠点・工程・カテゴリ・選択チーム・表示オプションなどの辞書
+        build_fn: フィギュアを構築する引数なしの関数
+
+    Returns:
+        plotly Figure（呼び出し側で変更しないこと）
+    """
+    cache = get_figure_cache()
+    key = (view, version, _freeze(params))
+
+    figure = cache.get(key)
+    if figure is None:
+        figure = build_fn()
+        cache.put(key, figure)
+    return figure
@@ -0,0 +1,197 @@
+# utils/profiling.py
+# セクション単位の処理時間・メモリ計測と開発者向けパフォーマンスパネル
+
+import functools
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+# 計測ログ（1再実行=1行のJSONL）
+PROFILING_LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'profiling.jsonl')
+
+# メモリ計測（tracemalloc）はプロセス全体に作用し全セッションが遅くなるため、
+# 環境変数 SDP_PROFILE_MEMORY=1 で起動したときだけプロセス単位で有効にする（無効ならセッションごとの計測は時間のみ）
+PROFILE_MEMORY = os.environ.get('SDP_PROFILE_MEMORY', '') not in ('', '0')
+
+
+def is_profiling_enabled():
+    """サイドバーで計測が有効化されているか"""
+    return bool(st.session_state.get('profiling_enabled', False))
+
+
+def start_profiling_run(menu=None, target_location=None):
+    """再実行の開始時に呼び出し、計測結果をリセット"""
+    if not is_profiling_enabled():
+        st.session_state.profiling_run = None
+        return
+
+    # トレースはプロセスで一度だけ開始し、セッションからは止めない
+    if PROFILE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    st.session_state.profiling_run = {
+        'run_id': uuid.uuid4().hex[:12],
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'menu': menu,
+        'target_location': target_location,
+        'started': time.perf_counter(),
+        'sections': [],
+        'stack': [],
+        'next_order': 0
+    }
+
+
+@contextmanager
+def profile_section(name):
+    """
+    処理ブロックの経過時間と割り当てメモリを計測するコンテキストマネージャ
+
+    計測が無効な場合は何もしない。メモリは PROFILE_MEMORY のときだけ記録し（それ以外は None）、
+    tracemalloc によるプロセス全体の値のため、同時実行中の他セッションの割り当ても含む。
+    """
+    run = st.session_state.get('profiling_run') if is_profiling_enabled() else None
+    if run is None:
+        yield
+        return
+
+    if not (PROFILE_MEMORY and tracemalloc.is_tracing()):
+        order = run['next_order']
+        run['next_order'] += 1
+        run['stack'].append(None)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            run['stack'].pop()
+            run['sections'].append({
+                'order': order,
+                'section': name,
+                'depth': len(run['stack']),
+                'wall_ms': round((time.perf_counter() - started) * 1000, 2),
+                'alloc_kb': None,
+                'peak_kb': None
+            })
+        return
+
+    stack = run['stack']
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        # 親セクションのピークを退避してからリセット
+        stack[-1]['max_peak'] = max(stack[-1]['max_peak'], peak)
+    tracemalloc.reset_peak()
+
+    frame = {'start_current': current, 'max_peak': current, 'order': run['next_order']}
+    run['next_order'] += 1
+    stack.append(frame)
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        wall_ms = (time.perf_counter() - started) * 1000
+        current_end, peak_end = tracemalloc.get_traced_memory()
+        stack.pop()
+        peak_end = max(peak_end, frame['max_peak'])
+        if stack:
+            stack[-1]['max_peak'] = max(stack[-1]['max_peak'], peak_end)
+
+        run['sections'].append({
+            'order': frame['order'],
+            'section': name,
+            'depth': len(stack),
+            'wall_ms': round(wall_ms, 2),
+            'alloc_kb': round((current_end - frame['start_current']) / 1024, 1),
+            'peak_kb': round((peak_end - frame['start_current']) / 1024, 1)
+        })
+
+
+def profiled(name=None):
+    """関数全体を profile_section で計測するデコレータ"""
+    def decorator(func):
+        section_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(section_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def finish_profiling_run(log_path=PROFILING_LOG_PATH):
+    """再実行の終了時に呼び出し、計測結果をJSONLログへ追記"""
+    run = st.session_state.get('profiling_run')
+    if run is None:
+        return None
+
+    record = {
+        'run_id': run['run_id'],
+        'timestamp': run['timestamp'],
+        'menu': run['menu'],
+        'target_location': run['target_location'],
+        'total_ms': round((time.perf_counter() - run['started']) * 1000, 2),
+        # 開始順に並べ替え（親セクションが子より先）
+        'sections': [
+            {k: v for k, v in section.items() if k != 'order'}
+            for section in sorted(run['sections'], key=lambda section: section['order'])
+        ]
+    }
+
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError as e:
+        record['log_error'] = str(e)
+
+    st.session_state.profiling_last = record
+    return record
+
+
+def show_profiling_panel(container, record):
+    """サイドバーのデバッグパネルに直近の計測結果を表示"""
+    if record is None:
+        return
+
+    with container:
+        st.markdown("#### ⏱️ 直近の再実行")
+        st.caption(f"合計 {record['total_ms']:.0f} ms / {record['menu']}")
+
+        if record['sections']:
+            df_sections = pd.DataFrame(record['sections'])
+            # 階層をインデントで表現
+            df_sections['section'] = [
+                '　' * depth + section for depth, section in zip(df_sections['depth'], df_sections['section'])
+            ]
+            # メモリ計測が無効なプロセスでは時間だけを表示
+            columns = ['section', 'wall_ms']
+            if df_sections['alloc_kb'].notna().any():
+                columns += ['alloc_kb', 'peak_kb']
+            st.dataframe(
+                df_sections[columns].rename(columns={
+                    'section': 'セクション',
+                    'wall_ms': '時間 (ms)',
+                    'alloc_kb': '割当 (KB・プロセス全体)',
+                    'peak_kb': 'ピーク (KB・プロセス全体)'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+            if len(columns) == 2:
+                st.caption("メモリも計測するには環境変数 SDP_PROFILE_MEMORY=1 で起動してください（全セッションに負荷がかかります）")
+            else:
+                st.caption("メモリは全セッション合計の値のため、同時に操作している他のユーザーの割り当ても含みます")
+
+        if 'log_error' in record:
+            st.warning(f"ログ書き込みに失敗しました: {record['log_error']}", icon="⚠️")
+        else:
+            st.caption(f"ログ: {PROFILING_LOG_PATH}")
@@ -0,0 +1,181 @@
+# utils/result_cache.py
+# 分析結果のLRUキャッシュ（メモリ上限つき、名前空間ごとのヒット率・常駐サイズを集計）
+
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import sparse
+
+# キャッシュ全体のメモリ上限（環境変数 SDP_RESULT_CACHE_MB で変更可）
+RESULT_CACHE_MAX_BYTES = int(float(os.environ.get('SDP_RESULT_CACHE_MB', 256)) * 1024 * 1024)
+
+# キャッシュする結果数の上限
+RESULT_CACHE_MAX_ENTRIES = 2048
+
+# 名前空間を指定しない結果の名前空間
+DEFAULT_NAMESPACE = 'default'
+
+
+# 属性をたどらずに getsizeof で数える型（関数・クラス・モジュールは結果の一部ではなく共有物）
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _has_sizeof_hook(value):
+    """クラスが __sizeof__ を自前で定義しているか（定義していれば属性をたどらずにその値を使う）"""
+    return any('__sizeof__' in vars(cls) for cls in type(value).__mro__ if cls is not object)
+
+
+def _slot_values(value):
+    for cls in type(value).__mro__:
+        slots = vars(cls).get('__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and hasattr(value, name):
+                yield getattr(value, name)
+
+
+def estimate_size(value, _seen=None):
+    """
+    結果のメモリ使用量（バイト）を見積もる
+
+    DataFrame・配列・疎行列はデータのサイズ、dict・list などは要素の合計で数える。
+    その他のオブジェクトは __sizeof__ を定義していればその値を、なければ __dict__ / __slots__ の
+    属性をたどって合計する（同じオブジェクトは1回だけ数える）。
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, pd.api.extensions.ExtensionArray):
+        return int(value.nbytes)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return int(value.nbytes) + sum(estimate_size(v, _seen) for v in value.ravel())
+        return int(value.nbytes)
+    if sparse.issparse(value):
+        matrix = value.tocsr()
+        return int(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v, _seen) for v in value)
+    if isinstance(value, (str, bytes, int, float, complex, bool, np.generic)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, _OPAQUE_TYPES) or _has_sizeof_hook(value):
+        return sys.getsizeof(value)
+
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += estimate_size(vars(value), _seen)
+    size += sum(estimate_size(v, _seen) for v in _slot_values(value))
+    return size
+
+
+class ResultCache:
+    """
+    分析結果を保持するスレッドセーフなLRUキャッシュ
+
+    エントリのサイズは DataFrame・配列のメモリ使用量で見積もり、
+    合計が max_bytes を超えたら最も長く使われていない結果から破棄する。
+    """
+
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self._stats = {}
+
+    def _namespace_stats(self, namespace):
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'resident_bytes': 0}
+            self._stats[namespace] = stats
+        return stats
+
+    def _remove(self, key):
+        namespace, _, size = self._entries.pop(key)
+        stats = self._namespace_stats(namespace)
+        stats['entries'] -= 1
+        stats['resident_bytes'] -= size
+        self.resident_bytes -= size
+        return namespace
+
+    def get(self, namespace, key, default=None):
+        """結果を返す（なければ default）"""
+        with self._lock:
+            stats = self._namespace_stats(namespace)
+            entry = self._entries.get(key)
+            if entry is None:
+                stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            stats['hits'] += 1
+            return entry[1]
+
+    def put(self, namespace, key, value, size=None):
+        """結果を登録し、上限を超えた分を古い順に破棄（上限より大きい結果は登録しない）"""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (namespace, value, size)
+            stats = self._namespace_stats(namespace)
+            stats['entries'] += 1
+            stats['resident_bytes'] += size
+            self.resident_bytes += size
+
+            while self._entries and (
+                self.resident_bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                evicted_key = next(iter(self._entries))
+                self._namespace_stats(self._remove(evicted_key))['evictions'] += 1
+        return True
+
+    def clear(self, namespace=None):
+        """全件（namespace 指定時はその名前空間のみ）を削除"""
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if namespace is None or entry[0] == namespace]
+            for key in keys:
+                self._remove(key)
+
+    def stats(self):
+        """名前空間ごとの hits, misses, evictions, entries, resident_bytes, hit_rate"""
+        with self._lock:
+            result = {}
+            for namespace, stats in sorted(self._stats.items()):
+                lookups = stats['hits'] + stats['misses']
+                result[namespace] = {**stats, 'hit_rate': stats['hits'] / lookups if lookups else None}
+            return result
+
+    def totals(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries
+            }
+
+
+@st.cache_resource
+def get_result_cache():
+    """プロセス全体（全セッション）で共有する分析結果キャッシュ"""
+    return ResultCache()
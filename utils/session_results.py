@@ -0,0 +1,170 @@
+# utils/session_results.py
+# セッション間で共有する結果ストア（セッションはハンドルだけを保持し、結果本体はプロセスに1つ）
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# 参照するセッションがなくなった結果・操作のないセッションを解放するまでの時間（環境変数 SDP_SESSION_RESULT_TTL_MIN で変更可）
+SESSION_RESULT_TTL_SECONDS = float(os.environ.get('SDP_SESSION_RESULT_TTL_MIN', 30)) * 60
+
+# 保持する結果数の上限（超えたら最も長く使われていない結果から破棄）
+SESSION_RESULT_MAX_ENTRIES = 256
+
+# st.session_state に保持するハンドルの辞書（結果名 -> ハンドル）
+HANDLES_STATE_KEY = 'result_handles'
+
+
+def result_handle(name, key):
+    """結果名とキー（データセットバージョン・パラメータ）から共有ハンドルを作成"""
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+    return f"{name}:{digest}"
+
+
+class SessionResultStore:
+    """
+    セッション間で共有する結果ストア（TTL + LRU）
+
+    同じ結果名・キーの結果は全セッションで1つだけ保持し、各セッションはハンドルで参照する。
+    一定時間操作のないセッションの参照は解放し、どのセッションからも参照されず
+    TTL を過ぎた結果と、上限件数を超えた分の古い結果を破棄する。
+    """
+
+    def __init__(self, ttl_seconds=SESSION_RESULT_TTL_SECONDS, max_entries=SESSION_RESULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # handle -> {'value', 'sessions', 'accessed_at'}
+        self._sessions = {}             # session_id -> 最終操作時刻
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, session_id, handle, value):
+        """結果を登録してセッションの参照を追加"""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                entry = {'value': value, 'sessions': set()}
+                self._entries[handle] = entry
+            else:
+                entry['value'] = value
+            self._attach(session_id, handle, entry)
+            self._evict_lru()
+        return handle
+
+    def get(self, session_id, handle):
+        """結果を返す（破棄済みなら None）。他セッションが登録した結果も参照を追加して返す"""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            self._attach(session_id, handle, entry)
+            return entry['value']
+
+    def _attach(self, session_id, handle, entry):
+        now = time.time()
+        entry['sessions'].add(session_id)
+        entry['accessed_at'] = now
+        self._sessions[session_id] = now
+        self._entries.move_to_end(handle)
+
+    def _evict_lru(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def detach(self, session_id, handle):
+        """セッションから1つの結果への参照を外す"""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is not None:
+                entry['sessions'].discard(session_id)
+
+    def touch(self, session_id):
+        """セッションの最終操作時刻を更新"""
+        with self._lock:
+            self._sessions[session_id] = time.time()
+
+    def release(self, session_id):
+        """セッションの参照をすべて解放"""
+        with self._lock:
+            self._release(session_id)
+
+    def _release(self, session_id):
+        self._sessions.pop(session_id, None)
+        for entry in self._entries.values():
+            entry['sessions'].discard(session_id)
+
+    def sweep(self, now=None):
+        """操作のないセッションの参照を解放し、参照がなく TTL を過ぎた結果を破棄"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for session_id, seen_at in list(self._sessions.items()):
+                if now - seen_at > self.ttl_seconds:
+                    self._release(session_id)
+            for handle, entry in list(self._entries.items()):
+                if not entry['sessions'] and now - entry['accessed_at'] > self.ttl_seconds:
+                    del self._entries[handle]
+                    self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'sessions': len(self._sessions),
+                'unreferenced': sum(1 for entry in self._entries.values() if not entry['sessions']),
+                'evictions': self.evictions
+            }
+
+
+@st.cache_resource
+def get_session_result_store():
+    """プロセス全体（全セッション）で共有する結果ストア"""
+    return SessionResultStore()
+
+
+def current_session_id():
+    """実行中のセッションID（スクリプト実行コンテキストの外では 'local'）"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'local'
+
+
+def touch_session():
+    """スクリプト実行ごとに呼び、セッションの操作時刻を更新して期限切れの参照・結果を解放"""
+    store = get_session_result_store()
+    store.touch(current_session_id())
+    store.sweep()
+
+
+def _set_handle(name, handle):
+    """セッションのハンドルを更新（同じ結果名で別のキーを参照していたら古い方の参照を外す）"""
+    handles = st.session_state.setdefault(HANDLES_STATE_KEY, {})
+    previous = handles.get(name)
+    if previous is not None and previous != handle:
+        get_session_result_store().detach(current_session_id(), previous)
+    handles[name] = handle
+
+
+def save_session_result(name, value, key):
+    """結果を共有ストアに登録し、セッションにはハンドルだけを保存（登録後の value は変更しないこと）"""
+    handle = result_handle(name, key)
+    get_session_result_store().put(current_session_id(), handle, value)
+    _set_handle(name, handle)
+    return handle
+
+
+def load_session_result(name, key):
+    """
+    共有ストアから結果を取得（なければ None）
+
+    同じ結果名・キーの結果を他のセッションが登録済みなら、それを共有して返す。
+    """
+    handle = result_handle(name, key)
+    value = get_session_result_store().get(current_session_id(), handle)
+    if value is not None:
+        _set_handle(name, handle)
+    return value
@@ -0,0 +1,246 @@
+# utils/versioned_cache.py
+# データセットのバージョン（内容フィンガープリント）と、バージョンをキーにした分析結果のキャッシュ
+
+import functools
+import hashlib
+import inspect
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from utils.disk_cache import get_disk_cache
+from utils.result_cache import DEFAULT_NAMESPACE, get_result_cache
+
+# キャッシュにない場合の目印（None を返す関数も結果をキャッシュできるように）
+_MISSING = object()
+
+# df.attrs に保持するキー
+VERSION_ATTR = 'dataset_version'
+SIGNATURE_ATTR = 'dataset_signature'
+
+# 文字列などビット列で比較できない列のチェックサムに使う抽出行数
+SIGNATURE_SAMPLE_ROWS = 4096
+
+# チェックサムを確認済みのフレーム（id -> (弱参照, バージョン)）。同じオブジェクトの再確認を省く
+_verified = {}
+_verified_lock = threading.Lock()
+
+
+def fingerprint(df):
+    """DataFrame の内容ハッシュからバージョン文字列を計算（行数に比例するコスト）"""
+    content_hash = int(pd.util.hash_pandas_object(df, index=True).sum()) & 0xFFFFFFFFFFFFFFFF
+    # 組み込みの hash() はプロセスごとに変わるため、再起動後も同じ値になる sha1 を使う
+    column_hash = int(hashlib.sha1('\x1f'.join(map(str, df.columns)).encode('utf-8')).hexdigest()[:8], 16)
+    return f"{len(df)}x{df.shape[1]}-{content_hash:016x}-{column_hash:08x}"
+
+
+def _column_checksum(values, weights):
+    """
+    列の値のビット列に行位置の重みを掛けた和（uint64 の桁あふれを許す）
+
+    数値・真偽・日時・カテゴリ（コード）の列が対象。ビット列で比較できない列は None。
+    """
+    if isinstance(values, pd.Categorical):
+        values = values.codes
+    values = np.asarray(values)
+    if values.dtype.kind not in 'biufmM' or values.dtype.itemsize > 8:
+        return None
+    bits = np.ascontiguousarray(values).view(f'u{values.dtype.itemsize}').astype(np.uint64, copy=False)
+    return int((bits * weights).sum())
+
+
+def _signature(df):
+    """
+    バージョンが同じ内容のフレームに属するかを確かめる軽量なチェックサム
+
+    数値・日時・カテゴリ列とインデックスは全行の値を行位置で重み付けした和で、文字列などの列は
+    最大 SIGNATURE_SAMPLE_ROWS 行の等間隔の抽出行の内容ハッシュで比較する。内容ハッシュ（fingerprint）より
+    1桁以上速く、attrs を引き継いだ同じ形のコピーで値を変えた列・assign で上書きした列も検出できる。
+    """
+    n = len(df)
+    # 奇数の乗数で行位置を散らした重み（行の入れ替えも検出できる）
+    weights = np.arange(n, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(1)
+
+    checksums = []
+    sampled = []
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            checksum = _column_checksum(column.array, weights)
+        elif isinstance(column.dtype, np.dtype):
+            checksum = _column_checksum(column.to_numpy(), weights)
+        else:
+            # 拡張型（文字列など）は変換のコストが大きいため抽出行で比較
+            checksum = None
+        if checksum is None:
+            sampled.append(position)
+        checksums.append(checksum)
+
+    if isinstance(df.index, pd.RangeIndex):
+        index_checksum = (df.index.start, df.index.stop, df.index.step)
+    else:
+        index_checksum = _column_checksum(df.index.to_numpy(), weights)
+        if index_checksum is None:
+            index_checksum = int(pd.util.hash_pandas_object(df.index, index=False).to_numpy().dot(weights))
+
+    sample_checksum = None
+    if sampled:
+        rows = np.unique(np.linspace(0, n - 1, min(n, SIGNATURE_SAMPLE_ROWS)).astype(np.int64)) if n else []
+        hashed = pd.util.hash_pandas_object(df.iloc[rows, sampled], index=False).to_numpy()
+        sample_checksum = int((hashed * weights[rows]).sum())
+
+    return (
+        n,
+        tuple(map(str, df.columns)),
+        tuple(map(str, df.dtypes)),
+        tuple(checksums),
+        index_checksum,
+        sample_checksum
+    )
+
+
+def dataset_signature(df):
+    """
+    内容の軽量なチェックサム（_signature）
+
+    行を追加したデータで追加分だけを処理する差分更新で、既存の行が変わっていないかの確認に使う。
+    """
+    return _signature(df)
+
+
+def register_dataset(df, version=None):
+    """
+    読み込み・取り込み時にバージョンを計算して df.attrs に保持
+
+    attrs は pickle（st.cache_data の戻り値のコピー）でも引き継がれるため、
+    以降の dataset_version() は再ハッシュしない。登録後のフレームは変更しないこと。
+
+    Args:
+        version: 既知のバージョン（ファイルのハッシュなど）。省略時は内容から計算
+    """
+    df.attrs[VERSION_ATTR] = version if version is not None else fingerprint(df)
+    df.attrs[SIGNATURE_ATTR] = _signature(df)
+    _remember(df, df.attrs[VERSION_ATTR])
+    return df
+
+
+def _remember(df, version):
+    key = id(df)
+    ref = weakref.ref(df, lambda _, key=key: _forget(key))
+    with _verified_lock:
+        _verified[key] = (ref, version)
+
+
+def _forget(key):
+    with _verified_lock:
+        _verified.pop(key, None)
+
+
+def dataset_version(df):
+    """
+    データセットのバージョン文字列を取得
+
+    登録済み（register_dataset）ならその値を返す。フィルタ・列選択・値の変更・assign などで作った
+    派生フレームは attrs を引き継いでもチェックサム（_signature）が変わるため、ここで内容ハッシュを
+    計算し直して登録する。st.cache_data が返す内容の同じコピーはチェックサムが一致するので再ハッシュしない。
+    確認済みのオブジェクトは（登録後に変更しない前提で）以降の呼び出しでチェックサムも計算しない。
+    """
+    with _verified_lock:
+        entry = _verified.get(id(df))
+    if entry is not None and entry[0]() is df and df.attrs.get(VERSION_ATTR) == entry[1]:
+        return entry[1]
+
+    version = df.attrs.get(VERSION_ATTR)
+    if version is None or df.attrs.get(SIGNATURE_ATTR) != _signature(df):
+        register_dataset(df)
+        version = df.attrs[VERSION_ATTR]
+    else:
+        _remember(df, version)
+    return version
+
+
+def _skill_matrix_version(skill_matrix):
+    return skill_matrix.dataset_version
+
+
+# st.cache_resource などでハッシュの代わりにバージョンを使う型
+VERSION_HASH_FUNCS = {
+    pd.DataFrame: dataset_version,
+    'analytics.skill_matrix.SkillMatrix': _skill_matrix_version
+}
+
+
+def _key_part(value):
+    """引数をキャッシュキーの要素に変換（DataFrame・SkillMatrix はバージョン）"""
+    if isinstance(value, pd.DataFrame):
+        return ('DataFrame', dataset_version(value))
+    if hasattr(value, 'dataset_version') and not isinstance(value, type):
+        return (type(value).__name__, value.dataset_version)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _key_part(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_key_part(v) for v in value))
+    hash(value)  # ハッシュできない引数はここで TypeError
+    return value
+
+
+def versioned_cache(func=None, namespace=DEFAULT_NAMESPACE):
+    """
+    分析関数のキャッシュデコレーター
+
+    DataFrame 引数は内容をハッシュせず dataset_version() を、SkillMatrix 引数は作成元データの
+    バージョンをキーに使う。その他の引数（拠点・工程などのスカラー）はそのままキーにする。
+    結果はプロセス共有の ResultCache（メモリ上限つきLRU）に namespace ごとに集計して保持し、
+    2段目として DiskCache にも保存する。再起動後はディスクの結果をメモリに読み戻して使う。
+    戻り値は全セッションで共有されるため、呼び出し側で変更しないこと。
+    wrapper.peek(*args, **kwargs) は計算せずにキャッシュ済みの結果だけを返す（なければ None）。
+
+    使い方:
+        @versioned_cache
+        def compute_xxx(df_daily_prod, location): ...
+
+        @versioned_cache(namespace='root_cause')
+        def compute_yyy(skill_matrix, processes): ...
+    """
+    if func is None:
+        return functools.partial(versioned_cache, namespace=namespace)
+
+    signature = inspect.signature(func)
+    func_name = f"{func.__module__}.{func.__qualname__}"
+
+    def make_key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (func_name, tuple((name, _key_part(value)) for name, value in bound.arguments.items()))
+
+    def lookup(key):
+        """メモリ → ディスクの順に探す（ディスクにあればメモリに読み戻す）"""
+        cache = get_result_cache()
+        result = cache.get(namespace, key, _MISSING)
+        if result is _MISSING:
+            result = get_disk_cache().get(namespace, key, _MISSING)
+            if result is not _MISSING:
+                cache.put(namespace, key, result)
+        return result
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = make_key(args, kwargs)
+        result = lookup(key)
+        if result is _MISSING:
+            result = func(*args, **kwargs)
+            get_disk_cache().put(namespace, key, result)
+            get_result_cache().put(namespace, key, result)
+        return result
+
+    def peek(*args, **kwargs):
+        result = lookup(make_key(args, kwargs))
+        return None if result is _MISSING else result
+
+    wrapper.namespace = namespace
+    wrapper.peek = peek
+    return wrapper
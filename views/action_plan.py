@@ -1,8 +1,352 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from analytics.budget_optimizer import MEASURES, cached_budget_problem, solve_budget_allocation
+from analytics.cohorts import cached_employee_cohorts, category_gaps, summarize_cohorts
+from analytics.mentor_pairing import cached_mentor_pairs
+from analytics.team_optimizer import cached_team_composition
+from utils.profiling import profiled, profile_section
 
-def show_action_plan(df_skill, target_location, priority_skill):
+# 施策ごとのグラフの色
+MEASURE_COLORS = ['#d32f2f', '#1976d2', '#f57c00', '#388e3c']
+
+def count_low_skill_employees(skill_matrix, target_location, priority_skill, threshold=2):
+    """
+    優先スキルがレベル threshold 以下の従業員数
+
+    priority_skill は「工程 - スキルカテゴリ」（根本原因分析の最優先改善対象）または個別スキル名。
+    カテゴリ指定の場合は、その工程でカテゴリ内のいずれかのスキルが threshold 以下の人数。
+    """
+    process, _, category = priority_skill.partition(' - ')
+    if category in skill_matrix.category_position:
+        rows = skill_matrix.rows({'拠点': target_location, '工程': process})
+        skill_columns = skill_matrix.skill_columns(category)
+    elif priority_skill in skill_matrix.skill_position:
+        rows = skill_matrix.rows({'拠点': target_location})
+        skill_columns = [skill_matrix.skill_position[priority_skill]]
+    else:
+        return 0
+    return skill_matrix.employees_with_low_skill(rows, skill_columns, threshold)
+
+def show_budget_optimizer(df_skill, target_location, skill_matrix, processes, skill_categories):
+    """予算を入力すると、全拠点×工程×スキルカテゴリで損失削減額が最大になる施策配分を表示"""
+
+    st.markdown("""
+    <div class="section-header">
+        <h2 class="section-title">🧮 教育予算の最適配分</h2>
+        <p class="section-subtitle">全拠点×工程×スキルカテゴリのギャップと施策の費用・効果曲線から、予算あたりの損失削減が最大になる配分を計算</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    with profile_section('action_plan.budget_problem'):
+        problem = cached_budget_problem(df_skill, skill_matrix, processes, skill_categories)
+
+    if problem['saturation_budget'] <= 0:
+        st.info("ベンチマークとのギャップがあるセルがないため、予算配分は不要です")
+        return
+
+    saturation = float(problem['saturation_budget'])
+    budget = st.slider(
+        "教育予算 (百万円)",
+        min_value=0.0,
+        max_value=float(np.ceil(saturation)),
+        value=float(min(10.0, np.ceil(saturation))),
+        step=0.5,
+        key='action_plan_budget',
+        help=f"約¥{saturation:.0f}Mで全ての施策の効果が上限に達します"
+    )
+
+    with profile_section('action_plan.budget_solve'):
+        allocation = solve_budget_allocation(problem, budget)
+    df_allocation = allocation['配分']
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("年間損失削減", f"¥{allocation['年間損失削減']:.0f}M",
+                  help=f"全拠点の年間損失 ¥{problem['total_loss']:.0f}M のうち削減できる額")
+    with col2:
+        st.metric("投資額", f"¥{allocation['投資額']:.1f}M")
+    with col3:
+        payback = allocation['投資額'] / (allocation['年間損失削減'] / 12) if allocation['年間損失削減'] > 0 else np.nan
+        st.metric("投資回収期間", f"{payback:.1f}ヶ月" if np.isfinite(payback) else "-")
+    with col4:
+        marginal = allocation['限界効果']
+        st.metric("限界効果", f"{marginal:.1f}x" if np.isfinite(marginal) else "-",
+                  help="予算を¥1M増やしたときに追加で削減できる年間損失額（百万円）")
+
+    col_frontier, col_location = st.columns(2)
+
+    with col_frontier:
+        df_frontier = problem['frontier']
+        fig_frontier = go.Figure()
+        fig_frontier.add_trace(go.Scatter(
+            x=df_frontier['予算 (M¥)'],
+            y=df_frontier['年間損失削減 (M¥)'],
+            mode='lines',
+            name='最適配分',
+            line=dict(color='#1976d2', width=3)
+        ))
+        fig_frontier.add_trace(go.Scatter(
+            x=[budget],
+            y=[allocation['年間損失削減']],
+            mode='markers',
+            name='選択中の予算',
+            marker=dict(color='#d32f2f', size=12)
+        ))
+        fig_frontier.update_layout(
+            title='予算と年間損失削減額',
+            xaxis_title='予算 (百万円)',
+            yaxis_title='年間損失削減 (百万円)',
+            height=400,
+            showlegend=False
+        )
+        st.plotly_chart(fig_frontier, use_container_width=True)
+
+    with col_location:
+        fig_location = go.Figure()
+        for measure, color in zip(MEASURES, MEASURE_COLORS):
+            df_measure = df_allocation[df_allocation['施策'] == measure['施策']]
+            by_location = df_measure.groupby('拠点')['投資額 (M¥)'].sum()
+            fig_location.add_trace(go.Bar(
+                x=by_location.index,
+                y=by_location.values,
+                name=measure['施策'],
+                marker_color=color
+            ))
+        fig_location.update_layout(
+            title='拠点別・施策別の配分額',
+            yaxis_title='投資額 (百万円)',
+            barmode='stack',
+            height=400,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig_location, use_container_width=True)
+
+    # 対象拠点の配分
+    df_target = df_allocation[df_allocation['拠点'] == target_location]
+    st.markdown(f"**{target_location} への配分**（¥{df_target['投資額 (M¥)'].sum():.1f}M）")
+    if df_target.empty:
+        st.info("この予算では対象拠点への配分はありません（他拠点の方が予算あたりの削減額が大きい）")
+    else:
+        st.dataframe(
+            df_target.drop(columns='拠点').round({'対象人数': 1, '投資額 (M¥)': 2, 'ギャップ改善 (pt)': 2, '年間損失削減 (M¥)': 1}),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    with st.expander("📐 施策の費用・効果の前提"):
+        st.dataframe(pd.DataFrame([
+            {
+                '施策': measure['施策'],
+                '費用 (M¥/人)': measure['費用'],
+                'スキル向上 (pt/人)': measure['向上'],
+                '対象上限': f"{sum(width for width, _ in measure['効果曲線']):.0%}",
+                '効果曲線': ' → '.join(f"{width:.0%}: ×{effect}" for width, effect in measure['効果曲線'])
+            }
+            for measure in MEASURES
+        ]), use_container_width=True, hide_index=True)
+        st.caption(
+            "拠点の年間損失額（エグゼクティブサマリーの試算）を工程×スキルカテゴリに人数×ギャップの比で按分し、"
+            "受講者1人あたりのスキル向上で損失が減ると仮定して線形計画で解いています。"
+        )
+
+def show_team_optimizer(df_skill, target_location, priority_skill, skill_matrix, processes):
+    """拠点×工程内のチーム間の入れ替えで、チーム間のスキル差を縮める編成案を表示"""
+
+    st.markdown("""
+    <div class="section-header">
+        <h2 class="section-title">👥 チーム編成の最適化</h2>
+        <p class="section-subtitle">ローテーション・ペアリングの前提として、工程内のチーム間でスキルが偏らない配置案を作成</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if not skill_matrix.has_column('チーム'):
+        st.info("スキルデータにチーム列がないため、チーム編成の最適化は利用できません")
+        return
+
+    priority_process = priority_skill.partition(' - ')[0]
+    col_process, col_objective, col_moves, col_tolerance = st.columns(4)
+    with col_process:
+        process = st.selectbox(
+            "工程",
+            options=processes,
+            index=processes.index(priority_process) if priority_process in processes else 0,
+            key='team_optimizer_process'
+        )
+    with col_objective:
+        objective_label = st.radio(
+            "目的",
+            options=['最も弱いチームの底上げ', 'チーム間のバラツキ最小化'],
+            key='team_optimizer_objective'
+        )
+    with col_moves:
+        max_moves = st.slider("異動人数の上限", min_value=2, max_value=40, value=10, step=2,
+                              key='team_optimizer_max_moves')
+    with col_tolerance:
+        headcount_tolerance = st.slider("チーム人数の増減許容", min_value=0, max_value=5, value=0,
+                                        key='team_optimizer_tolerance',
+                                        help="0 の場合は人数を変えない入れ替えのみ")
+
+    objective = 'worst' if objective_label == '最も弱いチームの底上げ' else 'variance'
+    with profile_section('action_plan.team_optimizer'):
+        result = cached_team_composition(
+            skill_matrix, target_location, process, objective, max_moves, headcount_tolerance
+        )
+
+    if result is None:
+        st.info(f"{target_location} の {process} にチームが登録された従業員がいません")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("最も低いチーム×カテゴリ平均", f"{result['worst_after']:.2f}",
+                  delta=f"{result['worst_after'] - result['worst_before']:+.2f}")
+    with col2:
+        st.metric("チーム間のバラツキ（分散）", f"{result['spread_after']:.3f}",
+                  delta=f"{result['spread_after'] - result['spread_before']:+.3f}", delta_color="inverse")
+    with col3:
+        st.metric("異動人数", f"{len(result['moves'])}名")
+
+    categories = [c for c in result['before'].columns if c not in ('チーム', '人数')]
+    col_before, col_after = st.columns(2)
+    for col, df_table, title in [(col_before, result['before'], '現在の編成'), (col_after, result['after'], '最適化後の編成')]:
+        with col:
+            st.markdown(f"**{title}**")
+            st.dataframe(
+                df_table.round({c: 2 for c in categories}),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    if result['moves'].empty:
+        st.success("現在の編成から改善できる入れ替えはありません")
+    else:
+        df_moves = result['moves'].copy()
+        df_moves.insert(0, '従業員ID', df_skill['従業員ID'].to_numpy()[df_moves.pop('行番号')])
+        with st.expander(f"🔄 異動案（{len(df_moves)}名）"):
+            st.dataframe(df_moves, use_container_width=True, hide_index=True)
+
+def show_mentor_pairing(df_skill, target_location, skill_matrix, processes):
+    """拠点×工程ごとに、高スキル者と低スキル者をスキルの補完度が最大になるよう組み合わせて表示"""
+
+    st.markdown("""
+    <div class="section-header">
+        <h2 class="section-title">🤝 ベテラン-若手ペアリング</h2>
+        <p class="section-subtitle">同じ工程の高スキル者と低スキル者を、メンターが得意でメンティーが苦手なスキルの差が最大になるよう割り当て</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    col_mentor, col_mentee, col_capacity = st.columns(3)
+    with col_mentor:
+        mentor_percent = st.slider("メンター: 総合スキル上位 (%)", min_value=5, max_value=50, value=25, step=5,
+                                   key='mentor_pairing_mentor_percent')
+    with col_mentee:
+        mentee_percent = st.slider("メンティー: 総合スキル下位 (%)", min_value=5, max_value=50, value=25, step=5,
+                                   key='mentor_pairing_mentee_percent')
+    with col_capacity:
+        mentees_per_mentor = st.slider("メンター1人あたりの担当人数", min_value=1, max_value=3, value=1,
+                                       key='mentor_pairing_capacity')
+
+    with profile_section('action_plan.mentor_pairing'):
+        df_pairs = cached_mentor_pairs(
+            skill_matrix, target_location, 1 - mentor_percent / 100, mentee_percent / 100, mentees_per_mentor
+        )
+
+    if df_pairs.empty:
+        st.info("条件に合うメンター・メンティーの組がありません")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("ペア数", f"{len(df_pairs)}組")
+    with col2:
+        st.metric("平均補完度", f"{df_pairs['補完度'].mean():.2f}",
+                  help="メンターがメンティーを上回るスキルの差の合計 / スキル数")
+    with col3:
+        if df_pairs['シフト一致'].notna().any():
+            st.metric("シフト一致率", f"{df_pairs['シフト一致'].astype(float).mean():.0%}")
+        else:
+            st.metric("総合スキル差（平均）", f"{(df_pairs['メンター総合'] - df_pairs['メンティー総合']).mean():.2f}")
+
+    process_filter = st.selectbox("工程", options=['すべて'] + list(processes), key='mentor_pairing_process')
+    df_view = df_pairs if process_filter == 'すべて' else df_pairs[df_pairs['工程'] == process_filter]
+
+    employee_ids = df_skill['従業員ID'].to_numpy()
+    df_display = pd.DataFrame({
+        '工程': df_view['工程'],
+        'メンター': employee_ids[df_view['メンター行'].to_numpy()],
+        'メンター総合': df_view['メンター総合'].round(2),
+        'メンティー': employee_ids[df_view['メンティー行'].to_numpy()],
+        'メンティー総合': df_view['メンティー総合'].round(2),
+        '補完度': df_view['補完度'].round(2),
+        '主な指導スキル': df_view['主な指導スキル']
+    })
+    if df_view['シフト一致'].notna().any():
+        df_display['シフト一致'] = df_view['シフト一致'].map({True: '✅', False: '⚠️'})
+    st.dataframe(df_display, use_container_width=True, hide_index=True)
+
+def recommend_measure(gap):
+    """コホートの平均ギャップに応じた施策"""
+    if gap > 1.0:
+        return '🏫 集合研修'
+    elif gap > 0.5:
+        return '📚 オンライン教育'
+    elif gap > 0:
+        return '👥 ペアリング制度'
+    else:
+        return '⭐ メンター候補'
+
+def show_training_cohorts(target_location, priority_skill, skill_matrix):
+    """スキルプロファイルの似た従業員をまとめた研修コホートの人数と重心ギャップを表示"""
+
+    st.markdown("""
+    <div class="section-header">
+        <h2 class="section-title">🎓 研修コホート</h2>
+        <p class="section-subtitle">全従業員をスキルプロファイルでクラスタリングし、同じ内容の研修を受けるグループを設計</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    n_cohorts = st.slider("コホート数", min_value=3, max_value=10, value=6, key='cohort_count')
+
+    with profile_section('action_plan.cohorts'):
+        cohorts = cached_employee_cohorts(skill_matrix, n_cohorts)
+        df_cohorts = summarize_cohorts(cohorts, skill_matrix, skill_matrix.rows({'拠点': target_location}))
+        df_category_gaps = category_gaps(cohorts, skill_matrix)
+
+    priority_category = priority_skill.partition(' - ')[2]
+    if priority_category in df_category_gaps.columns:
+        df_cohorts['優先カテゴリのギャップ'] = df_category_gaps[priority_category].to_numpy()
+    df_cohorts['推奨施策'] = df_cohorts['平均ギャップ'].apply(recommend_measure)
+
+    col_table, col_heatmap = st.columns([3, 2])
+    with col_table:
+        st.markdown(f"**{target_location} のコホート別人数**（ギャップはベンチマーク拠点の平均との差）")
+        st.dataframe(
+            df_cohorts.round(2),
+            use_container_width=True,
+            hide_index=True
+        )
+    with col_heatmap:
+        fig_gap = go.Figure(data=go.Heatmap(
+            z=df_category_gaps.to_numpy(),
+            x=df_category_gaps.columns,
+            y=df_category_gaps.index,
+            colorscale='RdYlGn_r',
+            zmid=0,
+            text=np.round(df_category_gaps.to_numpy(), 2),
+            texttemplate='%{text}',
+            colorbar=dict(title='ギャップ')
+        ))
+        fig_gap.update_layout(
+            title='コホート×スキルカテゴリの重心ギャップ',
+            height=400,
+            yaxis=dict(autorange='reversed')
+        )
+        st.plotly_chart(fig_gap, use_container_width=True)
+
+@profiled()
+def show_action_plan(df_skill, target_location, priority_skill, skill_matrix, processes, skill_categories):
     """具体的なアクションプランの提示"""
     
     st.markdown(f"""
@@ -12,8 +356,7 @@ def show_action_plan(df_skill, target_location, priority_skill):
     </div>
     """, unsafe_allow_html=True)
     
-    df_target = df_skill[df_skill['拠点'] == target_location].copy()
-    low_skill_count = df_target[df_target[priority_skill] <= 2].shape[0]
+    low_skill_count = count_low_skill_employees(skill_matrix, target_location, priority_skill)
     
     # 施策パッケージ
     st.markdown("""
@@ -114,71 +457,72 @@ def show_action_plan(df_skill, target_location, priority_skill):
     risk_action = [0.5]*12
     cumulative_effect = [monthly_benefit * min(i*0.3, 1) for i in months]
     
-    fig_timeline = go.Figure()
-    
-    # 投資額の積み上げ棒グラフ
-    fig_timeline.add_trace(go.Bar(
-        x=months,
-        y=immediate_action,
-        name='即効施策',
-        marker_color='#d32f2f'
-    ))
-    
-    fig_timeline.add_trace(go.Bar(
-        x=months,
-        y=mid_term_action,
-        name='中期施策',
-        marker_color='#1976d2'
-    ))
-    
-    fig_timeline.add_trace(go.Bar(
-        x=months,
-        y=structural_action,
-        name='構造施策',
-        marker_color='#388e3c'
-    ))
-    
-    fig_timeline.add_trace(go.Bar(
-        x=months,
-        y=risk_action,
-        name='リスク対応',
-        marker_color='#f57c00'
-    ))
-    
-    # 累積効果のライン
-    fig_timeline.add_trace(go.Scatter(
-        x=months,
-        y=cumulative_effect,
-        name='累積効果',
-        yaxis='y2',
-        mode='lines+markers',
-        line=dict(color='#7b1fa2', width=3),
-        marker=dict(size=8)
-    ))
-    
-    fig_timeline.update_layout(
-        title='施策実行タイムラインと累積効果',
-        xaxis=dict(title='月', tickmode='linear', tick0=1, dtick=1),
-        yaxis=dict(title='投資額 (百万円)', range=[0, 10]),
-        yaxis2=dict(
-            title='累積効果 (百万円/月)', 
-            overlaying='y', 
-            side='right',
-            range=[0, max(cumulative_effect) * 1.2]
-        ),
-        barmode='stack',
-        height=450,
-        hovermode='x unified',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
+    with profile_section('action_plan.timeline'):
+        fig_timeline = go.Figure()
+        
+        # 投資額の積み上げ棒グラフ
+        fig_timeline.add_trace(go.Bar(
+            x=months,
+            y=immediate_action,
+            name='即効施策',
+            marker_color='#d32f2f'
+        ))
+        
+        fig_timeline.add_trace(go.Bar(
+            x=months,
+            y=mid_term_action,
+            name='中期施策',
+            marker_color='#1976d2'
+        ))
+        
+        fig_timeline.add_trace(go.Bar(
+            x=months,
+            y=structural_action,
+            name='構造施策',
+            marker_color='#388e3c'
+        ))
+        
+        fig_timeline.add_trace(go.Bar(
+            x=months,
+            y=risk_action,
+            name='リスク対応',
+            marker_color='#f57c00'
+        ))
+        
+        # 累積効果のライン
+        fig_timeline.add_trace(go.Scatter(
+            x=months,
+            y=cumulative_effect,
+            name='累積効果',
+            yaxis='y2',
+            mode='lines+markers',
+            line=dict(color='#7b1fa2', width=3),
+            marker=dict(size=8)
+        ))
+        
+        fig_timeline.update_layout(
+            title='施策実行タイムラインと累積効果',
+            xaxis=dict(title='月', tickmode='linear', tick0=1, dtick=1),
+            yaxis=dict(title='投資額 (百万円)', range=[0, 10]),
+            yaxis2=dict(
+                title='累積効果 (百万円/月)', 
+                overlaying='y', 
+                side='right',
+                range=[0, max(cumulative_effect) * 1.2]
+            ),
+            barmode='stack',
+            height=450,
+            hovermode='x unified',
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1
+            )
         )
-    )
-    
-    st.plotly_chart(fig_timeline, use_container_width=True)
+        
+        st.plotly_chart(fig_timeline, use_container_width=True)
     
     # 承認判断
     st.success(
@@ -246,6 +590,26 @@ def show_action_plan(df_skill, target_location, priority_skill):
         - **合計: ¥5.0M**
         """)
     
+    st.markdown("---")
+
+    # 予算の最適配分
+    show_budget_optimizer(df_skill, target_location, skill_matrix, processes, skill_categories)
+
+    st.markdown("---")
+
+    # 研修コホート
+    show_training_cohorts(target_location, priority_skill, skill_matrix)
+
+    st.markdown("---")
+
+    # チーム編成の最適化
+    show_team_optimizer(df_skill, target_location, priority_skill, skill_matrix, processes)
+
+    st.markdown("---")
+
+    # ベテラン-若手ペアリング
+    show_mentor_pairing(df_skill, target_location, skill_matrix, processes)
+
     # 次のステップ
     st.markdown("---")
     
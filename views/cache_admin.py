@@ -0,0 +1,125 @@
+import streamlit as st
+import pandas as pd
+from utils.background_jobs import get_background_jobs
+from utils.disk_cache import get_disk_cache
+from utils.figure_cache import get_figure_cache
+from utils.result_cache import get_result_cache
+from utils.session_results import get_session_result_store
+from utils.profiling import profiled
+
+def _format_mb(size):
+    return f"{size / 1024 / 1024:,.1f} MB"
+
+@profiled()
+def show_cache_admin():
+    """分析結果キャッシュ（メモリ・ディスク）・フィギュアキャッシュの利用状況（管理者向け）"""
+
+    st.markdown("""
+    <div class="header-container">
+        <div class="header-title">🛠️ キャッシュ管理</div>
+        <div class="header-subtitle">プロセス全体で共有するキャッシュのメモリ使用量とヒット率</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    result_cache = get_result_cache()
+    disk_cache = get_disk_cache()
+    totals = result_cache.totals()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("分析結果の常駐サイズ", _format_mb(totals['resident_bytes']))
+    with col2:
+        st.metric("メモリ上限", _format_mb(totals['max_bytes']),
+                  help="環境変数 SDP_RESULT_CACHE_MB で変更できます")
+    with col3:
+        st.metric("エントリ数", f"{totals['entries']:,} / {totals['max_entries']:,}")
+
+    st.progress(min(1.0, totals['resident_bytes'] / totals['max_bytes']) if totals['max_bytes'] else 0.0)
+
+    # 名前空間別
+    st.markdown("### 📦 分析結果キャッシュ（名前空間別）")
+    namespace_stats = result_cache.stats()
+    disk_stats = disk_cache.stats()
+
+    if namespace_stats or disk_stats:
+        df_stats = pd.DataFrame([
+            {
+                '名前空間': namespace,
+                'エントリ数': stats['entries'],
+                '常駐サイズ (MB)': round(stats['resident_bytes'] / 1024 / 1024, 2),
+                'ヒット': stats['hits'],
+                'ミス': stats['misses'],
+                'ヒット率': f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else '-',
+                '破棄': stats['evictions']
+            }
+            for namespace, stats in namespace_stats.items()
+        ])
+        if disk_stats:
+            df_disk = pd.DataFrame([
+                {
+                    '名前空間': namespace,
+                    'ディスク件数': stats['entries'],
+                    'ディスクサイズ (MB)': round(stats['disk_bytes'] / 1024 / 1024, 2),
+                    'ディスクヒット': stats['hits']
+                }
+                for namespace, stats in disk_stats.items()
+            ])
+            df_stats = df_stats.merge(df_disk, on='名前空間', how='outer') if not df_stats.empty else df_disk
+
+        st.dataframe(df_stats, use_container_width=True, hide_index=True)
+
+        col_ns, col_clear = st.columns([2, 1])
+        with col_ns:
+            clear_target = st.selectbox(
+                '削除する名前空間',
+                options=['すべて'] + df_stats['名前空間'].tolist(),
+                key='cache_admin_clear_target'
+            )
+        with col_clear:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("🗑️ キャッシュを削除", use_container_width=True,
+                         help="メモリとディスクの両方から削除します"):
+                namespace = None if clear_target == 'すべて' else clear_target
+                result_cache.clear(namespace)
+                disk_cache.clear(namespace)
+                st.rerun()
+    else:
+        st.info("まだキャッシュされた分析結果はありません")
+
+    # ディスクキャッシュ
+    disk_totals = disk_cache.totals()
+    if disk_totals['enabled']:
+        st.caption(
+            f"💾 ディスクキャッシュ: {disk_totals['entries']:,}件 / "
+            f"{_format_mb(disk_totals['disk_bytes'])}（上限 {_format_mb(disk_totals['max_bytes'])}、"
+            f"保存先 {disk_totals['directory']}）"
+        )
+    else:
+        st.caption("💾 ディスクキャッシュは無効です（SDP_DISK_CACHE_MB=0 または保存先に書き込めません）")
+
+    # セッション共有の結果ストア
+    store_stats = get_session_result_store().stats()
+    st.caption(
+        f"🔗 共有結果ストア: {store_stats['entries']:,}件（参照なし {store_stats['unreferenced']:,}件）、"
+        f"アクティブなセッション {store_stats['sessions']:,}、破棄 {store_stats['evictions']:,}件"
+    )
+
+    # バックグラウンドジョブ（KPI予測の当てはめなど）
+    job_stats = get_background_jobs().stats()
+    st.caption(
+        f"⏳ バックグラウンドジョブ: 実行中 {job_stats['running']:,}件、完了 {job_stats['done']:,}件、"
+        f"失敗 {job_stats['failed']:,}件"
+    )
+
+    # フィギュアキャッシュ
+    st.markdown("### 📈 フィギュアキャッシュ")
+    figure_stats = get_figure_cache().stats()
+    lookups = figure_stats['hits'] + figure_stats['misses']
+    st.dataframe(pd.DataFrame([{
+        'エントリ数': figure_stats['entries'],
+        '常駐サイズ (MB)': round(figure_stats['resident_bytes'] / 1024 / 1024, 2),
+        'ヒット': figure_stats['hits'],
+        'ミス': figure_stats['misses'],
+        'ヒット率': f"{figure_stats['hits'] / lookups:.1%}" if lookups else '-',
+        '破棄': figure_stats['evictions']
+    }]), use_container_width=True, hide_index=True)
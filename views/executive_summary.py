@@ -2,7 +2,32 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from analytics.location_loss import cached_location_summary
+from utils.profiling import profiled, profile_section
+from utils.session_results import load_session_result, save_session_result
+from utils.versioned_cache import dataset_version
 
+
+def get_priority(score):
+    if score > 70:
+        return '🔴 最優先'
+    elif score > 50:
+        return '🟡 優先'
+    else:
+        return '🟢 中期対応'
+
+
+def prioritize_locations(df_summary):
+    """損失額とROIから拠点の優先度スコアを計算し、優先度の高い順に並べる"""
+    df_summary = df_summary.copy()
+    df_summary['損失額_正規化'] = df_summary['年間損失額 (M¥)'] / df_summary['年間損失額 (M¥)'].max()
+    df_summary['ROI_正規化'] = df_summary['ROI'] / df_summary['ROI'].max()
+    df_summary['優先度スコア'] = (df_summary['損失額_正規化'] * 0.6 + df_summary['ROI_正規化'] * 0.4) * 100
+    df_summary['優先度'] = df_summary['優先度スコア'].apply(get_priority)
+    return df_summary.sort_values('優先度スコア', ascending=False)
+
+
+@profiled()
 def show_executive_summary(df_skill, df_daily_prod):
     """経営層向けエグゼクティブサマリー"""
     
@@ -14,50 +39,14 @@ def show_executive_summary(df_skill, df_daily_prod):
     </div>
     """, unsafe_allow_html=True)
     
-    # ベンチマーク拠点（日本）との比較
-    jp_efficiency = df_skill[df_skill['拠点'] == '日本 (JP)']['生産効率 (%)'].mean()
-    jp_defect = df_skill[df_skill['拠点'] == '日本 (JP)']['品質不良率 (%)'].mean()
-    jp_skill = df_skill[df_skill['拠点'] == '日本 (JP)']['総合スキルスコア'].mean()
-    
-    # 拠点別の損失試算
-    location_summary = []
-    for loc in df_skill['拠点'].unique():
-        if loc == '日本 (JP)':
-            continue
-        
-        df_loc = df_skill[df_skill['拠点'] == loc]
-        efficiency_gap = jp_efficiency - df_loc['生産効率 (%)'].mean()
-        defect_gap = df_loc['品質不良率 (%)'].mean() - jp_defect
-        skill_gap = jp_skill - df_loc['総合スキルスコア'].mean()
-        
-        # 損失試算（仮定：月間生産額10億円/拠点）
-        monthly_production_value = 1000  # 百万円
-        efficiency_loss = monthly_production_value * (efficiency_gap / 100)
-        defect_loss = monthly_production_value * (defect_gap / 100) * 1.5
-        total_loss = efficiency_loss + defect_loss
-        annual_loss = total_loss * 12
-        
-        # 教育投資でのROI試算
-        employee_count = len(df_loc)
-        training_cost_per_person = 0.5  # 百万円/人
-        total_training_cost = employee_count * training_cost_per_person
-        roi = (annual_loss / total_training_cost) if total_training_cost > 0 else 0
-        payback_months = (total_training_cost / total_loss) if total_loss > 0 else 999
-        
-        location_summary.append({
-            '拠点': loc,
-            '従業員数': employee_count,
-            'スキルギャップ': skill_gap,
-            '効率ギャップ (%)': efficiency_gap,
-            '不良率ギャップ (%)': defect_gap,
-            '月間損失額 (M¥)': total_loss,
-            '年間損失額 (M¥)': annual_loss,
-            '教育投資額 (M¥)': total_training_cost,
-            'ROI': roi,
-            '投資回収期間 (月)': payback_months
-        })
-    
-    df_summary = pd.DataFrame(location_summary)
+    with profile_section('summary.location_loss'):
+        # ベンチマーク拠点（日本）との比較による拠点別の損失試算と優先度
+        # 結果は全セッションで1つだけ共有ストアに保持し、セッションにはハンドルのみ保存（変更しないこと）
+        summary_key = dataset_version(df_skill)
+        df_summary = load_session_result('df_summary', summary_key)
+        if df_summary is None:
+            df_summary = prioritize_locations(cached_location_summary(df_skill))
+            save_session_result('df_summary', df_summary, summary_key)
     
     # 重要指標のハイライト
     total_annual_loss = df_summary['年間損失額 (M¥)'].sum()
@@ -103,22 +92,6 @@ def show_executive_summary(df_skill, df_daily_prod):
     
     st.markdown("---")
     
-    # 優先度スコアリング
-    df_summary['損失額_正規化'] = df_summary['年間損失額 (M¥)'] / df_summary['年間損失額 (M¥)'].max()
-    df_summary['ROI_正規化'] = df_summary['ROI'] / df_summary['ROI'].max()
-    df_summary['優先度スコア'] = (df_summary['損失額_正規化'] * 0.6 + df_summary['ROI_正規化'] * 0.4) * 100
-    
-    def get_priority(score):
-        if score > 70:
-            return '🔴 最優先'
-        elif score > 50:
-            return '🟡 優先'
-        else:
-            return '🟢 中期対応'
-    
-    df_summary['優先度'] = df_summary['優先度スコア'].apply(get_priority)
-    df_summary = df_summary.sort_values('優先度スコア', ascending=False)
-    
     st.markdown("""
     <div class="section-header">
         <h2 class="section-title">🎯 拠点別 優先順位マトリクス</h2>
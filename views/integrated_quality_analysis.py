@@ -3,7 +3,13 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+from analytics.bootstrap import compute_bootstrap_ci, get_difference
+from analytics.summary_stats import box_parameters, summarize_groups
+from utils.figure_cache import cached_figure
+from utils.versioned_cache import dataset_version
+from utils.profiling import profiled, profile_section
 
+@profiled()
 def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, skill_categories, skill_hierarchy, processes):
     """統合的な品質×力量分析 - 4つの新しい可視化手法"""
     
@@ -71,6 +77,9 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
             key='integrated_category'
         )
     
+    # フィギュアキャッシュのキー用データバージョン
+    data_version = dataset_version(df_daily_prod)
+    
     # 選択した工程のデータ
     df_process = df_filtered[df_filtered['工程'] == selected_process].copy()
     
@@ -95,95 +104,106 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
     # チーム別にデータを準備
     teams = sorted(df_process['チーム'].unique())
     
-    # 2段のサブプロット作成（上段=日勤、下段=夜勤）
-    fig1 = make_subplots(
-        rows=2, cols=1,
-        subplot_titles=['☀️ 日勤シフト', '🌙 夜勤シフト'],
-        specs=[[{"secondary_y": True}], [{"secondary_y": True}]],
-        vertical_spacing=0.15
-    )
-    
-    # カラーマップ
-    team_colors = {
-        'Aチーム': '#1f77b4',
-        'Bチーム': '#ff7f0e',
-        'Cチーム': '#2ca02c'
-    }
-    
-    shifts = [('日勤', 1), ('夜勤', 2)]
-    
-    # シフトごとにプロット
-    for shift_name, row in shifts:
-        df_shift = df_process[df_process['シフト'] == shift_name].copy()
+    def build_fig1():
+        # 2段のサブプロット作成（上段=日勤、下段=夜勤）
+        fig1 = make_subplots(
+            rows=2, cols=1,
+            subplot_titles=['☀️ 日勤シフト', '🌙 夜勤シフト'],
+            specs=[[{"secondary_y": True}], [{"secondary_y": True}]],
+            vertical_spacing=0.15
+        )
+        
+        # カラーマップ
+        team_colors = {
+            'Aチーム': '#1f77b4',
+            'Bチーム': '#ff7f0e',
+            'Cチーム': '#2ca02c'
+        }
         
-        if df_shift.empty:
-            continue
+        shifts = [('日勤', 1), ('夜勤', 2)]
         
-        # チーム別にプロット
-        for team in teams:
-            df_team_shift = df_shift[df_shift['チーム'] == team].sort_values('日付')
+        # シフトごとにプロット
+        for shift_name, row in shifts:
+            df_shift = df_process[df_process['シフト'] == shift_name].copy()
             
-            if df_team_shift.empty:
+            if df_shift.empty:
                 continue
             
-            color = team_colors.get(team, '#888888')
-            
-            # スキルスコア（棒グラフ、左軸）
-            if skill_col in df_team_shift.columns:
+            # チーム別にプロット
+            for team in teams:
+                df_team_shift = df_shift[df_shift['チーム'] == team].sort_values('日付')
+                
+                if df_team_shift.empty:
+                    continue
+                
+                color = team_colors.get(team, '#888888')
+                
+                # スキルスコア（棒グラフ、左軸）
+                if skill_col in df_team_shift.columns:
+                    fig1.add_trace(
+                        go.Bar(
+                            x=df_team_shift['日付'],
+                            y=df_team_shift[skill_col],
+                            name=f'{team}',
+                            marker_color=color,
+                            opacity=0.7,
+                            legendgroup=f'{shift_name}_{team}',
+                            showlegend=(row == 1),
+                            hovertemplate=f'<b>{team}</b><br>日付: %{{x}}<br>スキル: %{{y:.2f}}<extra></extra>'
+                        ),
+                        row=row, col=1,
+                        secondary_y=False
+                    )
+                
+                # 品質不良率（折れ線、右軸）
                 fig1.add_trace(
-                    go.Bar(
+                    go.Scatter(
                         x=df_team_shift['日付'],
-                        y=df_team_shift[skill_col],
-                        name=f'{team}',
-                        marker_color=color,
-                        opacity=0.7,
+                        y=df_team_shift['品質不良率 (%)'],
+                        name=f'{team} 不良率',
+                        line=dict(color=color, width=3, dash='solid'),
+                        mode='lines+markers',
+                        marker=dict(size=8, symbol='diamond'),
                         legendgroup=f'{shift_name}_{team}',
-                        showlegend=(row == 1),
-                        hovertemplate=f'<b>{team}</b><br>日付: %{{x}}<br>スキル: %{{y:.2f}}<extra></extra>'
+                        showlegend=False,
+                        hovertemplate=f'<b>{team}</b><br>日付: %{{x}}<br>不良率: %{{y:.2f}}%<extra></extra>'
                     ),
                     row=row, col=1,
-                    secondary_y=False
+                    secondary_y=True
                 )
-            
-            # 品質不良率（折れ線、右軸）
-            fig1.add_trace(
-                go.Scatter(
-                    x=df_team_shift['日付'],
-                    y=df_team_shift['品質不良率 (%)'],
-                    name=f'{team} 不良率',
-                    line=dict(color=color, width=3, dash='solid'),
-                    mode='lines+markers',
-                    marker=dict(size=8, symbol='diamond'),
-                    legendgroup=f'{shift_name}_{team}',
-                    showlegend=False,
-                    hovertemplate=f'<b>{team}</b><br>日付: %{{x}}<br>不良率: %{{y:.2f}}%<extra></extra>'
-                ),
-                row=row, col=1,
-                secondary_y=True
+        
+        # 軸設定
+        fig1.update_xaxes(title_text="日付", row=2, col=1)
+        fig1.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=1, col=1, secondary_y=False)
+        fig1.update_yaxes(title_text="品質不良率 (%)", row=1, col=1, secondary_y=True)
+        fig1.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=2, col=1, secondary_y=False)
+        fig1.update_yaxes(title_text="品質不良率 (%)", row=2, col=1, secondary_y=True)
+        
+        fig1.update_layout(
+            title=f"{selected_process} - スキル（棒）×品質（折れ線）推移",
+            hovermode='x unified',
+            height=800,
+            barmode='group',
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=-0.12,
+                xanchor="center",
+                x=0.5
             )
-    
-    # 軸設定
-    fig1.update_xaxes(title_text="日付", row=2, col=1)
-    fig1.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=1, col=1, secondary_y=False)
-    fig1.update_yaxes(title_text="品質不良率 (%)", row=1, col=1, secondary_y=True)
-    fig1.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=2, col=1, secondary_y=False)
-    fig1.update_yaxes(title_text="品質不良率 (%)", row=2, col=1, secondary_y=True)
-    
-    fig1.update_layout(
-        title=f"{selected_process} - スキル（棒）×品質（折れ線）推移",
-        hovermode='x unified',
-        height=800,
-        barmode='group',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.12,
-            xanchor="center",
-            x=0.5
         )
-    )
-    
-    st.plotly_chart(fig1, use_container_width=True)
+        return fig1
+    
+    with profile_section('integrated.fig1'):
+        # 入力が同じなら構築済みフィギュアを再利用（全セッション共有）
+        fig1 = cached_figure(
+            'integrated.fig1',
+            data_version,
+            {'拠点': target_location, '工程': selected_process, 'カテゴリ': selected_category},
+            build_fig1
+        )
+        
+        st.plotly_chart(fig1, use_container_width=True)
     
     # インサイト
     col_insight1, col_insight2, col_insight3 = st.columns(3)
@@ -202,10 +222,19 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
         df_day = df_process[df_process['シフト'] == '日勤']
         df_night = df_process[df_process['シフト'] == '夜勤']
         if not df_day.empty and not df_night.empty:
-            day_defect = df_day['品質不良率 (%)'].mean()
-            night_defect = df_night['品質不良率 (%)'].mean()
-            diff = night_defect - day_defect
-            st.metric("夜勤 - 日勤 不良率差", f"{diff:+.2f}%", delta_color="inverse")
+            # シフト差のブートストラップ信頼区間（拠点×工程ごとにキャッシュ）
+            _, df_shift_diff = compute_bootstrap_ci(
+                df_daily_prod, target_location, selected_process, '品質不良率 (%)', ('シフト',)
+            )
+            shift_diff = get_difference(df_shift_diff, '夜勤', '日勤')
+            st.metric(
+                "夜勤 - 日勤 不良率差",
+                f"{shift_diff['差']:+.2f}%",
+                delta="有意差あり" if shift_diff['有意'] else "有意差なし",
+                delta_color="off",
+                help="ブートストラップ法（10,000回）による95%信頼区間"
+            )
+            st.caption(f"95%信頼区間: [{shift_diff['下限']:+.2f}%, {shift_diff['上限']:+.2f}%]")
     
     st.markdown("---")
     
@@ -220,105 +249,94 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
     """, unsafe_allow_html=True)
     
     if skill_col in df_process.columns:
-        # 2列のサブプロット（左:スキル、右:品質）
-        fig2 = make_subplots(
-            rows=1, cols=2,
-            subplot_titles=[
-                f'{selected_category}スキル分布',
-                '品質不良率分布'
-            ],
-            horizontal_spacing=0.15
-        )
+        # 四分位・ひげ・外れ値はサーバー側で集計し、箱ひげ図には統計量だけを渡す
+        with profile_section('integrated.box_stats'):
+            df_skill_stats, df_skill_outliers = summarize_groups(df_process, skill_col, ['シフト'])
+            df_defect_stats, df_defect_outliers = summarize_groups(df_process, '品質不良率 (%)', ['シフト'])
+        skill_stats = df_skill_stats.set_index('シフト')
+        defect_stats = df_defect_stats.set_index('シフト')
         
-        df_day = df_process[df_process['シフト'] == '日勤']
-        df_night = df_process[df_process['シフト'] == '夜勤']
-        
-        # スキルの箱ひげ図（左側）
-        if not df_day.empty:
+        def add_box(fig2, stats, df_outliers, shift, color, showlegend, col):
+            if shift not in stats.index:
+                return
             fig2.add_trace(
                 go.Box(
-                    y=df_day[skill_col],
-                    name='日勤',
-                    marker_color='#2E86DE',
+                    x=[shift],
+                    name=shift,
+                    marker_color=color,
                     boxmean='sd',  # 平均と標準偏差を表示
-                    showlegend=True
+                    showlegend=showlegend,
+                    **box_parameters(stats.loc[shift])
                 ),
-                row=1, col=1
+                row=1, col=col
             )
+            outliers = df_outliers.loc[df_outliers['シフト'] == shift, '値']
+            if not outliers.empty:
+                fig2.add_trace(
+                    go.Scatter(
+                        x=[shift] * len(outliers),
+                        y=outliers,
+                        mode='markers',
+                        marker=dict(color=color, size=5, symbol='circle-open'),
+                        name=f'{shift} 外れ値',
+                        showlegend=False
+                    ),
+                    row=1, col=col
+                )
         
-        if not df_night.empty:
-            fig2.add_trace(
-                go.Box(
-                    y=df_night[skill_col],
-                    name='夜勤',
-                    marker_color='#5F27CD',
-                    boxmean='sd',
-                    showlegend=True
-                ),
-                row=1, col=1
+        def build_fig2():
+            # 2列のサブプロット（左:スキル、右:品質）
+            fig2 = make_subplots(
+                rows=1, cols=2,
+                subplot_titles=[
+                    f'{selected_category}スキル分布',
+                    '品質不良率分布'
+                ],
+                horizontal_spacing=0.15
             )
-        
-        # 品質不良率の箱ひげ図（右側）
-        if not df_day.empty:
-            fig2.add_trace(
-                go.Box(
-                    y=df_day['品質不良率 (%)'],
-                    name='日勤',
-                    marker_color='#FF6348',
-                    boxmean='sd',
-                    showlegend=False
-                ),
-                row=1, col=2
+            
+            # スキルの箱ひげ図（左側）
+            add_box(fig2, skill_stats, df_skill_outliers, '日勤', '#2E86DE', True, 1)
+            add_box(fig2, skill_stats, df_skill_outliers, '夜勤', '#5F27CD', True, 1)
+            
+            # 品質不良率の箱ひげ図（右側）
+            add_box(fig2, defect_stats, df_defect_outliers, '日勤', '#FF6348', False, 2)
+            add_box(fig2, defect_stats, df_defect_outliers, '夜勤', '#EE5A6F', False, 2)
+            
+            # 軸設定
+            fig2.update_xaxes(title_text="シフト", row=1, col=1)
+            fig2.update_xaxes(title_text="シフト", row=1, col=2)
+            fig2.update_yaxes(title_text="スキルスコア", row=1, col=1)
+            fig2.update_yaxes(title_text="品質不良率 (%)", row=1, col=2)
+            
+            fig2.update_layout(
+                title=f"{selected_process} - シフト別分布比較（箱=四分位範囲、線=中央値、◇=平均、ひげ=1.5×IQR、○=外れ値）",
+                height=500
             )
+            return fig2
         
-        if not df_night.empty:
-            fig2.add_trace(
-                go.Box(
-                    y=df_night['品質不良率 (%)'],
-                    name='夜勤',
-                    marker_color='#EE5A6F',
-                    boxmean='sd',
-                    showlegend=False
-                ),
-                row=1, col=2
+        with profile_section('integrated.fig2'):
+            fig2 = cached_figure(
+                'integrated.fig2',
+                data_version,
+                {'拠点': target_location, '工程': selected_process, 'カテゴリ': selected_category},
+                build_fig2
             )
+            
+            st.plotly_chart(fig2, use_container_width=True)
         
-        # 軸設定
-        fig2.update_xaxes(title_text="シフト", row=1, col=1)
-        fig2.update_xaxes(title_text="シフト", row=1, col=2)
-        fig2.update_yaxes(title_text="スキルスコア", row=1, col=1)
-        fig2.update_yaxes(title_text="品質不良率 (%)", row=1, col=2)
-        
-        fig2.update_layout(
-            title=f"{selected_process} - シフト別分布比較（箱=四分位範囲、線=中央値、◇=平均、ひげ=1.5×IQR）",
-            height=500
-        )
-        
-        st.plotly_chart(fig2, use_container_width=True)
-        
-        # 統計比較テーブル
+        # 統計比較テーブル（箱ひげ図と同じ統計量を表示）
+        stat_rows = ['平均', '中央値', '標準偏差', '第1四分位', '第3四分位']
         col_stat1, col_stat2 = st.columns(2)
         
         with col_stat1:
             st.markdown("#### 📊 スキル統計比較")
             
-            if not df_day.empty and not df_night.empty:
+            if {'日勤', '夜勤'} <= set(skill_stats.index):
                 stat_data = {
-                    '指標': ['平均', '中央値', '標準偏差', '第1四分位', '第3四分位'],
-                    '日勤': [
-                        f"{df_day[skill_col].mean():.2f}",
-                        f"{df_day[skill_col].median():.2f}",
-                        f"{df_day[skill_col].std():.2f}",
-                        f"{df_day[skill_col].quantile(0.25):.2f}",
-                        f"{df_day[skill_col].quantile(0.75):.2f}"
-                    ],
-                    '夜勤': [
-                        f"{df_night[skill_col].mean():.2f}",
-                        f"{df_night[skill_col].median():.2f}",
-                        f"{df_night[skill_col].std():.2f}",
-                        f"{df_night[skill_col].quantile(0.25):.2f}",
-                        f"{df_night[skill_col].quantile(0.75):.2f}"
-                    ]
+                    '指標': stat_rows,
+                    '日勤': [f"{skill_stats.loc['日勤', stat]:.2f}" for stat in stat_rows],
+                    '夜勤': [f"{skill_stats.loc['夜勤', stat]:.2f}" for stat in stat_rows]
                 }
                 
                 st.dataframe(pd.DataFrame(stat_data), use_container_width=True, hide_index=True)
@@ -326,23 +344,11 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
         with col_stat2:
             st.markdown("#### 📊 品質統計比較")
             
-            if not df_day.empty and not df_night.empty:
+            if {'日勤', '夜勤'} <= set(defect_stats.index):
                 stat_data = {
-                    '指標': ['平均', '中央値', '標準偏差', '第1四分位', '第3四分位'],
-                    '日勤': [
-                        f"{df_day['品質不良率 (%)'].mean():.2f}%",
-                        f"{df_day['品質不良率 (%)'].median():.2f}%",
-                        f"{df_day['品質不良率 (%)'].std():.2f}%",
-                        f"{df_day['品質不良率 (%)'].quantile(0.25):.2f}%",
-                        f"{df_day['品質不良率 (%)'].quantile(0.75):.2f}%"
-                    ],
-                    '夜勤': [
-                        f"{df_night['品質不良率 (%)'].mean():.2f}%",
-                        f"{df_night['品質不良率 (%)'].median():.2f}%",
-                        f"{df_night['品質不良率 (%)'].std():.2f}%",
-                        f"{df_night['品質不良率 (%)'].quantile(0.25):.2f}%",
-                        f"{df_night['品質不良率 (%)'].quantile(0.75):.2f}%"
-                    ]
+                    '指標': stat_rows,
+                    '日勤': [f"{defect_stats.loc['日勤', stat]:.2f}%" for stat in stat_rows],
+                    '夜勤': [f"{defect_stats.loc['夜勤', stat]:.2f}%" for stat in stat_rows]
                 }
                 
                 st.dataframe(pd.DataFrame(stat_data), use_container_width=True, hide_index=True)
@@ -383,113 +389,132 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
         df_filtered_teams = df_process[df_process['チーム'].isin(selected_teams)].copy()
         
         if skill_col in df_filtered_teams.columns:
-            # 2行1列のサブプロット（上段=日勤、下段=夜勤）
-            fig3 = make_subplots(
-                rows=2, cols=1,
-                subplot_titles=['☀️ 日勤シフト - スキル×品質推移', '🌙 夜勤シフト - スキル×品質推移'],
-                specs=[[{"secondary_y": True}], [{"secondary_y": True}]],
-                vertical_spacing=0.15
-            )
-            
-            team_colors = {
-                'Aチーム': '#1f77b4',
-                'Bチーム': '#ff7f0e',
-                'Cチーム': '#2ca02c'
-            }
-            
-            shifts = [('日勤', 1), ('夜勤', 2)]
-            
-            for shift_name, row in shifts:
-                df_shift = df_filtered_teams[df_filtered_teams['シフト'] == shift_name]
+            def build_fig3():
+                # 2行1列のサブプロット（上段=日勤、下段=夜勤）
+                fig3 = make_subplots(
+                    rows=2, cols=1,
+                    subplot_titles=['☀️ 日勤シフト - スキル×品質推移', '🌙 夜勤シフト - スキル×品質推移'],
+                    specs=[[{"secondary_y": True}], [{"secondary_y": True}]],
+                    vertical_spacing=0.15
+                )
+                
+                team_colors = {
+                    'Aチーム': '#1f77b4',
+                    'Bチーム': '#ff7f0e',
+                    'Cチーム': '#2ca02c'
+                }
                 
-                if not df_shift.empty:
-                    # チーム別にプロット
-                    for team in selected_teams:
-                        df_team_shift = df_shift[df_shift['チーム'] == team]
+                shifts = [('日勤', 1), ('夜勤', 2)]
+                
+                for shift_name, row in shifts:
+                    df_shift = df_filtered_teams[df_filtered_teams['シフト'] == shift_name]
+                    
+                    if not df_shift.empty:
+                        # チーム別にプロット
+                        for team in selected_teams:
+                            df_team_shift = df_shift[df_shift['チーム'] == team]
+                            
+                            if not df_team_shift.empty:
+                                # スキルスコア
+                                fig3.add_trace(
+                                    go.Scatter(
+                                        x=df_team_shift['日付'],
+                                        y=df_team_shift[skill_col],
+                                        name=f'{team}',
+                                        line=dict(color=team_colors.get(team, '#888888'), width=2.5),
+                                        mode='lines+markers',
+                                        marker=dict(size=6),
+                                        legendgroup=f'{shift_name}_{team}',
+                                        showlegend=(row == 1),
+                                        hovertemplate=f'<b>{shift_name} - {team}</b><br>日付: %{{x}}<br>スキル: %{{y:.2f}}<extra></extra>'
+                                    ),
+                                    row=row, col=1,
+                                    secondary_y=False
+                                )
+                                
+                                # 品質不良率
+                                fig3.add_trace(
+                                    go.Scatter(
+                                        x=df_team_shift['日付'],
+                                        y=df_team_shift['品質不良率 (%)'],
+                                        name=f'{team} (不良率)',
+                                        line=dict(color=team_colors.get(team, '#888888'), width=2, dash='dash'),
+                                        mode='lines+markers',
+                                        marker=dict(size=5),
+                                        legendgroup=f'{shift_name}_{team}',
+                                        showlegend=False,
+                                        hovertemplate=f'<b>{shift_name} - {team}</b><br>日付: %{{x}}<br>不良率: %{{y:.2f}}%<extra></extra>'
+                                    ),
+                                    row=row, col=1,
+                                    secondary_y=True
+                                )
                         
-                        if not df_team_shift.empty:
-                            # スキルスコア
-                            fig3.add_trace(
-                                go.Scatter(
-                                    x=df_team_shift['日付'],
-                                    y=df_team_shift[skill_col],
-                                    name=f'{team}',
-                                    line=dict(color=team_colors.get(team, '#888888'), width=2.5),
-                                    mode='lines+markers',
-                                    marker=dict(size=6),
-                                    legendgroup=f'{shift_name}_{team}',
-                                    showlegend=(row == 1),
-                                    hovertemplate=f'<b>{shift_name} - {team}</b><br>日付: %{{x}}<br>スキル: %{{y:.2f}}<extra></extra>'
-                                ),
+                        # 平均線を追加（オプション）
+                        if show_avg_lines:
+                            skill_mean = df_shift[skill_col].mean()
+                            defect_mean = df_shift['品質不良率 (%)'].mean()
+                            
+                            fig3.add_hline(
+                                y=skill_mean,
+                                line=dict(color='blue', dash='dot', width=2),
                                 row=row, col=1,
-                                secondary_y=False
+                                secondary_y=False,
+                                annotation_text=f"平均スキル: {skill_mean:.2f}",
+                                annotation_position="right"
                             )
                             
-                            # 品質不良率
-                            fig3.add_trace(
-                                go.Scatter(
-                                    x=df_team_shift['日付'],
-                                    y=df_team_shift['品質不良率 (%)'],
-                                    name=f'{team} (不良率)',
-                                    line=dict(color=team_colors.get(team, '#888888'), width=2, dash='dash'),
-                                    mode='lines+markers',
-                                    marker=dict(size=5),
-                                    legendgroup=f'{shift_name}_{team}',
-                                    showlegend=False,
-                                    hovertemplate=f'<b>{shift_name} - {team}</b><br>日付: %{{x}}<br>不良率: %{{y:.2f}}%<extra></extra>'
-                                ),
+                            fig3.add_hline(
+                                y=defect_mean,
+                                line=dict(color='red', dash='dot', width=2),
                                 row=row, col=1,
-                                secondary_y=True
+                                secondary_y=True,
+                                annotation_text=f"平均不良率: {defect_mean:.2f}%",
+                                annotation_position="left"
                             )
-                    
-                    # 平均線を追加（オプション）
-                    if show_avg_lines:
-                        skill_mean = df_shift[skill_col].mean()
-                        defect_mean = df_shift['品質不良率 (%)'].mean()
-                        
-                        fig3.add_hline(
-                            y=skill_mean,
-                            line=dict(color='blue', dash='dot', width=2),
-                            row=row, col=1,
-                            secondary_y=False,
-                            annotation_text=f"平均スキル: {skill_mean:.2f}",
-                            annotation_position="right"
-                        )
-                        
-                        fig3.add_hline(
-                            y=defect_mean,
-                            line=dict(color='red', dash='dot', width=2),
-                            row=row, col=1,
-                            secondary_y=True,
-                            annotation_text=f"平均不良率: {defect_mean:.2f}%",
-                            annotation_position="left"
-                        )
-            
-            # 軸設定
-            fig3.update_xaxes(title_text="日付", row=2, col=1)
-            fig3.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=1, col=1, secondary_y=False)
-            fig3.update_yaxes(title_text="不良率 (%)", row=1, col=1, secondary_y=True)
-            fig3.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=2, col=1, secondary_y=False)
-            fig3.update_yaxes(title_text="不良率 (%)", row=2, col=1, secondary_y=True)
-            
-            fig3.update_layout(
-                title=f"{selected_process} - シフト別比較（実線=スキル、破線=不良率、点線=平均値）",
-                hovermode='x unified',
-                height=800,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=-0.08,
-                    xanchor="center",
-                    x=0.5
+                
+                # 軸設定
+                fig3.update_xaxes(title_text="日付", row=2, col=1)
+                fig3.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=1, col=1, secondary_y=False)
+                fig3.update_yaxes(title_text="不良率 (%)", row=1, col=1, secondary_y=True)
+                fig3.update_yaxes(title_text=f"{selected_category}スキル", range=[1, 5], row=2, col=1, secondary_y=False)
+                fig3.update_yaxes(title_text="不良率 (%)", row=2, col=1, secondary_y=True)
+                
+                fig3.update_layout(
+                    title=f"{selected_process} - シフト別比較（実線=スキル、破線=不良率、点線=平均値）",
+                    hovermode='x unified',
+                    height=800,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom",
+                        y=-0.08,
+                        xanchor="center",
+                        x=0.5
+                    )
                 )
-            )
+                return fig3
             
-            st.plotly_chart(fig3, use_container_width=True)
+            with profile_section('integrated.fig3'):
+                fig3 = cached_figure(
+                    'integrated.fig3',
+                    data_version,
+                    {'拠点': target_location, '工程': selected_process, 'カテゴリ': selected_category, 'チーム': selected_teams, '平均線': show_avg_lines},
+                    build_fig3
+                )
+                
+                st.plotly_chart(fig3, use_container_width=True)
             
             # チーム別統計サマリー（簡潔版）
             st.markdown("#### 📊 チーム別統計サマリー")
             
+            # チーム×シフト別・チーム別の不良率信頼区間（ブートストラップ）
+            df_team_shift_ci, _ = compute_bootstrap_ci(
+                df_daily_prod, target_location, selected_process, '品質不良率 (%)', ('チーム', 'シフト')
+            )
+            df_team_shift_ci = df_team_shift_ci.set_index(['チーム', 'シフト'])
+            _, df_team_diff = compute_bootstrap_ci(
+                df_daily_prod, target_location, selected_process, '品質不良率 (%)', ('チーム',)
+            )
+            
             summary_data = []
             
             for team in selected_teams:
@@ -499,11 +524,13 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
                     df_team_shift = df_team[df_team['シフト'] == shift]
                     
                     if not df_team_shift.empty and skill_col in df_team_shift.columns:
+                        ci_row = df_team_shift_ci.loc[(team, shift)]
                         summary_data.append({
                             'チーム': team,
                             'シフト': shift,
                             '平均スキル': f"{df_team_shift[skill_col].mean():.2f}",
                             '平均不良率': f"{df_team_shift['品質不良率 (%)'].mean():.2f}%",
+                            '不良率 95%CI': f"[{ci_row['下限']:.2f}%, {ci_row['上限']:.2f}%]",
                             'データ数': len(df_team_shift)
                         })
             
@@ -512,6 +539,28 @@ def show_integrated_quality_analysis(df_daily_prod, df_skill, target_location, s
                 st.dataframe(df_summary_table, use_container_width=True, hide_index=True)
             else:
                 st.info("選択されたチームのデータがありません", icon="ℹ️")
+            
+            # チーム間の不良率差
+            df_team_diff = df_team_diff[
+                df_team_diff['比較'].apply(lambda label: all(team in selected_teams for team in label.split(' - ')))
+            ]
+            
+            if not df_team_diff.empty:
+                st.markdown("#### 📏 チーム間の不良率差（95%信頼区間）")
+                
+                df_team_diff_display = df_team_diff.copy()
+                df_team_diff_display['差'] = df_team_diff_display['差'].apply(lambda x: f"{x:+.2f}%")
+                df_team_diff_display['95%信頼区間'] = [
+                    f"[{lower:+.2f}%, {upper:+.2f}%]"
+                    for lower, upper in zip(df_team_diff['下限'], df_team_diff['上限'])
+                ]
+                df_team_diff_display['判定'] = df_team_diff['有意'].map({True: '🔴 有意差あり', False: '⚪ 有意差なし'})
+                
+                st.dataframe(
+                    df_team_diff_display[['比較', '差', '95%信頼区間', '判定']],
+                    use_container_width=True,
+                    hide_index=True
+                )
     
     # 次のステップ
     st.markdown("---")
@@ -2,7 +2,12 @@ import streamlit as st
 import pandas as pd
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
+from analytics.forecasting import get_kpi_forecasts, start_kpi_forecasts
+from analytics.kpi_rollup import cached_daily_rollup
+from analytics.spc import SPC_METRICS, cached_spc_monitor
+from utils.profiling import profiled, profile_section
 
+@profiled()
 def show_monitoring_dashboard(df_daily_prod, target_location):
     """施策実行後のモニタリング"""
     
@@ -13,8 +18,9 @@ def show_monitoring_dashboard(df_daily_prod, target_location):
     </div>
     """, unsafe_allow_html=True)
     
-    df_target_daily = df_daily_prod[df_daily_prod['拠点'] == target_location].copy()
-    df_target_daily = df_target_daily.groupby('日付').mean(numeric_only=True).reset_index()
+    with profile_section('monitoring.daily_rollup'):
+        # キャッシュは全セッション共有のため、列を追加する前にコピー
+        df_target_daily = cached_daily_rollup(df_daily_prod, target_location).copy()
     
     if df_target_daily.empty:
         st.warning(f"{target_location}の日次データが存在しません。", icon="⚠️")
@@ -102,6 +108,19 @@ def show_monitoring_dashboard(df_daily_prod, target_location):
     
     st.markdown("---")
     
+    view_mode = st.radio(
+        "表示モード",
+        options=['KPIトレンド', '管理図（SPC）'],
+        horizontal=True,
+        key='monitoring_view_mode'
+    )
+    
+    if view_mode == '管理図（SPC）':
+        show_control_charts(df_daily_prod, target_location)
+        st.markdown("---")
+        show_monitoring_actions()
+        return
+    
     # KPIトレンドグラフ
     st.markdown("""
     <div class="section-header">
@@ -117,114 +136,115 @@ def show_monitoring_dashboard(df_daily_prod, target_location):
         ((10 - df_target_daily['品質不良率 (%)']) / 7 * 30)
     ).clip(0, 100)
     
-    # 4つのサブプロット
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=(
-            '生産効率トレンド',
-            'スキルスコアトレンド',
-            '品質不良率トレンド',
-            '総合健全性スコア'
-        ),
-        specs=[[{"secondary_y": False}, {"secondary_y": False}],
-               [{"secondary_y": False}, {"secondary_y": False}]]
-    )
-    
-    # 1. 生産効率
-    fig.add_trace(
-        go.Scatter(
-            x=df_target_daily['日付'],
-            y=df_target_daily['生産効率 (%)'],
-            name='生産効率',
-            line=dict(color='#1976d2', width=2),
-            mode='lines+markers'
-        ),
-        row=1, col=1
-    )
-    fig.add_hline(
-        y=target_efficiency,
-        line_dash="dash",
-        line_color="green",
-        annotation_text="目標",
-        row=1, col=1
-    )
-    
-    # 2. スキルスコア
-    fig.add_trace(
-        go.Scatter(
-            x=df_target_daily['日付'],
-            y=df_target_daily['平均スキル予測値'],
-            name='スキルスコア',
-            line=dict(color='#f57c00', width=2),
-            mode='lines+markers'
-        ),
-        row=1, col=2
-    )
-    fig.add_hline(
-        y=target_skill,
-        line_dash="dash",
-        line_color="green",
-        annotation_text="目標",
-        row=1, col=2
-    )
-    
-    # 3. 品質不良率
-    fig.add_trace(
-        go.Scatter(
-            x=df_target_daily['日付'],
-            y=df_target_daily['品質不良率 (%)'],
-            name='品質不良率',
-            line=dict(color='#d32f2f', width=2),
-            mode='lines+markers'
-        ),
-        row=2, col=1
-    )
-    fig.add_hline(
-        y=target_defect,
-        line_dash="dash",
-        line_color="green",
-        annotation_text="目標",
-        row=2, col=1
-    )
-    
-    # 4. 健全性スコア
-    fig.add_trace(
-        go.Scatter(
-            x=df_target_daily['日付'],
-            y=df_target_daily['健全性スコア'],
-            name='健全性',
-            line=dict(color='#7b1fa2', width=2),
-            fill='tozeroy',
-            mode='lines+markers'
-        ),
-        row=2, col=2
-    )
-    fig.add_hline(
-        y=80,
-        line_dash="dash",
-        line_color="green",
-        annotation_text="健全ライン",
-        row=2, col=2
-    )
-    
-    # レイアウト設定
-    fig.update_xaxes(title_text="日付", row=1, col=1)
-    fig.update_xaxes(title_text="日付", row=1, col=2)
-    fig.update_xaxes(title_text="日付", row=2, col=1)
-    fig.update_xaxes(title_text="日付", row=2, col=2)
-    
-    fig.update_yaxes(title_text="効率 (%)", row=1, col=1)
-    fig.update_yaxes(title_text="スコア", row=1, col=2)
-    fig.update_yaxes(title_text="不良率 (%)", row=2, col=1)
-    fig.update_yaxes(title_text="スコア (0-100)", row=2, col=2)
-    
-    fig.update_layout(
-        height=700,
-        showlegend=False,
-        hovermode='x unified'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    with profile_section('monitoring.trend_chart'):
+        # 4つのサブプロット
+        fig = make_subplots(
+            rows=2, cols=2,
+            subplot_titles=(
+                '生産効率トレンド',
+                'スキルスコアトレンド',
+                '品質不良率トレンド',
+                '総合健全性スコア'
+            ),
+            specs=[[{"secondary_y": False}, {"secondary_y": False}],
+                   [{"secondary_y": False}, {"secondary_y": False}]]
+        )
+        
+        # 1. 生産効率
+        fig.add_trace(
+            go.Scatter(
+                x=df_target_daily['日付'],
+                y=df_target_daily['生産効率 (%)'],
+                name='生産効率',
+                line=dict(color='#1976d2', width=2),
+                mode='lines+markers'
+            ),
+            row=1, col=1
+        )
+        fig.add_hline(
+            y=target_efficiency,
+            line_dash="dash",
+            line_color="green",
+            annotation_text="目標",
+            row=1, col=1
+        )
+        
+        # 2. スキルスコア
+        fig.add_trace(
+            go.Scatter(
+                x=df_target_daily['日付'],
+                y=df_target_daily['平均スキル予測値'],
+                name='スキルスコア',
+                line=dict(color='#f57c00', width=2),
+                mode='lines+markers'
+            ),
+            row=1, col=2
+        )
+        fig.add_hline(
+            y=target_skill,
+            line_dash="dash",
+            line_color="green",
+            annotation_text="目標",
+            row=1, col=2
+        )
+        
+        # 3. 品質不良率
+        fig.add_trace(
+            go.Scatter(
+                x=df_target_daily['日付'],
+                y=df_target_daily['品質不良率 (%)'],
+                name='品質不良率',
+                line=dict(color='#d32f2f', width=2),
+                mode='lines+markers'
+            ),
+            row=2, col=1
+        )
+        fig.add_hline(
+            y=target_defect,
+            line_dash="dash",
+            line_color="green",
+            annotation_text="目標",
+            row=2, col=1
+        )
+        
+        # 4. 健全性スコア
+        fig.add_trace(
+            go.Scatter(
+                x=df_target_daily['日付'],
+                y=df_target_daily['健全性スコア'],
+                name='健全性',
+                line=dict(color='#7b1fa2', width=2),
+                fill='tozeroy',
+                mode='lines+markers'
+            ),
+            row=2, col=2
+        )
+        fig.add_hline(
+            y=80,
+            line_dash="dash",
+            line_color="green",
+            annotation_text="健全ライン",
+            row=2, col=2
+        )
+        
+        # レイアウト設定
+        fig.update_xaxes(title_text="日付", row=1, col=1)
+        fig.update_xaxes(title_text="日付", row=1, col=2)
+        fig.update_xaxes(title_text="日付", row=2, col=1)
+        fig.update_xaxes(title_text="日付", row=2, col=2)
+        
+        fig.update_yaxes(title_text="効率 (%)", row=1, col=1)
+        fig.update_yaxes(title_text="スコア", row=1, col=2)
+        fig.update_yaxes(title_text="不良率 (%)", row=2, col=1)
+        fig.update_yaxes(title_text="スコア (0-100)", row=2, col=2)
+        
+        fig.update_layout(
+            height=700,
+            showlegend=False,
+            hovermode='x unified'
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
     
     st.markdown("---")
     
@@ -308,6 +328,14 @@ def show_monitoring_dashboard(df_daily_prod, target_location):
     )
     
     st.markdown("---")
+    show_kpi_forecast(df_daily_prod, target_location)
+    
+    st.markdown("---")
+    show_monitoring_actions()
+
+
+def show_monitoring_actions():
+    """モニタリング画面下部の遷移ボタン"""
     
     # アクション推奨
     col_action1, col_action2, col_action3 = st.columns(3)
@@ -325,4 +353,192 @@ def show_monitoring_dashboard(df_daily_prod, target_location):
     with col_action3:
         if st.button("📁 生データを確認", use_container_width=True):
             st.session_state.selected_menu = "📁 生データ閲覧"
-            st.rerun()
\ No newline at end of file
+            st.rerun()
+
+def show_control_charts(df_daily_prod, target_location):
+    """拠点×工程×シフトごとの EWMA・CUSUM 管理図と、全ラインの一括アラート"""
+    
+    st.markdown("""
+    <div class="section-header">
+        <h2 class="section-title">📐 管理図（EWMA・CUSUM）</h2>
+        <p class="section-subtitle">基準期間の平均・標準偏差から管理限界を決め、品質不良率と歩留まりの小さな変化を早期に検出</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    with profile_section('monitoring.spc'):
+        monitor = cached_spc_monitor(df_daily_prod)
+    
+    # 全ラインの一括アラート（悪化方向の逸脱のみ）
+    df_alerts = monitor.alerts()
+    st.markdown(f"#### 🚨 全ラインのアラート（{pd.Timestamp(monitor.last_date):%Y-%m-%d} 時点）")
+    if df_alerts.empty:
+        st.success(f"全{len(monitor.lines)}ラインで、悪化方向の逸脱はありません", icon="✅")
+    else:
+        n_lines = len(df_alerts[monitor.line_columns].drop_duplicates())
+        st.error(f"{len(monitor.lines)}ライン中 {n_lines}ラインで悪化方向の逸脱を検出しました", icon="⚠️")
+        st.dataframe(
+            df_alerts.round({'基準平均': 2, 'EWMA': 2, '下限': 2, '上限': 2, 'CUSUM': 2, '逸脱度': 2}),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    df_lines = monitor.lines[monitor.lines['拠点'] == target_location]
+    if df_lines.empty:
+        st.info(f"{target_location} の管理図を作成できる日次データがありません")
+        return
+    
+    st.markdown(f"#### 📈 {target_location} のライン別管理図")
+    col_process, col_shift, col_metric = st.columns(3)
+    with col_process:
+        process = st.selectbox("工程", options=sorted(df_lines['工程'].unique()), key='spc_process')
+    with col_shift:
+        shift = st.selectbox(
+            "シフト",
+            options=sorted(df_lines.loc[df_lines['工程'] == process, 'シフト'].unique()),
+            key='spc_shift'
+        )
+    with col_metric:
+        metric = st.radio("指標", options=list(SPC_METRICS), horizontal=True, key='spc_metric')
+    
+    df_history = monitor.history()
+    df_line = df_history[
+        (df_history['拠点'] == target_location) & (df_history['工程'] == process) &
+        (df_history['シフト'] == shift) & (df_history['指標'] == metric)
+    ]
+    
+    with profile_section('monitoring.spc_chart'):
+        fig = make_subplots(
+            rows=2, cols=1,
+            shared_xaxes=True,
+            subplot_titles=(f'EWMA管理図（λ={monitor.ewma_lambda}, L={monitor.ewma_l}）',
+                            f'CUSUM管理図（k={monitor.cusum_k}, h={monitor.cusum_h}）'),
+            vertical_spacing=0.12
+        )
+        
+        fig.add_trace(go.Scatter(x=df_line['日付'], y=df_line['値'], name='日次値',
+                                 mode='markers', marker=dict(color='#90a4ae', size=6)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=df_line['日付'], y=df_line['EWMA'], name='EWMA',
+                                 mode='lines+markers', line=dict(color='#1976d2', width=2)), row=1, col=1)
+        for column in ['上限', '下限']:
+            fig.add_trace(go.Scatter(x=df_line['日付'], y=df_line[column], name=column,
+                                     mode='lines', line=dict(color='#d32f2f', dash='dash')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=df_line['日付'], y=df_line['基準平均'], name='基準平均',
+                                 mode='lines', line=dict(color='green', dash='dot')), row=1, col=1)
+        df_signal = df_line[df_line['EWMA逸脱'] != 0]
+        fig.add_trace(go.Scatter(x=df_signal['日付'], y=df_signal['EWMA'], name='EWMA逸脱',
+                                 mode='markers', marker=dict(color='#d32f2f', size=11, symbol='x')), row=1, col=1)
+        
+        fig.add_trace(go.Scatter(x=df_line['日付'], y=df_line['CUSUM+'], name='CUSUM+（上方）',
+                                 mode='lines+markers', line=dict(color='#f57c00', width=2)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=df_line['日付'], y=df_line['CUSUM-'], name='CUSUM-（下方）',
+                                 mode='lines+markers', line=dict(color='#7b1fa2', width=2)), row=2, col=1)
+        fig.add_hline(y=monitor.cusum_h, line_dash="dash", line_color="#d32f2f",
+                      annotation_text="判定値 h", row=2, col=1)
+        
+        fig.update_yaxes(title_text=metric, row=1, col=1)
+        fig.update_yaxes(title_text='累積和（σ単位）', row=2, col=1)
+        fig.update_layout(height=600, hovermode='x unified', template='plotly_white')
+    
+    st.plotly_chart(fig, use_container_width=True)
+    
+    direction = '上昇' if SPC_METRICS[metric] > 0 else '低下'
+    st.caption(
+        f"{metric} は{direction}が悪化です。管理限界は先頭{monitor.baseline_days}日間（基準期間）の平均 ± L×σ で、"
+        "日次データが届くたびに各ラインの EWMA・CUSUM を1日分だけ逐次更新しています。"
+    )
+
+
+def show_kpi_forecast(df_daily_prod, target_location):
+    """拠点×工程×シフトごとの KPI 予測と予測区間（当てはめはバックグラウンドで実行済みの結果を表示）"""
+    
+    st.markdown("""
+    <div class="section-header">
+        <h2 class="section-title">🔮 KPI予測</h2>
+        <p class="section-subtitle">指数平滑法（減衰トレンド）による今後の見通しと95%予測区間</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    forecasts, status, error = get_kpi_forecasts(df_daily_prod)
+    if status == 'running':
+        st.info("⏳ 全拠点×工程×シフトの予測モデルをバックグラウンドで学習しています。完了後に再読み込みしてください。")
+        st.button("🔄 再読み込み", key='forecast_refresh')
+        return
+    if status == 'failed':
+        st.error(f"予測モデルの学習に失敗しました: {error}", icon="⚠️")
+        if st.button("🔁 再試行", key='forecast_retry'):
+            start_kpi_forecasts(df_daily_prod, retry=True)
+            st.rerun()
+        return
+    
+    df_series = forecasts['series']
+    location_rows = df_series.index[df_series['拠点'] == target_location].to_numpy()
+    if len(location_rows) == 0:
+        st.info(f"{target_location} の予測対象の系列がありません")
+        return
+    
+    df_location = df_series.loc[location_rows]
+    col_process, col_shift, col_metric = st.columns(3)
+    with col_process:
+        process = st.selectbox("工程", options=sorted(df_location['工程'].unique()), key='forecast_process')
+    with col_shift:
+        shift = st.selectbox(
+            "シフト",
+            options=sorted(df_location.loc[df_location['工程'] == process, 'シフト'].unique()),
+            key='forecast_shift'
+        )
+    with col_metric:
+        metric = st.selectbox("指標", options=forecasts['metrics'], key='forecast_metric')
+    
+    row = df_series.index[
+        (df_series['拠点'] == target_location) & (df_series['工程'] == process) & (df_series['シフト'] == shift)
+    ][0]
+    m = forecasts['metrics'].index(metric)
+    forecast_dates = forecasts['forecast_dates']
+    
+    with profile_section('monitoring.forecast_chart'):
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=forecasts['dates'], y=forecasts['history'][row, m], name='実績',
+            mode='lines+markers', line=dict(color='#1976d2', width=2)
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast_dates, y=forecasts['upper'][row, m], name='予測区間（上限）',
+            mode='lines', line=dict(width=0), showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast_dates, y=forecasts['lower'][row, m], name='95%予測区間',
+            mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(245, 124, 0, 0.2)'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast_dates, y=forecasts['forecast'][row, m], name='予測',
+            mode='lines', line=dict(color='#f57c00', width=2, dash='dash')
+        ))
+        fig.update_layout(
+            title=f'{process} - {shift}: {metric}',
+            xaxis_title='日付',
+            yaxis_title=metric,
+            height=400,
+            hovermode='x unified',
+            template='plotly_white'
+        )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    df_models = forecasts['models']
+    model = df_models[
+        (df_models['拠点'] == target_location) & (df_models['工程'] == process) &
+        (df_models['シフト'] == shift) & (df_models['指標'] == metric)
+    ].iloc[0]
+    st.caption(
+        f"モデル: {model['手法']}（α={model['α']:.2f}, β={model['β']:.2f}, φ={model['φ']:.2f}, 残差σ={model['残差σ']:.2f}）"
+    )
+    
+    # 拠点内の全系列の見通し（直近7日の実績平均と予測期間の平均の比較）
+    history = forecasts['history'][location_rows]
+    forecast = forecasts['forecast'][location_rows]
+    df_outlook = df_series.loc[location_rows, ['工程', 'シフト']].reset_index(drop=True)
+    for k, name in enumerate(forecasts['metrics']):
+        recent = history[:, k, -7:].mean(axis=1)
+        df_outlook[f'{name} 直近7日'] = recent
+        df_outlook[f'{name} 予測平均'] = forecast[:, k].mean(axis=1)
+    with st.expander(f"📋 {target_location} の全ラインの見通し（今後{len(forecast_dates)}日）"):
+        st.dataframe(df_outlook.round(2), use_container_width=True, hide_index=True)
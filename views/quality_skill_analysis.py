@@ -2,7 +2,14 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from analytics.correlation import get_slice_correlation, correlation_strength, get_skill_metric_columns
+from analytics.lagged_correlation import compute_lag_profiles, compute_rolling_correlations
+from analytics.regression import compute_regression_batch, fit_group_detail
+from utils.figure_cache import cached_figure
+from utils.versioned_cache import dataset_version
+from utils.profiling import profiled, profile_section
 
+@profiled()
 def show_quality_skill_analysis(df_daily_prod, df_skill, target_location, skill_categories, skill_hierarchy, processes):
     """品質×力量の時系列分析"""
     
@@ -69,6 +76,9 @@ def show_quality_skill_analysis(df_daily_prod, df_skill, target_location, skill_
             index=0
         )
     
+    # フィギュアキャッシュのキー用データバージョン
+    data_version = dataset_version(df_daily_prod)
+    
     # 選択した工程のデータ
     df_process = df_filtered[df_filtered['工程'] == selected_process].copy()
     
@@ -87,81 +97,92 @@ def show_quality_skill_analysis(df_daily_prod, df_skill, target_location, skill_
     # チーム別の時系列グラフ
     teams = df_process['チーム'].unique()
     
-    fig = make_subplots(
-        rows=len(teams), cols=1,
-        subplot_titles=[f'{team} の推移' for team in sorted(teams)],
-        specs=[[{"secondary_y": True}] for _ in teams],
-        vertical_spacing=0.08
-    )
-    
     colors_yield = {'Aチーム': '#1f77b4', 'Bチーム': '#ff7f0e', 'Cチーム': '#2ca02c'}
     colors_skill = {'Aチーム': '#9467bd', 'Bチーム': '#8c564b', 'Cチーム': '#e377c2'}
     
-    for i, team in enumerate(sorted(teams), 1):
-        df_team = df_process[df_process['チーム'] == team].copy()
-        
-        # 歩留まり
-        fig.add_trace(
-            go.Scatter(
-                x=df_team['日付'],
-                y=df_team['歩留まり (%)'],
-                name=f'{team} 歩留まり',
-                line=dict(color=colors_yield.get(team, '#1f77b4'), width=2),
-                mode='lines+markers',
-                legendgroup=team,
-                showlegend=(i == 1)
-            ),
-            row=i, col=1,
-            secondary_y=False
+    def build_timeseries():
+        fig = make_subplots(
+            rows=len(teams), cols=1,
+            subplot_titles=[f'{team} の推移' for team in sorted(teams)],
+            specs=[[{"secondary_y": True}] for _ in teams],
+            vertical_spacing=0.08
         )
         
-        # スキルカテゴリ平均
-        skill_col = f'{selected_category}_平均'
-        if skill_col in df_team.columns:
+        for i, team in enumerate(sorted(teams), 1):
+            df_team = df_process[df_process['チーム'] == team].copy()
+            
+            # 歩留まり
             fig.add_trace(
                 go.Scatter(
                     x=df_team['日付'],
-                    y=df_team[skill_col],
-                    name=f'{team} {selected_category}',
-                    line=dict(color=colors_skill.get(team, '#9467bd'), width=2, dash='dash'),
+                    y=df_team['歩留まり (%)'],
+                    name=f'{team} 歩留まり',
+                    line=dict(color=colors_yield.get(team, '#1f77b4'), width=2),
                     mode='lines+markers',
                     legendgroup=team,
                     showlegend=(i == 1)
                 ),
                 row=i, col=1,
-                secondary_y=True
+                secondary_y=False
             )
-        
-        # シフト情報を背景色で表示
-        for idx, row in df_team.iterrows():
-            if row['シフト'] == '夜勤':
-                fig.add_vrect(
-                    x0=row['日付'], x1=row['日付'] + pd.Timedelta(days=1),
-                    fillcolor="LightGray", opacity=0.2,
-                    layer="below", line_width=0,
-                    row=i, col=1
+            
+            # スキルカテゴリ平均
+            skill_col = f'{selected_category}_平均'
+            if skill_col in df_team.columns:
+                fig.add_trace(
+                    go.Scatter(
+                        x=df_team['日付'],
+                        y=df_team[skill_col],
+                        name=f'{team} {selected_category}',
+                        line=dict(color=colors_skill.get(team, '#9467bd'), width=2, dash='dash'),
+                        mode='lines+markers',
+                        legendgroup=team,
+                        showlegend=(i == 1)
+                    ),
+                    row=i, col=1,
+                    secondary_y=True
                 )
+            
+            # シフト情報を背景色で表示
+            for idx, row in df_team.iterrows():
+                if row['シフト'] == '夜勤':
+                    fig.add_vrect(
+                        x0=row['日付'], x1=row['日付'] + pd.Timedelta(days=1),
+                        fillcolor="LightGray", opacity=0.2,
+                        layer="below", line_width=0,
+                        row=i, col=1
+                    )
+            
+            # Y軸設定
+            fig.update_yaxes(title_text="歩留まり (%)", range=[90, 100], row=i, col=1, secondary_y=False)
+            fig.update_yaxes(title_text=f"{selected_category} (スコア)", range=[1, 5], row=i, col=1, secondary_y=True)
         
-        # Y軸設定
-        fig.update_yaxes(title_text="歩留まり (%)", range=[90, 100], row=i, col=1, secondary_y=False)
-        fig.update_yaxes(title_text=f"{selected_category} (スコア)", range=[1, 5], row=i, col=1, secondary_y=True)
-    
-    fig.update_xaxes(title_text="日付")
-    
-    fig.update_layout(
-        height=300 * len(teams),
-        hovermode='x unified',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        title_text=f"{selected_process} - チーム別 歩留まり×{selected_category}スキル 推移<br><sub>背景グレー: 夜勤シフト</sub>"
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+        fig.update_xaxes(title_text="日付")
+        
+        fig.update_layout(
+            height=300 * len(teams),
+            hovermode='x unified',
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1
+            ),
+            title_text=f"{selected_process} - チーム別 歩留まり×{selected_category}スキル 推移<br><sub>背景グレー: 夜勤シフト</sub>"
+        )
+        return fig
+    
+    with profile_section('quality.timeseries'):
+        # 入力が同じなら構築済みフィギュアを再利用（全セッション共有）
+        fig = cached_figure(
+            'quality.timeseries',
+            data_version,
+            {'拠点': target_location, '工程': selected_process, 'カテゴリ': selected_category},
+            build_timeseries
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
     
     st.markdown("---")
     
@@ -175,78 +196,100 @@ def show_quality_skill_analysis(df_daily_prod, df_skill, target_location, skill_
         skill_col = f'{selected_category}_平均'
         
         if skill_col in df_process.columns:
-            fig_scatter = go.Figure()
-            
-            for team in sorted(teams):
-                df_team = df_process[df_process['チーム'] == team]
-                
-                # 日付をフォーマット（datetime型に変換済みであることを確認）
-                if pd.api.types.is_datetime64_any_dtype(df_team['日付']):
-                    date_text = df_team['日付'].dt.strftime('%Y-%m-%d')
-                else:
-                    date_text = df_team['日付'].astype(str)
-                
-                fig_scatter.add_trace(go.Scatter(
-                    x=df_team[skill_col],
-                    y=df_team['歩留まり (%)'],
-                    mode='markers',
-                    name=team,
-                    marker=dict(size=8, color=colors_yield.get(team, '#1f77b4')),
-                    text=date_text,
-                    hovertemplate='<b>%{text}</b><br>スキル: %{x:.2f}<br>歩留まり: %{y:.1f}%<extra></extra>'
-                ))
-            
-            # トレンドライン
+            # scipy の有無はキャッシュの外で確認（キャッシュ済みのフィギュアを使う再実行でも警告を表示する）
             try:
                 from scipy import stats
-                x_data = df_process[skill_col].dropna()
-                y_data = df_process.loc[x_data.index, '歩留まり (%)']
+            except ImportError:
+                stats = None
+                st.warning("scipyがインストールされていないため、トレンドラインを表示できません。", icon="⚠️")
+            
+            def build_scatter():
+                fig_scatter = go.Figure()
                 
-                if len(x_data) > 2:
-                    slope, intercept, r_value, p_value, std_err = stats.linregress(x_data, y_data)
-                    line_x = [x_data.min(), x_data.max()]
-                    line_y = [slope * x + intercept for x in line_x]
+                for team in sorted(teams):
+                    df_team = df_process[df_process['チーム'] == team]
+                    
+                    # 日付をフォーマット（datetime型に変換済みであることを確認）
+                    if pd.api.types.is_datetime64_any_dtype(df_team['日付']):
+                        date_text = df_team['日付'].dt.strftime('%Y-%m-%d')
+                    else:
+                        date_text = df_team['日付'].astype(str)
                     
                     fig_scatter.add_trace(go.Scatter(
-                        x=line_x,
-                        y=line_y,
-                        mode='lines',
-                        name=f'トレンド (R²={r_value**2:.3f})',
-                        line=dict(color='red', dash='dash', width=2)
+                        x=df_team[skill_col],
+                        y=df_team['歩留まり (%)'],
+                        mode='markers',
+                        name=team,
+                        marker=dict(size=8, color=colors_yield.get(team, '#1f77b4')),
+                        text=date_text,
+                        hovertemplate='<b>%{text}</b><br>スキル: %{x:.2f}<br>歩留まり: %{y:.1f}%<extra></extra>'
                     ))
-            except ImportError:
-                st.warning("scipyがインストールされていないため、トレンドラインを表示できません。", icon="⚠️")
-            
-            fig_scatter.update_layout(
-                title=f'歩留まり vs {selected_category}スキル',
-                xaxis_title=f'{selected_category}スキル 平均',
-                yaxis_title='歩留まり (%)',
-                height=400
-            )
+                
+                # トレンドライン
+                if stats is not None:
+                    x_data = df_process[skill_col].dropna()
+                    y_data = df_process.loc[x_data.index, '歩留まり (%)']
+                    
+                    if len(x_data) > 2:
+                        slope, intercept, r_value, p_value, std_err = stats.linregress(x_data, y_data)
+                        line_x = [x_data.min(), x_data.max()]
+                        line_y = [slope * x + intercept for x in line_x]
+                        
+                        fig_scatter.add_trace(go.Scatter(
+                            x=line_x,
+                            y=line_y,
+                            mode='lines',
+                            name=f'トレンド (R²={r_value**2:.3f})',
+                            line=dict(color='red', dash='dash', width=2)
+                        ))
+                
+                fig_scatter.update_layout(
+                    title=f'歩留まり vs {selected_category}スキル',
+                    xaxis_title=f'{selected_category}スキル 平均',
+                    yaxis_title='歩留まり (%)',
+                    height=400
+                )
+                return fig_scatter
             
-            st.plotly_chart(fig_scatter, use_container_width=True)
+            with profile_section('quality.scatter'):
+                fig_scatter = cached_figure(
+                    'quality.scatter',
+                    data_version,
+                    {'拠点': target_location, '工程': selected_process, 'カテゴリ': selected_category,
+                     'トレンドライン': stats is not None},
+                    build_scatter
+                )
+                
+                st.plotly_chart(fig_scatter, use_container_width=True)
     
     with col_corr2:
         # 相関係数マトリックス
         st.markdown("#### 相関係数")
         
-        corr_data = []
-        for cat in skill_categories:
-            skill_col = f'{cat}_平均'
-            if skill_col in df_process.columns:
-                corr = df_process[[skill_col, '歩留まり (%)']].corr().iloc[0, 1]
-                corr_data.append({
-                    'スキルカテゴリ': cat,
-                    '歩留まりとの相関': f"{corr:.3f}",
-                    '相関強度': '強' if abs(corr) > 0.7 else ('中' if abs(corr) > 0.4 else '弱')
-                })
-        
-        df_corr = pd.DataFrame(corr_data)
-        st.dataframe(df_corr, use_container_width=True, hide_index=True)
+        with profile_section('quality.correlation_table'):
+            # 拠点×工程スライスの相関を一括計算結果から取得
+            df_slice_corr = get_slice_correlation(df_daily_prod, target_location, selected_process)
+            df_slice_corr = df_slice_corr[df_slice_corr['KPI'] == '歩留まり (%)'].set_index('スキル指標')
+            
+            corr_data = []
+            for cat in skill_categories:
+                cat_col = f'{cat}_平均'
+                if cat_col in df_slice_corr.index:
+                    corr = df_slice_corr.loc[cat_col, '相関係数']
+                    corr_data.append({
+                        'スキルカテゴリ': cat,
+                        '歩留まりとの相関': f"{corr:.3f}",
+                        'p値': f"{df_slice_corr.loc[cat_col, 'p値']:.3f}",
+                        'サンプル数': int(df_slice_corr.loc[cat_col, 'サンプル数']),
+                        '相関強度': correlation_strength(corr)
+                    })
+            
+            df_corr = pd.DataFrame(corr_data)
+            st.dataframe(df_corr, use_container_width=True, hide_index=True)
         
         # インサイト
-        if skill_col in df_process.columns:
-            corr = df_process[[skill_col, '歩留まり (%)']].corr().iloc[0, 1]
+        if skill_col in df_slice_corr.index:
+            corr = df_slice_corr.loc[skill_col, '相関係数']
             
             if corr > 0.5:
                 st.success(
@@ -272,6 +315,54 @@ def show_quality_skill_analysis(df_daily_prod, df_skill, target_location, skill_
     
     st.markdown("---")
     
+    # 多変量回帰分析
+    st.markdown("### 🧮 多変量回帰分析: 全スキルカテゴリ + シフト")
+    
+    regression_target = st.radio(
+        '目的変数',
+        options=['品質不良率 (%)', '歩留まり (%)'],
+        horizontal=True,
+        key='quality_regression_target'
+    )
+    
+    with profile_section('quality.regression'):
+        # 全拠点×工程の回帰を一括推定した結果から抽出（キャッシュ済み）
+        df_coef, df_fit = compute_regression_batch(df_daily_prod)
+        
+        df_coef_group = df_coef[
+            (df_coef['拠点'] == target_location) &
+            (df_coef['工程'] == selected_process) &
+            (df_coef['目的変数'] == regression_target)
+        ]
+        df_fit_location = df_fit[(df_fit['拠点'] == target_location) & (df_fit['目的変数'] == regression_target)]
+        
+        col_reg1, col_reg2 = st.columns([2, 1])
+        
+        with col_reg1:
+            st.markdown(f"#### 回帰係数: {selected_process}")
+            df_coef_display = df_coef_group[['説明変数', '係数', '標準誤差', 't値', 'p値']].copy()
+            df_coef_display['有意'] = df_coef_display['p値'].apply(lambda p: '✅' if p < 0.05 else '')
+            for col in ['係数', '標準誤差', 't値']:
+                df_coef_display[col] = df_coef_display[col].apply(lambda x: f"{x:.3f}")
+            df_coef_display['p値'] = df_coef_display['p値'].apply(lambda x: f"{x:.4f}")
+            st.dataframe(df_coef_display, use_container_width=True, hide_index=True)
+        
+        with col_reg2:
+            st.markdown("#### 工程別の説明力")
+            df_fit_display = df_fit_location[['工程', 'R²', '調整済みR²', 'サンプル数']].copy()
+            df_fit_display['R²'] = df_fit_display['R²'].apply(lambda x: f"{x:.3f}")
+            df_fit_display['調整済みR²'] = df_fit_display['調整済みR²'].apply(lambda x: f"{x:.3f}")
+            st.dataframe(df_fit_display, use_container_width=True, hide_index=True)
+    
+    with st.expander(f"🔎 {selected_process} の詳細回帰結果（statsmodels）"):
+        try:
+            detail = fit_group_detail(df_daily_prod, target_location, selected_process, regression_target)
+            st.text(detail.summary().as_text())
+        except ImportError:
+            st.warning("statsmodelsがインストールされていないため、詳細結果を表示できません。", icon="⚠️")
+    
+    st.markdown("---")
+    
     # シフトパターン分析
     st.markdown("### 🔄 シフトパターン分析")
     
@@ -299,6 +390,125 @@ def show_quality_skill_analysis(df_daily_prod, df_skill, target_location, skill_
         
         st.dataframe(team_summary, use_container_width=True, hide_index=True)
     
+    st.markdown("---")
+    
+    # ラグ相関・ローリング相関分析
+    st.markdown("### ⏱️ 時間差分析: スキル変化が品質に現れるまでの遅れ")
+    
+    col_lag1, col_lag2, col_lag3, col_lag4 = st.columns(4)
+    
+    with col_lag1:
+        analysis_mode = st.radio(
+            '分析モード',
+            options=['ラグ相関', 'ローリング相関'],
+            horizontal=True,
+            key='quality_lag_mode'
+        )
+    
+    with col_lag2:
+        lag_skill_col = st.selectbox(
+            'スキル指標',
+            options=get_skill_metric_columns(df_process),
+            key='quality_lag_skill'
+        )
+    
+    with col_lag3:
+        lag_kpi_col = st.selectbox(
+            '品質KPI',
+            options=['品質不良率 (%)', '歩留まり (%)', '生産効率 (%)'],
+            key='quality_lag_kpi'
+        )
+    
+    with col_lag4:
+        lag_group = st.selectbox(
+            '系列の単位',
+            options=['チーム', 'シフト'],
+            key='quality_lag_group'
+        )
+    
+    series_keys = ('拠点', '工程', lag_group)
+    
+    # 系列の単位に含めない軸（チーム別ならシフト）は同じ日の行を平均する
+    other_group = 'シフト' if lag_group == 'チーム' else 'チーム'
+    series_note = f"系列は拠点×工程×{lag_group}の日次値で、同じ日に{other_group}の異なる行がある場合は平均しています。"
+    if lag_group == 'チーム':
+        series_note += "チームが日勤・夜勤を交替する場合、チーム別の系列には両方のシフトの日が混在します。"
+    st.caption(series_note)
+    
+    with profile_section('quality.lag_analysis'):
+        if analysis_mode == 'ラグ相関':
+            max_lag = st.slider('最大ラグ (日)', min_value=1, max_value=14, value=14, key='quality_max_lag')
+            
+            # 全拠点×工程×系列のラグプロファイルを一括計算（キャッシュ済み）
+            df_lag = compute_lag_profiles(df_daily_prod, lag_skill_col, lag_kpi_col, max_lag=max_lag, by=series_keys)
+            df_lag = df_lag[(df_lag['拠点'] == target_location) & (df_lag['工程'] == selected_process)]
+            
+            fig_lag = go.Figure()
+            
+            for series_name in sorted(df_lag[lag_group].unique()):
+                df_series = df_lag[df_lag[lag_group] == series_name]
+                fig_lag.add_trace(go.Scatter(
+                    x=df_series['ラグ (日)'],
+                    y=df_series['相関係数'],
+                    name=series_name,
+                    mode='lines+markers',
+                    line=dict(color=colors_yield.get(series_name), width=2),
+                    customdata=df_series['サンプル数'],
+                    hovertemplate='ラグ: %{x}日<br>相関: %{y:.3f}<br>サンプル数: %{customdata}<extra></extra>'
+                ))
+            
+            fig_lag.add_hline(y=0, line=dict(color='gray', width=1))
+            fig_lag.update_layout(
+                title=f'{lag_skill_col} → {lag_kpi_col} のラグ相関（ラグ=スキルが先行する日数）',
+                xaxis=dict(title='ラグ (日)', dtick=1),
+                yaxis=dict(title='相関係数', range=[-1, 1]),
+                height=400
+            )
+            
+            st.plotly_chart(fig_lag, use_container_width=True)
+            
+            # 系列ごとに相関の絶対値が最大となるラグ
+            df_peak = df_lag.dropna(subset=['相関係数'])
+            if not df_peak.empty:
+                df_peak = df_peak.loc[df_peak['相関係数'].abs().groupby(df_peak[lag_group]).idxmax()]
+                df_peak_display = df_peak[[lag_group, 'ラグ (日)', '相関係数', 'サンプル数']].copy()
+                df_peak_display['相関係数'] = df_peak_display['相関係数'].apply(lambda x: f"{x:.3f}")
+                st.markdown("#### 相関が最も強いラグ")
+                st.dataframe(df_peak_display, use_container_width=True, hide_index=True)
+        
+        else:
+            window = st.slider('ウィンドウ幅 (日)', min_value=3, max_value=21, value=7, key='quality_rolling_window')
+            
+            df_rolling = compute_rolling_correlations(df_daily_prod, lag_skill_col, lag_kpi_col, window=window, by=series_keys)
+            df_rolling = df_rolling[(df_rolling['拠点'] == target_location) & (df_rolling['工程'] == selected_process)]
+            
+            if df_rolling.empty:
+                st.info("ウィンドウ内のデータ数が不足しています。ウィンドウ幅を広げてください。", icon="ℹ️")
+            else:
+                fig_rolling = go.Figure()
+                
+                for series_name in sorted(df_rolling[lag_group].unique()):
+                    df_series = df_rolling[df_rolling[lag_group] == series_name]
+                    fig_rolling.add_trace(go.Scatter(
+                        x=df_series['日付'],
+                        y=df_series['相関係数'],
+                        name=series_name,
+                        mode='lines+markers',
+                        line=dict(color=colors_yield.get(series_name), width=2),
+                        customdata=df_series['サンプル数'],
+                        hovertemplate='%{x|%Y-%m-%d}<br>相関: %{y:.3f}<br>サンプル数: %{customdata}<extra></extra>'
+                    ))
+                
+                fig_rolling.add_hline(y=0, line=dict(color='gray', width=1))
+                fig_rolling.update_layout(
+                    title=f'{lag_skill_col} × {lag_kpi_col} の{window}日ローリング相関',
+                    xaxis_title='日付（ウィンドウ終端）',
+                    yaxis=dict(title='相関係数', range=[-1, 1]),
+                    height=400
+                )
+                
+                st.plotly_chart(fig_rolling, use_container_width=True)
+    
     # 次のステップ
     st.markdown("---")
     
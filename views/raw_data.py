@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
+from utils.data_filters import filter_by_values
+from utils.profiling import profiled, profile_section
 
+@profiled()
 def show_raw_data(df_skill, df_daily_prod):
     """元データの閲覧とダウンロード"""
     
@@ -52,12 +55,13 @@ def show_raw_data(df_skill, df_daily_prod):
                 default=df_skill['シフト'].unique().tolist()
             )
         
-        # フィルタリング適用
-        df_filtered = df_skill[
-            df_skill['拠点'].isin(selected_locations) &
-            df_skill['組織・チーム'].isin(selected_teams) &
-            df_skill['シフト'].isin(selected_shifts)
-        ].copy()
+        with profile_section('raw_data.filter_skill'):
+            # フィルタリング適用
+            df_filtered = filter_by_values(df_skill, {
+                '拠点': selected_locations,
+                '組織・チーム': selected_teams,
+                'シフト': selected_shifts
+            })
         
         # データサマリー
         col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
@@ -143,11 +147,12 @@ def show_raw_data(df_skill, df_daily_prod):
                 key="daily_shift_filter"
             )
         
-        # フィルタリング適用
-        df_daily_filtered = df_daily_prod[
-            df_daily_prod['拠点'].isin(selected_locations_daily) &
-            df_daily_prod['シフト'].isin(selected_shifts_daily)
-        ].copy()
+        with profile_section('raw_data.filter_daily'):
+            # フィルタリング適用
+            df_daily_filtered = filter_by_values(df_daily_prod, {
+                '拠点': selected_locations_daily,
+                'シフト': selected_shifts_daily
+            })
         
         # データサマリー
         col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
@@ -4,8 +4,115 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from analytics.skill_gap import (
+    compute_gap_heatmap, compute_bottleneck_table, cached_gap_tensor, gap_from_tensor, rank_location_gaps,
+    significance_tensor_mask, GAP_ALERT_THRESHOLD
+)
+from analytics.location_loss import BENCHMARK_LOCATION
+from analytics.significance import attach_significance, cached_gap_significance, FDR_ALPHA
+from utils.profiling import profiled, profile_section
 
-def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_category, skill_categories, skill_hierarchy, processes):
+# 全拠点比較のヒートマップで並べる拠点数の上限（ギャップの大きい順）
+MAX_COMPARISON_PANELS = 12
+COMPARISON_PANEL_COLUMNS = 4
+
+def show_location_comparison(skill_matrix, processes, skill_categories, mask_insignificant=False):
+    """全拠点のギャップをスモールマルチプルのヒートマップまたはランキング表で比較"""
+    st.markdown("---")
+    st.markdown("### 🌐 全拠点比較")
+    
+    if not st.checkbox('全拠点比較モード（ベンチマークを選んで全拠点のギャップを並べて表示）', key='root_cause_compare_all'):
+        return
+    
+    with profile_section('root_cause.location_comparison'):
+        tensor = cached_gap_tensor(skill_matrix, tuple(processes), tuple(skill_categories))
+        locations = tensor['locations']
+        
+        col_bench, col_mode = st.columns(2)
+        
+        with col_bench:
+            benchmark_location = st.selectbox(
+                'ベンチマーク拠点',
+                options=locations,
+                index=locations.index('日本 (JP)') if '日本 (JP)' in locations else 0,
+                key='root_cause_benchmark'
+            )
+        
+        with col_mode:
+            comparison_mode = st.radio(
+                '表示形式',
+                options=['ヒートマップ', 'ランキング'],
+                horizontal=True,
+                key='root_cause_compare_mode'
+            )
+        
+        significant = None
+        if mask_insignificant:
+            df_significance = cached_gap_significance(skill_matrix, benchmark_location)
+            significant = significance_tensor_mask(tensor, df_significance)
+        
+        df_rank = rank_location_gaps(tensor, benchmark_location, significant=significant)
+        if df_rank.empty:
+            st.warning("比較できる拠点がありません")
+            return
+        
+        if comparison_mode == 'ヒートマップ':
+            gap = gap_from_tensor(tensor, benchmark_location)
+            if significant is not None:
+                gap = np.where(significant, gap, np.nan)
+            panel_locations = df_rank['拠点'].head(MAX_COMPARISON_PANELS).tolist()
+            panel_gaps = gap[[locations.index(loc) for loc in panel_locations]]
+            
+            n_cols = min(COMPARISON_PANEL_COLUMNS, len(panel_locations))
+            n_rows = -(-len(panel_locations) // n_cols)
+            fig_compare = make_subplots(
+                rows=n_rows, cols=n_cols,
+                subplot_titles=panel_locations,
+                shared_yaxes=True,
+                horizontal_spacing=0.03,
+                vertical_spacing=0.12
+            )
+            
+            for k, panel_gap in enumerate(panel_gaps):
+                fig_compare.add_trace(
+                    go.Heatmap(
+                        z=panel_gap,
+                        x=tensor['categories'],
+                        y=tensor['processes'],
+                        coloraxis='coloraxis',  # 全パネルで色の範囲を共通にする
+                        text=np.round(panel_gap, 2),
+                        texttemplate='%{text}',
+                        textfont={"size": 10}
+                    ),
+                    row=k // n_cols + 1, col=k % n_cols + 1
+                )
+            
+            fig_compare.update_layout(
+                title=f'スキルギャップ（{benchmark_location} - 各拠点、平均ギャップの大きい順）',
+                coloraxis=dict(
+                    colorscale='RdYlGn_r',
+                    cmin=float(np.nanmin(panel_gaps)) if not np.isnan(panel_gaps).all() else 0.0,
+                    cmax=float(np.nanmax(panel_gaps)) if not np.isnan(panel_gaps).all() else 1.0,
+                    colorbar=dict(title="ギャップ")
+                ),
+                height=320 * n_rows
+            )
+            
+            st.plotly_chart(fig_compare, use_container_width=True)
+            
+            if len(df_rank) > MAX_COMPARISON_PANELS:
+                st.caption(f"平均ギャップ上位{MAX_COMPARISON_PANELS}拠点を表示（全{len(df_rank)}拠点はランキングで確認できます）")
+        else:
+            df_rank_display = df_rank.copy()
+            for col in ['平均ギャップ', '最大ギャップ']:
+                df_rank_display[col] = df_rank_display[col].apply(lambda x: f"{x:.2f}")
+            
+            st.dataframe(df_rank_display, use_container_width=True, hide_index=True)
+            alert_note = "（有意なセルのみ）" if mask_insignificant else ""
+            st.caption(f"平均ギャップは工程×カテゴリのギャップを人数で加重平均した値、要改善セルはギャップが{GAP_ALERT_THRESHOLD}を超える工程×カテゴリの数{alert_note}")
+
+@profiled()
+def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_category, skill_categories, skill_hierarchy, processes, skill_matrix):
     """特定拠点の根本原因分析"""
     
     st.markdown(f"""
@@ -64,85 +171,60 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
     </div>
     """, unsafe_allow_html=True)
     
-    # 工程×スキルカテゴリのヒートマップデータを作成
-    heatmap_data = []
+    mask_insignificant = st.checkbox(
+        f'有意なギャップのみ表示（Welch t検定、Benjamini-Hochberg補正 q < {FDR_ALPHA}）',
+        key='root_cause_mask_insignificant',
+        help='人数が少なく差が偶然の範囲にあるセルを非表示にします（ヒートマップ・全拠点比較・ボトルネック表に適用）'
+    )
     
-    for process in processes:
-        for category in skill_categories:
-            # 対象拠点のデータ
-            target_process_data = df_target[df_target['工程'] == process]
-            
-            # データ存在チェック
-            if len(target_process_data) == 0:
-                continue
-            
-            category_skills = skill_hierarchy[category]['skills']
-            
-            # スキルカラムの存在チェック
-            existing_skills = [s for s in category_skills if s in target_process_data.columns]
-            if not existing_skills:
-                continue
-            
-            target_mean = target_process_data[existing_skills].mean().mean()
-            target_std = target_process_data[existing_skills].std().mean()
+    with profile_section('root_cause.heatmap'):
+        # 工程×スキルカテゴリのヒートマップデータを作成
+        df_heatmap = compute_gap_heatmap(skill_matrix, target_location, processes, skill_categories)
+        # 最優先改善対象の候補（有意なギャップのみの場合はヒートマップに表示されるセルに限る）
+        df_priority_candidates = df_heatmap
+        
+        # ヒートマップデータが空の場合
+        if df_heatmap.empty:
+            st.warning("⚠️ ヒートマップ用のデータが不足しています。別の拠点を選択してください。", icon="⚠️")
+        else:
+            # ヒートマップ表示（クリック可能）
+            st.markdown("### 🔥 工程×スキルカテゴリ ギャップヒートマップ")
+            st.markdown("**クリック可能**: 各セルをクリックすると、下部に詳細な分布が表示されます")
             
-            # ベンチマークのデータ
-            benchmark_process_data = df_benchmark[df_benchmark['工程'] == process]
+            # ピボットテーブル作成
+            pivot_table = df_heatmap.pivot(index='工程', columns='スキルカテゴリ', values='ギャップ')
+            if mask_insignificant:
+                df_significance = cached_gap_significance(skill_matrix)
+                df_significance = df_significance[df_significance['拠点'] == target_location]
+                df_heatmap_significance = attach_significance(df_heatmap, df_significance, ['工程', 'スキルカテゴリ'])
+                significant = df_heatmap_significance.pivot(index='工程', columns='スキルカテゴリ', values='有意')
+                pivot_table = pivot_table.where(significant.astype(bool))
+                df_priority_candidates = df_heatmap_significance[df_heatmap_significance['有意']]
+                st.caption(f"有意なセル: {int(significant.values.sum())} / {significant.size}（非有意のセルは空白）")
             
-            # ベンチマークデータ存在チェック
-            if len(benchmark_process_data) == 0:
-                benchmark_mean = np.nan
-                benchmark_std = np.nan
-            else:
-                benchmark_mean = benchmark_process_data[existing_skills].mean().mean()
-                benchmark_std = benchmark_process_data[existing_skills].std().mean()
+            # ヒートマップ描画
+            fig_heatmap = go.Figure(data=go.Heatmap(
+                z=pivot_table.values,
+                x=pivot_table.columns,
+                y=pivot_table.index,
+                colorscale='RdYlGn_r',  # 赤（大きいギャップ）→黄→緑（小さいギャップ）
+                text=pivot_table.values.round(2),
+                texttemplate='%{text}',
+                textfont={"size": 12},
+                colorbar=dict(title="ギャップ")
+            ))
             
-            gap = benchmark_mean - target_mean if not pd.isna(target_mean) and not pd.isna(benchmark_mean) else 0
+            fig_heatmap.update_layout(
+                title='スキルギャップ（ベンチマーク - 対象拠点）',
+                xaxis_title='スキルカテゴリ',
+                yaxis_title='工程',
+                height=400
+            )
             
-            heatmap_data.append({
-                '工程': process,
-                'スキルカテゴリ': category,
-                '対象拠点_平均': target_mean,
-                '対象拠点_バラツキ': target_std,
-                'ベンチマーク_平均': benchmark_mean,
-                'ベンチマーク_バラツキ': benchmark_std,
-                'ギャップ': gap,
-                '人数': len(target_process_data)
-            })
-    
-    df_heatmap = pd.DataFrame(heatmap_data)
-    
-    # ヒートマップデータが空の場合
-    if df_heatmap.empty:
-        st.warning("⚠️ ヒートマップ用のデータが不足しています。別の拠点を選択してください。", icon="⚠️")
-    else:
-        # ヒートマップ表示（クリック可能）
-        st.markdown("### 🔥 工程×スキルカテゴリ ギャップヒートマップ")
-        st.markdown("**クリック可能**: 各セルをクリックすると、下部に詳細な分布が表示されます")
-        
-        # ピボットテーブル作成
-        pivot_table = df_heatmap.pivot(index='工程', columns='スキルカテゴリ', values='ギャップ')
-        
-        # ヒートマップ描画
-        fig_heatmap = go.Figure(data=go.Heatmap(
-            z=pivot_table.values,
-            x=pivot_table.columns,
-            y=pivot_table.index,
-            colorscale='RdYlGn_r',  # 赤（大きいギャップ）→黄→緑（小さいギャップ）
-            text=pivot_table.values.round(2),
-            texttemplate='%{text}',
-            textfont={"size": 12},
-            colorbar=dict(title="ギャップ")
-        ))
-        
-        fig_heatmap.update_layout(
-            title='スキルギャップ（ベンチマーク - 対象拠点）',
-            xaxis_title='スキルカテゴリ',
-            yaxis_title='工程',
-            height=400
-        )
-        
-        st.plotly_chart(fig_heatmap, use_container_width=True)
+            st.plotly_chart(fig_heatmap, use_container_width=True)
+    
+    # 全拠点比較（拠点×工程×カテゴリのテンソルを1回だけ計算）
+    show_location_comparison(skill_matrix, processes, skill_categories, mask_insignificant)
     
     # インタラクティブな詳細表示
     st.markdown("---")
@@ -169,6 +251,13 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
         (df_heatmap['工程'] == selected_process) & 
         (df_heatmap['スキルカテゴリ'] == selected_category)
     ].iloc[0]
+    # 要改善の判定（有意なギャップのみの場合は有意なセルに限る）
+    needs_improvement = selected_data['ギャップ'] > GAP_ALERT_THRESHOLD
+    if mask_insignificant:
+        needs_improvement = needs_improvement and (
+            (df_priority_candidates['工程'] == selected_process) &
+            (df_priority_candidates['スキルカテゴリ'] == selected_category)
+        ).any()
     
     # サマリー表示
     col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
@@ -191,8 +280,8 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
         st.metric(
             "ギャップ",
             f"{selected_data['ギャップ']:.2f}",
-            delta=f"{'要改善' if selected_data['ギャップ'] > 0.5 else '良好'}",
-            delta_color="inverse" if selected_data['ギャップ'] > 0.5 else "normal"
+            delta=f"{'要改善' if needs_improvement else '良好'}",
+            delta_color="inverse" if needs_improvement else "normal"
         )
     
     with col_sum4:
@@ -205,100 +294,89 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
     # スキルカテゴリ内の個別スキル分布
     st.markdown(f"#### 【{selected_category}】内の個別スキル分布（平均とバラツキ）")
     
-    category_skills = skill_hierarchy[selected_category]['skills']
+    category_skills = [s for s in skill_hierarchy[selected_category]['skills'] if s in skill_matrix.skill_position]
     
-    # 対象拠点とベンチマークのデータを抽出
-    target_process_filtered = df_target[df_target['工程'] == selected_process]
-    benchmark_process_filtered = df_benchmark[df_benchmark['工程'] == selected_process]
+    # 対象拠点とベンチマークの行を抽出
+    target_rows = skill_matrix.rows({'拠点': target_location, '工程': selected_process})
+    benchmark_rows = skill_matrix.rows({'拠点': '日本 (JP)', '工程': selected_process})
     
-    # スキルごとのデータを集める
-    skill_distribution_data = []
-    
-    for skill in category_skills:
-        # 対象拠点
-        for score in target_process_filtered[skill].dropna():
-            skill_distribution_data.append({
-                'スキル': skill,
-                '拠点': target_location,
-                'スコア': score
-            })
-        
-        # ベンチマーク
-        for score in benchmark_process_filtered[skill].dropna():
-            skill_distribution_data.append({
-                'スキル': skill,
-                '拠点': '日本 (ベンチマーク)',
-                'スコア': score
-            })
-    
-    df_dist = pd.DataFrame(skill_distribution_data)
-    
-    if not df_dist.empty:
-        # バイオリンプロット + 平均値マーカー
-        fig_violin = go.Figure()
+    with profile_section('root_cause.violin'):
+        # スキルごとのスコアを集める
+        skill_distribution_data = [
+            pd.DataFrame({'スキル': skill, '拠点': location, 'スコア': skill_matrix.scores(rows, skill)})
+            for skill in category_skills
+            for location, rows in ((target_location, target_rows), ('日本 (ベンチマーク)', benchmark_rows))
+        ]
         
-        colors = {target_location: '#ff7f0e', '日本 (ベンチマーク)': '#2ca02c'}
+        df_dist = pd.concat(skill_distribution_data, ignore_index=True) if skill_distribution_data else pd.DataFrame()
         
-        for location in [target_location, '日本 (ベンチマーク)']:
-            df_loc = df_dist[df_dist['拠点'] == location]
+        if not df_dist.empty:
+            # バイオリンプロット + 平均値マーカー
+            fig_violin = go.Figure()
             
-            for skill in category_skills:
-                df_skill_loc = df_loc[df_loc['スキル'] == skill]
+            colors = {target_location: '#ff7f0e', '日本 (ベンチマーク)': '#2ca02c'}
+            
+            for location in [target_location, '日本 (ベンチマーク)']:
+                df_loc = df_dist[df_dist['拠点'] == location]
                 
-                if not df_skill_loc.empty:
-                    # バイオリンプロット
-                    fig_violin.add_trace(go.Violin(
-                        x=df_skill_loc['スキル'],
-                        y=df_skill_loc['スコア'],
-                        name=location,
-                        legendgroup=location,
-                        scalegroup=skill,
-                        side='positive' if location == target_location else 'negative',
-                        line_color=colors[location],
-                        showlegend=(skill == category_skills[0]),  # 最初のスキルだけ凡例表示
-                        meanline_visible=True,
-                        points=False
-                    ))
-        
-        fig_violin.update_layout(
-            title=f'{selected_process} - {selected_category}: スキル別分布（バイオリンプロット）',
-            xaxis_title='スキル',
-            yaxis_title='スコア',
-            yaxis=dict(range=[0.5, 5.5], dtick=1),
-            height=450,
-            violinmode='overlay',
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
+                for skill in category_skills:
+                    df_skill_loc = df_loc[df_loc['スキル'] == skill]
+                    
+                    if not df_skill_loc.empty:
+                        # バイオリンプロット
+                        fig_violin.add_trace(go.Violin(
+                            x=df_skill_loc['スキル'],
+                            y=df_skill_loc['スコア'],
+                            name=location,
+                            legendgroup=location,
+                            scalegroup=skill,
+                            side='positive' if location == target_location else 'negative',
+                            line_color=colors[location],
+                            showlegend=(skill == category_skills[0]),  # 最初のスキルだけ凡例表示
+                            meanline_visible=True,
+                            points=False
+                        ))
+            
+            fig_violin.update_layout(
+                title=f'{selected_process} - {selected_category}: スキル別分布（バイオリンプロット）',
+                xaxis_title='スキル',
+                yaxis_title='スコア',
+                yaxis=dict(range=[0.5, 5.5], dtick=1),
+                height=450,
+                violinmode='overlay',
+                legend=dict(
+                    orientation="h",
+                    yanchor="bottom",
+                    y=1.02,
+                    xanchor="right",
+                    x=1
+                )
             )
-        )
-        
-        st.plotly_chart(fig_violin, use_container_width=True)
-        
-        # 統計サマリー
-        st.markdown("##### 📊 スキル別統計")
-        
-        summary_data = []
-        for skill in category_skills:
-            target_skill_data = df_dist[(df_dist['スキル'] == skill) & (df_dist['拠点'] == target_location)]['スコア']
-            bench_skill_data = df_dist[(df_dist['スキル'] == skill) & (df_dist['拠点'] == '日本 (ベンチマーク)')]['スコア']
             
-            summary_data.append({
-                'スキル': skill,
-                f'{target_location} 平均': f"{target_skill_data.mean():.2f}",
-                f'{target_location} 標準偏差': f"{target_skill_data.std():.2f}",
-                'ベンチマーク 平均': f"{bench_skill_data.mean():.2f}",
-                'ベンチマーク 標準偏差': f"{bench_skill_data.std():.2f}",
-                'ギャップ': f"{bench_skill_data.mean() - target_skill_data.mean():.2f}"
-            })
-        
-        df_summary = pd.DataFrame(summary_data)
-        st.dataframe(df_summary, use_container_width=True, hide_index=True)
-    else:
-        st.warning("分布データが不足しています")
+            st.plotly_chart(fig_violin, use_container_width=True)
+            
+            # 統計サマリー
+            st.markdown("##### 📊 スキル別統計")
+            
+            target_mean, target_std, _ = skill_matrix.skill_stats(target_rows)
+            bench_mean, bench_std, _ = skill_matrix.skill_stats(benchmark_rows)
+            
+            summary_data = []
+            for skill in category_skills:
+                j = skill_matrix.skill_position[skill]
+                summary_data.append({
+                    'スキル': skill,
+                    f'{target_location} 平均': f"{target_mean[j]:.2f}",
+                    f'{target_location} 標準偏差': f"{target_std[j]:.2f}",
+                    'ベンチマーク 平均': f"{bench_mean[j]:.2f}",
+                    'ベンチマーク 標準偏差': f"{bench_std[j]:.2f}",
+                    'ギャップ': f"{bench_mean[j] - target_mean[j]:.2f}"
+                })
+            
+            df_summary = pd.DataFrame(summary_data)
+            st.dataframe(df_summary, use_container_width=True, hide_index=True)
+        else:
+            st.warning("分布データが不足しています")
     
     # 分布の詳細（ヒストグラム）
     st.markdown(f"#### 分布の詳細: {selected_process} - {selected_category}")
@@ -309,11 +387,11 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
         st.markdown(f"**{target_location} の分布**")
         
         # カテゴリ内の全スキルのスコアを集計
-        target_category_scores = []
-        for skill in category_skills:
-            target_category_scores.extend(target_process_filtered[skill].dropna().tolist())
+        target_category_scores = np.concatenate(
+            [skill_matrix.scores(target_rows, skill) for skill in category_skills] or [np.empty(0, dtype=np.int8)]
+        )
         
-        if target_category_scores:
+        if len(target_category_scores) > 0:
             fig_target_hist = px.histogram(
                 x=target_category_scores,
                 nbins=5,
@@ -325,7 +403,7 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
             fig_target_hist.update_xaxes(range=[0.5, 5.5], dtick=1)
             st.plotly_chart(fig_target_hist, use_container_width=True)
             
-            low_skill_count = sum(1 for s in target_category_scores if s <= 2)
+            low_skill_count = int((target_category_scores <= 2).sum())
             st.error(
                 f"⚠️ **レベル2以下**: {low_skill_count}件 ({low_skill_count/len(target_category_scores)*100:.1f}%)",
                 icon="🚨"
@@ -337,11 +415,11 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
         st.markdown("**日本 (ベンチマーク) の分布**")
         
         # カテゴリ内の全スキルのスコアを集計
-        benchmark_category_scores = []
-        for skill in category_skills:
-            benchmark_category_scores.extend(benchmark_process_filtered[skill].dropna().tolist())
+        benchmark_category_scores = np.concatenate(
+            [skill_matrix.scores(benchmark_rows, skill) for skill in category_skills] or [np.empty(0, dtype=np.int8)]
+        )
         
-        if benchmark_category_scores:
+        if len(benchmark_category_scores) > 0:
             fig_bench_hist = px.histogram(
                 x=benchmark_category_scores,
                 nbins=5,
@@ -353,7 +431,7 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
             fig_bench_hist.update_xaxes(range=[0.5, 5.5], dtick=1)
             st.plotly_chart(fig_bench_hist, use_container_width=True)
             
-            bench_low_count = sum(1 for s in benchmark_category_scores if s <= 2)
+            bench_low_count = int((benchmark_category_scores <= 2).sum())
             st.success(
                 f"✅ **レベル2以下**: {bench_low_count}件 ({bench_low_count/len(benchmark_category_scores)*100:.1f}%)",
                 icon="✨"
@@ -371,69 +449,52 @@ def show_root_cause_analysis(df_skill, target_location, all_skills, skill_to_cat
     </div>
     """, unsafe_allow_html=True)
     
-    # 最もギャップが大きい工程×スキルカテゴリを特定
-    top_gap_row = df_heatmap.sort_values('ギャップ', ascending=False).iloc[0]
+    # 最もギャップが大きい工程×スキルカテゴリを特定（有意なセルがなければフィルタなしで選ぶ）
+    priority_filtered = mask_insignificant and not df_priority_candidates.empty
+    df_priority = df_priority_candidates if priority_filtered else df_heatmap
+    top_gap_row = df_priority.sort_values('ギャップ', ascending=False).iloc[0]
     priority_process = top_gap_row['工程']
     priority_category = top_gap_row['スキルカテゴリ']
     
+    priority_note = ""
+    if mask_insignificant and not priority_filtered:
+        priority_note = "\n\n※ 有意なギャップがないため、有意性のフィルタを適用せずに選んでいます"
     st.info(
         f"💡 **最優先改善対象**: {priority_process} - {priority_category}\n\n"
-        f"ギャップ: {top_gap_row['ギャップ']:.2f} / 対象人数: {int(top_gap_row['人数'])}名",
+        f"ギャップ: {top_gap_row['ギャップ']:.2f} / 対象人数: {int(top_gap_row['人数'])}名{priority_note}",
         icon="🎯"
     )
     
-    # シフト別のボトルネック分析
-    bottleneck_analysis = []
-    
-    for process in processes:
-        for shift in ['日勤', '夜勤']:
-            process_shift_data = df_target[(df_target['工程'] == process) & (df_target['シフト'] == shift)]
-            
-            # データ存在チェック
-            if len(process_shift_data) == 0:
-                continue
-            
-            if len(process_shift_data) > 0:
-                for category in skill_categories:
-                    category_skills = skill_hierarchy[category]['skills']
-                    avg_score = process_shift_data[category_skills].mean().mean()
-                    std_score = process_shift_data[category_skills].std().mean()
-                    
-                    # リスクスコア計算
-                    risk_score = (5 - avg_score) * 0.5 + std_score * 0.5
-                    
-                    bottleneck_analysis.append({
-                        '工程': process,
-                        'シフト': shift,
-                        'スキルカテゴリ': category,
-                        '平均スコア': avg_score,
-                        'バラツキ': std_score,
-                        '人数': len(process_shift_data),
-                        'リスクスコア': risk_score
-                    })
-    
-    df_bottleneck = pd.DataFrame(bottleneck_analysis)
-    df_bottleneck = df_bottleneck.sort_values('リスクスコア', ascending=False).head(10)
-    
-    def get_priority_label(score):
-        if score > df_bottleneck['リスクスコア'].quantile(0.7):
-            return '🔴 即時対応'
-        else:
-            return '🟡 計画対応'
-    
-    df_bottleneck['対策優先度'] = df_bottleneck['リスクスコア'].apply(get_priority_label)
-    
-    # フォーマット
-    df_bottleneck_display = df_bottleneck.copy()
-    df_bottleneck_display['平均スコア'] = df_bottleneck_display['平均スコア'].apply(lambda x: f"{x:.2f}")
-    df_bottleneck_display['バラツキ'] = df_bottleneck_display['バラツキ'].apply(lambda x: f"{x:.2f}")
-    df_bottleneck_display['リスクスコア'] = df_bottleneck_display['リスクスコア'].apply(lambda x: f"{x:.2f}")
-    
-    st.dataframe(
-        df_bottleneck_display[['対策優先度', '工程', 'シフト', 'スキルカテゴリ', '平均スコア', 'バラツキ', '人数', 'リスクスコア']],
-        use_container_width=True,
-        hide_index=True
-    )
+    with profile_section('root_cause.bottleneck_table'):
+        # シフト別のボトルネック分析
+        df_bottleneck_significance = None
+        if mask_insignificant and skill_matrix.has_column('シフト'):
+            df_bottleneck_significance = cached_gap_significance(
+                skill_matrix, BENCHMARK_LOCATION, ('拠点', '工程', 'シフト')
+            )
+        df_bottleneck = compute_bottleneck_table(
+            skill_matrix, target_location, processes, skill_categories,
+            df_significance=df_bottleneck_significance, significant_only=mask_insignificant
+        )
+        if df_bottleneck.empty:
+            if not skill_matrix.has_column('シフト'):
+                st.info("スキルデータにシフト情報がないため、シフト別のボトルネック分析は表示できません")
+            elif mask_insignificant:
+                st.info("有意なギャップのある工程×シフト×スキルカテゴリがありません（「有意なギャップのみ表示」を外すと全件を表示します）")
+            else:
+                st.info("対象拠点のスキルデータがないため、シフト別のボトルネック分析は表示できません")
+        
+        # フォーマット
+        df_bottleneck_display = df_bottleneck.copy()
+        df_bottleneck_display['平均スコア'] = df_bottleneck_display['平均スコア'].apply(lambda x: f"{x:.2f}")
+        df_bottleneck_display['バラツキ'] = df_bottleneck_display['バラツキ'].apply(lambda x: f"{x:.2f}")
+        df_bottleneck_display['リスクスコア'] = df_bottleneck_display['リスクスコア'].apply(lambda x: f"{x:.2f}")
+        
+        st.dataframe(
+            df_bottleneck_display[['対策優先度', '工程', 'シフト', 'スキルカテゴリ', '平均スコア', 'バラツキ', '人数', 'リスクスコア']],
+            use_container_width=True,
+            hide_index=True
+        )
     
     # 最優先対応
     if not df_bottleneck.empty:
@@ -1,5 +1,7 @@
 import streamlit as st
+from utils.profiling import profiled
 
+@profiled()
 def show_welcome_screen():
     """初期表示のウェルカム画面"""
     